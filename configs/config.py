@@ -44,6 +44,13 @@ class Config(QConfig):
     # Material
     blurRadius = RangeConfigItem("Material", "AcrylicBlurRadius", 15, RangeValidator(0, 40))
     
+    # DataCache
+    dataCacheEnabled = ConfigItem("DataCache", "Enabled", False, BoolValidator())
+    dataCacheMaxSize = RangeConfigItem("DataCache", "MaxSizeGB", 5, RangeValidator(1, 100))
+    
+    # Workflow
+    workflowMemoryBudget = RangeConfigItem("Workflow", "MemoryBudgetMB", 2048, RangeValidator(256, 65536))
+    
     # Version
     currentVersion = ConfigItem("Version", "CurrentVersion", "1.0.1", None)
     latestVersion = ConfigItem("Version", "LatestVersion", "1.0.1", None)
@@ -1,6 +1,7 @@
 # coding:utf-8
 import sys
 import os
+import multiprocessing
 
 # 版本号定义
 VERSION = "1.0.2"
@@ -657,6 +658,8 @@ class Window(FluentWindow):
 
 
 if __name__ == '__main__':
+    # 打包为exe后，进程池的子进程会重新运行入口，需要先交给multiprocessing处理
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     w = Window()
     # w.show()  # 已在 initWindow 中调用，无需重复
@@ -12,6 +12,7 @@ from qfluentwidgets import (PrimaryPushButton, TransparentPushButton, ComboBox,
                            LineEdit, ProgressBar, StateToolTip)
 from qfluentwidgets import FluentIcon
 import geopandas as gpd
+from functions.图层目录 import 字段名称
 
 
 class DataOverlayWidget(QWidget):
@@ -112,11 +113,8 @@ class DataOverlayWidget(QWidget):
         )
         if file_path:
             try:
-                # 读取字段
-                gdf = gpd.read_file(file_path)
-                fields = gdf.columns.tolist()
-                if 'geometry' in fields:
-                    fields.remove('geometry')
+                # 只读取图层结构获取字段
+                fields = 字段名称(file_path)
                 
                 if index == 1:
                     self.vectorPath1 = file_path
@@ -280,10 +278,8 @@ class FieldSplitWidget(QWidget):
         )
         if file_path:
             try:
-                gdf = gpd.read_file(file_path)
-                fields = gdf.columns.tolist()
-                if 'geometry' in fields:
-                    fields.remove('geometry')
+                # 只读取图层结构获取字段
+                fields = 字段名称(file_path)
                 
                 self.vectorPath = file_path
                 self.pathLabel.setText(f"文件: {file_path}")
@@ -9,6 +9,7 @@ from qfluentwidgets import LineEdit, PrimaryPushButton, TransparentPushButton, C
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
 import geopandas as gpd
+from .图层目录 import 字段名称
 
 
 class AreaAdjustThread(QThread):
@@ -24,7 +25,7 @@ class AreaAdjustThread(QThread):
             file_path: 矢量文件路径
             field1: 第一个字段名
             field2: 第二个字段名
-            area_value: 指定的面积值
+            area_value: 允许误差（平方米）
         """
         super().__init__(parent)
         self.file_path = file_path
@@ -50,7 +51,7 @@ class AreaAdjustThread(QThread):
                 self.progress.emit(int(progress))
             
             # 调用处理函数
-            根据指定面积缓冲调整要素(
+            report = 根据指定面积缓冲调整要素(
                 self.file_path,
                 self.field1,
                 self.field2,
@@ -58,7 +59,17 @@ class AreaAdjustThread(QThread):
                 update_progress
             )
             
-            self.success.emit("面积调整完成！")
+            message = (
+                f"面积调整完成！\n"
+                f"输出文件: {report['output_path']}\n"
+                f"调整要素: {report['adjusted']} 个，最大迭代次数: {report['max_iterations']}，"
+                f"最大面积残差: {report['max_residual']:.4f} 平方米"
+            )
+            if report['unconverged']:
+                message += f"\n未收敛要素: {', '.join(report['unconverged'])}"
+            if report['larger_than_original']:
+                message += f"\n指定面积大于原面积未调整: {', '.join(report['larger_than_original'])}"
+            self.success.emit(message)
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -149,26 +160,8 @@ class AreaAdjustFunction(BaseFunction):
         if file_path:
             self.FilePathLabel.setText(file_path)
             try:
-                # 尝试读取矢量文件并获取字段列表
-                try:
-                    gdf = gpd.read_file(file_path)
-                except Exception as shx_error:
-                    # 检查是否为缺少.shx文件的错误
-                    if "SHAPE_RESTORE_SHX" in str(shx_error):
-                        # 设置环境变量以恢复或创建.shx文件
-                        import os
-                        os.environ['SHAPE_RESTORE_SHX'] = 'YES'
-                        # 重新尝试读取文件
-                        gdf = gpd.read_file(file_path)
-                    else:
-                        # 其他错误，重新抛出
-                        raise
-                    
-                fields = gdf.columns.tolist()
-                
-                # 移除几何字段
-                if 'geometry' in fields:
-                    fields.remove('geometry')
+                # 只读取图层结构获取字段列表，缺少.shx文件时自动恢复
+                fields = 字段名称(file_path)
                     
                 # 更新两个下拉框
                 self.AddShpVectorFieldDisplay.clear()
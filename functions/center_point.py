@@ -17,6 +17,7 @@ from qfluentwidgets import ComboBox, PrimaryPushButton, TextEdit, TransparentPus
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
 import geopandas as gpd
+from .图层目录 import 字段名称
 
 
 class CenterPointThread(QThread):
@@ -112,24 +113,8 @@ class CenterPointFunction(BaseFunction):
         if file_path:
             self.FilePathLabel.setText(file_path)
             try:
-                # 尝试读取矢量文件并获取字段列表
-                try:
-                    gdf = gpd.read_file(file_path)
-                except Exception as shx_error:
-                    # 检查是否为缺少.shx文件的错误
-                    if "SHAPE_RESTORE_SHX" in str(shx_error):
-                        # 设置环境变量以恢复或创建.shx文件
-                        os.environ['SHAPE_RESTORE_SHX'] = 'YES'
-                        # 重新尝试读取文件
-                        gdf = gpd.read_file(file_path)
-                    else:
-                        # 其他错误，重新抛出
-                        raise
-                
-                # 获取字段列表
-                fields = gdf.columns.tolist()
-                if 'geometry' in fields:
-                    fields.remove('geometry')
+                # 只读取图层结构获取字段列表，缺少.shx文件时自动恢复
+                fields = 字段名称(file_path)
                 
                 # 更新字段下拉框
                 self.AddShpVectorFieldDisplay.clear()
@@ -9,9 +9,11 @@ from PyQt6.QtCore import Qt
 from qfluentwidgets import LineEdit, PushButton, ComboBox
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录
 import threading
 import os
 import geopandas as gpd
+from .矢量读写 import 读取矢量, 写出矢量, 读取计划
 from shapely.ops import unary_union, split
 from shapely.geometry import LineString, MultiLineString, Point, Polygon, box
 import concurrent.futures
@@ -424,9 +426,7 @@ class ChangeMapToolFunction(BaseFunction):
         if file_path.lower().endswith('.gdb'):
             # 列出GDB中的所有图层
             try:
-                import fiona
-                with fiona.Env():
-                    layers = fiona.listlayers(file_path)
+                layers = 获取图层目录().图层名称(file_path)
                 combo.addItems(layers)
                 combo.setEnabled(True)
                 widget.setVisible(True)  # 选择GDB后显示图层选择器
@@ -590,17 +590,15 @@ class ChangeMapToolFunction(BaseFunction):
                 output_path = os.path.join(output_dir, "clipped_features.shp")
                 
                 self.update_progress_signal.emit(5, f"读取上图图斑: {feature_a_path}")
-                if feature_a_path.lower().endswith('.gdb') and feature_a_layer:
-                    feature_a = gpd.read_file(feature_a_path, layer=feature_a_layer)
-                else:
-                    feature_a = gpd.read_file(feature_a_path, driver='ESRI Shapefile')
+                feature_a = 读取矢量(feature_a_path, layer=feature_a_layer)
                 self.update_progress_signal.emit(10, f"上图图斑包含 {len(feature_a)} 个要素")
                 
+                # 只读取上图图斑外扩范围内的底图要素，范围内没有要素时再读取全部
                 self.update_progress_signal.emit(15, f"读取数据库底图: {feature_b_path}")
-                if feature_b_path.lower().endswith('.gdb') and feature_b_layer:
-                    feature_b = gpd.read_file(feature_b_path, layer=feature_b_layer)
-                else:
-                    feature_b = gpd.read_file(feature_b_path, driver='ESRI Shapefile')
+                feature_b = 读取矢量(feature_b_path, layer=feature_b_layer,
+                                 计划=读取计划.参考范围(feature_a, buffer_distance * 2))
+                if len(feature_b) == 0:
+                    feature_b = 读取矢量(feature_b_path, layer=feature_b_layer)
                 self.update_progress_signal.emit(20, f"数据库底图包含 {len(feature_b)} 个要素")
             else:
                 # 批量执行：使用传入的GeoDataFrame
@@ -855,14 +853,14 @@ class ChangeMapToolFunction(BaseFunction):
                         if hasattr(lines_a, 'crs') and lines_a.crs is not None:
                             clipped_inverse.crs = lines_a.crs
                     # 不再向to_file方法传递crs参数，pyogrio引擎会自动使用GeoDataFrame的crs属性
-                    clipped_inverse.to_file(output_path, driver='ESRI Shapefile', index=False)
+                    写出矢量(clipped_inverse, output_path, index=False)
                     return f"步骤1执行完成！\n生成文件: {output_path}"
                 else:
                     # 保存到GDB
                     layer_prefix = self.output_gdb_layer_prefix.text()
                     layer_name = f"{layer_prefix}_clipped_features"
                     self.update_progress_signal.emit(95, f"保存结果到GDB图层: {layer_name}")
-                    clipped_inverse.to_file(output_dir, layer=layer_name, driver='OpenFileGDB', index=False)
+                    写出矢量(clipped_inverse, output_dir, layer=layer_name, index=False)
                     return f"步骤1执行完成！\n生成GDB图层: {layer_name}"
         except Exception as e:
             import traceback
@@ -1039,13 +1037,13 @@ class ChangeMapToolFunction(BaseFunction):
                 output_path = os.path.join(output_dir, "extended_features.shp")
                 
                 self.update_progress_signal.emit(progress_offset + 10, f"读取裁剪后的线要素: {clipped_features_path}")
-                clipped_gdf = gpd.read_file(clipped_features_path, driver='ESRI Shapefile')
+                clipped_gdf = 读取矢量(clipped_features_path)
                 
                 self.update_progress_signal.emit(progress_offset + 20, f"读取数据库底图: {feature_b_path}")
-                if feature_b_path.lower().endswith('.gdb') and feature_b_layer:
-                    feature_b = gpd.read_file(feature_b_path, layer=feature_b_layer)
-                else:
-                    feature_b = gpd.read_file(feature_b_path, driver='ESRI Shapefile')
+                feature_b = 读取矢量(feature_b_path, layer=feature_b_layer,
+                                 计划=读取计划.参考范围(clipped_gdf, extend_distance * 2))
+                if len(feature_b) == 0:
+                    feature_b = 读取矢量(feature_b_path, layer=feature_b_layer)
             else:
                 # 批量执行：使用传入的GeoDataFrame
                 self.update_progress_signal.emit(progress_offset + 5, "使用内存中的裁剪后线要素数据...")
@@ -1125,14 +1123,14 @@ class ChangeMapToolFunction(BaseFunction):
                         if hasattr(clipped_gdf, 'crs') and clipped_gdf.crs is not None:
                             extended_gdf.crs = clipped_gdf.crs
                     # 不再向to_file方法传递crs参数，pyogrio引擎会自动使用GeoDataFrame的crs属性
-                    extended_gdf.to_file(output_path, driver='ESRI Shapefile', index=False)
+                    写出矢量(extended_gdf, output_path, index=False)
                     return f"步骤2执行完成！\n生成文件: {output_path}"
                 else:
                     # 保存到GDB
                     layer_prefix = self.output_gdb_layer_prefix.text()
                     layer_name = f"{layer_prefix}_extended_features"
                     self.update_progress_signal.emit(progress_offset + 80, f"保存结果到GDB图层: {layer_name}")
-                    extended_gdf.to_file(output_dir, layer=layer_name, driver='OpenFileGDB', index=False)
+                    写出矢量(extended_gdf, output_dir, layer=layer_name, index=False)
                     return f"步骤2执行完成！\n生成GDB图层: {layer_name}"
         except Exception as e:
             import traceback
@@ -1186,31 +1184,26 @@ class ChangeMapToolFunction(BaseFunction):
             
             # 读取上图图斑
             self.update_progress_signal.emit(10, f"读取上图图斑: {feature_a_path}")
-            if feature_a_path.lower().endswith('.gdb') and feature_a_layer:
-                feature_a = gpd.read_file(feature_a_path, layer=feature_a_layer)
-            else:
-                feature_a = gpd.read_file(feature_a_path, driver='ESRI Shapefile')
+            feature_a = 读取矢量(feature_a_path, layer=feature_a_layer)
             self.update_progress_signal.emit(20, f"上图图斑包含 {len(feature_a)} 个要素")
             
-            # 读取数据库底图
-            self.update_progress_signal.emit(30, f"读取数据库底图: {feature_b_path}")
-            if feature_b_path.lower().endswith('.gdb') and feature_b_layer:
-                feature_b = gpd.read_file(feature_b_path, layer=feature_b_layer)
-            else:
-                feature_b = gpd.read_file(feature_b_path, driver='ESRI Shapefile')
-            self.update_progress_signal.emit(40, f"数据库底图包含 {len(feature_b)} 个要素")
-            
             # 获取用户设置的裁剪阈值
             buffer_threshold = float(self.crop_threshold_lineedit.text())
             
             # 合并所有上图图斑，得到合并后的范围
-            self.update_progress_signal.emit(50, "合并所有上图图斑...")
+            self.update_progress_signal.emit(30, "合并所有上图图斑...")
             merged_feature_a = unary_union(feature_a.geometry)
             
             # 对合并后的范围外扩指定阈值
-            self.update_progress_signal.emit(60, f"对合并后的上图图斑范围外扩阈值{buffer_threshold}...")
+            self.update_progress_signal.emit(35, f"对合并后的上图图斑范围外扩阈值{buffer_threshold}...")
             buffered_feature_a = merged_feature_a.buffer(buffer_threshold)
             
+            # 读取数据库底图，只读取与外扩范围相交的要素
+            self.update_progress_signal.emit(40, f"读取数据库底图: {feature_b_path}")
+            feature_b = 读取矢量(feature_b_path, layer=feature_b_layer,
+                             计划=读取计划(mask=buffered_feature_a, crs=feature_a.crs))
+            self.update_progress_signal.emit(60, f"外扩范围内数据库底图包含 {len(feature_b)} 个要素")
+            
             # 使用外扩后的范围裁剪数据库底图
             self.update_progress_signal.emit(70, "使用外扩后的图斑范围裁剪数据库底图...")
             # 先使用边界框快速筛选，提高性能
@@ -1232,7 +1225,7 @@ class ChangeMapToolFunction(BaseFunction):
             if feature_b_path.lower().endswith('.gdb') and feature_b_layer:
                 # 保存到GDB新图层，添加_clipped后缀
                 new_layer_name = f"{feature_b_layer}_clipped"
-                feature_b_clipped.to_file(feature_b_path, layer=new_layer_name, driver='OpenFileGDB', index=False)
+                写出矢量(feature_b_clipped, feature_b_path, layer=new_layer_name, index=False)
                 result_msg = f"数据库底图处理完成！\n已创建新GDB图层: {new_layer_name}"
             else:
                 # 保存到新SHP文件，添加_clipped后缀
@@ -1247,7 +1240,7 @@ class ChangeMapToolFunction(BaseFunction):
                     if hasattr(feature_b, 'crs') and feature_b.crs is not None:
                         feature_b_clipped.crs = feature_b.crs
                 # 不再向to_file方法传递crs参数，pyogrio引擎会自动使用GeoDataFrame的crs属性
-                feature_b_clipped.to_file(new_file_path, driver='ESRI Shapefile', index=False)
+                写出矢量(feature_b_clipped, new_file_path, index=False)
                 result_msg = f"数据库底图处理完成！\n已创建新文件: {new_file_path}"
             
             self.update_progress_signal.emit(100, "处理完成！")
@@ -1428,13 +1421,10 @@ class ChangeMapToolFunction(BaseFunction):
                 output_path = os.path.join(output_dir, "split_features_b.shp")
                 
                 self.update_progress_signal.emit(progress_offset + 20, f"读取数据库底图: {feature_b_path}")
-                if feature_b_path.lower().endswith('.gdb') and feature_b_layer:
-                    feature_b = gpd.read_file(feature_b_path, layer=feature_b_layer)
-                else:
-                    feature_b = gpd.read_file(feature_b_path, driver='ESRI Shapefile')
+                feature_b = 读取矢量(feature_b_path, layer=feature_b_layer)
                 
                 self.update_progress_signal.emit(progress_offset + 40, f"读取延长后的线要素: {extended_features_path}")
-                extended_gdf = gpd.read_file(extended_features_path, driver='ESRI Shapefile')
+                extended_gdf = 读取矢量(extended_features_path)
             else:
                 # 批量执行：使用传入的GeoDataFrame
                 output_path = os.path.join(output_dir, "split_features_b.shp")
@@ -1492,7 +1482,7 @@ class ChangeMapToolFunction(BaseFunction):
                     if hasattr(feature_b, 'crs') and feature_b.crs is not None:
                         split_result.crs = feature_b.crs
                 # 不再向to_file方法传递crs参数，pyogrio引擎会自动使用GeoDataFrame的crs属性
-                split_result.to_file(output_path, driver='ESRI Shapefile', index=False)
+                写出矢量(split_result, output_path, index=False)
                 return f"步骤3执行完成！\n生成文件: {output_path}"
             else:
                 # 保存到GDB
@@ -1527,7 +1517,7 @@ class ChangeMapToolFunction(BaseFunction):
                             schema['properties'][col] = 'str'
                     
                     # 使用fiona显式schema保存
-                    split_result.to_file(
+                    写出矢量(split_result,
                         output_dir, 
                         layer=layer_name, 
                         driver='OpenFileGDB', 
@@ -1603,16 +1593,10 @@ class ChangeMapToolFunction(BaseFunction):
                     
                     self.update_progress_signal.emit(2, f"准备执行完整工作流...")
                     self.update_progress_signal.emit(5, f"读取上图图斑: {feature_a_path}")
-                    if feature_a_path.lower().endswith('.gdb') and feature_a_layer:
-                        feature_a = gpd.read_file(feature_a_path, layer=feature_a_layer)
-                    else:
-                        feature_a = gpd.read_file(feature_a_path, driver='ESRI Shapefile')
+                    feature_a = 读取矢量(feature_a_path, layer=feature_a_layer)
                     
                     self.update_progress_signal.emit(10, f"读取数据库底图: {feature_b_path}")
-                    if feature_b_path.lower().endswith('.gdb') and feature_b_layer:
-                        feature_b = gpd.read_file(feature_b_path, layer=feature_b_layer)
-                    else:
-                        feature_b = gpd.read_file(feature_b_path, driver='ESRI Shapefile')
+                    feature_b = 读取矢量(feature_b_path, layer=feature_b_layer)
                     
                     self.update_progress_signal.emit(15, "开始执行步骤1：要素转换与裁剪...")
                     # 2. 执行步骤1：要素转换与裁剪（返回GeoDataFrame）
@@ -1723,17 +1707,11 @@ class ChangeMapToolFunction(BaseFunction):
                 
                 # 读取数据库底图（只需要读取一次）
                 self.update_progress_signal.emit(10, f"读取数据库底图: {feature_b_path}")
-                if feature_b_path.lower().endswith('.gdb') and feature_b_layer:
-                    feature_b = gpd.read_file(feature_b_path, layer=feature_b_layer)
-                else:
-                    feature_b = gpd.read_file(feature_b_path, driver='ESRI Shapefile')
+                feature_b = 读取矢量(feature_b_path, layer=feature_b_layer)
                 
                 # 读取上图图斑
                 self.update_progress_signal.emit(20, f"读取上图图斑: {feature_a_path}")
-                if feature_a_path.lower().endswith('.gdb') and feature_a_layer:
-                    feature_a = gpd.read_file(feature_a_path, layer=feature_a_layer)
-                else:
-                    feature_a = gpd.read_file(feature_a_path, driver='ESRI Shapefile')
+                feature_a = 读取矢量(feature_a_path, layer=feature_a_layer)
                 
                 total_features = len(feature_a)
                 self.update_progress_signal.emit(30, f"开始处理 {total_features} 个图斑要素...")
@@ -1799,7 +1777,7 @@ class ChangeMapToolFunction(BaseFunction):
                                     if hasattr(feature_b, 'crs') and feature_b.crs is not None:
                                         split_result.crs = feature_b.crs
                                 # 不再向to_file方法传递crs参数，pyogrio引擎会自动使用GeoDataFrame的crs属性
-                                split_result.to_file(output_path, driver='ESRI Shapefile', index=False)
+                                写出矢量(split_result, output_path, index=False)
                                 result_msg = f"处理结果已保存到: {output_path}"
                             else:
                                 # 保存为单个GDB图层
@@ -1808,7 +1786,7 @@ class ChangeMapToolFunction(BaseFunction):
                                 
                                 try:
                                     # 尝试直接保存
-                                    split_result.to_file(output_dir, layer=layer_name, driver='OpenFileGDB', index=False)
+                                    写出矢量(split_result, output_dir, layer=layer_name, index=False)
                                     result_msg = f"处理结果已保存到GDB图层: {layer_name}"
                                 except Exception as e:
                                     # 如果保存失败，尝试使用fiona显式schema保存
@@ -1838,7 +1816,7 @@ class ChangeMapToolFunction(BaseFunction):
                                                 schema['properties'][col] = 'str'
                                         
                                         # 使用fiona显式schema保存
-                                        split_result.to_file(
+                                        写出矢量(split_result,
                                             output_dir, 
                                             layer=layer_name, 
                                             driver='OpenFileGDB', 
@@ -69,7 +69,7 @@ class CoordsToShpFunction(BaseFunction):
             "📢 <span style='color: orange; font-weight: bold;'>功能说明：</span>"
             "<br>1. 输入坐标串，支持多行格式，每行一个坐标点 (X,Y或X,Y,Z)"
             "<br>2. 支持多部件坐标串，使用|分隔不同部件"
-            "<br>3. 设置投影带号，3度分带(≤39)或6度分带(>39)"
+            "<br>3. 设置投影带号，3度分带(≤39)或6度分带(>39)，设为0时根据坐标自动检测"
             "<br>4. 坐标点必须首尾闭合，形成完整多边形"
             "<br>5. 支持多种分隔符：逗号、冒号等"
         )
@@ -119,9 +119,10 @@ class CoordsToShpFunction(BaseFunction):
         paramsRow.addWidget(zoneLabel)
         
         self.zoneSpin = SpinBox(self)
-        self.zoneSpin.setRange(1, 60)
+        self.zoneSpin.setRange(0, 60)
         self.zoneSpin.setValue(35)  # 默认35度带
         self.zoneSpin.setSuffix(" 度带")
+        self.zoneSpin.setSpecialValueText("自动检测")  # 0表示根据坐标自动检测带号
         paramsRow.addWidget(self.zoneSpin)
         
         paramsRow.addStretch(1)
@@ -9,6 +9,8 @@ from qfluentwidgets import LineEdit, ComboBox, PushButton
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
 import geopandas as gpd
+from .矢量读写 import 读取矢量, 写出矢量
+from .图层目录 import 字段名称
 import os
 import sys
 
@@ -38,13 +40,14 @@ class DataOverlayThread(QThread):
         try:
             # 实现数据套合占比功能
             import geopandas as gpd
+            from .矢量读写 import 读取矢量, 写出矢量
             import pandas as pd
             import os
             from datetime import datetime
             
             # 读取矢量数据
-            gdf1 = gpd.read_file(self.path1)
-            gdf2 = gpd.read_file(self.path2)
+            gdf1 = 读取矢量(self.path1)
+            gdf2 = 读取矢量(self.path2)
             
             # 确保坐标系一致
             if gdf1.crs != gdf2.crs:
@@ -112,7 +115,7 @@ class DataOverlayThread(QThread):
             output_path = os.path.join(os.path.dirname(self.path1), f'叠加分析结果_{os.path.basename(self.path1)}')
             if not output_path.endswith('.shp'):
                 output_path += '.shp'
-            merged.to_file(output_path, encoding='utf-8')
+            写出矢量(merged, output_path, encoding='utf-8')
             
             # 生成TXT文件
             txt_path = output_path[:-4] + '.txt'
@@ -231,8 +234,8 @@ class DataOverlayFunction(BaseFunction):
     def _loadFields(self, file_path, combo_box):
         """加载字段列表"""
         try:
-            gdf = gpd.read_file(file_path)
-            fields = [col for col in gdf.columns if col != 'geometry']
+            # 只读取图层结构，不读取要素
+            fields = 字段名称(file_path)
             combo_box.clear()
             combo_box.addItems(fields)
         except Exception as e:
@@ -8,6 +8,7 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from qfluentwidgets import LineEdit, PrimaryPushButton, StateToolTip
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录, 字段名称
 import os
 import sys
 
@@ -199,18 +200,17 @@ class DissolveFeaturesFunction(BaseFunction):
                 self.showError("目录中没有找到SHP文件")
                 return
             
-            # 读取第一个SHP文件以获取字段
-            import geopandas as gpd
-            gdf = gpd.read_file(shp_files[0])
+            # 只读取第一个SHP文件的结构以获取字段
+            import pandas as pd
+            fields = 字段名称(shp_files[0])
             
             # 清理字段名称
             from .矢量操作 import _clean_field_names
-            gdf = _clean_field_names(gdf)
+            columns = _clean_field_names(pd.DataFrame(columns=fields)).columns
             
             # 添加字段到下拉列表
-            for field in gdf.columns:
-                if field != 'geometry':
-                    self.fieldCombo.addItem(field)
+            for field in columns:
+                self.fieldCombo.addItem(field)
             
             self.fieldCombo.setEnabled(True)
             self.showSuccess(f"成功加载SHP文件的字段")
@@ -238,13 +238,8 @@ class DissolveFeaturesFunction(BaseFunction):
             # 清空当前图层列表
             self.listWidgetLayers.clear()
             
-            # 使用geopandas和fiona获取GDB文件中的所有图层
-            import fiona
-            
-            # 获取所有图层名称
-            layer_names = []
-            with fiona.Env():
-                layer_names = fiona.listlayers(gdb_path)
+            # 通过图层目录服务获取GDB文件中的所有图层，GDB未变化时使用缓存
+            layer_names = 获取图层目录().图层名称(gdb_path)
             
             if not layer_names:
                 self.showError("GDB文件中没有找到图层")
@@ -300,18 +295,17 @@ class DissolveFeaturesFunction(BaseFunction):
             self.fieldCombo.addItem("不按字段融合")
             self.fieldCombo.setEnabled(False)
             
-            # 读取图层以获取字段
-            import geopandas as gpd
-            gdf = gpd.read_file(gdb_path, layer=layer_name)
+            # 只读取图层结构以获取字段
+            import pandas as pd
+            fields = 字段名称(gdb_path, layer=layer_name)
             
             # 清理字段名称
             from .矢量操作 import _clean_field_names
-            gdf = _clean_field_names(gdf)
+            columns = _clean_field_names(pd.DataFrame(columns=fields)).columns
             
             # 添加字段到下拉列表
-            for field in gdf.columns:
-                if field != 'geometry':
-                    self.fieldCombo.addItem(field)
+            for field in columns:
+                self.fieldCombo.addItem(field)
             
             self.fieldCombo.setEnabled(True)
             self.showSuccess(f"成功加载图层 {layer_name} 的字段")
@@ -19,7 +19,7 @@ class DxfConvertThread(QThread):
     def __init__(self, dxf_path, layer_name, parent=None):
         """
         Args:
-            dxf_path: DXF文件路径
+            dxf_path: DXF文件路径或DXF文件所在目录
             layer_name: 要提取的图层名称
         """
         super().__init__(parent)
@@ -37,8 +37,8 @@ class DxfConvertThread(QThread):
                 sys.path.insert(0, root_dir)
             
             from .格式转换 import DXF转SHP
-            DXF转SHP(self.dxf_path, self.layer_name)
-            self.success.emit("转换完成！")
+            output_files = DXF转SHP(self.dxf_path, self.layer_name)
+            self.success.emit("转换完成！\n输出文件:\n" + "\n".join(output_files))
         except Exception as e:
             import traceback
             self.error.emit(f"转换失败: {str(e)}\n\n{traceback.format_exc()}")
@@ -10,6 +10,8 @@ from .base_function import BaseFunction
 import os
 import sys
 import geopandas as gpd
+from .矢量读写 import 读取矢量, 写出矢量
+from .几何修复 import 修复无效几何
 import pandas as pd
 from datetime import datetime
 from shapely.geometry import Polygon, LineString, MultiPolygon
@@ -56,7 +58,12 @@ class EliminateThread(QThread):
         通过将面与具有最大面积或最长公用边界的邻近面合并来消除面
         """
         # 读取输入文件
-        gdf = gpd.read_file(self.input_path)
+        gdf = 读取矢量(self.input_path)
+        
+        # 整体修复无效几何，合并时只需处理合并产生的几何
+        gdf, repaired_count = 修复无效几何(gdf, self.input_path)
+        if repaired_count:
+            print(f"修复 {repaired_count} 个无效几何")
         
         # 确保是面要素
         if gdf.geometry.geom_type.iloc[0] not in ['Polygon', 'MultiPolygon']:
@@ -69,7 +76,7 @@ class EliminateThread(QThread):
         exclude_lines = []
         if self.exclude_layer_path:
             # 读取排除图层
-            exclude_gdf = gpd.read_file(self.exclude_layer_path)
+            exclude_gdf = 读取矢量(self.exclude_layer_path)
             
             # 确保只处理面要素
             if exclude_gdf.geometry.geom_type.iloc[0] not in ['Polygon', 'MultiPolygon']:
@@ -332,7 +339,7 @@ class EliminateThread(QThread):
         output_file = os.path.join(self.output_path, f'eliminated_{timestamp}.shp')
         
         # 保存文件
-        final_output_gdf.to_file(output_file, encoding='utf-8')
+        写出矢量(final_output_gdf, output_file, encoding='utf-8')
         
         return output_file
 
@@ -9,10 +9,12 @@ from PyQt6.QtCore import Qt
 from qfluentwidgets import LineEdit, PushButton, ComboBox, SpinBox, CheckBox
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录, 面几何类型
 import threading
 import os
 import pandas as pd
 import geopandas as gpd
+from .矢量读写 import 读取矢量, 写出矢量, 读取计划
 from shapely.geometry import MultiPolygon, Polygon
 from shapely.ops import unary_union, polygonize
 
@@ -235,9 +237,8 @@ class EliminateOverlapFunction(BaseFunction):
     def _load_gdb_layers(self, gdb_path):
         """加载GDB中的图层"""
         try:
-            # 获取GDB中的所有图层
-            layers = [layer for layer in gpd.list_layers(gdb_path) if layer.geom_type == 'Polygon']
-            layer_names = [layer.name for layer in layers]
+            # 获取GDB中的所有面图层
+            layer_names = 获取图层目录().图层名称(gdb_path, 几何类型=面几何类型)
             
             self.source_layer_combo.clear()
             self.source_layer_combo.addItems(layer_names)
@@ -425,15 +426,11 @@ class EliminateOverlapFunction(BaseFunction):
         # 读取源数据
         self.update_progress_signal.emit(20, "正在读取源数据...")
         
-        if source_path.lower().endswith('.gdb'):
-            # 从GDB读取图层
-            gdf = gpd.read_file(source_path, layer=source_layer)
-        else:
-            # 读取SHP文件
-            gdf = gpd.read_file(source_path)
+        # 结果只保留几何和新编号，源数据的属性字段不需要读取
+        gdf = 读取矢量(source_path, layer=source_layer, 计划=读取计划(columns=[]))
         
-        # 确保是面要素
-        if gdf.geometry.type.iloc[0] != 'Polygon':
+        # 确保是面要素，GDB中的面图层读取后为MultiPolygon
+        if gdf.geometry.type.iloc[0] not in ['Polygon', 'MultiPolygon']:
             raise ValueError("仅支持面要素类型")
         
         original_count = len(gdf)
@@ -473,7 +470,7 @@ class EliminateOverlapFunction(BaseFunction):
         
         if output_type == "SHP文件":
             # 保存为SHP文件
-            result_gdf.to_file(output_path, driver='ESRI Shapefile')
+            写出矢量(result_gdf, output_path)
             result_msg = f"成功执行要素去重叠\n"
             result_msg += f"源文件: {os.path.basename(source_path)}\n"
             result_msg += f"原始要素数量: {original_count}\n"
@@ -481,7 +478,7 @@ class EliminateOverlapFunction(BaseFunction):
             result_msg += f"输出文件: {os.path.basename(output_path)}"
         else:
             # 保存为GDB图层
-            result_gdf.to_file(output_path, layer=output_layer, driver='OpenFileGDB')
+            写出矢量(result_gdf, output_path, layer=output_layer)
             result_msg = f"成功执行要素去重叠\n"
             result_msg += f"源文件: {os.path.basename(source_path)}\n"
             result_msg += f"原始要素数量: {original_count}\n"
@@ -2,9 +2,11 @@
 # 用于检查GDB中图层要素或SHP要素的常规检查
 import os
 import geopandas as gpd
+import numpy as np
+import pandas as pd
+from .矢量读写 import 读取矢量, 分块读取矢量, 要素数量, 多图层写出器
 import shapely
 from shapely.geometry import Polygon, MultiPolygon
-from shapely.validation import make_valid
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                             QCheckBox, QFileDialog, QListWidget, QListWidgetItem, QProgressBar,
                             QGroupBox, QGridLayout, QFrame, QMessageBox, QSlider, QSizePolicy)
@@ -12,6 +14,9 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from qfluentwidgets import (PrimaryPushButton, PushButton, ToggleButton, SwitchButton, FluentIcon, InfoBar,
                             InfoBarPosition, LineEdit, ComboBox)
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录
+from .结果句柄 import 结果句柄
+from .几何修复 import 修复无效几何
 
 class FeatureCheckWorker(QThread):
     """要素检查工作线程"""
@@ -31,28 +36,16 @@ class FeatureCheckWorker(QThread):
     def run(self):
         """执行检查"""
         try:
-            # 读取要素
-            if self.layer_name:
-                # GDB图层
-                try:
-                    gdf = gpd.read_file(self.input_path, layer=self.layer_name)
-                except Exception as e:
+            # 只统计要素数量，要素按分块读取，避免整个图层同时驻留内存
+            try:
+                total_features = 要素数量(self.input_path, layer=self.layer_name)
+            except Exception as e:
+                if self.layer_name:
                     self.error_occurred.emit(f"读取GDB图层 '{self.layer_name}' 失败: {str(e)}")
-                    return
-            else:
-                # SHP文件
-                try:
-                    gdf = gpd.read_file(self.input_path)
-                except Exception as e:
+                else:
                     self.error_occurred.emit(f"读取SHP文件失败: {str(e)}")
-                    return
-            
-            # 验证读取结果
-            if gdf is None:
-                self.error_occurred.emit("文件读取失败，未返回有效的GeoDataFrame")
                 return
             
-            total_features = len(gdf)
             if total_features == 0:
                 if self.layer_name:
                     self.error_occurred.emit(f"图层 '{self.layer_name}' 中没有找到要素")
@@ -60,64 +53,76 @@ class FeatureCheckWorker(QThread):
                     self.error_occurred.emit("文件中没有找到要素")
                 return
             
-            # 初始化结果字典
-            results = {
+            # 每个分块检查完只保留有问题的要素
+            flagged = {
                 'narrow': [],
-                'overlap': [],
-                'roundabout': [],
-                'sharp_angle': []
+                'roundabout': []
             }
             
             # 检查每个要素
-            geometries = []
+            geometries = []  # 面面相叠检查需要全部几何，只保存几何不保存属性
             sharp_angle_lines = []  # 存储尖锐角的夹角线
-            for idx, row in gdf.iterrows():
-                geometry = row.geometry
-                geometries.append(geometry)
-                
-                # 进度更新
-                progress = int((idx + 1) / total_features * 100)
-                self.progress_updated.emit(progress)
+            crs = None
+            processed = 0
+            last_progress = -1
+            repaired_count = 0
+            for chunk in 分块读取矢量(self.input_path, layer=self.layer_name):
+                crs = chunk.crs
+                narrow_indices = []
+                narrow_ratios = []
+                roundabout_indices = []
                 
-                # 确保几何有效（用于其他检查）
-                if not geometry.is_valid:
-                    geometry = make_valid(geometry)
-                    if not geometry.is_valid:
-                        continue
+                # 整块修复无效几何（用于检查），结果要素仍保留原始几何
+                valid_geometry, repaired = 修复无效几何(chunk.geometry, self.input_path, self.layer_name)
+                repaired_count += repaired
                 
-                # 狭长检查
-                if 'narrow' in self.check_items:
-                    is_narrow, aspect_ratio = self._check_narrow(geometry)
-                    if is_narrow:
-                        results['narrow'].append((idx, aspect_ratio))
-                
-                # 环岛图斑检查
-                if 'roundabout' in self.check_items:
-                    if self._check_roundabout(geometry):
-                        results['roundabout'].append(idx)
+                for idx, geometry in zip(chunk.index, valid_geometry):
+                    if 'overlap' in self.check_items:
+                        geometries.append(geometry)
+                    
+                    # 进度更新
+                    processed += 1
+                    progress = int(processed / total_features * 100)
+                    if progress != last_progress:
+                        self.progress_updated.emit(progress)
+                        last_progress = progress
+                    
+                    # 狭长检查
+                    if 'narrow' in self.check_items:
+                        is_narrow, aspect_ratio = self._check_narrow(geometry)
+                        if is_narrow:
+                            narrow_indices.append(idx)
+                            narrow_ratios.append(aspect_ratio)
+                    
+                    # 环岛图斑检查
+                    if 'roundabout' in self.check_items:
+                        if self._check_roundabout(geometry):
+                            roundabout_indices.append(idx)
+                    
+                    # 尖锐角检查
+                    if 'sharp_angle' in self.check_items:
+                        angles = self._check_sharp_angle(geometry)
+                        if angles:
+                            sharp_angle_lines.extend(angles)
                 
-                # 尖锐角检查
-                if 'sharp_angle' in self.check_items:
-                    angles = self._check_sharp_angle(geometry)
-                    if angles:
-                        results['sharp_angle'].append(idx)
-                        sharp_angle_lines.extend(angles)
+                # 处理狭长结果，添加宽长比字段
+                if narrow_indices:
+                    narrow_gdf = chunk.loc[narrow_indices].copy()
+                    narrow_gdf['阈值'] = narrow_ratios
+                    flagged['narrow'].append(narrow_gdf)
+                if roundabout_indices:
+                    flagged['roundabout'].append(chunk.loc[roundabout_indices].copy())
+                del chunk
+            
+            if repaired_count:
+                print(f"修复 {repaired_count} 个无效几何")
             
             # 面面相叠检查（只保留重叠部分）
             overlap_geometries = []
             if 'overlap' in self.check_items:
-                # 为所有几何创建有效的2D多边形副本和边界框
-                valid_geometries = []
-                bounds_list = []
-                for geometry in geometries:
-                    # 确保几何有效
-                    if not geometry.is_valid:
-                        geometry = make_valid(geometry)
-                    # 转换为2D几何
-                    if geometry.has_z:
-                        geometry = geometry.buffer(0)
-                    valid_geometries.append(geometry)
-                    bounds_list.append(geometry.bounds)
+                # 几何已在分块时修复，这里只转换为2D几何并计算边界框
+                valid_geometries = list(shapely.force_2d(np.asarray(geometries, dtype=object)))
+                bounds_list = [tuple(bounds) for bounds in shapely.bounds(valid_geometries)]
                 
                 # 记录已经检查过的要素对，避免重复检查
                 checked_pairs = set()
@@ -192,20 +197,9 @@ class FeatureCheckWorker(QThread):
             self.result_progress_updated.emit(0)
             
             # 处理狭长和环岛图斑结果（保留原始要素）
-            for check_type, indices in results.items():
-                if check_type == 'sharp_angle':
-                    # 尖锐角结果单独处理，生成夹角线
-                    continue
-                elif check_type != 'overlap' and indices:
-                    if check_type == 'narrow':
-                        # 处理狭长结果，添加宽长比字段
-                        narrow_indices = [idx for idx, _ in indices]
-                        narrow_gdf = gdf.iloc[narrow_indices].copy()
-                        narrow_gdf['阈值'] = [aspect_ratio for _, aspect_ratio in indices]
-                        result_gdfs[check_type] = narrow_gdf
-                    else:
-                        # 其他结果直接复制
-                        result_gdfs[check_type] = gdf.iloc[indices].copy()
+            for check_type, parts in flagged.items():
+                if parts:
+                    result_gdfs[check_type] = pd.concat(parts)
                     processed_types += 1
                     # 更新结果生成进度
                     progress = int(processed_types / total_result_types * 100)
@@ -214,7 +208,7 @@ class FeatureCheckWorker(QThread):
             # 处理面面相叠结果（只保留重叠区域）
             if overlap_geometries and 'overlap' in self.check_items:
                 # 创建只包含重叠区域的GeoDataFrame
-                overlap_gdf = gpd.GeoDataFrame(geometry=overlap_geometries, crs=gdf.crs)
+                overlap_gdf = gpd.GeoDataFrame(geometry=overlap_geometries, crs=crs)
                 result_gdfs['overlap'] = overlap_gdf
                 processed_types += 1
             
@@ -223,14 +217,20 @@ class FeatureCheckWorker(QThread):
                 # 创建包含夹角线和角度值的GeoDataFrame
                 angles = [angle for angle, _ in sharp_angle_lines]
                 lines = [line for _, line in sharp_angle_lines]
-                sharp_angle_gdf = gpd.GeoDataFrame({'阈值': angles, 'geometry': lines}, crs=gdf.crs)
+                sharp_angle_gdf = gpd.GeoDataFrame({'阈值': angles, 'geometry': lines}, crs=crs)
                 result_gdfs['sharp_angle'] = sharp_angle_gdf
                 processed_types += 1
             
+            # 结果转存为句柄，界面线程只接收数量和预览，保存时再读取完整数据
+            result_handles = {
+                check_type: 结果句柄.保存(gdf, check_type)
+                for check_type, gdf in result_gdfs.items()
+            }
+            
             # 发送结果生成完成信号
             self.result_progress_updated.emit(100)
             
-            self.check_completed.emit(result_gdfs)
+            self.check_completed.emit(result_handles)
             
         except Exception as e:
             self.error_occurred.emit(str(e))
@@ -653,8 +653,9 @@ class FeatureCheckFunction(BaseFunction):
         # 连接信号
         self.file_edit.textChanged.connect(self._on_file_path_changed)
         
-        # 结果数据
+        # 结果数据（检查类型到结果句柄的映射）
         self.result_gdfs = {}
+        self.batch_results = []
     
     def _browse_shp(self):
         """浏览SHP文件"""
@@ -703,9 +704,7 @@ class FeatureCheckFunction(BaseFunction):
             self.layer_combo.setVisible(True)
             try:
                 # 列出GDB中的所有图层
-                import fiona
-                with fiona.Env():
-                    layer_names = fiona.listlayers(file_path)
+                layer_names = 获取图层目录().图层名称(file_path)
                 
                 if not layer_names:
                     InfoBar.warning(
@@ -817,7 +816,7 @@ class FeatureCheckFunction(BaseFunction):
         self.progress_bar.setFormat("开始检查...")
         
         self.result_list.clear()
-        self.result_gdfs.clear()
+        self._release_results()
         self.save_btn.setEnabled(False)
         
         # 判断是否为批量检测
@@ -865,9 +864,7 @@ class FeatureCheckFunction(BaseFunction):
                     gdb_path = os.path.join(root, dir_name)
                     # 获取gdb中的所有图层
                     try:
-                        import fiona
-                        with fiona.Env():
-                            layer_names = fiona.listlayers(gdb_path)
+                        layer_names = 获取图层目录().图层名称(gdb_path)
                         
                         if not layer_names:
                             InfoBar.warning(
@@ -1086,6 +1083,26 @@ class FeatureCheckFunction(BaseFunction):
                 widget.setVisible(False)
                 break
     
+    def _release_results(self):
+        """释放上一次检查的结果句柄"""
+        for handle in self.result_gdfs.values():
+            handle.删除()
+        self.result_gdfs.clear()
+        for _, result_handles in self.batch_results:
+            for handle in result_handles.values():
+                handle.删除()
+        self.batch_results = []
+    
+    def _remove_old_shp(self, output_path):
+        """删除可能存在的旧文件（解决文件被占用问题）"""
+        for ext in ['.shp', '.shx', '.dbf', '.prj', '.cpg']:
+            old_file = output_path.replace('.shp', ext)
+            if os.path.exists(old_file):
+                try:
+                    os.remove(old_file)
+                except:
+                    pass
+    
     def _save_results(self):
         """保存结果"""
         if self.batch_check.isChecked():
@@ -1107,6 +1124,8 @@ class FeatureCheckFunction(BaseFunction):
             # 获取当前日期时间，格式：YYYYMMDD_HHMMSS
             current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             
+            # 所有结果图层交给多图层写出器统一写出，后面图层的编码与当前图层的写出同时进行
+            writer = 多图层写出器(encoding='gbk')
             if self.batch_check.isChecked():
                 # 批量检测结果保存
                 for file_key, result_gdfs in self.batch_results:
@@ -1119,22 +1138,9 @@ class FeatureCheckFunction(BaseFunction):
                             # 生成文件名，包含日期时间
                             output_name = f"{file_key}_{check_type}.shp"
                             output_path = os.path.join(file_dir, output_name)
-                            
+                            self._remove_old_shp(output_path)
                             # 保留所有属性字段，包括阈值字段
-                            gdf_copy = gdf.copy()
-                            
-                            # 删除可能存在的旧文件（解决文件被占用问题）
-                            import glob
-                            for ext in ['.shp', '.shx', '.dbf', '.prj', '.cpg']:
-                                old_file = output_path.replace('.shp', ext)
-                                if os.path.exists(old_file):
-                                    try:
-                                        os.remove(old_file)
-                                    except:
-                                        pass
-                            
-                            # 保存为SHP文件，使用GBK编码处理中文文件名
-                            gdf_copy.to_file(output_path, driver='ESRI Shapefile', encoding='gbk')
+                            writer.添加(gdf, output_path)
             else:
                 # 单文件检测结果保存
                 base_name = os.path.splitext(os.path.basename(self.file_edit.text()))[0]
@@ -1143,22 +1149,12 @@ class FeatureCheckFunction(BaseFunction):
                     # 生成文件名，包含日期时间
                     output_name = f"{base_name}_{check_type}_{current_time}.shp"
                     output_path = os.path.join(save_dir, output_name)
-                    
+                    self._remove_old_shp(output_path)
                     # 保留所有属性字段，包括阈值字段
-                    gdf_copy = gdf.copy()
-                    
-                    # 删除可能存在的旧文件（解决文件被占用问题）
-                    import glob
-                    for ext in ['.shp', '.shx', '.dbf', '.prj', '.cpg']:
-                        old_file = output_path.replace('.shp', ext)
-                        if os.path.exists(old_file):
-                            try:
-                                os.remove(old_file)
-                            except:
-                                pass
-                    
-                    # 保存为SHP文件，使用GBK编码处理中文文件名
-                    gdf_copy.to_file(output_path, driver='ESRI Shapefile', encoding='gbk')
+                    writer.添加(gdf, output_path)
+            
+            # 保存为SHP文件，使用GBK编码处理中文文件名
+            writer.写出全部()
             
             InfoBar.success(
                 title="成功",
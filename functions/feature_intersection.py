@@ -9,23 +9,16 @@ from PyQt6.QtCore import Qt
 from qfluentwidgets import LineEdit, PushButton, ComboBox
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录, 面几何类型
 import threading
 import os
 import pandas as pd
 import geopandas as gpd
+from .矢量读写 import 读取矢量, 写出矢量
+from .几何修复 import 修复无效几何
+import shapely
 from shapely.geometry import MultiPolygon, Polygon
 
-# 尝试从不同模块导入make_valid函数，兼容不同版本的shapely库
-try:
-    from shapely.ops import make_valid
-except ImportError:
-    try:
-        from shapely.validation import make_valid
-    except ImportError:
-        # 如果都导入失败，定义一个简单的替代函数
-        def make_valid(geom):
-            return geom
-
 
 class FeatureIntersectionFunction(BaseFunction):
     """要素相交功能"""
@@ -239,9 +232,8 @@ class FeatureIntersectionFunction(BaseFunction):
     def _load_gdb_layers(self, gdb_path):
         """加载GDB中的图层"""
         try:
-            # 获取GDB中的所有图层
-            layers = [layer for layer in gpd.list_layers(gdb_path) if layer.geom_type == 'Polygon']
-            layer_names = [layer.name for layer in layers]
+            # 获取GDB中的所有面图层
+            layer_names = 获取图层目录().图层名称(gdb_path, 几何类型=面几何类型)
             
             self.source_layer_combo.clear()
             self.source_layer_combo.addItems(layer_names)
@@ -429,12 +421,7 @@ class FeatureIntersectionFunction(BaseFunction):
         # 读取源数据
         self.update_progress_signal.emit(20, "正在读取源数据...")
         
-        if source_path.lower().endswith('.gdb'):
-            # 从GDB读取图层
-            gdf = gpd.read_file(source_path, layer=source_layer)
-        else:
-            # 读取SHP文件
-            gdf = gpd.read_file(source_path)
+        gdf = 读取矢量(source_path, layer=source_layer)
         
         # 确保是面要素
         if gdf.geometry.type.iloc[0] != 'Polygon':
@@ -446,17 +433,11 @@ class FeatureIntersectionFunction(BaseFunction):
         self.update_progress_signal.emit(40, "正在计算重叠区域...")
         
         # 为所有几何创建有效的2D多边形副本和边界框
-        valid_geometries = []
-        bounds_list = []
-        for geometry in gdf.geometry:
-            # 确保几何有效
-            if not geometry.is_valid:
-                geometry = make_valid(geometry)
-            # 转换为2D几何
-            if geometry.has_z:
-                geometry = geometry.buffer(0)
-            valid_geometries.append(geometry)
-            bounds_list.append(geometry.bounds)
+        valid_geometry, repaired_count = 修复无效几何(gdf.geometry, source_path, source_layer, 转为二维=True)
+        if repaired_count:
+            print(f"修复 {repaired_count} 个无效几何")
+        valid_geometries = list(valid_geometry)
+        bounds_list = [tuple(bounds) for bounds in shapely.bounds(valid_geometries)]
         
         # 面面相叠检查（只保留重叠部分）
         overlap_geometries = []
@@ -528,7 +509,7 @@ class FeatureIntersectionFunction(BaseFunction):
         
         if output_type == "SHP文件":
             # 保存为SHP文件
-            result_gdf.to_file(output_path, driver='ESRI Shapefile')
+            写出矢量(result_gdf, output_path)
             result_msg = f"成功执行要素相交\n"
             result_msg += f"源文件: {os.path.basename(source_path)}\n"
             result_msg += f"原始要素数量: {original_count}\n"
@@ -536,7 +517,7 @@ class FeatureIntersectionFunction(BaseFunction):
             result_msg += f"输出文件: {os.path.basename(output_path)}"
         else:
             # 保存为GDB图层
-            result_gdf.to_file(output_path, layer=output_layer, driver='OpenFileGDB')
+            写出矢量(result_gdf, output_path, layer=output_layer)
             result_msg += f"成功执行要素相交\n"
             result_msg += f"源文件: {os.path.basename(source_path)}\n"
             result_msg += f"原始要素数量: {original_count}\n"
@@ -9,6 +9,7 @@ from qfluentwidgets import LineEdit, ComboBox, PushButton
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
 import geopandas as gpd
+from .图层目录 import 字段名称
 
 
 class SplitThread(QThread):
@@ -88,8 +89,8 @@ class FieldSplitFunction(BaseFunction):
     def _loadFields(self, file_path):
         """加载字段列表"""
         try:
-            gdf = gpd.read_file(file_path)
-            fields = [col for col in gdf.columns if col != 'geometry']
+            # 只读取图层结构，不读取要素
+            fields = 字段名称(file_path)
             
             # 检查UI元素是否仍然存在
             if hasattr(self, 'fieldCombo') and self.fieldCombo is not None:
@@ -5,8 +5,8 @@
 
 import os
 import geopandas as gpd
+from .矢量读写 import 写出矢量, 分块读取矢量, 分块写出器, 要素数量
 import shapely
-import fiona
 from shapely.geometry import Polygon, MultiPolygon, LineString, Point
 from shapely.validation import make_valid
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFileDialog, 
@@ -16,6 +16,8 @@ from qfluentwidgets import (PrimaryPushButton, PushButton, ToggleButton, SwitchB
                             InfoBarPosition, LineEdit, ComboBox)
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录
+from .几何修复 import 修复无效几何
 
 
 class FixSharpAngleWorker(QThread):
@@ -34,66 +36,71 @@ class FixSharpAngleWorker(QThread):
     def run(self):
         """执行修复尖锐角操作"""
         try:
-            # 读取主矢量数据
-            if self.main_layer_name:
-                main_gdf = gpd.read_file(self.main_vector_path, layer=self.main_layer_name)
-            else:
-                main_gdf = gpd.read_file(self.main_vector_path)
+            # 创建输出目录
+            output_dir = os.path.join(os.path.dirname(self.main_vector_path), "fixed_result")
+            os.makedirs(output_dir, exist_ok=True)
+            
+            # 生成输出文件名
+            base_name = os.path.splitext(os.path.basename(self.main_vector_path))[0]
+            output_path = os.path.join(output_dir, f"{base_name}_fixed.shp")
             
-            # 创建结果GeoDataFrame列表，用于存储新生成的要素
-            result_features = []
+            # 主矢量按分块读取，每个分块修复后立即写出，再读取下一块
+            writer = 分块写出器(output_path)
             
             # 存储修复的位置
             fixed_locations = []
+            crs = None
             
             # 处理每个主矢量要素
-            total_features = len(main_gdf)
-            for idx, row in main_gdf.iterrows():
-                # 更新进度
-                progress = int((idx + 1) / total_features * 100)
-                self.progress_updated.emit(progress)
+            total_features = 要素数量(self.main_vector_path, layer=self.main_layer_name)
+            processed = 0
+            repaired_count = 0
+            for main_gdf in 分块读取矢量(self.main_vector_path, layer=self.main_layer_name):
+                crs = main_gdf.crs
                 
-                # 获取当前要素几何
-                geometry = row.geometry
+                # 整块修复无效几何
+                main_gdf, repaired = 修复无效几何(main_gdf, self.main_vector_path, self.main_layer_name)
+                repaired_count += repaired
                 
-                # 确保几何有效且为多边形类型
-                if not geometry.is_valid:
-                    geometry = make_valid(geometry)
-                    # 检查修复后的几何是否为多边形类型
-                    if not hasattr(geometry, 'geom_type') or geometry.geom_type not in ['Polygon', 'MultiPolygon']:
-                        continue
-                    if not geometry.is_valid:
+                # 创建结果要素列表，用于存储当前分块新生成的要素
+                result_features = []
+                for idx, row in main_gdf.iterrows():
+                    # 更新进度
+                    processed += 1
+                    progress = int(processed / total_features * 100)
+                    self.progress_updated.emit(progress)
+                    
+                    # 获取当前要素几何
+                    geometry = row.geometry
+                    
+                    # 修复后不是多边形的要素跳过
+                    if geometry is None or geometry.geom_type not in ['Polygon', 'MultiPolygon']:
                         continue
+                    
+                    # 修复尖锐角，同时收集修复位置
+                    new_geometries, locations = self._fix_sharp_angle(geometry)
+                    if new_geometries:
+                        # 为每个新生成的几何创建一个新要素
+                        for geom in new_geometries:
+                            # 复制原始要素的属性
+                            new_row = row.copy()
+                            new_row['geometry'] = geom
+                            result_features.append(new_row)
+                        # 添加修复位置
+                        if locations:
+                            fixed_locations.extend(locations) 
+                    else:
+                        # 如果没有修复，保留原始要素
+                        result_features.append(row.copy())
                 
-                # 修复尖锐角，同时收集修复位置
-                new_geometries, locations = self._fix_sharp_angle(geometry)
-                if new_geometries:
-                    # 为每个新生成的几何创建一个新要素
-                    for geom in new_geometries:
-                        # 复制原始要素的属性
-                        new_row = row.copy()
-                        new_row['geometry'] = geom
-                        result_features.append(new_row)
-                    # 添加修复位置
-                    if locations:
-                        fixed_locations.extend(locations) 
-                else:
-                    # 如果没有修复，保留原始要素
-                    result_features.append(row.copy())
+                # 写出当前分块的结果
+                if result_features:
+                    writer.写出(gpd.GeoDataFrame(result_features, crs=crs))
             
-            # 创建结果GeoDataFrame
-            result_gdf = gpd.GeoDataFrame(result_features, crs=main_gdf.crs)
-            
-            # 创建输出目录
-            output_dir = os.path.join(os.path.dirname(self.main_vector_path), "fixed_result")
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # 生成输出文件名
-            base_name = os.path.splitext(os.path.basename(self.main_vector_path))[0]
-            output_path = os.path.join(output_dir, f"{base_name}_fixed.shp")
-            
-            # 保存结果
-            result_gdf.to_file(output_path)
+            # 没有任何多边形要素时分块写出器不会创建文件，不能返回不存在的输出路径
+            if writer.count == 0:
+                self.error_occurred.emit("主矢量中没有可修复的多边形要素，未生成输出文件")
+                return
             
             # 保存修复位置矢量
             fixed_locations_path = None
@@ -101,18 +108,19 @@ class FixSharpAngleWorker(QThread):
                 # 创建修复位置的GeoDataFrame
                 from shapely.geometry import Point
                 fixed_points = [Point(location) for location in fixed_locations]
-                fixed_locations_gdf = gpd.GeoDataFrame(geometry=fixed_points, crs=main_gdf.crs)
+                fixed_locations_gdf = gpd.GeoDataFrame(geometry=fixed_points, crs=crs)
                 # 添加修复角度信息
                 fixed_locations_gdf['修复角度阈值'] = self.angle_threshold
                 
                 # 保存为SHP文件
                 fixed_locations_path = os.path.join(output_dir, f"{base_name}_fixed_locations.shp")
-                fixed_locations_gdf.to_file(fixed_locations_path)
+                写出矢量(fixed_locations_gdf, fixed_locations_path)
             
             # 发送结果
             self.result_generated.emit({
                 'output_path': output_path,
-                'fixed_count': len(result_gdf),
+                'fixed_count': writer.count,
+                'repaired_count': repaired_count,
                 'fixed_locations_path': fixed_locations_path
             })
             
@@ -488,8 +496,7 @@ class FixSharpAngleFunction(BaseFunction):
         if file_path.lower().endswith('.gdb'):
             # 列出GDB中的所有图层
             try:
-                with fiona.Env():
-                    layers = fiona.listlayers(file_path)
+                layers = 获取图层目录().图层名称(file_path)
                 self.main_layer_combo.addItems(layers)
                 self.main_layer_combo.setEnabled(True)
                 self.main_layer_name = layers[0] if layers else ""
@@ -580,6 +587,8 @@ class FixSharpAngleFunction(BaseFunction):
         content = f"尖锐角修复成功！结果已保存到：{result['output_path']}"
         if 'fixed_locations_path' in result and result['fixed_locations_path']:
             content += f"\n修复位置矢量已保存到：{result['fixed_locations_path']}"
+        if result.get('repaired_count'):
+            content += f"\n已修复 {result['repaired_count']} 个无效几何"
         InfoBar.success(
             title="修复完成",
             content=content,
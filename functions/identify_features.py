@@ -9,6 +9,7 @@ from PyQt6.QtGui import QDrag
 from qfluentwidgets import LineEdit, PrimaryPushButton, StateToolTip, ComboBox, BodyLabel
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录
 import os
 import sys
 
@@ -160,9 +161,7 @@ class IdentifyFeaturesFunction(BaseFunction):
                 
                 # 加载GDB图层
                 try:
-                    import fiona
-                    with fiona.Env():
-                        layer_names = fiona.listlayers(gdb_path)
+                    layer_names = 获取图层目录().图层名称(gdb_path)
                     
                     # 清空列表
                     layers_list.clear()
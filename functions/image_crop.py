@@ -21,6 +21,7 @@ from qfluentwidgets import FluentIcon as FIF
 from qfluentwidgets import StateToolTip
 from .base_function import BaseFunction
 import geopandas as gpd
+from .图层目录 import 读取字段信息
 
 
 class CropThread(QThread):
@@ -346,10 +347,12 @@ class ImageCropFunction(BaseFunction):
             self.crop_vector_path_label.setToolTip(file_path)
             self._crop_vector_full_path = file_path
             try:
-                gdf = gpd.read_file(file_path)
+                # 只读取图层结构，获取坐标系和字段列表
+                layer_info = 读取字段信息(file_path)
+                crs = layer_info['crs']
                 
                 # 检查坐标系
-                if gdf.crs is None:
+                if crs is None:
                     # 使用qfluentwidgets的MessageBox组件
                     msg_box = MessageBox(
                         '警告',
@@ -359,12 +362,12 @@ class ImageCropFunction(BaseFunction):
                     msg_box.exec()
                     return
                 
-                if gdf.crs.is_geographic:
+                if crs.is_geographic:
                     # 使用qfluentwidgets的MessageBox组件
                     msg_box = MessageBox(
                         '警告',
                         f'矢量文件使用地理坐标系（经纬度），无法直接进行裁剪。\n'
-                        f'当前坐标系: {gdf.crs}\n'
+                        f'当前坐标系: {crs}\n'
                         f'请先将矢量文件投影到投影坐标系。',
                         self
                     )
@@ -372,14 +375,12 @@ class ImageCropFunction(BaseFunction):
                     return
                 
                 # 显示坐标系信息
-                crs_info = f"坐标系: {gdf.crs}"
-                if hasattr(gdf.crs, 'to_epsg') and gdf.crs.to_epsg():
-                    crs_info += f" (EPSG:{gdf.crs.to_epsg()})"
+                crs_info = f"坐标系: {crs}"
+                if hasattr(crs, 'to_epsg') and crs.to_epsg():
+                    crs_info += f" (EPSG:{crs.to_epsg()})"
                 
                 # 更新字段列表
-                fields = gdf.columns.tolist()
-                if 'geometry' in fields:
-                    fields.remove('geometry')
+                fields = layer_info['fields']
                 self.crop_vector_field_cb.clear()
                 self.crop_vector_field_cb.addItems(fields)
                 self.crop_vector_field_cb.setCurrentIndex(-1)
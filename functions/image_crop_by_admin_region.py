@@ -22,6 +22,7 @@ from qfluentwidgets import FluentIcon as FIF
 from qfluentwidgets import StateToolTip
 from .base_function import BaseFunction
 import geopandas as gpd
+from .矢量读写 import 读取矢量
 import numpy as np
 from shapely.geometry import mapping, box
 import fiona
@@ -54,7 +55,7 @@ class CropThread(QThread):
         try:
             # 读取矢量数据
             self.progress.emit("正在读取矢量数据...")
-            gdf = gpd.read_file(self.vector_path)
+            gdf = 读取矢量(self.vector_path)
             
             # 确保输出文件夹存在
             os.makedirs(self.output_folder, exist_ok=True)
@@ -374,7 +375,7 @@ class ImageCropByAdminRegionFunction(BaseFunction):
                 
                 # 读取矢量数据
                 log_cb(f"正在读取矢量数据: {shapefile_path}")
-                gdf = gpd.read_file(shapefile_path)
+                gdf = 读取矢量(shapefile_path)
                 log_cb(f"成功读取矢量数据，包含 {len(gdf)} 个行政区域")
                 log_cb(f"矢量数据的坐标系统: {gdf.crs}")
                 
@@ -13,6 +13,7 @@ import os
 import tempfile
 import zipfile
 import geopandas as gpd
+from .矢量读写 import 写出矢量
 from shapely.geometry import Point, LineString, Polygon, MultiPolygon
 from shapely.wkt import loads
 
@@ -176,7 +177,7 @@ class KmzToShpThread(QThread):
                 
                 # 保存为SHP文件
                 self.log_signal.emit(f"正在保存SHP文件: {os.path.basename(shp_path)}")
-                gdf.to_file(shp_path, encoding='utf-8')
+                写出矢量(gdf, shp_path, encoding='utf-8')
                 
                 self.log_signal.emit(f"转换完成！")
                 self.log_signal.emit(f"输出文件: {shp_path}")
@@ -31,10 +31,17 @@ class LandDepartmentCoordsThread(QThread):
             import os
             sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
             
-            from .坐标处理 import 征地部坐标转换
+            from .坐标处理 import 征地部坐标转换, 批量征地部坐标转换
             
-            # 直接调用坐标处理模块中的函数
-            output_files = 征地部坐标转换(self.file_path, self.output_dir, self.merge_plots)
+            # 输入为目录时批量转换目录下的所有坐标文件
+            if os.path.isdir(self.file_path):
+                output_files, failed_files = 批量征地部坐标转换(
+                    self.file_path, self.output_dir, self.merge_plots
+                )
+                if failed_files:
+                    print(f"以下文件转换失败: {failed_files}")
+            else:
+                output_files = 征地部坐标转换(self.file_path, self.output_dir, self.merge_plots)
             
             # 发送成功信号
             self.success.emit(output_files)
@@ -69,6 +76,7 @@ class LandDepartmentCoordsFunction(BaseFunction):
             "<br>2. 设置输出目录"
             "<br>3. 转换为SHP矢量文件"
             "<br>4. 支持多个地块的批量转换"
+            "<br>5. 开启批量模式后可选择目录，转换目录下所有坐标文件"
         )
         infoLabel.setWordWrap(True)
         infoLabel.setStyleSheet('''
@@ -123,6 +131,20 @@ class LandDepartmentCoordsFunction(BaseFunction):
         mergeRow.addStretch(1)
         self.contentLayout.addLayout(mergeRow)
         
+        # 批量模式开关
+        batchRow = QHBoxLayout()
+        batchLabel = QLabel("批量模式：")
+        batchRow.addWidget(batchLabel)
+        
+        self.batchModeSwitch = SwitchButton(self)
+        self.batchModeSwitch.setText("转换目录下的所有坐标文件")
+        self.batchModeSwitch.setChecked(False)
+        self.batchModeSwitch.checkedChanged.connect(self._onBatchModeChanged)
+        batchRow.addWidget(self.batchModeSwitch)
+        
+        batchRow.addStretch(1)
+        self.contentLayout.addLayout(batchRow)
+        
         # 执行按钮
         buttonRow = QHBoxLayout()
         buttonRow.addStretch(1)
@@ -134,8 +156,22 @@ class LandDepartmentCoordsFunction(BaseFunction):
         buttonRow.addStretch(1)
         self.contentLayout.addLayout(buttonRow)
     
+    def _onBatchModeChanged(self, checked):
+        """切换批量模式"""
+        self.inputPathEdit.clear()
+        if checked:
+            self.inputPathEdit.setPlaceholderText("请选择征地部坐标文件所在目录")
+        else:
+            self.inputPathEdit.setPlaceholderText("请选择征地部标准坐标文件")
+    
     def _selectInputFile(self):
         """选择输入文件"""
+        if self.batchModeSwitch.isChecked():
+            dir_path = QFileDialog.getExistingDirectory(self, "选择征地部坐标文件所在目录", "")
+            if dir_path:
+                self.inputPathEdit.setText(dir_path)
+            return
+        
         file_path, _ = QFileDialog.getOpenFileName(
             self, "选择征地部标准坐标文件", "", "文本文件 (*.txt *.dat);;所有文件 (*.*)"
         )
@@ -159,6 +195,9 @@ class LandDepartmentCoordsFunction(BaseFunction):
         if not os.path.exists(input_path):
             return False, "输入文件不存在"
         
+        if self.batchModeSwitch.isChecked() and not os.path.isdir(input_path):
+            return False, "批量模式下请选择目录"
+        
         output_dir = self.outputDirEdit.text().strip()
         if not output_dir:
             return False, "请选择输出目录"
@@ -8,6 +8,7 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from qfluentwidgets import LineEdit, PrimaryPushButton, StateToolTip
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录
 import os
 import sys
 
@@ -68,6 +69,7 @@ class MergeThread(QThread):
     def _mergeMixedFeatures(self, shp_files, gdb_path, gdb_layers, output_path):
         """混合合并：同时合并SHP文件和GDB图层"""
         import geopandas as gpd
+        from .矢量读写 import 读取矢量, 写出矢量
         import pandas as pd
         from datetime import datetime
         
@@ -76,7 +78,7 @@ class MergeThread(QThread):
         # 处理SHP文件
         for shp_file in shp_files:
             try:
-                gdf = gpd.read_file(shp_file, encoding='utf-8')
+                gdf = 读取矢量(shp_file, encoding='utf-8')
                 from .矢量操作 import _clean_field_names
                 gdf = _clean_field_names(gdf)
                 # 添加来源信息
@@ -89,7 +91,7 @@ class MergeThread(QThread):
         # 处理GDB图层
         for layer_name in gdb_layers:
             try:
-                gdf = gpd.read_file(gdb_path, layer=layer_name)
+                gdf = 读取矢量(gdb_path, layer=layer_name)
                 from .矢量操作 import _clean_field_names
                 gdf = _clean_field_names(gdf)
                 # 添加来源信息
@@ -132,17 +134,18 @@ class MergeThread(QThread):
         
         # 使用utf-8编码保存文件
         try:
-            merged_gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(merged_gdf, output_file, encoding='utf-8')
             return output_file
         except Exception as e:
             # 尝试使用不同的文件名
             output_file = os.path.join(output_path, f'mixed_merged_{timestamp}_1.shp')
-            merged_gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(merged_gdf, output_file, encoding='utf-8')
             return output_file
     
     def _mergeSHPFilesList(self, shp_files, output_path):
         """合并列表中的多个SHP文件"""
         import geopandas as gpd
+        from .矢量读写 import 读取矢量, 写出矢量
         import pandas as pd
         from datetime import datetime
         
@@ -151,7 +154,7 @@ class MergeThread(QThread):
         
         # 读取第一个文件作为基准
         try:
-            merged_gdf = gpd.read_file(shp_files[0], encoding='utf-8')
+            merged_gdf = 读取矢量(shp_files[0], encoding='utf-8')
         except Exception as e:
             raise Exception(f"读取文件 {shp_files[0]} 失败: {e}")
         
@@ -166,7 +169,7 @@ class MergeThread(QThread):
         for shp_file in shp_files[1:]:
             try:
                 # 读取当前文件
-                gdf = gpd.read_file(shp_file, encoding='utf-8')
+                gdf = 读取矢量(shp_file, encoding='utf-8')
                 
                 # 清理字段名称
                 gdf = _clean_field_names(gdf)
@@ -203,17 +206,18 @@ class MergeThread(QThread):
         
         # 使用utf-8编码保存文件
         try:
-            merged_gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(merged_gdf, output_file, encoding='utf-8')
             return output_file
         except Exception as e:
             # 尝试使用不同的文件名
             output_file = os.path.join(output_path, f'shp_list_merged_{timestamp}_1.shp')
-            merged_gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(merged_gdf, output_file, encoding='utf-8')
             return output_file
     
     def _mergeMultipleGDBLayers(self, gdb_path, layer_names, output_path):
         """合并多个GDB图层到SHP文件"""
         import geopandas as gpd
+        from .矢量读写 import 读取矢量, 写出矢量
         import pandas as pd
         from datetime import datetime
         
@@ -222,7 +226,7 @@ class MergeThread(QThread):
         
         # 读取第一个图层作为基准
         try:
-            merged_gdf = gpd.read_file(gdb_path, layer=layer_names[0])
+            merged_gdf = 读取矢量(gdb_path, layer=layer_names[0])
         except Exception as e:
             raise Exception(f"读取图层 {layer_names[0]} 失败: {e}")
         
@@ -237,7 +241,7 @@ class MergeThread(QThread):
         for layer_name in layer_names[1:]:
             try:
                 # 读取当前图层
-                gdf = gpd.read_file(gdb_path, layer=layer_name)
+                gdf = 读取矢量(gdb_path, layer=layer_name)
                 
                 # 清理字段名称
                 gdf = _clean_field_names(gdf)
@@ -273,18 +277,19 @@ class MergeThread(QThread):
         
         # 使用utf-8编码保存文件
         try:
-            merged_gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(merged_gdf, output_file, encoding='utf-8')
             return output_file
         except Exception as e:
             # 尝试使用不同的文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_file = os.path.join(output_path, f'gdb_layers_merged_{timestamp}.shp')
-            merged_gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(merged_gdf, output_file, encoding='utf-8')
             return output_file
     
     def _mergeGDBLayersToGDB(self, gdb_path, layer_names):
         """合并多个GDB图层到当前GDB文件"""
         import geopandas as gpd
+        from .矢量读写 import 读取矢量, 写出矢量
         import pandas as pd
         from datetime import datetime
         
@@ -293,7 +298,7 @@ class MergeThread(QThread):
         
         # 读取第一个图层作为基准
         try:
-            merged_gdf = gpd.read_file(gdb_path, layer=layer_names[0])
+            merged_gdf = 读取矢量(gdb_path, layer=layer_names[0])
         except Exception as e:
             raise Exception(f"读取图层 {layer_names[0]} 失败: {e}")
         
@@ -308,7 +313,7 @@ class MergeThread(QThread):
         for layer_name in layer_names[1:]:
             try:
                 # 读取当前图层
-                gdf = gpd.read_file(gdb_path, layer=layer_name)
+                gdf = 读取矢量(gdb_path, layer=layer_name)
                 
                 # 清理字段名称
                 gdf = _clean_field_names(gdf)
@@ -345,12 +350,12 @@ class MergeThread(QThread):
         
         # 保存到当前GDB文件
         try:
-            merged_gdf.to_file(gdb_path, layer=output_layer_name, driver='OpenFileGDB')
+            写出矢量(merged_gdf, gdb_path, layer=output_layer_name)
             return f"{gdb_path}#{output_layer_name}"
         except Exception as e:
             # 尝试使用不同的图层名称
             output_layer_name = f"merged_{timestamp}"
-            merged_gdf.to_file(gdb_path, layer=output_layer_name, driver='OpenFileGDB')
+            写出矢量(merged_gdf, gdb_path, layer=output_layer_name)
             return f"{gdb_path}#{output_layer_name}"
 
 
@@ -569,13 +574,8 @@ class MergeFeaturesFunction(BaseFunction):
             # 清空当前图层列表
             self.listWidgetLayers.clear()
             
-            # 使用geopandas和fiona获取GDB文件中的所有图层
-            import fiona
-            
-            # 获取所有图层名称
-            layer_names = []
-            with fiona.Env():
-                layer_names = fiona.listlayers(gdb_path)
+            # 通过图层目录服务获取GDB文件中的所有图层，GDB未变化时使用缓存
+            layer_names = 获取图层目录().图层名称(gdb_path)
             
             if not layer_names:
                 self.showError("GDB文件中没有找到图层")
@@ -772,11 +772,12 @@ class MergeFeaturesFunction(BaseFunction):
     def _mergeGDBLayers(self, gdb_path, layer_name, output_path):
         """合并单个GDB图层"""
         import geopandas as gpd
+        from .矢量读写 import 读取矢量, 写出矢量
         import pandas as pd
         from datetime import datetime
         
         # 读取GDB图层
-        gdf = gpd.read_file(gdb_path, layer=layer_name)
+        gdf = 读取矢量(gdb_path, layer=layer_name)
         
         # 清理字段名称
         from .矢量操作 import _clean_field_names
@@ -790,20 +791,21 @@ class MergeFeaturesFunction(BaseFunction):
         
         # 使用utf-8编码保存文件
         try:
-            gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(gdf, output_file, encoding='utf-8')
             print(f"GDB图层合并完成并保存为: {output_file}")
             return output_file
         except Exception as e:
             # 尝试使用不同的文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_file = os.path.join(output_path, f'{layer_name}_merged_{timestamp}.shp')
-            gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(gdf, output_file, encoding='utf-8')
             print(f"GDB图层合并完成并保存为: {output_file}")
             return output_file
     
     def _mergeMultipleGDBLayers(self, gdb_path, layer_names, output_path):
         """合并多个GDB图层到SHP文件"""
         import geopandas as gpd
+        from .矢量读写 import 读取矢量, 写出矢量
         import pandas as pd
         from datetime import datetime
         
@@ -812,7 +814,7 @@ class MergeFeaturesFunction(BaseFunction):
         
         # 读取第一个图层作为基准
         try:
-            merged_gdf = gpd.read_file(gdb_path, layer=layer_names[0])
+            merged_gdf = 读取矢量(gdb_path, layer=layer_names[0])
         except Exception as e:
             print(f"读取图层 {layer_names[0]} 失败: {e}")
             return None
@@ -828,7 +830,7 @@ class MergeFeaturesFunction(BaseFunction):
         for layer_name in layer_names[1:]:
             try:
                 # 读取当前图层
-                gdf = gpd.read_file(gdb_path, layer=layer_name)
+                gdf = 读取矢量(gdb_path, layer=layer_name)
                 
                 # 清理字段名称
                 gdf = _clean_field_names(gdf)
@@ -865,20 +867,21 @@ class MergeFeaturesFunction(BaseFunction):
         
         # 使用utf-8编码保存文件
         try:
-            merged_gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(merged_gdf, output_file, encoding='utf-8')
             print(f"多个GDB图层合并完成并保存为: {output_file}")
             return output_file
         except Exception as e:
             # 尝试使用不同的文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_file = os.path.join(output_path, f'gdb_layers_merged_{timestamp}.shp')
-            merged_gdf.to_file(output_file, encoding='utf-8')
+            写出矢量(merged_gdf, output_file, encoding='utf-8')
             print(f"多个GDB图层合并完成并保存为: {output_file}")
             return output_file
     
     def _mergeGDBLayersToGDB(self, gdb_path, layer_names):
         """合并多个GDB图层到当前GDB文件"""
         import geopandas as gpd
+        from .矢量读写 import 读取矢量, 写出矢量
         import pandas as pd
         from datetime import datetime
         
@@ -887,7 +890,7 @@ class MergeFeaturesFunction(BaseFunction):
         
         # 读取第一个图层作为基准
         try:
-            merged_gdf = gpd.read_file(gdb_path, layer=layer_names[0])
+            merged_gdf = 读取矢量(gdb_path, layer=layer_names[0])
         except Exception as e:
             print(f"读取图层 {layer_names[0]} 失败: {e}")
             return None
@@ -903,7 +906,7 @@ class MergeFeaturesFunction(BaseFunction):
         for layer_name in layer_names[1:]:
             try:
                 # 读取当前图层
-                gdf = gpd.read_file(gdb_path, layer=layer_name)
+                gdf = 读取矢量(gdb_path, layer=layer_name)
                 
                 # 清理字段名称
                 gdf = _clean_field_names(gdf)
@@ -942,12 +945,12 @@ class MergeFeaturesFunction(BaseFunction):
         
         # 保存到当前GDB文件
         try:
-            merged_gdf.to_file(gdb_path, layer=output_layer_name, driver='OpenFileGDB')
+            写出矢量(merged_gdf, gdb_path, layer=output_layer_name)
             print(f"多个GDB图层合并完成并保存到当前GDB，图层名称: {output_layer_name}")
             return f"{gdb_path}#{output_layer_name}"
         except Exception as e:
             # 尝试使用不同的图层名称
             output_layer_name = f"merged_{timestamp}"
-            merged_gdf.to_file(gdb_path, layer=output_layer_name, driver='OpenFileGDB')
+            写出矢量(merged_gdf, gdb_path, layer=output_layer_name)
             print(f"多个GDB图层合并完成并保存到当前GDB，图层名称: {output_layer_name}")
             return f"{gdb_path}#{output_layer_name}"
@@ -9,9 +9,11 @@ from PyQt6.QtCore import Qt
 from qfluentwidgets import LineEdit, PushButton, ComboBox
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录
 import threading
 import os
 import geopandas as gpd
+from .矢量读写 import 分块读取矢量, 分块写出器, 要素数量
 
 
 class OrganizeFieldsFunction(BaseFunction):
@@ -254,16 +256,13 @@ class OrganizeFieldsFunction(BaseFunction):
     
     def _update_layer_list(self, file_path):
         """更新矢量图层列表"""
-        import fiona
-        
         self.input_layer_combo.clear()
         self.input_layer_combo.setEnabled(False)
         
         if file_path.lower().endswith('.gdb'):
             # 列出GDB中的所有图层
             try:
-                with fiona.Env():
-                    layers = fiona.listlayers(file_path)
+                layers = 获取图层目录().图层名称(file_path)
                 self.input_layer_combo.addItems(layers)
                 self.input_layer_combo.setEnabled(True)
                 self.input_layer_name = layers[0] if layers else ""
@@ -517,55 +516,56 @@ class OrganizeFieldsFunction(BaseFunction):
         返回:
             处理结果描述
         """
-        # 读取输入数据
+        # 按分块读取输入数据，每个分块整理字段后立即写出，再读取下一块
         self.update_progress_signal.emit(20, "正在读取输入数据...")
-        if input_file.lower().endswith('.gdb') and layer_name:
-            # 读取GDB中的特定图层
-            gdf = gpd.read_file(input_file, layer=layer_name)
+        total_features = 要素数量(input_file, layer=layer_name)
+        if output_type == "SHP文件":
+            writer = 分块写出器(output_path)
         else:
-            # 读取SHP或其他格式文件
-            gdf = gpd.read_file(input_file)
+            writer = 分块写出器(output_path, layer=output_layer)
         
         self.update_progress_signal.emit(40, "正在整理字段...")
-        
-        # 创建新的GeoDataFrame
-        organized_gdf = gpd.GeoDataFrame(geometry=gdf.geometry, crs=gdf.crs)
-        
-        # 遍历字段映射关系
-        for new_field, (old_field, default_value) in field_mapping.items():
-            if old_field is not None:
-                # 如果原始字段存在，则复制值
-                if old_field in gdf.columns:
-                    organized_gdf[new_field] = gdf[old_field]
-                else:
-                    # 如果原始字段不存在，则使用默认值
-                    organized_gdf[new_field] = default_value
-            else:
-                # 如果原始字段名为None，表示继承
-                if new_field in gdf.columns:
-                    organized_gdf[new_field] = gdf[new_field]
+        organized_columns = []
+        for gdf in 分块读取矢量(input_file, layer=layer_name):
+            # 创建新的GeoDataFrame
+            organized_gdf = gpd.GeoDataFrame(geometry=gdf.geometry, crs=gdf.crs)
+            
+            # 遍历字段映射关系
+            for new_field, (old_field, default_value) in field_mapping.items():
+                if old_field is not None:
+                    # 如果原始字段存在，则复制值
+                    if old_field in gdf.columns:
+                        organized_gdf[new_field] = gdf[old_field]
+                    else:
+                        # 如果原始字段不存在，则使用默认值
+                        organized_gdf[new_field] = default_value
                 else:
-                    # 如果原始字段不存在，则使用默认值
-                    organized_gdf[new_field] = default_value
-        
-        self.update_progress_signal.emit(70, "正在保存输出文件...")
+                    # 如果原始字段名为None，表示继承
+                    if new_field in gdf.columns:
+                        organized_gdf[new_field] = gdf[new_field]
+                    else:
+                        # 如果原始字段不存在，则使用默认值
+                        organized_gdf[new_field] = default_value
+            
+            # 保存当前分块
+            writer.写出(organized_gdf)
+            organized_columns = list(organized_gdf.columns)
+            
+            progress = 40 + int(writer.count / max(total_features, 1) * 50)
+            self.update_progress_signal.emit(progress, f"已整理 {writer.count}/{total_features} 个要素...")
         
-        # 保存输出文件
+        # 输出结果描述
         if output_type == "SHP文件":
-            # 保存为SHP文件
-            organized_gdf.to_file(output_path, driver='ESRI Shapefile')
-            result_msg = f"成功整理 {len(gdf)} 个要素的字段\n"
+            result_msg = f"成功整理 {writer.count} 个要素的字段\n"
             result_msg += f"输入文件: {os.path.basename(input_file)}\n"
             result_msg += f"输出文件: {os.path.basename(output_path)}\n"
-            result_msg += f"整理后的字段列表: {list(organized_gdf.columns)}"
+            result_msg += f"整理后的字段列表: {organized_columns}"
         else:
-            # 保存为GDB图层
-            organized_gdf.to_file(output_path, layer=output_layer, driver='OpenFileGDB')
-            result_msg = f"成功整理 {len(gdf)} 个要素的字段\n"
+            result_msg = f"成功整理 {writer.count} 个要素的字段\n"
             result_msg += f"输入文件: {os.path.basename(input_file)}\n"
             result_msg += f"输出GDB: {os.path.basename(output_path)}\n"
             result_msg += f"输出图层: {output_layer}\n"
-            result_msg += f"整理后的字段列表: {list(organized_gdf.columns)}"
+            result_msg += f"整理后的字段列表: {organized_columns}"
         
         # 更新进度为100%
         self.update_progress_signal.emit(100, "整理完成！")
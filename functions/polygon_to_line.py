@@ -9,9 +9,11 @@ from PyQt6.QtCore import Qt
 from qfluentwidgets import LineEdit, PushButton, ComboBox
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录
 import threading
 import os
 import geopandas as gpd
+from .矢量读写 import 写出矢量, 分块读取矢量, 要素数量
 from shapely.geometry import LineString, MultiLineString
 from shapely.ops import unary_union
 
@@ -308,16 +310,13 @@ class PolygonToLineFunction(BaseFunction):
             
     def _update_layer_list(self, file_path):
         """更新矢量图层列表"""
-        import fiona
-        
         self.input_layer_combo.clear()
         self.input_layer_combo.setEnabled(False)
         
         if file_path.lower().endswith('.gdb'):
             # 列出GDB中的所有图层
             try:
-                with fiona.Env():
-                    layers = fiona.listlayers(file_path)
+                layers = 获取图层目录().图层名称(file_path)
                 self.input_layer_combo.addItems(layers)
                 self.input_layer_combo.setEnabled(True)
                 self.input_layer_name = layers[0] if layers else ""
@@ -477,49 +476,52 @@ class PolygonToLineFunction(BaseFunction):
         返回:
             处理结果描述
         """
-        # 读取输入数据
+        # 按分块读取输入数据，只读取几何，每个分块提取边界线后即释放
         self.update_progress_signal.emit(10, "正在读取输入数据...")
-        if input_file.lower().endswith('.gdb') and layer_name:
-            # 读取GDB中的特定图层
-            gdf = gpd.read_file(input_file, layer=layer_name)
-        else:
-            # 读取SHP或其他格式文件
-            gdf = gpd.read_file(input_file)
-        
-        # 检查几何类型
-        self.update_progress_signal.emit(20, "正在检查几何类型...")
-        if not all(gdf.geometry.geom_type.isin(['Polygon', 'MultiPolygon'])):
-            raise ValueError("输入文件中包含非多边形要素")
+        total_features = 要素数量(input_file, layer=layer_name)
         
         # 转换为线
         self.update_progress_signal.emit(30, "正在转换为线...")
-        line_geometries = []
-        total_features = len(gdf)
-        for i, geom in enumerate(gdf.geometry):
-            # 更新进度
-            progress = 30 + int((i / total_features) * 40)
-            self.update_progress_signal.emit(progress, f"正在处理第 {i+1}/{total_features} 个要素...")
+        chunk_lines = []
+        crs = None
+        processed = 0
+        for chunk in 分块读取矢量(input_file, layer=layer_name, columns=[]):
+            crs = chunk.crs
             
-            # 对于每个多边形，获取其边界
-            if geom.geom_type == 'Polygon':
-                # 单个多边形，获取外环
-                line_geometries.append(geom.exterior)
-                # 获取所有内环
-                for interior in geom.interiors:
-                    line_geometries.append(interior)
-            elif geom.geom_type == 'MultiPolygon':
-                # 多个多边形，遍历每个多边形
-                for polygon in geom.geoms:
-                    line_geometries.append(polygon.exterior)
+            # 检查几何类型
+            if not all(chunk.geometry.geom_type.isin(['Polygon', 'MultiPolygon'])):
+                raise ValueError("输入文件中包含非多边形要素")
+            
+            # 对于每个多边形，获取其外环和所有内环
+            line_geometries = []
+            for geom in chunk.geometry:
+                if geom.geom_type == 'Polygon':
+                    # 单个多边形，获取外环
+                    line_geometries.append(geom.exterior)
                     # 获取所有内环
-                    for interior in polygon.interiors:
+                    for interior in geom.interiors:
                         line_geometries.append(interior)
+                elif geom.geom_type == 'MultiPolygon':
+                    # 多个多边形，遍历每个多边形
+                    for polygon in geom.geoms:
+                        line_geometries.append(polygon.exterior)
+                        # 获取所有内环
+                        for interior in polygon.interiors:
+                            line_geometries.append(interior)
+            
+            # 分块内先合并一次，相邻图斑的公共边只保留一份
+            chunk_lines.append(unary_union(line_geometries))
+            
+            # 更新进度
+            processed += len(chunk)
+            progress = 30 + int((processed / total_features) * 40)
+            self.update_progress_signal.emit(progress, f"已处理 {processed}/{total_features} 个要素...")
         
         # 移除重复的线
         self.update_progress_signal.emit(70, "正在移除重复的线...")
-        # 使用unary_union合并所有线，然后再分解为单个线要素
+        # 合并各分块的线，去除分块之间重复的公共边
         # 这将自动处理重叠和重复的线
-        unioned = unary_union(line_geometries)
+        unioned = unary_union(chunk_lines)
         
         # 提取所有唯一的线
         self.update_progress_signal.emit(80, "正在提取唯一的线...")
@@ -534,21 +536,21 @@ class PolygonToLineFunction(BaseFunction):
         self.update_progress_signal.emit(85, "正在创建输出数据...")
         output_gdf = gpd.GeoDataFrame(
             {'geometry': unique_lines}, 
-            crs=gdf.crs
+            crs=crs
         )
         
         # 保存输出文件
         self.update_progress_signal.emit(90, "正在保存输出文件...")
         if output_type == "SHP文件":
             # 保存为SHP文件
-            output_gdf.to_file(output_path, driver='ESRI Shapefile')
-            result_msg = f"成功转换 {len(gdf)} 个多边形为 {len(unique_lines)} 条线\n"
+            写出矢量(output_gdf, output_path)
+            result_msg = f"成功转换 {processed} 个多边形为 {len(unique_lines)} 条线\n"
             result_msg += f"输入文件: {os.path.basename(input_file)}\n"
             result_msg += f"输出文件: {os.path.basename(output_path)}"
         else:
             # 保存为GDB图层
-            output_gdf.to_file(output_path, layer=output_layer, driver='OpenFileGDB')
-            result_msg = f"成功转换 {len(gdf)} 个多边形为 {len(unique_lines)} 条线\n"
+            写出矢量(output_gdf, output_path, layer=output_layer)
+            result_msg = f"成功转换 {processed} 个多边形为 {len(unique_lines)} 条线\n"
             result_msg += f"输入文件: {os.path.basename(input_file)}\n"
             result_msg += f"输出GDB: {os.path.basename(output_path)}\n"
             result_msg += f"输出图层: {output_layer}"
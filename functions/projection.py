@@ -9,6 +9,7 @@ from qfluentwidgets import PrimaryPushButton, TransparentPushButton, ComboBox, S
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
 import geopandas as gpd
+from .矢量读写 import 读取矢量
 import sys
 import os
 
@@ -22,7 +23,7 @@ class ProjectionThread(QThread):
     def __init__(self, file_path, proj_index, operation_type, parent=None):
         """
         Args:
-            file_path: 矢量文件路径
+            file_path: 矢量文件路径，多个文件时为路径列表
             proj_index: 投影索引
             operation_type: '修改数据投影' 或 '定义数据投影'
         """
@@ -35,18 +36,37 @@ class ProjectionThread(QThread):
         """线程运行方法"""
         try:
             # 导入投影转换函数
-            from gis_workflow.投影转换 import 修改数据投影, 定义数据投影
+            from gis_workflow.投影转换 import 修改数据投影, 定义数据投影, 批量修改数据投影
+            
+            file_paths = self.file_path if isinstance(self.file_path, (list, tuple)) else [self.file_path]
+            
+            # 多个文件修改投影时使用进程池批量处理
+            if self.operation_type == '修改数据投影' and len(file_paths) > 1:
+                results, failed = 批量修改数据投影(file_paths, self.proj_index)
+                if results:
+                    message = f"投影操作成功完成！\n共处理 {len(results)} 个文件"
+                    if failed:
+                        message += f"\n失败 {len(failed)} 个文件:\n" + "\n".join(failed)
+                    self.success.emit(message)
+                else:
+                    self.error.emit("投影操作执行失败！")
+                return
             
             # 根据操作类型调用相应的函数
-            if self.operation_type == '修改数据投影':
-                result = 修改数据投影(self.file_path, self.proj_index)
-            elif self.operation_type == '定义数据投影':
-                result = 定义数据投影(self.file_path, self.proj_index)
-            else:
-                raise ValueError(f"未知的操作类型: {self.operation_type}")
+            results = []
+            for file_path in file_paths:
+                if self.operation_type == '修改数据投影':
+                    result = 修改数据投影(file_path, self.proj_index)
+                elif self.operation_type == '定义数据投影':
+                    result = 定义数据投影(file_path, self.proj_index)
+                else:
+                    raise ValueError(f"未知的操作类型: {self.operation_type}")
+                if result:
+                    results.append(result)
             
-            if result:
-                self.success.emit(f"投影操作成功完成！\n输出文件: {result}")
+            if results:
+                output_text = '\n'.join(results)
+                self.success.emit(f"投影操作成功完成！\n输出文件: {output_text}")
             else:
                 self.error.emit("投影操作执行失败！")
                 
@@ -79,7 +99,7 @@ class ProjectionFunction(BaseFunction):
             "<br>1. <b>修改数据投影</b>功能用于将矢量数据从当前投影转换为指定投影"
             "<br>2. <b>定义数据投影</b>功能用于为无投影信息的矢量数据指定投影坐标系"
             "<br>3. <b>操作步骤：</b>"
-            "<br>   - 点击'添加矢量路径'按钮选择矢量文件"
+            "<br>   - 点击'添加矢量路径'按钮选择矢量文件（可多选，多个文件将并行处理）"
             "<br>   - 从下拉框选择目标投影参数"
             "<br>   - 点击'修改投影'或'定义投影'按钮"
             "<br>4. <b>输出结果：</b>"
@@ -161,19 +181,21 @@ class ProjectionFunction(BaseFunction):
     
     def _selectVectorFile(self):
         """选择矢量文件并显示坐标系信息"""
-        file_path, _ = QFileDialog.getOpenFileName(self, "选择矢量文件", "", "矢量文件 (*.shp)")
-        if file_path:
-            self.label7.setText(file_path)
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "选择矢量文件", "", "矢量文件 (*.shp)")
+        if file_paths:
+            self.label7.setText(';'.join(file_paths))
+            # 显示第一个文件的坐标系信息
+            file_path = file_paths[0]
             try:
                 # 尝试读取矢量文件
                 try:
-                    gdf = gpd.read_file(file_path)
+                    gdf = 读取矢量(file_path)
                 except Exception as shx_error:
                     # 检查是否为缺少.shx文件的错误
                     if "SHAPE_RESTORE_SHX" in str(shx_error):
                         import os
                         os.environ['SHAPE_RESTORE_SHX'] = 'YES'
-                        gdf = gpd.read_file(file_path)
+                        gdf = 读取矢量(file_path)
                     else:
                         raise
                 
@@ -192,7 +214,7 @@ class ProjectionFunction(BaseFunction):
                 bounds_info = f"范围: X({bounds[0]:.2f}~{bounds[2]:.2f}), Y({bounds[1]:.2f}~{bounds[3]:.2f})"
                 
                 # 更新界面上的标签
-                info_text = f"📊 矢量文件信息\n\n" \
+                info_text = f"📊 矢量文件信息（共 {len(file_paths)} 个文件，显示第一个）\n\n" \
                             f"📍 坐标系统：\n{crs_info}\n\n" \
                             f"📐 数据范围：\n{bounds_info}"
                 self.crsInfoLabel.setText(info_text)
@@ -230,7 +252,7 @@ class ProjectionFunction(BaseFunction):
         
         # 创建并启动投影转换线程
         self.projection_thread = ProjectionThread(
-            file_path=self.label7.text(),
+            file_path=[p for p in self.label7.text().split(';') if p],
             proj_index=self.comboBox.currentIndex(),
             operation_type=operation_type,
             parent=self
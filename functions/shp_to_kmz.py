@@ -11,6 +11,7 @@ from qfluentwidgets import (LineEdit, PushButton, ComboBox, CheckBox, SpinBox,
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
 import geopandas as gpd
+from .矢量读写 import 读取矢量
 import os
 
 
@@ -175,7 +176,7 @@ class ShpToKmzFunction(BaseFunction):
             self.filePathLabel.setText(file_path)
             try:
                 # 读取字段列表
-                gdf = gpd.read_file(file_path)
+                gdf = 读取矢量(file_path)
                 fields = gdf.columns.tolist()
                 if 'geometry' in fields:
                     fields.remove('geometry')
@@ -9,10 +9,12 @@ from PyQt6.QtCore import Qt
 from qfluentwidgets import LineEdit, PushButton, ComboBox, SpinBox
 from qfluentwidgets import FluentIcon as FIF
 from .base_function import BaseFunction
+from .图层目录 import 获取图层目录
 import threading
 import os
 import pandas as pd
 import geopandas as gpd
+from .矢量读写 import 读取矢量, 写出矢量
 
 
 class SpatialJoinFieldsFunction(BaseFunction):
@@ -290,9 +292,7 @@ class SpatialJoinFieldsFunction(BaseFunction):
                     widget.setVisible(True)
             # 列出GDB中的所有图层
             try:
-                import fiona
-                with fiona.Env():
-                    layers = fiona.listlayers(file_path)
+                layers = 获取图层目录().图层名称(file_path)
                 combo.addItems(layers)
                 combo.setEnabled(True)
             except Exception as e:
@@ -558,15 +558,9 @@ class SpatialJoinFieldsFunction(BaseFunction):
         # 读取要素A和要素B
         self.update_progress_signal.emit(20, "正在读取要素数据...")
         # 根据文件类型选择读取方式
-        if feature_a_path.lower().endswith('.gdb') and feature_a_layer:
-            feature_a = gpd.read_file(feature_a_path, layer=feature_a_layer)
-        else:
-            feature_a = gpd.read_file(feature_a_path)
+        feature_a = 读取矢量(feature_a_path, layer=feature_a_layer)
             
-        if feature_b_path.lower().endswith('.gdb') and feature_b_layer:
-            feature_b = gpd.read_file(feature_b_path, layer=feature_b_layer)
-        else:
-            feature_b = gpd.read_file(feature_b_path)
+        feature_b = 读取矢量(feature_b_path, layer=feature_b_layer)
         
         self.update_progress_signal.emit(30, "正在检查坐标系...")
         # 检查坐标系是否一致
@@ -630,7 +624,7 @@ class SpatialJoinFieldsFunction(BaseFunction):
         # 保存输出文件
         if output_type == "SHP文件":
             # 保存为SHP文件
-            final_gdf.to_file(output_path, driver='ESRI Shapefile')
+            写出矢量(final_gdf, output_path)
             result_msg = f"成功执行空间挂接，重叠面积阈值: {threshold}\n"
             result_msg += f"要素A: {os.path.basename(feature_a_path)}\n"
             result_msg += f"要素B: {os.path.basename(feature_b_path)}\n"
@@ -640,7 +634,7 @@ class SpatialJoinFieldsFunction(BaseFunction):
             result_msg += f"匹配成功率: {len(matched_a) / len(feature_a) * 100:.2f}%"
         else:
             # 保存为GDB图层
-            final_gdf.to_file(output_path, layer=output_layer, driver='OpenFileGDB')
+            写出矢量(final_gdf, output_path, layer=output_layer)
             result_msg = f"成功执行空间挂接，重叠面积阈值: {threshold}\n"
             result_msg += f"要素A: {os.path.basename(feature_a_path)}\n"
             result_msg += f"要素B: {os.path.basename(feature_b_path)}\n"
@@ -11,10 +11,20 @@ from .base_function import BaseFunction
 import os
 import sys
 import geopandas as gpd
+from .矢量读写 import 读取矢量, 写出矢量, 读取计划
 import pandas as pd
 import openpyxl
 
 
+# 各图层汇总时用到的字段，只读取这些字段和几何，LD图层只统计面积
+汇总读取计划 = {
+    'YJJBNTBHTB': 读取计划(columns=['YJJBNTLX']),
+    '管理边界划定成果': 读取计划(columns=['ZHLX', 'CLLX', 'HSHKCXS', 'GLBJLX', 'HSHPDJB', 'HSHPDDL']),
+    'DLTB': 读取计划(columns=['TKJ_DLBM', 'KCXS']),
+    'LD': 读取计划(columns=[]),
+}
+
+
 class TrialPlanSummaryThread(QThread):
     """试划成果总结统计线程"""
     
@@ -48,19 +58,19 @@ class TrialPlanSummaryThread(QThread):
             
             # 读取YJJBNTBHTB图层
             self.progress.emit(10, "正在读取YJJBNTBHTB图层...")
-            gdf_yjjb = gpd.read_file(self.gdb_path, layer='YJJBNTBHTB')
+            gdf_yjjb = 读取矢量(self.gdb_path, layer='YJJBNTBHTB', 计划=汇总读取计划['YJJBNTBHTB'])
             
             # 读取管理边界划定成果图层
             self.progress.emit(20, "正在读取管理边界划定成果图层...")
-            gdf_glbj = gpd.read_file(self.gdb_path, layer='管理边界划定成果')
+            gdf_glbj = 读取矢量(self.gdb_path, layer='管理边界划定成果', 计划=汇总读取计划['管理边界划定成果'])
             
             # 读取DLTB图层
             self.progress.emit(30, "正在读取DLTB图层...")
-            gdf_dltb = gpd.read_file(self.gdb_path, layer='DLTB')
+            gdf_dltb = 读取矢量(self.gdb_path, layer='DLTB', 计划=汇总读取计划['DLTB'])
             
             # 读取LD图层
             self.progress.emit(40, "正在读取LD图层...")
-            gdf_ld = gpd.read_file(self.gdb_path, layer='LD')
+            gdf_ld = 读取矢量(self.gdb_path, layer='LD', 计划=汇总读取计划['LD'])
             
             # 检查必要字段是否存在
             self.progress.emit(50, "正在检查必要字段...")
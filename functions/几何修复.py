@@ -0,0 +1,136 @@
+# coding:utf-8
+"""
+几何有效性预处理
+用shapely的数组函数一次检查整列几何，只对无效几何调用make_valid，
+代替各工具中逐个要素的is_valid/make_valid/buffer(0)
+
+传入数据源路径时，修复结果按数据源签名缓存在本次运行中，
+同一个图层被多个工具依次处理时不再重复检查和修复
+"""
+
+import threading
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+# 修复结果缓存：{(数据源, 图层): 修复记录}
+_修复缓存 = {}
+_锁 = threading.Lock()
+
+
+class _修复记录:
+    """单个图层的检查状态，按要素序号记录是否已检查和修复后的几何"""
+
+    def __init__(self, signature):
+        self.signature = signature
+        self.checked = np.zeros(0, dtype=bool)
+        self.repaired = {}
+
+    def 扩展(self, size):
+        if size > len(self.checked):
+            checked = np.zeros(size, dtype=bool)
+            checked[:len(self.checked)] = self.checked
+            self.checked = checked
+
+
+def _获取记录(path, layer):
+    """获取图层的修复记录，数据源变化后重新记录"""
+    import os
+    from .数据缓存 import _数据源签名
+    from .矢量读写 import 拆分图层路径
+
+    path, layer = 拆分图层路径(path, layer)
+    key = (os.path.normcase(os.path.abspath(path)), layer)
+    signature = _数据源签名(path)
+    if signature is None:
+        return None
+    record = _修复缓存.get(key)
+    if record is None or record.signature != signature:
+        record = _修复记录(signature)
+        _修复缓存[key] = record
+    return record
+
+
+def 修复无效几何(data, path=None, layer=None, 转为二维=False):
+    """
+    修复GeoDataFrame或GeoSeries中的无效几何
+
+    参数:
+        data: GeoDataFrame或GeoSeries
+        path: 数据来源路径，传入时按要素序号缓存修复结果；
+              只适用于未经过滤直接读取（或分块读取）的数据，索引即要素序号
+        layer: 图层名称
+        转为二维: 是否同时去掉Z坐标
+
+    返回:
+        (修复后的数据, 修复数量)，没有需要修复的几何时返回原对象
+    """
+    geometry = data if isinstance(data, gpd.GeoSeries) else data.geometry
+    geoms = np.asarray(geometry.values, dtype=object)
+    labels = geometry.index.to_numpy()
+
+    record = None
+    if path is not None and len(labels) and labels.dtype.kind in 'iu' and labels.min() >= 0:
+        with _锁:
+            record = _获取记录(path, layer)
+
+    if record is None:
+        to_check = np.ones(len(geoms), dtype=bool)
+    else:
+        with _锁:
+            record.扩展(int(labels.max()) + 1)
+            to_check = ~record.checked[labels]
+
+    # 只检查之前没有检查过的几何，空几何视为有效
+    invalid = np.zeros(len(geoms), dtype=bool)
+    if to_check.any():
+        checking = geoms[to_check]
+        invalid[to_check] = ~(shapely.is_valid(checking) | shapely.is_missing(checking))
+
+    result = geoms
+    repaired_count = 0
+    if invalid.any():
+        result = geoms.copy()
+        result[invalid] = shapely.make_valid(geoms[invalid])
+        repaired_count += int(invalid.sum())
+
+    if record is not None:
+        with _锁:
+            for label, geom in zip(labels[invalid], result[invalid]):
+                record.repaired[int(label)] = geom
+            record.checked[labels[to_check]] = True
+            # 之前已修复过的几何直接取缓存结果
+            cached = []
+            if record.repaired:
+                known = np.fromiter(record.repaired, dtype=np.int64, count=len(record.repaired))
+                cached = np.flatnonzero(~to_check & np.isin(labels, known))
+            if len(cached):
+                if result is geoms:
+                    result = geoms.copy()
+                for i in cached:
+                    result[i] = record.repaired[int(labels[i])]
+                repaired_count += len(cached)
+
+    if 转为二维:
+        has_z = shapely.has_z(result)
+        if has_z.any():
+            if result is geoms:
+                result = geoms.copy()
+            result[has_z] = shapely.force_2d(result[has_z])
+
+    if result is geoms:
+        return data, 0
+
+    series = gpd.GeoSeries(result, index=geometry.index, crs=geometry.crs, name=geometry.name)
+    if isinstance(data, gpd.GeoSeries):
+        return series, repaired_count
+    data = data.copy()
+    data[geometry.name] = series
+    return data, repaired_count
+
+
+def 清除修复缓存():
+    """清除全部修复记录"""
+    with _锁:
+        _修复缓存.clear()
@@ -0,0 +1,152 @@
+# coding:utf-8
+"""
+矢量图层句柄
+添加数据时只读取图层信息（字段、坐标系、范围、要素数），不读取要素；
+下游模块需要数据时才读取，读取前可以叠加字段、SQL条件和范围过滤，
+由读取矢量下推到OGR执行，只读入实际需要的要素
+"""
+
+import threading
+
+from .矢量读写 import 拆分图层路径, 读取矢量, 分块读取矢量, 读取计划, _读取编码
+
+
+class 图层句柄:
+    """
+    延迟读取的矢量图层
+
+    属性:
+        name: 图层显示名称
+        path: 数据源路径
+        layer: 图层名（SHP为None）
+        columns: 属性字段
+        dtypes: {字段名: 数据类型}
+        crs: 坐标系
+        bounds: 图层范围(minx, miny, maxx, maxy)
+        geometry_type: 几何类型
+        encoding: 属性编码，SHP打开时检测，读取时使用同一编码
+        计划: 读取计划，None表示读取全部
+    """
+
+    def __init__(self, path, layer=None, name=None, columns=None, dtypes=None, crs=None,
+                 bounds=None, geometry_type=None, count=None, 计划=None, encoding=None):
+        self.path, self.layer = 拆分图层路径(path, layer)
+        self.name = name or self.layer or self.path
+        self.columns = list(columns or [])
+        self.dtypes = dict(dtypes or {})
+        self.crs = crs
+        self.bounds = bounds
+        self.geometry_type = geometry_type
+        self.encoding = encoding
+        self.计划 = 计划
+        self._count = count
+        self._gdf = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def 打开(cls, path, layer=None, name=None):
+        """只读取图层信息创建句柄"""
+        import pyogrio
+        path, layer = 拆分图层路径(path, layer)
+        # 字段名按与读取时相同的编码解析，否则筛选字段时会对不上
+        encoding = _读取编码(path)
+        info = pyogrio.read_info(path, layer=layer, encoding=encoding,
+                                 force_feature_count=True, force_total_bounds=True)
+        columns = [str(col) for col in info.get('fields', [])]
+        count = info.get('features')
+        return cls(
+            path, layer=layer, name=name,
+            columns=columns,
+            dtypes=dict(zip(columns, [str(dtype) for dtype in info.get('dtypes', [])])),
+            crs=info.get('crs'),
+            bounds=info.get('total_bounds'),
+            geometry_type=info.get('geometry_type'),
+            count=count if count is not None and count >= 0 else None,
+            encoding=encoding,
+        )
+
+    @property
+    def 已过滤(self):
+        """是否带有SQL条件或范围过滤"""
+        return self.计划 is not None and (self.计划.where or self.计划.bbox is not None)
+
+    @property
+    def count(self):
+        """要素数量，带过滤条件且尚未读取时为None"""
+        if self._gdf is not None:
+            return len(self._gdf)
+        return None if self.已过滤 else self._count
+
+    def __len__(self):
+        count = self.count
+        return count if count is not None else len(self.读取())
+
+    def __repr__(self):
+        return f"图层句柄({self.name}, {self.计划 or '全部要素'})"
+
+    def 筛选(self, columns=None, where=None, bbox=None, crs=None):
+        """
+        叠加读取条件，返回新的句柄，不读取数据
+
+        参数:
+            columns: 只保留的字段，与已有字段取交集
+            where: OGR SQL条件，与已有条件取并(AND)
+            bbox: 范围过滤，只是减少读取量的预筛选，结果中仍可能有范围外的要素
+            crs: bbox所在的坐标系
+        """
+        plan = self.计划 or 读取计划()
+        new_columns = plan.columns
+        if columns is not None:
+            new_columns = [col for col in columns if col in (plan.columns if plan.columns is not None else self.columns)]
+        new_where = plan.where
+        if where:
+            new_where = f"({plan.where}) AND ({where})" if plan.where else where
+        new_bbox, new_crs = plan.bbox, plan.crs
+        if bbox is not None:
+            new_bbox, new_crs = tuple(float(value) for value in bbox), crs
+            # 同一坐标系下两个范围取交集，否则使用新范围
+            if plan.bbox is not None and _同一坐标系(plan.crs, crs):
+                new_bbox = (max(plan.bbox[0], bbox[0]), max(plan.bbox[1], bbox[1]),
+                            min(plan.bbox[2], bbox[2]), min(plan.bbox[3], bbox[3]))
+
+        handle = 图层句柄(
+            self.path, layer=self.layer, name=self.name,
+            columns=new_columns if new_columns is not None else self.columns,
+            dtypes={col: dtype for col, dtype in self.dtypes.items()
+                    if new_columns is None or col in new_columns},
+            crs=self.crs, bounds=self.bounds, geometry_type=self.geometry_type, count=self._count,
+            计划=读取计划(columns=new_columns, bbox=new_bbox, where=new_where, crs=new_crs),
+            encoding=self.encoding,
+        )
+        return handle
+
+    def 读取(self):
+        """读取为GeoDataFrame，同一句柄只读取一次"""
+        with self._lock:
+            if self._gdf is None:
+                print(f"读取图层 {self.name}: {self.计划 or '全部要素'}")
+                self._gdf = 读取矢量(self.path, layer=self.layer, encoding=self.encoding, 计划=self.计划)
+            return self._gdf
+
+    def 分块读取(self, 分块大小=20000):
+        """逐块读取，已经读取过时直接切分内存中的数据"""
+        if self._gdf is not None:
+            for start in range(0, len(self._gdf), 分块大小):
+                yield self._gdf.iloc[start:start + 分块大小]
+            return
+        yield from 分块读取矢量(self.path, layer=self.layer, 分块大小=分块大小, encoding=self.encoding, 计划=self.计划)
+
+    def 释放(self):
+        """释放已读取的数据，之后需要时重新读取"""
+        with self._lock:
+            self._gdf = None
+
+
+def _同一坐标系(crs1, crs2):
+    if crs1 is None or crs2 is None:
+        return crs1 is None and crs2 is None
+    from pyproj import CRS
+    try:
+        return CRS.from_user_input(crs1) == CRS.from_user_input(crs2)
+    except Exception:
+        return False
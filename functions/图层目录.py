@@ -0,0 +1,288 @@
+# coding:utf-8
+"""
+图层目录服务
+缓存GDB/GPKG/SHP的图层列表、几何类型、要素数量、坐标系和字段结构，
+所有选择图层的对话框共用，数据源未变化时直接返回缓存结果
+
+缓存同时保存到用户目录，重启软件后依然有效；
+数据源目录或其中表文件的修改时间变化时自动重新读取
+"""
+
+import json
+import os
+import threading
+
+from .矢量读写 import 拆分图层路径, 读取矢量, _读取编码
+
+# 面图层对应的几何类型
+面几何类型 = ('Polygon', 'MultiPolygon', 'Polygon Z', 'MultiPolygon Z',
+            'Polygon M', 'MultiPolygon M', 'Polygon ZM', 'MultiPolygon ZM')
+
+
+def _数据源签名(path):
+    """
+    数据源的变化签名
+
+    GDB为目录，新建或删除图层会改变目录的修改时间，
+    图层内容修改只会改变对应的.gdbtable文件，因此一并记录表文件的最新修改时间；
+    SHP只修改属性（例如增加字段）时.shp不变，因此一并记录.dbf和.cpg
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    if not os.path.isdir(path):
+        signature = [stat.st_mtime_ns, stat.st_size]
+        if path.lower().endswith('.shp'):
+            base = os.path.splitext(path)[0]
+            for ext in ('.dbf', '.cpg'):
+                try:
+                    sidecar = os.stat(base + ext)
+                    signature += [sidecar.st_mtime_ns, sidecar.st_size]
+                except OSError:
+                    signature += [None, None]
+        return signature
+
+    latest = 0
+    count = 0
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.endswith(('.gdbtable', '.gdbtablx')):
+                count += 1
+                latest = max(latest, entry.stat().st_mtime_ns)
+    return [stat.st_mtime_ns, latest, count]
+
+
+class LayerCatalog:
+    """图层目录服务（单例模式）"""
+
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self._initialized = True
+        self._lock = threading.RLock()
+        # 将目录缓存保存到用户目录的cache文件夹中
+        user_dir = os.path.expanduser('~')
+        self.cache_dir = os.path.join(user_dir, '知秋工作平台', 'cache')
+        self.cache_file = os.path.join(self.cache_dir, 'layer_catalog.json')
+        self.catalogs = self._load()
+        # 仅在本次运行内有效的附加结果缓存，例如文件系统方式解析的GDB结构
+        self._extra = {}
+
+    def _load(self):
+        """从文件加载目录缓存，数据源已不存在的条目直接移除"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                catalogs = json.load(f)
+        except Exception:
+            return {}
+        if not isinstance(catalogs, dict):
+            return {}
+        existing = {key: catalog for key, catalog in catalogs.items() if os.path.exists(key)}
+        if len(existing) != len(catalogs):
+            print(f"移除 {len(catalogs) - len(existing)} 个已不存在的数据源目录缓存")
+            self.catalogs = existing
+            self._save()
+        return existing
+
+    def _save(self):
+        """保存目录缓存到文件"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_file = self.cache_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.catalogs, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"保存图层目录缓存失败: {e}")
+
+    @staticmethod
+    def _key(path):
+        path, _ = 拆分图层路径(path)
+        return os.path.normcase(os.path.abspath(path))
+
+    def _catalog(self, path):
+        """获取数据源的目录条目，签名变化时重新列出图层"""
+        import pyogrio
+
+        key = self._key(path)
+        signature = _数据源签名(key)
+        if signature is None:
+            raise FileNotFoundError(f"数据源不存在: {path}")
+
+        with self._lock:
+            catalog = self.catalogs.get(key)
+            if catalog is not None and catalog.get('signature') == signature:
+                return key, catalog
+
+            layers = pyogrio.list_layers(key)
+            catalog = {
+                'signature': signature,
+                'layers': [str(name) for name in layers[:, 0]],
+                'info': {
+                    str(name): {'geometry_type': geometry_type}
+                    for name, geometry_type in layers
+                },
+            }
+            self.catalogs[key] = catalog
+            self._extra.pop(key, None)
+            self._save()
+            return key, catalog
+
+    def _layer_info(self, key, catalog, layer):
+        """读取单个图层的详细信息，结果写入目录条目"""
+        import pyogrio
+
+        info = catalog['info'].setdefault(layer, {})
+        # SHP按与读取矢量相同的方式确定编码，字段名与实际读取的数据一致
+        encoding = _读取编码(key)
+        if 'fields' in info and info.get('encoding') == encoding:
+            return info, False
+
+        layer_arg = layer if key.lower().endswith(('.gdb', '.gpkg')) else None
+        try:
+            meta = pyogrio.read_info(key, layer=layer_arg, encoding=encoding, force_feature_count=True)
+        except Exception as e:
+            # 缺少.shx文件时让GDAL自动恢复
+            if "SHAPE_RESTORE_SHX" not in str(e):
+                raise
+            os.environ['SHAPE_RESTORE_SHX'] = 'YES'
+            meta = pyogrio.read_info(key, layer=layer_arg, encoding=encoding, force_feature_count=True)
+        info.update({
+            'encoding': encoding,
+            'geometry_type': meta.get('geometry_type') or info.get('geometry_type'),
+            'feature_count': int(meta.get('features', -1)),
+            'crs': meta.get('crs'),
+            'fields': dict(zip([str(f) for f in meta['fields']], [str(d) for d in meta['dtypes']])),
+        })
+        return info, True
+
+    def 图层名称(self, path, 几何类型=None):
+        """
+        列出数据源中的图层名称
+
+        参数:
+            path: GDB/GPKG/SHP路径
+            几何类型: 只保留指定几何类型的图层，例如面几何类型，None表示全部
+        """
+        _, catalog = self._catalog(path)
+        if 几何类型 is None:
+            return list(catalog['layers'])
+        return [name for name in catalog['layers']
+                if catalog['info'].get(name, {}).get('geometry_type') in 几何类型]
+
+    def 图层信息(self, path, layer=None):
+        """
+        获取单个图层的几何类型、要素数量、坐标系和字段结构
+
+        返回:
+            dict，包含geometry_type、feature_count、crs、fields（字段名到类型的映射）
+        """
+        key, catalog = self._catalog(path)
+        _, path_layer = 拆分图层路径(path, layer)
+        layer = path_layer or catalog['layers'][0]
+        with self._lock:
+            info, changed = self._layer_info(key, catalog, layer)
+            if changed:
+                self._save()
+        return dict(info)
+
+    def 全部图层信息(self, path):
+        """获取数据源中所有图层的详细信息，返回[(图层名, 信息)]"""
+        key, catalog = self._catalog(path)
+        result = []
+        changed = False
+        with self._lock:
+            for layer in catalog['layers']:
+                try:
+                    info, layer_changed = self._layer_info(key, catalog, layer)
+                    changed = changed or layer_changed
+                except Exception as e:
+                    print(f"读取图层 {layer} 信息失败: {e}")
+                    info = catalog['info'].get(layer, {})
+                result.append((layer, dict(info)))
+            if changed:
+                self._save()
+        return result
+
+    def 缓存结果(self, path, name, func):
+        """
+        按数据源签名缓存任意计算结果（仅本次运行内有效）
+
+        用于目录服务无法处理时的备用解析方法，数据源变化后重新计算
+        """
+        key = self._key(path)
+        signature = _数据源签名(key)
+        with self._lock:
+            entry = self._extra.get(key)
+            if entry is None or entry['signature'] != signature:
+                entry = {'signature': signature, 'results': {}}
+                self._extra[key] = entry
+            if name not in entry['results']:
+                entry['results'][name] = func()
+            return entry['results'][name]
+
+    def 清除缓存(self, path=None):
+        """清除指定数据源或全部数据源的目录缓存"""
+        with self._lock:
+            if path is None:
+                self.catalogs.clear()
+                self._extra.clear()
+            else:
+                key = self._key(path)
+                self.catalogs.pop(key, None)
+                self._extra.pop(key, None)
+            self._save()
+
+
+def 获取图层目录():
+    """获取全局图层目录服务"""
+    return LayerCatalog()
+
+
+def 读取字段信息(path, layer=None, 预览行数=0):
+    """
+    只读取图层结构获取字段信息，不读取要素，用于填充字段下拉框
+
+    参数:
+        path: SHP/GDB/GPKG路径，支持"xxx.gdb|图层名"
+        layer: 图层名称，GDB/GPKG未指定时使用第一个图层
+        预览行数: 需要预览的要素行数，0表示不读取要素
+
+    返回:
+        dict，包含fields（字段名列表）、dtypes（字段类型）、geometry_type、
+        feature_count、crs（pyproj.CRS或None）和preview（预览数据或None）
+    """
+    info = 获取图层目录().图层信息(path, layer)
+    crs = None
+    if info.get('crs'):
+        from pyproj import CRS
+        crs = CRS.from_user_input(info['crs'])
+
+    preview = None
+    if 预览行数:
+        preview = 读取矢量(path, layer=layer, rows=预览行数)
+
+    return {
+        'fields': list(info.get('fields', {})),
+        'dtypes': dict(info.get('fields', {})),
+        'geometry_type': info.get('geometry_type'),
+        'feature_count': info.get('feature_count'),
+        'crs': crs,
+        'preview': preview,
+    }
+
+
+def 字段名称(path, layer=None):
+    """列出图层的属性字段名称（不含几何字段）"""
+    return 读取字段信息(path, layer)['fields']
@@ -5,11 +5,160 @@
 
 import os
 import re
+import warnings
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+import numpy as np
 import geopandas as gpd
+from .矢量读写 import 写出矢量
+import shapely
 from shapely.geometry import Point, LineString, Polygon, MultiPolygon
 from pyproj import CRS
 
+# 征地部坐标文件编码检测的采样字节数
+编码采样大小 = 64 * 1024
+
+
+_数字 = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+
+# 一次匹配整段坐标文本，每个匹配对应一个坐标点或部件分隔符：
+# 1. 征地部格式：J1,1,Y,X（XY坐标颠倒）
+# 2. 普通格式：X,Y 或 X Y 或 X;Y 或 X:Y（可带Z值）
+# 3. 部件分隔符：|
+_坐标行模式 = re.compile(
+    rf'^[ \t]*J[^,\n]*,[^,\n]*,[ \t]*({_数字})[ \t]*,[ \t]*({_数字})'
+    rf'|^[ \t]*({_数字})[,;: \t]+({_数字})'
+    r'|^[ \t]*(\|)',
+    re.MULTILINE
+)
+
+
+_分隔符转空格 = str.maketrans({',': ' ', ';': ' ', ':': ' ', '\t': ' '})
+
+
+def _快速解析纯数字坐标(坐标串):
+    """
+    使用numpy.fromstring一次解析每行列数相同的纯数字坐标文本
+    
+    无法按固定列数整体解析时返回None，由正则解析兜底
+    """
+    lines = [line for line in 坐标串.splitlines() if line.strip()]
+    if not lines:
+        return None
+    
+    列数 = len(lines[0].translate(_分隔符转空格).split())
+    if 列数 not in (2, 3):
+        return None
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            values = np.fromstring(坐标串.translate(_分隔符转空格), dtype=np.float64, sep=' ')
+        except ValueError:
+            return None
+    
+    if values.size != len(lines) * 列数:
+        return None
+    return values.reshape(-1, 列数)[:, :2].copy()
+
+
+def 解析坐标串(坐标串):
+    """
+    向量化解析坐标文本，将整段坐标转换为浮点数组
+    
+    参数:
+    坐标串: 坐标文本，支持征地部格式和普通格式，使用|分隔多个部件
+    
+    返回:
+    (coords, part_ids): coords为N×2的坐标数组，part_ids为每个坐标点所属的部件编号
+    """
+    # 快速路径：纯数字的单部件坐标直接由numpy.fromstring整体解析
+    if 'J' not in 坐标串 and '|' not in 坐标串:
+        coords = _快速解析纯数字坐标(坐标串)
+        if coords is not None:
+            return coords, np.zeros(len(coords), dtype=np.int64)
+    
+    # 分隔符单独成行，保证同一行中|前后的坐标也能被行首匹配到
+    matches = _坐标行模式.findall(坐标串.replace('|', '\n|\n'))
+    if not matches:
+        return np.empty((0, 2), dtype=np.float64), np.empty(0, dtype=np.int64)
+    
+    arr = np.array(matches, dtype=str)
+    is_sep = arr[:, 4] != ''
+    part_ids = np.cumsum(is_sep)[~is_sep]
+    arr = arr[~is_sep]
+    if len(arr) == 0:
+        return np.empty((0, 2), dtype=np.float64), np.empty(0, dtype=np.int64)
+    
+    is_j = arr[:, 0] != ''
+    x = np.where(is_j, arr[:, 1], arr[:, 2]).astype(np.float64)
+    y = np.where(is_j, arr[:, 0], arr[:, 3]).astype(np.float64)
+    return np.column_stack([x, y]), part_ids
+
+
+def 检测带号(coords, 默认带号=35):
+    """
+    根据坐标数组一次性检测投影带号
+    
+    带带号的X坐标为8位（2位带号+6位东坐标），取所有坐标带号的众数
+    
+    参数:
+    coords: N×2的坐标数组
+    默认带号: 无法检测时使用的带号
+    """
+    if len(coords) == 0:
+        return 默认带号
+    
+    x = np.abs(coords[:, 0])
+    zones = (x[(x >= 1e7) & (x < 1e8)] // 1e6).astype(np.int64)
+    if len(zones) == 0:
+        return 默认带号
+    
+    counts = np.bincount(zones)
+    带号 = int(np.argmax(counts))
+    if counts[带号] < len(zones):
+        print(f"警告：坐标中包含多个带号，使用出现最多的带号 {带号}")
+    return 带号
+
+
+def 批量构建几何(coords, part_ids):
+    """
+    根据部件编号一次性构建所有几何对象
+    
+    坐标点不足2个的部件跳过，2个点的部件构建为线，3个及以上构建为闭合多边形
+    
+    参数:
+    coords: N×2的坐标数组
+    part_ids: 每个坐标点所属的部件编号（非递减）
+    
+    返回:
+    按部件顺序排列的几何对象数组
+    """
+    if len(coords) == 0:
+        return np.array([], dtype=object)
+    
+    # 部件编号重新编码为连续整数，并计算每个部件的坐标数量
+    _, part_index, counts = np.unique(part_ids, return_inverse=True, return_counts=True)
+    geometries = np.full(len(counts), None, dtype=object)
+    
+    is_line = counts == 2
+    is_polygon = counts >= 3
+    
+    if is_line.any():
+        mask = is_line[part_index]
+        shapely.linestrings(coords[mask], indices=part_index[mask], out=geometries)
+    if is_polygon.any():
+        mask = is_polygon[part_index]
+        rings = np.full(len(counts), None, dtype=object)
+        shapely.linearrings(coords[mask], indices=part_index[mask], out=rings)
+        geometries[is_polygon] = shapely.polygons(rings[is_polygon])
+    
+    for part_idx in np.flatnonzero(counts < 2):
+        print(f"部件 {part_idx+1} 坐标点不足，跳过")
+    
+    return geometries[counts >= 2]
+
 
 def 坐标转SHP格式(坐标串, 带号, 输出路径):
     """
@@ -17,7 +166,7 @@ def 坐标转SHP格式(坐标串, 带号, 输出路径):
     
     参数:
     坐标串: 坐标文本，支持多行格式，每行一个坐标点 (X,Y或X,Y,Z)
-    带号: 投影带号，3度分带(≤39)或6度分带(>39)
+    带号: 投影带号，3度分带(≤39)或6度分带(>39)，为0或None时根据坐标自动检测
     输出路径: 输出SHP文件的路径
     """
     if not 坐标串:
@@ -28,85 +177,23 @@ def 坐标转SHP格式(坐标串, 带号, 输出路径):
     
     try:
         print(f"\n开始处理坐标转SHP:")
-        print(f"带号: {带号}")
         print(f"输出路径: {输出路径}")
         
-        # 解析坐标串
-        parts = 坐标串.strip().split('|')  # 支持多部件
-        print(f"解析到 {len(parts)} 个部件")
+        # 向量化解析坐标串，支持多部件
+        coords, part_ids = 解析坐标串(坐标串.strip())
+        print(f"解析到 {len(coords)} 个坐标点，{len(np.unique(part_ids))} 个部件")
         
-        geometries = []
-        
-        for part_idx, part in enumerate(parts):
-            print(f"\n处理第 {part_idx+1} 个部件:")
-            coords = []
-            lines = part.strip().split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # 支持多种坐标格式
-                # 1. 征地部格式：J1,1,X,Y 或 J2,1,X,Y
-                # 2. 普通格式：X,Y 或 X Y 或 X;Y
-                try:
-                    # 检查是否为征地部格式
-                    if line.startswith('J') and ',' in line:
-                        coords_parts = line.split(',')
-                        if len(coords_parts) >= 4:
-                            # 征地部格式：J1,1,Y,X（用户指出XY坐标搞反了）
-                            y = float(coords_parts[2])
-                            x = float(coords_parts[3])
-                            coords.append((x, y))
-                            print(f"解析征地部坐标: ({x}, {y}) (Y={coords_parts[2]}, X={coords_parts[3]})")
-                        else:
-                            print(f"跳过无效征地部坐标行: {line}")
-                    else:
-                        # 普通格式，支持多种分隔符：逗号、冒号、空格等
-                        coords_list = re.split(r'[,;:\s]+', line)
-                        if len(coords_list) >= 2:
-                            x = float(coords_list[0])
-                            y = float(coords_list[1])
-                            coords.append((x, y))
-                            print(f"解析普通坐标: ({x}, {y})")
-                        else:
-                            print(f"跳过无效坐标行: {line}")
-                except ValueError as e:
-                    print(f"跳过无效坐标行: {line}，错误: {str(e)}")
-            
-            if len(coords) < 2:
-                print(f"部件 {part_idx+1} 坐标点不足，跳过")
-                continue
-            
-            # 处理几何类型
-            if len(coords) == 2:
-                # 线
-                line = LineString(coords)
-                geometries.append(line)
-                print(f"创建线要素")
-            elif len(coords) >= 3:
-                # 检查是否闭合
-                if coords[0] == coords[-1]:
-                    # 多边形
-                    polygon = Polygon(coords)
-                    geometries.append(polygon)
-                    print(f"创建多边形要素，{len(coords)} 个坐标点")
-                else:
-                    # 闭合多边形
-                    coords.append(coords[0])
-                    polygon = Polygon(coords)
-                    geometries.append(polygon)
-                    print(f"创建闭合多边形要素，{len(coords)} 个坐标点")
-            else:
-                # 点
-                point = Point(coords[0])
-                geometries.append(point)
-                print(f"创建点要素")
+        geometries = 批量构建几何(coords, part_ids)
+        print(f"创建 {len(geometries)} 个要素")
         
-        if not geometries:
+        if len(geometries) == 0:
             raise Exception("没有有效的几何对象可以转换")
         
+        if not 带号:
+            带号 = 检测带号(coords)
+            print(f"自动检测到带号: {带号}")
+        print(f"带号: {带号}")
+        
         # 确定坐标系
         # 修正带号处理：3度分带和6度分带的EPSG代码生成
         # 3度分带：EPSG:326XX (XX为带号，范围1-60)
@@ -131,7 +218,7 @@ def 坐标转SHP格式(坐标串, 带号, 输出路径):
         }, crs=None)
         
         # 保存为SHP文件
-        gdf.to_file(输出路径, encoding='utf-8')
+        写出矢量(gdf, 输出路径, encoding='utf-8')
         
         print(f"\n坐标转SHP成功！")
         print(f"输出文件: {输出路径}")
@@ -144,6 +231,137 @@ def 坐标转SHP格式(坐标串, 带号, 输出路径):
         raise Exception(f"坐标转SHP格式失败: {str(e)}")
 
 
+def _检测文件编码(文件路径, 采样大小=编码采样大小):
+    """
+    读取文件开头的少量字节检测文本编码，只检测一次
+    
+    参数:
+    文件路径: 输入文件路径
+    采样大小: 采样的字节数
+    """
+    with open(文件路径, 'rb') as f:
+        sample = f.read(采样大小)
+        到达末尾 = not f.read(1)
+    
+    if sample.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    
+    for encoding in ['utf-8', 'gbk', 'gb18030']:
+        try:
+            sample.decode(encoding)
+            return encoding
+        except UnicodeDecodeError as e:
+            # 采样截断在多字节字符中间时不算解码失败
+            if not 到达末尾 and e.start >= len(sample) - 3:
+                return encoding
+            continue
+    
+    # 兜底使用gb18030，无法解码的字节在读取时替换
+    return 'gb18030'
+
+
+def _提取带号(x):
+    """从坐标值中提取带号：8位坐标前三位、6位坐标前两位为带号"""
+    if x > 1000000:
+        return int(str(int(x))[:3])
+    return int(str(int(x))[:2])
+
+
+def _流式解析征地部地块(文件路径, encoding):
+    """
+    逐行惰性读取征地部坐标文件，按地块产出坐标缓冲区
+    
+    文件结构：
+    [文件头]
+    格式版本号=
+    ...
+    [地块数据]
+    地块1属性行,1,地块1,平,...
+    J1,1,X,Y
+    J2,1,X,Y
+    ...
+    J1,1,X,Y  # 闭合点
+    地块2属性行,10,地块10,平,...
+    J1,1,X,Y
+    ...
+    
+    产出: (地块序号, 地块名称, 坐标数组(N×2), 首个原始X坐标)
+    """
+    in_data_section = False
+    block_idx = -1
+    地块名称 = None
+    buffer = array('d')
+    首个X = None
+    
+    def _输出当前地块():
+        coords = np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2).copy()
+        return block_idx, 地块名称 or f"地块{block_idx+1}", coords, 首个X
+    
+    with open(文件路径, 'r', encoding=encoding, errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            
+            # 检查是否进入数据部分（包含[地块数据]或类似乱码标记，或遇到属性行）
+            is_property_candidate = line[0].isdigit() and ',' in line
+            if '[地块数据]' in line or '[�ؿ' in line or is_property_candidate:
+                in_data_section = True
+            
+            if not in_data_section:
+                continue
+            
+            # 识别地块属性行：以数字开头，包含逗号分隔的属性
+            # 征地部属性行格式：面积,周长,编号,地块名称,地类,...
+            if is_property_candidate:
+                fields = line.split(',')
+                if len(fields) >= 4:
+                    if block_idx >= 0:
+                        yield _输出当前地块()
+                    block_idx += 1
+                    地块名称 = fields[3].strip() or None
+                    buffer = array('d')
+                    首个X = None
+                    continue
+            
+            # 坐标行：J1,1,Y,X（征地部格式XY坐标颠倒）
+            if line.startswith('J') and ',' in line:
+                coords_parts = line.split(',')
+                if len(coords_parts) >= 4:
+                    try:
+                        y = float(coords_parts[2])
+                        x = float(coords_parts[3])
+                    except ValueError:
+                        print(f"跳过无效坐标行: {line}")
+                        continue
+                    if block_idx < 0:
+                        block_idx = 0
+                    if 首个X is None:
+                        首个X = y
+                    buffer.append(x)
+                    buffer.append(y)
+    
+    if block_idx >= 0:
+        yield _输出当前地块()
+
+
+def _批量构建多边形(坐标列表):
+    """
+    使用shapely.polygons一次性构建所有地块的多边形
+    
+    参数:
+    坐标列表: 每个地块的坐标数组(N×2)列表，未闭合的环会自动闭合
+    """
+    if not 坐标列表:
+        return np.array([], dtype=object)
+    
+    lengths = np.fromiter((len(c) for c in 坐标列表), dtype=np.int64, count=len(坐标列表))
+    coords = np.concatenate(坐标列表)
+    indices = np.repeat(np.arange(len(坐标列表)), lengths)
+    rings = shapely.linearrings(coords, indices=indices)
+    return shapely.polygons(rings)
+
+
 def 征地部坐标转换(文件路径, 输出目录, 合并地块=True):
     """
     征地部坐标转换功能
@@ -164,302 +382,101 @@ def 征地部坐标转换(文件路径, 输出目录, 合并地块=True):
         print(f"输入文件: {文件路径}")
         print(f"输出目录: {输出目录}")
         
-        # 读取征地部坐标文件，尝试不同的编码方式
-        content = None
-        encodings = ['utf-8', 'gbk', 'gb2312', 'ansi']
-        
-        for encoding in encodings:
-            try:
-                with open(文件路径, 'r', encoding=encoding) as f:
-                    content = f.read()
-                print(f"使用 {encoding} 编码成功读取文件，共 {len(content)} 字符")
-                break
-            except UnicodeDecodeError as e:
-                print(f"尝试 {encoding} 编码失败: {str(e)}")
-                continue
-        
-        if content is None:
-            raise Exception("无法读取文件，请检查文件编码格式")
+        # 采样检测编码，整个文件只读取一遍
+        encoding = _检测文件编码(文件路径)
+        print(f"检测到文件编码: {encoding}")
         
         base_name = os.path.splitext(os.path.basename(文件路径))[0]
         
-        # 解析征地部坐标文件格式
-        # 文件结构：
-        # [文件头]
-        # 格式版本号=
-        # ...
-        # [地块数据]
-        # 地块1属性行,1,地块1,平,...
-        # J1,1,X,Y
-        # J2,1,X,Y
-        # ...
-        # J1,1,X,Y  # 闭合点
-        # 地块2属性行,10,地块10,平,...
-        # J1,1,X,Y
-        # ...
-        
-        blocks = []
-        current_block = []
-        lines = content.strip().split('\n')
-        
-        # 跳过文件头，找到地块数据部分
-        in_data_section = False
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # 检查是否进入数据部分（更宽松的条件）
-            # 1. 检查是否包含[地块数据]或类似乱码标记
-            # 2. 如果遇到可能的属性行也直接进入数据部分
-            if '[地块数据]' in line or '[�ؿ' in line or line and line[0].isdigit() and ',' in line:
-                in_data_section = True
-            
-            if not in_data_section:
+        # 流式解析所有地块，坐标点不足的地块直接跳过
+        地块序号 = []
+        地块名称列表 = []
+        坐标列表 = []
+        带号 = 35  # 默认带号
+        地块总数 = 0
+        for block_idx, 地块名称, coords, 首个X in _流式解析征地部地块(文件路径, encoding):
+            地块总数 += 1
+            # 从第一个地块提取带号
+            if 地块总数 == 1 and 首个X is not None:
+                try:
+                    带号 = _提取带号(首个X)
+                    print(f"从第一个地块提取到带号: {带号}")
+                except Exception as e:
+                    print(f"无法提取带号，使用默认带号: {str(e)}")
+            if len(coords) < 2:
+                print(f"地块 {block_idx+1} 坐标点不足，跳过")
                 continue
-            
-            # 识别地块属性行：以数字开头，包含逗号分隔的属性
-            is_property_line = False
-            try:
-                # 更宽松的属性行识别：只要以数字开头且包含逗号
-                if line and line[0].isdigit() and ',' in line:
-                    # 进一步验证是否包含地块名称字段
-                    fields = line.split(',')
-                    # 征地部属性行格式：面积,周长,编号,地块名称,地类,...
-                    if len(fields) >= 4:
-                        is_property_line = True
-            except:
-                pass
-            
-            if is_property_line:
-                # 如果当前已有地块数据，先保存
-                if current_block:
-                    blocks.append(current_block)
-                    current_block = []
-                # 开始新地块
-                current_block.append(line)
-            else:
-                # 添加坐标行到当前地块
-                current_block.append(line)
+            地块序号.append(block_idx)
+            地块名称列表.append(地块名称)
+            坐标列表.append(coords)
         
-        # 添加最后一个地块
-        if current_block:
-            blocks.append(current_block)
+        print(f"解析到 {地块总数} 个地块")
         
-        print(f"解析到 {len(blocks)} 个地块")
+        output_files = []
         
-        # 处理地块
-        if 合并地块 and len(blocks) > 1:
-            # 合并地块模式：收集所有地块的几何信息
-            print(f"\n=== 合并地块模式 ===")
-            
-            # 收集所有地块的坐标和名称
-            all_geometries = []
-            all_names = []
-            all_coords_info = []
-            
-            # 提取带号（从第一个地块提取）
-            带号 = 35  # 默认带号
-            if blocks:
-                first_block = blocks[0]
-                if len(first_block) >= 2:
-                    坐标行_list = first_block[1:]
-                    if 坐标行_list:
-                        first_coord_line = 坐标行_list[0].strip()
-                        coords_parts = first_coord_line.split(',')
-                        if len(coords_parts) >= 3:
-                            try:
-                                x = float(coords_parts[2])
-                                # 提取带号：假设X坐标为6位或8位，前两位或三位为带号
-                                if x > 1000000:
-                                    # 8位坐标，前三位为带号
-                                    带号 = int(str(int(x))[:3])
-                                else:
-                                    # 6位坐标，前两位为带号
-                                    带号 = int(str(int(x))[:2])
-                                print(f"从第一个地块提取到带号: {带号}")
-                            except Exception as e:
-                                print(f"无法提取带号，使用默认带号: {str(e)}")
-            
-            # 处理每个地块，收集坐标信息
-            for block_idx, block in enumerate(blocks):
-                if not block or len(block) < 2:
-                    continue
-                
-                # 提取地块名称和坐标
-                属性行 = block[0]
-                坐标行_list = block[1:]
-                
-                # 从属性行提取地块名称
-                地块名称 = f"地块{block_idx+1}"  # 默认名称
-                try:
-                    fields = 属性行.split(',')
-                    if len(fields) >= 4:
-                        地块名称 = fields[3].strip()
-                except Exception as e:
-                    print(f"解析地块名称失败: {str(e)}")
-                    continue
-                
-                print(f"\n收集地块 {block_idx+1}: {地块名称}")
-                print(f"坐标行数: {len(坐标行_list)}")
-                
-                # 提取坐标点
-                coords = []
-                for line in 坐标行_list:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    if line.startswith('J') and ',' in line:
-                        coords_parts = line.split(',')
-                        if len(coords_parts) >= 4:
-                            try:
-                                # 征地部格式：J1,1,Y,X（用户指出XY坐标搞反了）
-                                y = float(coords_parts[2])
-                                x = float(coords_parts[3])
-                                coords.append((x, y))
-                            except ValueError as e:
-                                print(f"跳过无效坐标行: {line}")
-                                continue
-                
-                if len(coords) < 3:
+        if 合并地块 and 地块总数 > 1:
+            # 合并文件只包含多边形，两点地块无法构成面，跳过
+            有效 = [len(c) >= 3 for c in 坐标列表]
+            for block_idx, ok in zip(地块序号, 有效):
+                if not ok:
                     print(f"地块 {block_idx+1} 坐标点不足，跳过")
-                    continue
-                
-                # 创建多边形
-                if coords[0] != coords[-1]:
-                    coords.append(coords[0])  # 闭合多边形
-                
-                polygon = Polygon(coords)
-                all_geometries.append(polygon)
-                all_names.append(地块名称)
-                all_coords_info.append((coords, 地块名称))
+            地块名称列表 = [名称 for 名称, ok in zip(地块名称列表, 有效) if ok]
+            polygons = _批量构建多边形([c for c, ok in zip(坐标列表, 有效) if ok])
             
-            if all_geometries:
-                # 生成输出文件名
-                shp_name = f"{base_name}_合并地块.shp"
-                output_path = os.path.join(输出目录, shp_name)
-                
-                # 确定坐标系
-                # 修正带号处理：3度分带和6度分带的EPSG代码生成
-                # 3度分带：EPSG:326XX (XX为带号，范围1-60)
-                # 6度分带：EPSG:327XX (XX为带号，范围1-60)
-                # 通常带号范围为1-60，所以需要确保带号在有效范围内
-                valid_带号 = 带号 % 60 if 带号 > 60 else 带号
-                valid_带号 = max(1, min(60, valid_带号))  # 确保带号在1-60范围内
-                
-                if 带号 <= 39:
-                    # 3度分带，使用EPSG:326XX
-                    epsg = 32600 + valid_带号
-                    print(f"使用3度分带，带号: {valid_带号}，EPSG: {epsg}")
-                else:
-                    # 6度分带，使用EPSG:327XX
-                    epsg = 32700 + valid_带号
-                    print(f"使用6度分带，带号: {valid_带号}，EPSG: {epsg}")
+
+            # 合并地块模式：所有地块写入同一个SHP文件
+            print(f"\n=== 合并地块模式 ===")
+            if len(polygons):
+                output_path = os.path.join(输出目录, f"{base_name}_合并地块.shp")
                 
                 # 创建GeoDataFrame，不设置坐标系
                 gdf = gpd.GeoDataFrame({
-                    'geometry': all_geometries,
-                    '名称': all_names
+                    'geometry': polygons,
+                    '名称': 地块名称列表
                 }, crs=None)
-                
-                # 保存为SHP文件
-                gdf.to_file(output_path, encoding='utf-8')
+                写出矢量(gdf, output_path, encoding='utf-8')
                 
                 print(f"\n合并地块转换成功！")
                 print(f"输出文件: {output_path}")
-                print(f"共包含 {len(all_geometries)} 个地块要素")
-                
-                output_files = [output_path]
+                print(f"共包含 {len(polygons)} 个地块要素")
+                output_files.append(output_path)
             else:
                 print(f"没有有效的地块可以合并")
-                output_files = []
         else:
-            # 非合并地块模式：为每个地块生成一个独立的SHP文件
-            output_files = []
-            for block_idx, block in enumerate(blocks):
-                if not block:
+            # 非合并地块模式：为每个地块生成一个独立的SHP文件，两点地块按线输出
+            if 坐标列表:
+                lengths = [len(c) for c in 坐标列表]
+                geometries = 批量构建几何(np.concatenate(坐标列表), np.repeat(np.arange(len(坐标列表)), lengths))
+            else:
+                geometries = []
+            for block_idx, 地块名称, polygon in zip(地块序号, 地块名称列表, geometries):
+                output_path = os.path.join(输出目录, f"{base_name}_{地块名称}_{block_idx+1}.shp")
+                try:
+                    gdf = gpd.GeoDataFrame({
+                        'geometry': [polygon],
+                        '名称': ['要素_1']
+                    }, crs=None)
+                    写出矢量(gdf, output_path, encoding='utf-8')
+                    output_files.append(output_path)
+                    print(f"地块 {block_idx+1} 转换成功")
+                except Exception as e:
+                    print(f"地块 {block_idx+1} 转换失败: {str(e)}")
                     continue
-                
-                # 提取地块名称和坐标
-                if len(block) >= 2:
-                    # 地块属性行为第一行，后续行为坐标
-                    属性行 = block[0]
-                    坐标行_list = block[1:]
-                    
-                    # 从属性行提取地块名称
-                    地块名称 = f"地块{block_idx+1}"  # 默认名称
-                    try:
-                        # 解析属性行，格式：面积,周长,编号,地块名称,地类,...
-                        fields = 属性行.split(',')
-                        if len(fields) >= 4:
-                            地块名称 = fields[3].strip()
-                    except Exception as e:
-                        print(f"解析地块名称失败: {str(e)}")
-                        continue
-                    
-                    print(f"\n处理地块 {block_idx+1}: {地块名称}")
-                    print(f"属性行: {属性行}")
-                    print(f"坐标行数: {len(坐标行_list)}")
-                    
-                    # 提取坐标串
-                    坐标串 = '\n'.join(坐标行_list)
-                    
-                    # 提取带号（假设坐标X值的前两位或三位为带号）
-                    带号 = 35  # 默认带号
-                    
-                    # 尝试从坐标中提取带号
-                    if 坐标串:
-                        first_coord_line = 坐标串.split('\n')[0].strip()
-                        if first_coord_line:
-                            # 解析坐标行，格式：J1,1,X,Y
-                            coords_parts = first_coord_line.split(',')
-                            if len(coords_parts) >= 3:
-                                try:
-                                    x = float(coords_parts[2])
-                                    # 提取带号：假设X坐标为6位或8位，前两位或三位为带号
-                                    if x > 1000000:
-                                        # 8位坐标，前三位为带号
-                                        带号 = int(str(int(x))[:3])
-                                    else:
-                                        # 6位坐标，前两位为带号
-                                        带号 = int(str(int(x))[:2])
-                                    print(f"从坐标中提取到带号: {带号}")
-                                except Exception as e:
-                                    print(f"无法提取带号，使用默认带号: {str(e)}")
-                    
-                    # 生成输出文件名
-                    shp_name = f"{base_name}_{地块名称}_{block_idx+1}.shp"
-                    output_path = os.path.join(输出目录, shp_name)
-                    
-                    # 调用坐标转SHP格式函数
-                    try:
-                        shp_file = 坐标转SHP格式(坐标串, 带号, output_path)
-                        output_files.append(shp_file)
-                        print(f"地块 {block_idx+1} 转换成功")
-                    except Exception as e:
-                        print(f"地块 {block_idx+1} 转换失败: {str(e)}")
-                        continue
             
         if not output_files:
             # 如果没有生成任何SHP文件，尝试将整个文件作为一个地块处理
             print(f"\n尝试将整个文件作为一个地块处理")
-            地块名称 = "地块"
-            坐标串 = content.strip()
+            with open(文件路径, 'r', encoding=encoding, errors='replace') as f:
+                坐标串 = f.read().strip()
             
             # 提取带号
-            带号 = 35  # 默认带号
             if 坐标串:
-                first_coord_line = 坐标串.split('\n')[0].strip()
+                first_coord_line = 坐标串.split('\n', 1)[0].strip()
                 if first_coord_line and ',' in first_coord_line:
                     coords_parts = first_coord_line.split(',')
                     if len(coords_parts) >= 3:
                         try:
-                            x = float(coords_parts[2])
-                            if x > 1000000:
-                                带号 = int(str(int(x))[:3])
-                            else:
-                                带号 = int(str(int(x))[:2])
+                            带号 = _提取带号(float(coords_parts[2]))
                             print(f"从坐标中提取到带号: {带号}")
                         except:
                             print("无法提取带号，使用默认带号")
@@ -489,3 +506,66 @@ def 征地部坐标转换(文件路径, 输出目录, 合并地块=True):
         import traceback
         print(f"错误堆栈: {traceback.format_exc()}")
         raise Exception(f"征地部坐标转换失败: {str(e)}")
+
+
+def 批量征地部坐标转换(输入目录, 输出目录, 合并地块=True, 扩展名=('.txt', '.dat'),
+                      max_workers=None, progress_callback=None):
+    """
+    批量转换目录（包括子目录）中的所有征地部坐标文件
+    
+    参数:
+    输入目录: 坐标文件所在目录
+    输出目录: 输出目录路径
+    合并地块: 每个文件的地块是否合并为一个SHP文件
+    扩展名: 需要处理的坐标文件扩展名
+    max_workers: 最大进程数，默认为CPU核心数
+    progress_callback: 进度回调函数，参数为(已完成数量, 总数量)
+    
+    返回:
+    (输出文件列表, 失败文件列表)
+    """
+    if not 输入目录 or not os.path.isdir(输入目录):
+        raise ValueError("请选择有效的输入目录")
+    
+    if not 输出目录:
+        raise ValueError("请选择输出目录")
+    
+    文件列表 = []
+    for root, _, files in os.walk(输入目录):
+        for file in files:
+            if file.lower().endswith(tuple(扩展名)):
+                文件列表.append(os.path.join(root, file))
+    
+    if not 文件列表:
+        raise Exception("输入目录中没有找到征地部坐标文件")
+    
+    print(f"\n开始批量征地部坐标转换: 共 {len(文件列表)} 个文件")
+    
+    output_files = []
+    failed_files = []
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(文件列表)))
+    
+    # 输出目录保持输入目录的子目录结构，不同子目录中的同名文件不会互相覆盖
+    文件输出目录 = {}
+    for file_path in 文件列表:
+        relative_dir = os.path.relpath(os.path.dirname(file_path), 输入目录)
+        文件输出目录[file_path] = os.path.normpath(os.path.join(输出目录, relative_dir))
+        os.makedirs(文件输出目录[file_path], exist_ok=True)
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(征地部坐标转换, file_path, 文件输出目录[file_path], 合并地块): file_path
+                   for file_path in 文件列表}
+        for i, future in enumerate(as_completed(futures), 1):
+            file_path = futures[future]
+            try:
+                output_files.extend(future.result())
+            except Exception as e:
+                print(f"文件 {file_path} 转换失败: {str(e)}")
+                failed_files.append(file_path)
+            if progress_callback:
+                progress_callback(i, len(文件列表))
+    
+    print(f"\n批量征地部坐标转换完成！成功 {len(文件列表) - len(failed_files)} 个文件，失败 {len(failed_files)} 个文件")
+    return output_files, failed_files
@@ -6,6 +6,7 @@
 import os
 import numpy as np
 import geopandas as gpd
+from .矢量读写 import 读取矢量
 
 
 def 影像裁剪(
@@ -57,7 +58,7 @@ def 影像裁剪(
         print(f"处理影像数量: {len(image_files)}")
         
         # 读取矢量文件
-        gdf = gpd.read_file(矢量路径)
+        gdf = 读取矢量(矢量路径)
         print(f"矢量要素数量: {len(gdf)}")
         print(f"矢量坐标系: {gdf.crs}")
         
@@ -0,0 +1,182 @@
+# coding:utf-8
+"""
+矢量数据本地缓存
+同一个大图层一天内会被多个工具反复读取，开启缓存后第一次读取时将整个图层转存为
+GeoParquet，之后直接以内存映射方式读取列式缓存，不再经过OGR逐要素解析
+
+缓存文件按数据源路径、图层名、编码和数据源修改时间命名，数据源变化后自动失效；
+缓存总大小超过上限时按最近使用时间淘汰最旧的文件
+"""
+
+import hashlib
+import os
+import threading
+
+# 缓存目录
+缓存目录 = os.path.join(os.path.expanduser('~'), '知秋工作平台', 'cache', 'geoparquet')
+
+# 缓存设置，由设置界面根据配置更新，默认关闭
+_设置 = {'启用': False, '最大容量': 5 * 1024 ** 3}
+_写入锁 = threading.Lock()
+
+
+def 配置缓存(启用=None, 最大容量GB=None):
+    """
+    更新缓存设置
+
+    参数:
+        启用: 是否启用缓存
+        最大容量GB: 缓存目录的最大占用空间（GB），超过后淘汰最久未使用的缓存
+    """
+    if 启用 is not None:
+        _设置['启用'] = bool(启用)
+    if 最大容量GB is not None:
+        _设置['最大容量'] = int(最大容量GB) * 1024 ** 3
+
+
+def 缓存已启用():
+    """缓存是否启用，未安装pyarrow时始终不启用"""
+    if not _设置['启用']:
+        return False
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _数据源签名(path):
+    """数据源的修改签名，SHP同时检查.dbf和.cpg，GDB检查目录和表文件"""
+    from .图层目录 import _数据源签名 as 目录签名
+    return 目录签名(path)
+
+
+def _缓存文件(path, layer, encoding):
+    """数据源当前状态对应的缓存文件路径，数据源不存在时返回None"""
+    signature = _数据源签名(path)
+    if signature is None:
+        return None
+    key = '|'.join([os.path.normcase(os.path.abspath(path)), str(layer or ''),
+                    str(encoding or ''), ','.join(str(v) for v in signature)])
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(缓存目录, f"{name}.parquet")
+
+
+def _读取缓存文件(cache_file, columns=None, bbox=None):
+    """
+    以内存映射方式读取GeoParquet缓存
+
+    缓存中不存在的字段直接忽略，与OGR读取时一致；
+    范围过滤后重新编号索引，与OGR读取的结果形式相同
+    """
+    import json
+    import geopandas as gpd
+    import pyarrow.parquet as pq
+
+    read_kwargs = {'memory_map': True}
+    if columns is not None:
+        schema = pq.read_schema(cache_file, memory_map=True)
+        geo = json.loads((schema.metadata or {}).get(b'geo', b'{}'))
+        geometry_name = geo.get('primary_column', 'geometry')
+        read_kwargs['columns'] = [col for col in columns
+                                  if col in schema.names and col != geometry_name] + [geometry_name]
+    gdf = gpd.read_parquet(cache_file, **read_kwargs)
+    if bbox is not None:
+        minx, miny, maxx, maxy = bbox
+        gdf = gdf.cx[minx:maxx, miny:maxy].reset_index(drop=True)
+    return gdf
+
+
+def 读取缓存(path, layer, 读取函数, columns=None, bbox=None, encoding=None):
+    """
+    从缓存读取图层，缓存不存在时调用读取函数读取整个图层并写入缓存
+
+    参数:
+        path: 数据源路径
+        layer: 图层名称
+        读取函数: 无参数函数，返回整个图层的GeoDataFrame
+        columns: 需要的属性字段，None表示全部字段
+        bbox: (minx, miny, maxx, maxy)范围过滤，坐标与数据源坐标系一致
+        encoding: 读取数据源时使用的编码，作为缓存键的一部分
+    """
+    cache_file = _缓存文件(path, layer, encoding)
+    if cache_file is None:
+        return None
+
+    if os.path.exists(cache_file):
+        try:
+            gdf = _读取缓存文件(cache_file, columns, bbox)
+            # 更新修改时间作为最近使用时间
+            os.utime(cache_file)
+            return gdf
+        except Exception as e:
+            print(f"读取缓存失败，重新读取数据源: {e}")
+
+    gdf = 读取函数()
+    _写入缓存(gdf, cache_file)
+
+    if columns is not None:
+        gdf = gdf[[col for col in columns if col in gdf.columns] + [gdf.geometry.name]]
+    if bbox is not None:
+        minx, miny, maxx, maxy = bbox
+        gdf = gdf.cx[minx:maxx, miny:maxy].reset_index(drop=True)
+    return gdf
+
+
+def _写入缓存(gdf, cache_file):
+    """写入GeoParquet缓存并按容量上限淘汰旧缓存"""
+    with _写入锁:
+        try:
+            os.makedirs(缓存目录, exist_ok=True)
+            tmp_file = cache_file + '.tmp'
+            gdf.to_parquet(tmp_file, index=False)
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            print(f"写入缓存失败: {e}")
+            return
+        _淘汰旧缓存()
+
+
+def _缓存文件列表():
+    """列出缓存文件，返回[(路径, 大小, 最近使用时间)]"""
+    entries = []
+    if not os.path.isdir(缓存目录):
+        return entries
+    with os.scandir(缓存目录) as it:
+        for entry in it:
+            if entry.name.endswith('.parquet'):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+    return entries
+
+
+def _淘汰旧缓存():
+    """缓存总大小超过上限时删除最久未使用的缓存"""
+    entries = sorted(_缓存文件列表(), key=lambda item: item[2])
+    total = sum(size for _, size, _ in entries)
+    for cache_file, size, _ in entries:
+        if total <= _设置['最大容量']:
+            break
+        try:
+            os.remove(cache_file)
+            total -= size
+        except OSError:
+            pass
+
+
+def 缓存占用():
+    """缓存目录当前占用的字节数"""
+    return sum(size for _, size, _ in _缓存文件列表())
+
+
+def 清除缓存():
+    """删除全部缓存文件，返回释放的字节数"""
+    freed = 0
+    with _写入锁:
+        for cache_file, size, _ in _缓存文件列表():
+            try:
+                os.remove(cache_file)
+                freed += size
+            except OSError:
+                pass
+    return freed
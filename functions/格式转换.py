@@ -5,6 +5,7 @@
 
 import os
 import geopandas as gpd
+from .矢量读写 import 读取矢量, 写出矢量
 import simplekml
 
 
@@ -32,7 +33,7 @@ def SHP转KMZ奥维格式(矢量路径, 分离字段, 标注字段, 颜色值, 
         print(f"是否分离: {是否分离}")
         
         # 读取SHP文件
-        gdf = gpd.read_file(矢量路径)
+        gdf = 读取矢量(矢量路径)
         print(f"\n读取到的属性字段: {list(gdf.columns)}")
         print(f"原始坐标系: {gdf.crs}")
         
@@ -249,7 +250,7 @@ def KMZ转SHP格式(kmz_file_path, output_path):
             gdf = gpd.GeoDataFrame({'name': names, 'geometry': geometries}, crs='EPSG:4326')
             
             # 保存为SHP文件
-            gdf.to_file(output_path, encoding='utf-8')
+            写出矢量(gdf, output_path, encoding='utf-8')
             
             print(f"KMZ转SHP成功，输出文件: {output_path}")
             return output_path
@@ -271,7 +272,7 @@ def SHP转WKT文本格式(shp_path):
         
     try:
         # 读取矢量文件
-        gdf = gpd.read_file(shp_path)
+        gdf = 读取矢量(shp_path)
         print(f"\n读取到 {len(gdf)} 个要素")
         
         # 创建WKT字段列表
@@ -337,7 +338,7 @@ def SHP转WKT文本格式(shp_path):
         
         # 保存更新后的SHP文件
         shp_output_path = os.path.splitext(shp_path)[0] + '_带WKT字段.shp'
-        gdf.to_file(shp_output_path, encoding='utf-8')
+        写出矢量(gdf, shp_output_path, encoding='utf-8')
         
         # 同时输出WKT文本文件
         txt_output_path = os.path.splitext(shp_path)[0] + '_wkt.txt'
@@ -432,7 +433,7 @@ def WKT转SHP格式(wkt_string, output_path):
         }, crs='EPSG:4326')  # 默认使用WGS84坐标系
         
         # 保存为SHP文件
-        gdf.to_file(output_path, encoding='utf-8')
+        写出矢量(gdf, output_path, encoding='utf-8')
         
         print(f"\nWKT转SHP成功！")
         print(f"输出文件: {output_path}")
@@ -443,3 +444,170 @@ def WKT转SHP格式(wkt_string, output_path):
         import traceback
         print(f"错误堆栈: {traceback.format_exc()}")
         raise Exception(f"WKT转SHP格式失败: {str(e)}")
+
+
+# DXF转SHP时每批构建和写出的多边形数量，控制内存占用
+DXF写出批大小 = 10000
+
+
+def _迭代DXF图层面坐标(dxf_path, layer_name):
+    """
+    流式遍历DXF模型空间中指定图层的面实体，逐个产出边界坐标
+    
+    使用ezdxf的iterdxf按实体流式读取，不会把整个图纸加载到内存；
+    二进制DXF等iterdxf无法处理的文件退化为完整读取
+    
+    产出: (实体类型, 句柄, 边界环列表)，多段线只有一个环，HATCH为全部边界路径
+    """
+    import ezdxf
+    from ezdxf import path as dxf_path_tools
+    from ezdxf.addons import iterdxf
+    
+    layer_key = layer_name.strip().upper()
+    types = ['LWPOLYLINE', 'POLYLINE', 'HATCH']
+    
+    def _提取坐标(entity):
+        dxftype = entity.dxftype()
+        if dxftype in ('LWPOLYLINE', 'POLYLINE'):
+            # 多段线的凸度（圆弧段）与HATCH边界一样按0.01的弦高展平
+            try:
+                boundary = dxf_path_tools.make_path(entity)
+            except TypeError:
+                # 多面网格等无法转换为路径的POLYLINE只取顶点
+                return [[(v.dxf.location[0], v.dxf.location[1]) for v in entity.vertices]]
+            return [[(v.x, v.y) for v in boundary.flattening(0.01)]]
+        # HATCH的每条边界路径展平为一个环，圆弧等曲线边按0.01的弦高展平；
+        # 内边界（洞和洞中的岛）与外边界一起产出，由写出时组合为一个多边形
+        return [[(v.x, v.y) for v in boundary.flattening(0.01)]
+                for boundary in dxf_path_tools.from_hatch(entity)]
+    
+    try:
+        doc = iterdxf.opendxf(dxf_path)
+    except Exception as e:
+        print(f"流式读取DXF失败，改为完整读取: {e}")
+        doc = None
+    
+    if doc is not None:
+        try:
+            for entity in doc.modelspace(types=types):
+                if entity.dxf.get('layer', '').upper() != layer_key:
+                    continue
+                yield entity.dxftype(), entity.dxf.get('handle', ''), _提取坐标(entity)
+        finally:
+            doc.close()
+    else:
+        from ezdxf import recover
+        full_doc, _ = recover.readfile(dxf_path)
+        for entity in full_doc.modelspace().query(' '.join(types)):
+            if entity.dxf.get('layer', '').upper() != layer_key:
+                continue
+            yield entity.dxftype(), entity.dxf.get('handle', ''), _提取坐标(entity)
+
+
+def _写出DXF多边形批次(output_path, 坐标批次, 属性批次, 追加):
+    """
+    将一批边界构建为多边形并写入SHP文件
+
+    只有一个环的边界一次性向量化构建；HATCH的多个边界环按奇偶规则组合
+    （与HATCH默认的填充方式一致），内边界成为洞，洞中的岛重新填充
+    """
+    import numpy as np
+    import shapely
+    
+    polygons = np.empty(len(坐标批次), dtype=object)
+    single = np.array([len(rings) == 1 for rings in 坐标批次], dtype=bool)
+    if single.any():
+        rings = [坐标批次[i][0] for i in np.flatnonzero(single)]
+        lengths = np.fromiter((len(c) for c in rings), dtype=np.int64, count=len(rings))
+        coords = np.asarray([xy for ring in rings for xy in ring], dtype=np.float64)
+        indices = np.repeat(np.arange(len(rings)), lengths)
+        polygons[single] = shapely.polygons(shapely.linearrings(coords, indices=indices))
+    for i in np.flatnonzero(~single):
+        polygon = None
+        for ring in 坐标批次[i]:
+            part = shapely.make_valid(shapely.Polygon(ring))
+            polygon = part if polygon is None else polygon.symmetric_difference(part)
+        polygons[i] = polygon
+    
+    gdf = gpd.GeoDataFrame({
+        '类型': [a[0] for a in 属性批次],
+        '句柄': [a[1] for a in 属性批次],
+        'geometry': polygons
+    }, crs=None)
+    写出矢量(gdf, output_path, encoding='utf-8', mode='a' if 追加 else 'w')
+    return len(gdf)
+
+
+def DXF转SHP(dxf_path, layer_name):
+    """
+    提取DXF指定图层的面要素转换为SHP文件
+    
+    LWPOLYLINE/POLYLINE边界自动闭合，HATCH的外边界和内边界组合为一个带洞的多边形；
+    要素按批构建并追加写入，内存占用与图纸大小无关
+    
+    参数:
+    dxf_path: DXF文件路径或DXF文件所在目录
+    layer_name: 要提取的图层名称
+    
+    返回:
+    生成的SHP文件路径列表
+    """
+    if not dxf_path:
+        raise ValueError("请输入DXF文件或目录路径")
+    
+    if not layer_name:
+        raise ValueError("请输入要提取的图层名称")
+    
+    if os.path.isdir(dxf_path):
+        dxf_files = [os.path.join(root, file)
+                     for root, _, files in os.walk(dxf_path)
+                     for file in files if file.lower().endswith('.dxf')]
+    else:
+        dxf_files = [dxf_path]
+    
+    if not dxf_files:
+        raise Exception("没有找到任何DXF文件")
+    
+    output_files = []
+    for dxf_file in dxf_files:
+        try:
+            print(f"\n开始处理DXF: {dxf_file}, 图层: {layer_name}")
+            output_path = f"{os.path.splitext(dxf_file)[0]}_{layer_name}.shp"
+            
+            坐标批次 = []
+            属性批次 = []
+            写出数量 = 0
+            跳过数量 = 0
+            for dxftype, handle, rings in _迭代DXF图层面坐标(dxf_file, layer_name):
+                rings = [ring for ring in rings if len(ring) >= 3]
+                if not rings:
+                    跳过数量 += 1
+                    continue
+                坐标批次.append(rings)
+                属性批次.append((dxftype, handle))
+                if len(坐标批次) >= DXF写出批大小:
+                    写出数量 += _写出DXF多边形批次(output_path, 坐标批次, 属性批次, 写出数量 > 0)
+                    坐标批次 = []
+                    属性批次 = []
+            
+            if 坐标批次:
+                写出数量 += _写出DXF多边形批次(output_path, 坐标批次, 属性批次, 写出数量 > 0)
+            
+            if 写出数量 == 0:
+                print(f"DXF文件中图层 {layer_name} 没有可转换的面要素")
+                continue
+            
+            print(f"转换成功，共 {写出数量} 个面要素，跳过 {跳过数量} 个无效边界")
+            print(f"输出文件: {output_path}")
+            output_files.append(output_path)
+        except Exception as e:
+            print(f"DXF转SHP过程中出现错误: {dxf_file}, {str(e)}")
+            import traceback
+            print(f"错误堆栈: {traceback.format_exc()}")
+            if len(dxf_files) == 1:
+                raise Exception(f"DXF转SHP失败: {str(e)}")
+    
+    if not output_files:
+        raise Exception(f"没有从DXF中提取到图层 {layer_name} 的面要素")
+    
+    return output_files
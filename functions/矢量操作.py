@@ -4,10 +4,17 @@
 """
 
 import os
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+from .矢量读写 import 读取矢量, 写出矢量, 检测SHP编码
+from .几何修复 import 修复无效几何
+import shapely
 from datetime import datetime
 
+# 1亩对应的平方米数
+亩转平方米 = 10000 / 15
+
 
 def 合并指定目录中的所有要素(folder_path, encoding='utf-8'):
     """
@@ -28,13 +35,9 @@ def 合并指定目录中的所有要素(folder_path, encoding='utf-8'):
         print("没有找到任何SHP文件！")
         return None
         
-    # 读取第一个文件作为基准
-    try:
-        merged_gdf = gpd.read_file(shp_files[0], encoding=encoding)
-    except Exception as e:
-        print(f"使用{encoding}编码读取文件失败，尝试使用gbk编码: {e}")
-        merged_gdf = gpd.read_file(shp_files[0], encoding='gbk')
-        encoding = 'gbk'  # 更新编码参数
+    # 读取第一个文件作为基准，输出沿用第一个文件的编码
+    encoding = 检测SHP编码(shp_files[0], encoding)
+    merged_gdf = 读取矢量(shp_files[0], encoding=encoding)
     
     # 清理字段名称，确保符合SHP格式要求
     merged_gdf = _clean_field_names(merged_gdf)
@@ -47,20 +50,10 @@ def 合并指定目录中的所有要素(folder_path, encoding='utf-8'):
     # 合并其他文件
     for shp_file in shp_files[1:]:
         try:
-            # 读取文件，尝试多种编码
-            gdf = None
-            encodings_to_try = [encoding, 'gbk', 'gb2312', 'utf-8']
-            for enc in encodings_to_try:
-                try:
-                    gdf = gpd.read_file(shp_file, encoding=enc)
-                    print(f"使用{enc}编码成功读取文件{shp_file}")
-                    break
-                except Exception as e:
-                    print(f"使用{enc}编码读取文件{shp_file}失败: {e}")
-                    continue
-            
-            if gdf is None:
-                raise Exception(f"无法使用任何编码读取文件{shp_file}")
+            # 按检测到的编码读取文件，每个文件只读取一次
+            file_encoding = 检测SHP编码(shp_file, encoding)
+            gdf = 读取矢量(shp_file, encoding=file_encoding)
+            print(f"使用{file_encoding}编码读取文件{shp_file}")
             
             # 清理字段名称，确保符合SHP格式要求
             gdf = _clean_field_names(gdf)
@@ -96,14 +89,14 @@ def 合并指定目录中的所有要素(folder_path, encoding='utf-8'):
     
     # 使用指定编码保存文件，添加错误处理
     try:
-        merged_gdf.to_file(output_path, encoding=encoding)
+        写出矢量(merged_gdf, output_path, encoding=encoding)
         print(f"合并完成并保存为: {output_path}")
         return output_path
     except Exception as e:
         # 尝试使用不同的文件名
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_path = os.path.join(folder_path, f'merged_{timestamp}.shp')
-        merged_gdf.to_file(output_path, encoding=encoding)
+        写出矢量(merged_gdf, output_path, encoding=encoding)
         print(f"合并完成并保存为: {output_path}")
         return output_path
 
@@ -118,7 +111,7 @@ def 获取矢量要素中心点(vector_path, naming_field=None):
     """
     try:
         # 读取矢量文件
-        gdf = gpd.read_file(vector_path)
+        gdf = 读取矢量(vector_path)
         
         # 计算每个要素的中心点
         gdf['center'] = gdf.geometry.centroid
@@ -160,7 +153,7 @@ def 根据矢量字段分离要素(file_path, field_name):
     from datetime import datetime
     
     # 读取文件
-    data = gpd.read_file(file_path)
+    data = 读取矢量(file_path)
     grouped_data = data.groupby(field_name)
     
     # 创建文件夹
@@ -182,7 +175,7 @@ def 根据矢量字段分离要素(file_path, field_name):
         
         # 保存分组数据
         output_file = os.path.join(tbbh_folder_path, f'{tbbh}.shp')
-        group.to_file(output_file)
+        写出矢量(group, output_file)
         
         # 处理辅助文件
         if os.path.exists(original_cpg):
@@ -229,7 +222,7 @@ def 融合要素(input_path, encoding='utf-8', field_name=None, layer_name=None)
         if input_path.endswith('.gdb') and layer_name:
             # 处理GDB图层
             print(f"处理GDB图层: {layer_name}")
-            merged_gdf = gpd.read_file(input_path, layer=layer_name, encoding=encoding)
+            merged_gdf = 读取矢量(input_path, layer=layer_name, encoding=encoding)
             target_crs = merged_gdf.crs
         else:
             # 处理SHP文件
@@ -244,33 +237,19 @@ def 融合要素(input_path, encoding='utf-8', field_name=None, layer_name=None)
                 print("没有找到任何SHP文件！")
                 return None
                 
-            # 读取第一个文件作为基准
-            try:
-                merged_gdf = gpd.read_file(shp_files[0], encoding=encoding)
-            except Exception as e:
-                print(f"使用{encoding}编码读取文件失败，尝试使用gbk编码: {e}")
-                merged_gdf = gpd.read_file(shp_files[0], encoding='gbk')
-                encoding = 'gbk'  # 更新编码参数
+            # 读取第一个文件作为基准，输出沿用第一个文件的编码
+            encoding = 检测SHP编码(shp_files[0], encoding)
+            merged_gdf = 读取矢量(shp_files[0], encoding=encoding)
             
             target_crs = merged_gdf.crs
             
             # 融合其他文件
             for shp_file in shp_files[1:]:
                 try:
-                    # 读取文件，尝试多种编码
-                    gdf = None
-                    encodings_to_try = [encoding, 'gbk', 'gb2312', 'utf-8']
-                    for enc in encodings_to_try:
-                        try:
-                            gdf = gpd.read_file(shp_file, encoding=enc)
-                            print(f"使用{enc}编码成功读取文件{shp_file}")
-                            break
-                        except Exception as e:
-                            print(f"使用{enc}编码读取文件{shp_file}失败: {e}")
-                            continue
-                    
-                    if gdf is None:
-                        raise Exception(f"无法使用任何编码读取文件{shp_file}")
+                    # 按检测到的编码读取文件，每个文件只读取一次
+                    file_encoding = 检测SHP编码(shp_file, encoding)
+                    gdf = 读取矢量(shp_file, encoding=file_encoding)
+                    print(f"使用{file_encoding}编码读取文件{shp_file}")
                     
                     # 清理字段名称，确保符合SHP格式要求
                     gdf = _clean_field_names(gdf)
@@ -316,7 +295,7 @@ def 融合要素(input_path, encoding='utf-8', field_name=None, layer_name=None)
         # 输出到GDB
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_layer_name = f"dissolved_{timestamp}"
-        dissolved_gdf.to_file(input_path, layer=output_layer_name, driver='OpenFileGDB')
+        写出矢量(dissolved_gdf, input_path, layer=output_layer_name)
         output_path = f"{input_path}#{output_layer_name}"
         print(f"融合完成并保存到GDB: {output_path}")
         return output_path
@@ -329,14 +308,14 @@ def 融合要素(input_path, encoding='utf-8', field_name=None, layer_name=None)
         
         # 使用指定编码保存文件，添加错误处理
         try:
-            dissolved_gdf.to_file(output_path, encoding=encoding)
+            写出矢量(dissolved_gdf, output_path, encoding=encoding)
             print(f"融合完成并保存为: {output_path}")
             return output_path
         except Exception as e:
             # 尝试使用不同的文件名
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = os.path.join(input_path, f'dissolved_{timestamp}.shp')
-            dissolved_gdf.to_file(output_path, encoding=encoding)
+            写出矢量(dissolved_gdf, output_path, encoding=encoding)
             print(f"融合完成并保存为: {output_path}")
             return output_path
 
@@ -354,6 +333,7 @@ def 标识要素(input_layers, output_path, encoding='utf-8'):
         str, 生成的结果文件路径
     """
     import geopandas as gpd
+    from .矢量读写 import 读取矢量, 写出矢量
     import pandas as pd
     from datetime import datetime
     
@@ -371,25 +351,15 @@ def 标识要素(input_layers, output_path, encoding='utf-8'):
         target_layer = input_layers[0]
         print(f"读取目标图层: {target_layer['path']}")
         
-        if '|' in target_layer['path']:
-            # 处理GDB图层
-            gdb_path, layer_name = target_layer['path'].split('|', 1)
-            target_gdf = gpd.read_file(gdb_path, layer=layer_name, encoding=encoding)
-        else:
-            # 处理SHP图层
-            target_gdf = gpd.read_file(target_layer['path'], encoding=encoding)
+        # SHP图层或"GDB路径|图层名"
+        target_gdf = 读取矢量(target_layer['path'], encoding=encoding)
         
         # 读取第二个图层作为标识图层
         identify_layer = input_layers[1]
         print(f"读取标识图层: {identify_layer['path']}")
         
-        if '|' in identify_layer['path']:
-            # 处理GDB图层
-            gdb_path, layer_name = identify_layer['path'].split('|', 1)
-            identify_gdf = gpd.read_file(gdb_path, layer=layer_name, encoding=encoding)
-        else:
-            # 处理SHP图层
-            identify_gdf = gpd.read_file(identify_layer['path'], encoding=encoding)
+        # SHP图层或"GDB路径|图层名"
+        identify_gdf = 读取矢量(identify_layer['path'], encoding=encoding)
         
         # 确保坐标系一致
         if target_gdf.crs != identify_gdf.crs:
@@ -432,7 +402,7 @@ def 标识要素(input_layers, output_path, encoding='utf-8'):
         
         # 保存结果
         print(f"保存结果到: {output_file}")
-        result_gdf.to_file(output_file, encoding=encoding)
+        写出矢量(result_gdf, output_file, encoding=encoding)
         
         return output_file
         
@@ -443,6 +413,154 @@ def 标识要素(input_layers, output_path, encoding='utf-8'):
         raise
 
 
+def 面积目标缓冲求解(geometries, 目标面积, 允许误差=1.0, 最大迭代次数=50, progress_callback=None):
+    """
+    对所有要素同时求解缓冲距离，使缓冲后的面积逼近目标面积
+    
+    每轮迭代对所有未收敛要素做一次向量化的shapely.buffer，用割线法给出下一步距离，
+    超出有效区间时退化为二分法，保证每个要素都在[下界, 上界]区间内收敛
+    
+    参数:
+        geometries: 面要素几何数组
+        目标面积: 每个要素的目标面积数组（平方米）
+        允许误差: 面积允许误差（平方米）
+        最大迭代次数: 最大迭代次数
+        progress_callback: 进度回调函数，参数为进度百分比
+    
+    返回:
+        (调整后几何数组, 缓冲距离数组, 迭代次数数组, 面积残差数组)
+    """
+    geoms = np.asarray(geometries, dtype=object)
+    目标面积 = np.asarray(目标面积, dtype=np.float64)
+    原面积 = shapely.area(geoms)
+    n = len(geoms)
+    
+    结果 = geoms.copy()
+    距离 = np.zeros(n)
+    迭代次数 = np.zeros(n, dtype=np.int64)
+    残差 = 原面积 - 目标面积
+    
+    # 只对需要缩小的要素求解，调整面积不可能比原图斑大
+    active = np.isfinite(目标面积) & (目标面积 >= 0) & (残差 > 允许误差)
+    if not active.any():
+        return 结果, 距离, 迭代次数, 残差
+    
+    # 区间[下界, 上界]：缓冲距离为内切圆半径上限时面积为0，距离为0时面积为原面积
+    下界 = -np.sqrt(原面积 / np.pi)
+    上界 = np.zeros(n)
+    f下界 = -目标面积
+    f上界 = 原面积 - 目标面积
+    
+    # 初始猜测：面积对缓冲距离的一阶近似 A(d) ≈ A0 + 周长 × d
+    周长 = shapely.length(geoms)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d = np.where(周长 > 0, (目标面积 - 原面积) / 周长, 下界 / 2)
+    前d = 上界.copy()
+    前f = f上界.copy()
+    
+    总数 = int(active.sum())
+    for iteration in range(1, 最大迭代次数 + 1):
+        idx = np.flatnonzero(active)
+        if len(idx) == 0:
+            break
+        
+        # 越界或非有限的猜测退化为二分
+        d_idx = d[idx]
+        越界 = ~np.isfinite(d_idx) | (d_idx <= 下界[idx]) | (d_idx >= 上界[idx])
+        d_idx = np.where(越界, (下界[idx] + 上界[idx]) / 2, d_idx)
+        
+        缓冲结果 = shapely.buffer(geoms[idx], d_idx)
+        f = shapely.area(缓冲结果) - 目标面积[idx]
+        
+        距离[idx] = d_idx
+        结果[idx] = 缓冲结果
+        残差[idx] = f
+        迭代次数[idx] = iteration
+        
+        # 更新区间
+        偏大 = f > 0
+        上界[idx[偏大]] = d_idx[偏大]
+        f上界[idx[偏大]] = f[偏大]
+        下界[idx[~偏大]] = d_idx[~偏大]
+        f下界[idx[~偏大]] = f[~偏大]
+        
+        # 割线法给出下一步猜测
+        with np.errstate(divide='ignore', invalid='ignore'):
+            斜率 = (f - 前f[idx]) / (d_idx - 前d[idx])
+            d[idx] = d_idx - f / 斜率
+        前d[idx] = d_idx
+        前f[idx] = f
+        
+        收敛 = np.abs(f) <= 允许误差
+        active[idx[收敛]] = False
+        
+        if progress_callback:
+            progress_callback(int((总数 - active.sum()) / 总数 * 100))
+    
+    return 结果, 距离, 迭代次数, 残差
+
+
+def 根据指定面积缓冲调整要素(file_path, id_field, area_field, tolerance, progress_callback=None):
+    """
+    根据指定面积缓冲调整要素，调整后的要素保存到源文件目录
+    
+    参数:
+        file_path: str, 输入矢量文件路径
+        id_field: str, 唯一编号字段
+        area_field: str, 指定面积字段（亩）
+        tolerance: float, 允许误差（平方米）
+        progress_callback: 进度回调函数，参数为进度百分比
+    
+    返回:
+        dict, 包含输出路径、迭代次数和残差统计
+    """
+    tolerance = float(tolerance)
+    if tolerance <= 0:
+        raise ValueError("允许误差必须大于0")
+    
+    gdf = 读取矢量(file_path)
+    if gdf.crs is not None and gdf.crs.is_geographic:
+        print("警告：数据为地理坐标系，面积和缓冲距离单位不是米，结果可能不正确")
+    
+    目标面积 = pd.to_numeric(gdf[area_field], errors='coerce').to_numpy(dtype=np.float64) * 亩转平方米
+    
+    # 先修复无效几何，避免缓冲面积计算出错
+    geoms, 修复数量 = 修复无效几何(gdf.geometry, file_path)
+    if 修复数量:
+        print(f"修复 {修复数量} 个无效几何")
+    
+    结果, 距离, 迭代次数, 残差 = 面积目标缓冲求解(
+        np.asarray(geoms.values), 目标面积, tolerance, progress_callback=progress_callback
+    )
+    
+    gdf = gdf.set_geometry(gpd.GeoSeries(结果, index=gdf.index, crs=gdf.crs))
+    gdf['TZMJ'] = np.round(shapely.area(结果), 4)
+    gdf['HCJL'] = np.round(距离, 6)
+    gdf['MJWC'] = np.round(残差, 4)
+    gdf['DDCS'] = 迭代次数
+    
+    未收敛 = (迭代次数 > 0) & (np.abs(残差) > tolerance)
+    已调整 = 迭代次数 > 0
+    未调整 = np.isfinite(目标面积) & ~已调整 & (残差 < -tolerance)
+    
+    base_path, ext = os.path.splitext(file_path)
+    output_path = f"{base_path}_面积调整{ext}"
+    写出矢量(gdf, output_path, encoding='utf-8')
+    
+    report = {
+        'output_path': output_path,
+        'adjusted': int(已调整.sum()),
+        'max_iterations': int(迭代次数.max()) if len(迭代次数) else 0,
+        'max_residual': float(np.abs(残差[已调整]).max()) if 已调整.any() else 0.0,
+        'unconverged': gdf.loc[未收敛, id_field].astype(str).tolist(),
+        'larger_than_original': gdf.loc[未调整, id_field].astype(str).tolist(),
+    }
+    print(f"面积调整完成: 调整 {report['adjusted']} 个要素, 最大迭代 {report['max_iterations']} 次, "
+          f"最大残差 {report['max_residual']:.4f} 平方米, 未收敛 {len(report['unconverged'])} 个")
+    print(f"输出文件: {output_path}")
+    return report
+
+
 def _clean_field_names(gdf):
     """
     清理GeoDataFrame的字段名称，确保符合SHP文件格式要求
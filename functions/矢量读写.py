@@ -0,0 +1,618 @@
+# coding:utf-8
+"""
+矢量数据读写公共模块
+统一SHP、GDB、GPKG的读取和写出，所有工具都通过这里访问矢量文件
+
+读取固定使用pyogrio引擎并开启Arrow传输，支持字段裁剪(columns)、
+范围过滤(bbox/mask)和SQL条件下推(where)，过滤在OGR层完成，不再读入无用数据
+"""
+
+import os
+import geopandas as gpd
+
+# 扩展名与OGR驱动的对应关系
+驱动映射 = {
+    '.shp': 'ESRI Shapefile',
+    '.gdb': 'OpenFileGDB',
+    '.gpkg': 'GPKG',
+    '.geojson': 'GeoJSON',
+    '.json': 'GeoJSON',
+    '.kml': 'KML',
+}
+
+# 支持多图层的容器格式
+多图层格式 = ('.gdb', '.gpkg')
+
+# 分块读取时每块的默认要素数
+默认分块大小 = 20000
+
+
+def 拆分图层路径(path, layer=None):
+    """
+    拆分"数据源|图层"形式的路径
+
+    参数:
+        path: 文件路径，GDB/GPKG图层可写作"xxx.gdb|图层名"
+        layer: 显式指定的图层名，优先于路径中的图层名
+
+    返回:
+        (数据源路径, 图层名)，单图层格式的图层名为None
+    """
+    path = str(path)
+    if '|' in path:
+        path, path_layer = path.split('|', 1)
+        layer = layer or path_layer
+
+    path = path.rstrip('/\\')
+    if not path.lower().endswith(多图层格式):
+        layer = None
+    return path, layer or None
+
+
+def 识别驱动(path):
+    """根据扩展名识别OGR驱动，无法识别时返回None由OGR自行判断"""
+    return 驱动映射.get(os.path.splitext(str(path).rstrip('/\\'))[1].lower())
+
+
+# .cpg中常见的代码页写法与Python编码名称的对应关系
+代码页映射 = {
+    'UTF-8': 'utf-8', 'UTF8': 'utf-8', '65001': 'utf-8',
+    'GBK': 'gbk', 'CP936': 'gbk', '936': 'gbk', 'GB2312': 'gbk',
+    'GB18030': 'gb18030', '54936': 'gb18030',
+}
+
+# DBF头第29字节的语言驱动标识，0x4D为简体中文(936)
+DBF语言驱动映射 = {0x4D: 'gbk', 0x7A: 'gbk'}
+
+# 编码检测结果缓存：{SHP路径: (文件签名, 编码)}
+_编码缓存 = {}
+
+
+def _文件签名(*paths):
+    """文件的修改时间和大小，文件变化后缓存自动失效"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def _读取cpg编码(cpg_path):
+    """从.cpg文件读取编码，无法识别时返回None"""
+    import codecs
+    try:
+        with open(cpg_path, 'r', encoding='ascii', errors='ignore') as f:
+            name = f.read().strip().upper()
+    except OSError:
+        return None
+    if not name:
+        return None
+    if name in 代码页映射:
+        return 代码页映射[name]
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def _采样DBF编码(dbf_path, 采样大小=65536):
+    """
+    采样DBF记录字节判断编码
+
+    先看记录中的非ASCII字节能否按UTF-8解码，不能则按GBK处理；
+    全部为ASCII时参考文件头的语言驱动标识，仍无法判断返回None
+    """
+    try:
+        with open(dbf_path, 'rb') as f:
+            header = f.read(32)
+            if len(header) < 32:
+                return None
+            header_length = int.from_bytes(header[8:10], 'little')
+            f.seek(header_length)
+            sample = f.read(采样大小)
+    except OSError:
+        return None
+
+    if not sample.isascii():
+        # 采样末尾可能截断多字节字符，去掉最后几个字节再解码
+        try:
+            sample[:-4].decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError:
+            return 'gbk'
+    return DBF语言驱动映射.get(header[29])
+
+
+def 检测SHP编码(shp_path, 默认编码='utf-8'):
+    """
+    检测SHP文件属性表的编码，优先读取.cpg，没有时采样DBF字节
+
+    结果按文件路径缓存，.dbf或.cpg修改后重新检测
+
+    参数:
+        shp_path: SHP文件路径
+        默认编码: 无法判断（例如属性全部为ASCII）时使用的编码
+    """
+    base = os.path.splitext(os.path.abspath(str(shp_path)))[0]
+    dbf_path = base + '.dbf'
+    cpg_path = base + '.cpg'
+    signature = _文件签名(dbf_path, cpg_path)
+
+    cached = _编码缓存.get(base)
+    if cached is not None and cached[0] == signature:
+        encoding = cached[1]
+    else:
+        encoding = _读取cpg编码(cpg_path) if signature[1] is not None else None
+        if encoding is None and signature[0] is not None:
+            encoding = _采样DBF编码(dbf_path)
+        _编码缓存[base] = (signature, encoding)
+
+    return encoding or 默认编码
+
+
+def _读取编码(path, encoding=None):
+    """
+    确定读取时使用的属性编码
+
+    Arrow读取要求属性为UTF-8，没有.cpg的GBK编码SHP会读取失败，
+    因此SHP未指定编码时按检测SHP编码的结果读取
+    """
+    if encoding or 识别驱动(path) != 'ESRI Shapefile' or not os.path.isfile(path):
+        return encoding
+    return 检测SHP编码(path)
+
+
+class 读取计划:
+    """
+    工具声明的读取需求，由读取矢量下推到OGR执行
+
+    属性:
+        columns: 需要的属性字段，None表示全部字段，空列表表示只读取几何
+        bbox: (minx, miny, maxx, maxy)范围过滤
+        mask: 几何范围过滤，只读取与之相交的要素
+        where: OGR SQL条件
+        crs: bbox/mask所在的坐标系，与数据坐标系不同时读取前自动转换
+    """
+
+    def __init__(self, columns=None, bbox=None, mask=None, where=None, crs=None):
+        self.columns = list(columns) if columns is not None else None
+        self.bbox = tuple(bbox) if bbox is not None else None
+        self.mask = mask
+        self.where = where
+        self.crs = crs
+
+    @classmethod
+    def 参考范围(cls, gdf, 外扩距离=0, columns=None, where=None):
+        """以另一个图层的外包矩形（外扩指定距离）作为读取范围，参考图层为空时不限制范围"""
+        import numpy as np
+        bounds = gdf.total_bounds
+        if len(gdf) == 0 or not np.all(np.isfinite(bounds)):
+            return cls(columns=columns, where=where)
+        minx, miny, maxx, maxy = bounds
+        bbox = (minx - 外扩距离, miny - 外扩距离, maxx + 外扩距离, maxy + 外扩距离)
+        return cls(columns=columns, bbox=bbox, where=where, crs=gdf.crs)
+
+    def 读取参数(self):
+        """转换为读取矢量的关键字参数"""
+        kwargs = {}
+        if self.columns is not None:
+            kwargs['columns'] = self.columns
+        if self.where:
+            kwargs['where'] = self.where
+        if self.bbox is not None:
+            # 带坐标系的范围交给geopandas按数据坐标系转换
+            if self.crs is not None:
+                from shapely.geometry import box
+                kwargs['bbox'] = gpd.GeoSeries([box(*self.bbox)], crs=self.crs)
+            else:
+                kwargs['bbox'] = self.bbox
+        if self.mask is not None:
+            if self.crs is not None and not isinstance(self.mask, (gpd.GeoSeries, gpd.GeoDataFrame)):
+                kwargs['mask'] = gpd.GeoSeries([self.mask], crs=self.crs)
+            else:
+                kwargs['mask'] = self.mask
+        return kwargs
+
+    def __repr__(self):
+        return (f"读取计划(columns={self.columns}, bbox={self.bbox}, "
+                f"mask={'有' if self.mask is not None else '无'}, where={self.where!r})")
+
+
+def 读取矢量(path, layer=None, columns=None, bbox=None, mask=None, where=None,
+            encoding=None, 计划=None, 使用缓存=None, **kwargs):
+    """
+    读取矢量数据为GeoDataFrame
+
+    参数:
+        path: SHP/GDB/GPKG等矢量数据路径，支持"xxx.gdb|图层名"
+        layer: 图层名称（仅GDB/GPKG需要，SHP会忽略）
+        columns: 只读取的属性字段列表，None表示读取全部字段
+        bbox: (minx, miny, maxx, maxy)范围过滤
+        mask: 几何范围过滤，只读取与之相交的要素
+        where: OGR SQL条件，例如"DLBM LIKE '01%'"
+        encoding: 属性编码，仅对SHP等需要指定编码的格式有效
+        计划: 读取计划，工具声明的字段和范围需求，显式传入的参数优先
+        使用缓存: 是否使用本地GeoParquet缓存，None表示按设置决定
+        **kwargs: 其他传给pyogrio的参数
+    """
+    path, layer = 拆分图层路径(path, layer)
+    kwargs.pop('driver', None)
+    encoding = _读取编码(path, encoding)
+
+    if 计划 is not None:
+        plan_kwargs = 计划.读取参数()
+        columns = columns if columns is not None else plan_kwargs.get('columns')
+        where = where or plan_kwargs.get('where')
+        if bbox is None and mask is None:
+            bbox = plan_kwargs.get('bbox')
+            mask = plan_kwargs.get('mask')
+
+    # 只读取字段或按普通范围读取时可以使用缓存，SQL条件和几何范围仍交给OGR
+    if 使用缓存 is None:
+        from .数据缓存 import 缓存已启用
+        使用缓存 = 缓存已启用()
+    if (使用缓存 and not kwargs and not where and mask is None
+            and not isinstance(bbox, (gpd.GeoSeries, gpd.GeoDataFrame))):
+        from .数据缓存 import 读取缓存
+        cached = 读取缓存(
+            path, layer,
+            lambda: 读取矢量(path, layer=layer, encoding=encoding, 使用缓存=False),
+            columns=columns, bbox=bbox, encoding=encoding
+        )
+        if cached is not None:
+            return cached
+
+    read_kwargs = dict(kwargs)
+    if layer is not None:
+        read_kwargs['layer'] = layer
+    if columns is not None:
+        read_kwargs['columns'] = list(columns)
+    if bbox is not None:
+        read_kwargs['bbox'] = bbox if isinstance(bbox, (gpd.GeoSeries, gpd.GeoDataFrame)) else tuple(bbox)
+    if mask is not None:
+        read_kwargs['mask'] = mask
+    if where:
+        read_kwargs['where'] = where
+    if encoding:
+        read_kwargs['encoding'] = encoding
+
+    try:
+        return gpd.read_file(path, engine='pyogrio', use_arrow=True, **read_kwargs)
+    except ImportError:
+        # 未安装pyarrow时退化为普通读取
+        return gpd.read_file(path, engine='pyogrio', **read_kwargs)
+    except Exception as e:
+        # 缺少.shx文件时让GDAL自动恢复
+        if "SHAPE_RESTORE_SHX" in str(e):
+            os.environ['SHAPE_RESTORE_SHX'] = 'YES'
+            return gpd.read_file(path, engine='pyogrio', use_arrow=True, **read_kwargs)
+        raise
+
+
+def _转换范围参数(path, layer, bbox, mask):
+    """将带坐标系的bbox/mask转换到数据坐标系，供直接调用pyogrio时使用"""
+    if not isinstance(bbox, (gpd.GeoSeries, gpd.GeoDataFrame)) and \
+            not isinstance(mask, (gpd.GeoSeries, gpd.GeoDataFrame)):
+        return bbox, mask
+
+    import pyogrio
+    data_crs = pyogrio.read_info(path, layer=layer).get('crs')
+    if isinstance(bbox, (gpd.GeoSeries, gpd.GeoDataFrame)):
+        if data_crs and bbox.crs is not None:
+            bbox = bbox.to_crs(data_crs)
+        bbox = tuple(bbox.total_bounds)
+    if isinstance(mask, (gpd.GeoSeries, gpd.GeoDataFrame)):
+        if data_crs and mask.crs is not None:
+            mask = mask.to_crs(data_crs)
+        mask = mask.geometry.union_all() if isinstance(mask, gpd.GeoDataFrame) else mask.union_all()
+    return bbox, mask
+
+
+def 分块读取矢量(path, layer=None, 分块大小=默认分块大小, columns=None, bbox=None, mask=None,
+              where=None, encoding=None, 计划=None):
+    """
+    按固定要素数分块读取矢量数据，内存中只保留当前分块
+
+    安装pyarrow时使用OGR的Arrow流式接口，否则按skip_features/max_features逐块读取。
+    每个分块的索引为要素在图层中的序号，与一次性读取时的索引一致
+
+    参数:
+        path: SHP/GDB/GPKG等矢量数据路径，支持"xxx.gdb|图层名"
+        layer: 图层名称
+        分块大小: 每个分块的最大要素数
+        columns/bbox/mask/where/encoding/计划: 与读取矢量相同
+
+    返回:
+        生成器，逐个产出GeoDataFrame分块
+    """
+    import pandas as pd
+    import pyogrio
+    import shapely
+
+    path, layer = 拆分图层路径(path, layer)
+    if 计划 is not None:
+        plan_kwargs = 计划.读取参数()
+        columns = columns if columns is not None else plan_kwargs.get('columns')
+        where = where or plan_kwargs.get('where')
+        if bbox is None and mask is None:
+            bbox = plan_kwargs.get('bbox')
+            mask = plan_kwargs.get('mask')
+    bbox, mask = _转换范围参数(path, layer, bbox, mask)
+    if bbox is not None:
+        bbox = tuple(bbox)
+    encoding = _读取编码(path, encoding)
+
+    read_kwargs = {'layer': layer, 'encoding': encoding, 'columns': columns,
+                   'where': where, 'bbox': bbox, 'mask': mask}
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        # 未安装pyarrow时按偏移量逐块读取
+        offset = 0
+        while True:
+            chunk = pyogrio.read_dataframe(path, skip_features=offset, max_features=分块大小, **read_kwargs)
+            if len(chunk) == 0:
+                return
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+            if len(chunk) < 分块大小:
+                return
+
+    from pyogrio.raw import open_arrow
+    with open_arrow(path, batch_size=分块大小, use_pyarrow=True, **read_kwargs) as (meta, reader):
+        geometry_name = meta.get('geometry_name') or 'wkb_geometry'
+        offset = 0
+        for batch in reader:
+            df = batch.to_pandas()
+            geometry = shapely.from_wkb(df.pop(geometry_name).values)
+            chunk = gpd.GeoDataFrame(df, geometry=geometry, crs=meta.get('crs'))
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+
+def 要素数量(path, layer=None):
+    """统计图层要素数量，只读取图层信息"""
+    import pyogrio
+    path, layer = 拆分图层路径(path, layer)
+    return int(pyogrio.read_info(path, layer=layer, force_feature_count=True).get('features', 0))
+
+
+class 分块写出器:
+    """
+    逐块追加写出矢量数据，第一块创建文件或图层，之后的分块追加写入
+
+    用法:
+        writer = 分块写出器(output_path, layer=output_layer)
+        for chunk in 分块读取矢量(input_path):
+            writer.写出(处理(chunk))
+    """
+
+    def __init__(self, path, layer=None, driver=None, encoding=None):
+        self.path = path
+        self.layer = layer
+        self.driver = driver
+        self.encoding = encoding
+        self.count = 0
+
+    def 写出(self, gdf):
+        """写出一个分块，空分块直接跳过"""
+        if gdf is None or len(gdf) == 0:
+            return
+        mode = 'a' if self.count else 'w'
+        写出矢量(gdf, self.path, layer=self.layer, driver=self.driver,
+                encoding=self.encoding, mode=mode)
+        self.count += len(gdf)
+
+
+def _推断几何类型(gdf):
+    """按pyogrio的规则推断输出图层的几何类型，单部件和多部件混合时使用多部件类型"""
+    import pandas as pd
+
+    geometry = gdf.geometry
+    geometry = geometry[geometry.notna() & ~geometry.is_empty]
+    types = set(pd.unique(geometry.geom_type))
+    geometry_type = 'Unknown'
+    if len(types) == 1:
+        geometry_type = types.pop()
+    else:
+        for single in ('Point', 'LineString', 'Polygon'):
+            if types == {single, f'Multi{single}'}:
+                geometry_type = f'Multi{single}'
+    if geometry_type != 'Unknown' and geometry.has_z.any():
+        geometry_type = f'{geometry_type} Z'
+    return geometry_type
+
+
+def _坐标系参数(crs):
+    """转换为写出时的坐标系参数，优先使用EPSG代码"""
+    if crs is None:
+        return None
+    epsg = crs.to_epsg()
+    return f"EPSG:{epsg}" if epsg else crs.to_wkt('WKT1_GDAL')
+
+
+def _编码图层(data):
+    """
+    将图层编码为Arrow表（几何为WKB），在线程池中执行
+
+    shapely的WKB编码会释放GIL，多个图层的编码可以真正并行，
+    同时避免了多进程传递几何对象时的重复序列化；
+    结果句柄保存的GeoParquet几何已经是WKB，直接读取Arrow表
+
+    返回:
+        (table, 几何类型, 坐标系, 几何字段名)
+    """
+    import pyarrow as pa
+
+    if hasattr(data, '读取Arrow'):
+        arrow = data.读取Arrow()
+        if arrow is not None:
+            table, geometry_name = arrow
+            return table, data.geometry_type, _坐标系参数(data.crs), geometry_name
+        data = data.读取()
+
+    table = pa.table(data.to_arrow(geometry_encoding='WKB', index=False))
+    return table, _推断几何类型(data), _坐标系参数(data.crs), data.geometry.name
+
+
+class 多图层写出器:
+    """
+    批量写出多个结果图层
+
+    图层的WKB编码在线程池中提前进行，写出线程按数据源依次写入，
+    写当前图层的同时编码后面的图层，同一个GDB的图层连续写出。
+    未安装pyarrow时不创建线程池，直接用写出矢量逐个写出；Arrow写出失败的图层也退回到写出矢量
+
+    用法:
+        writer = 多图层写出器(encoding='gbk')
+        writer.添加(gdf1, 'result.gdb', layer='重叠')
+        writer.添加(gdf2, 'result.gdb', layer='碎面')
+        outputs = writer.写出全部()
+    """
+
+    def __init__(self, driver=None, encoding=None, 并行数=None):
+        self.driver = driver
+        self.encoding = encoding
+        self.并行数 = 并行数 or min(4, os.cpu_count() or 1)
+        self._jobs = []
+
+    def 添加(self, gdf, path, layer=None, encoding=None):
+        """添加一个待写出的图层，gdf可以是GeoDataFrame或结果句柄，空图层直接跳过"""
+        if gdf is None or len(gdf) == 0:
+            return
+        path, layer = 拆分图层路径(path, layer)
+        # 写出器的默认编码只用于SHP，GDB/GPKG固定为UTF-8
+        if encoding is None and (self.driver or 识别驱动(path)) == 'ESRI Shapefile':
+            encoding = self.encoding
+        self._jobs.append((gdf, path, layer, encoding))
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def _写出(self, job, encoded):
+        """写出单个图层，encoded为None时使用写出矢量"""
+        gdf, path, layer, encoding = job
+        driver = self.driver or 识别驱动(path)
+        if encoded is None:
+            if hasattr(gdf, '读取'):
+                gdf = gdf.读取()
+            return 写出矢量(gdf, path, layer=layer, driver=driver, encoding=encoding)
+
+        import pyogrio
+        table, geometry_type, crs, geometry_name = encoded
+        write_kwargs = {}
+        if driver == 'ESRI Shapefile':
+            write_kwargs['encoding'] = encoding or 'utf-8'
+        elif encoding:
+            write_kwargs['encoding'] = encoding
+        pyogrio.write_arrow(table, path, layer=layer, driver=driver,
+                            geometry_name=geometry_name, geometry_type=geometry_type,
+                            crs=crs, **write_kwargs)
+        return path if layer is None else f"{path}|{layer}"
+
+    def 写出全部(self, progress_callback=None):
+        """
+        写出全部图层
+
+        参数:
+            progress_callback: 进度回调函数(已完成数, 总数, 输出路径)
+
+        返回:
+            输出路径列表，GDB/GPKG为"xxx.gdb|图层名"
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        try:
+            import pyarrow  # noqa: F401
+            use_arrow = True
+        except ImportError:
+            use_arrow = False
+
+        # 按数据源排序，同一个GDB的图层连续写出
+        jobs = sorted(self._jobs, key=lambda job: os.path.normcase(os.path.abspath(job[1])))
+        self._jobs = []
+        outputs = []
+        total = len(jobs)
+        if not total:
+            return outputs
+
+        def 写出(index, job, encoded):
+            try:
+                output = self._写出(job, encoded)
+            except Exception as e:
+                if encoded is None:
+                    raise
+                print(f"Arrow写出失败，改用逐要素写出: {e}")
+                output = self._写出(job, None)
+            outputs.append(output)
+            if progress_callback:
+                progress_callback(index + 1, total, output)
+
+        if not use_arrow:
+            for index, job in enumerate(jobs):
+                写出(index, job, None)
+            return outputs
+
+        with ThreadPoolExecutor(max_workers=self.并行数) as executor:
+            # 只提前编码并行数个图层，避免同时占用过多内存
+            futures = {}
+
+            def submit(index):
+                if index < total:
+                    futures[index] = executor.submit(_编码图层, jobs[index][0])
+
+            for index in range(self.并行数):
+                submit(index)
+
+            for index, job in enumerate(jobs):
+                encoded = None
+                try:
+                    encoded = futures.pop(index).result()
+                except Exception as e:
+                    print(f"图层编码失败，改用逐要素写出: {e}")
+                submit(index + self.并行数)
+                写出(index, job, encoded)
+
+        return outputs
+
+
+def 写出矢量(gdf, path, layer=None, driver=None, encoding=None, **kwargs):
+    """
+    将GeoDataFrame写出为SHP/GDB/GPKG
+
+    参数:
+        gdf: 要写出的GeoDataFrame
+        path: 输出路径，支持"xxx.gdb|图层名"
+        layer: 输出图层名称（仅GDB/GPKG需要，SHP会忽略）
+        driver: OGR驱动名称，默认根据扩展名识别
+        encoding: 属性编码，仅对SHP有效，默认为utf-8
+        **kwargs: 其他传给pyogrio的参数，例如mode='a'追加写入
+    """
+    path, layer = 拆分图层路径(path, layer)
+    driver = driver or 识别驱动(path)
+
+    write_kwargs = dict(kwargs)
+    if driver:
+        write_kwargs['driver'] = driver
+    if layer is not None:
+        write_kwargs['layer'] = layer
+    if driver == 'ESRI Shapefile':
+        write_kwargs['encoding'] = encoding or 'utf-8'
+    elif encoding:
+        write_kwargs['encoding'] = encoding
+
+    gdf.to_file(path, engine='pyogrio', **write_kwargs)
+    return path if layer is None else f"{path}|{layer}"
+
+
+def 列出图层(path):
+    """列出矢量数据源中的所有图层名称"""
+    import pyogrio
+    path, _ = 拆分图层路径(path)
+    return [str(name) for name in pyogrio.list_layers(path)[:, 0]]
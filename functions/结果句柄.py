@@ -0,0 +1,158 @@
+# coding:utf-8
+"""
+检查结果句柄
+工作线程把结果GeoDataFrame转存为临时GeoParquet，只通过信号传递要素数量、
+范围、字段和少量预览行，界面线程不再接收和复制整份结果；
+保存结果时才读取完整数据，GeoParquet中的几何本身就是WKB，可以直接交给Arrow写出
+
+未安装pyarrow时句柄直接持有GeoDataFrame，用法不变
+"""
+
+import atexit
+import os
+import threading
+import uuid
+
+# 结果临时目录，本次运行创建的文件在退出时删除
+结果目录 = os.path.join(os.path.expanduser('~'), '知秋工作平台', 'cache', 'results')
+
+_临时文件 = set()
+_锁 = threading.Lock()
+
+
+def _清理临时文件():
+    """删除本次运行创建的结果文件"""
+    with _锁:
+        for path in list(_临时文件):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        _临时文件.clear()
+
+
+atexit.register(_清理临时文件)
+
+
+class 结果句柄:
+    """
+    结果数据的轻量句柄
+
+    属性:
+        name: 结果名称，例如检查类型
+        count: 要素数量
+        geometry_type: 输出图层几何类型
+        bounds: 结果范围(minx, miny, maxx, maxy)
+        columns: 属性字段
+        crs: 坐标系
+        preview: 前几行预览数据
+    """
+
+    def __init__(self, name, count, geometry_type, bounds, columns, crs, preview,
+                 path=None, gdf=None):
+        self.name = name
+        self.count = count
+        self.geometry_type = geometry_type
+        self.bounds = bounds
+        self.columns = columns
+        self.crs = crs
+        self.preview = preview
+        self.path = path
+        self._gdf = gdf
+
+    @classmethod
+    def 保存(cls, gdf, name=None, 预览行数=5):
+        """
+        在工作线程中保存结果，返回句柄
+
+        参数:
+            gdf: 结果GeoDataFrame
+            name: 结果名称
+            预览行数: 句柄中保留的预览行数
+        """
+        from .矢量读写 import _推断几何类型
+
+        summary = {
+            'name': name,
+            'count': len(gdf),
+            'geometry_type': _推断几何类型(gdf) if len(gdf) else 'Unknown',
+            'bounds': tuple(gdf.total_bounds) if len(gdf) else None,
+            'columns': [col for col in gdf.columns if col != gdf.geometry.name],
+            'crs': gdf.crs,
+            'preview': gdf.head(预览行数).copy(),
+        }
+
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return cls(gdf=gdf, **summary)
+
+        path = os.path.join(结果目录, f"{uuid.uuid4().hex}.parquet")
+        try:
+            os.makedirs(结果目录, exist_ok=True)
+            # 索引一并保存，读取时与原结果一致
+            gdf.to_parquet(path)
+        except Exception as e:
+            print(f"结果转存失败，保留在内存中: {e}")
+            return cls(gdf=gdf, **summary)
+
+        with _锁:
+            _临时文件.add(path)
+        return cls(path=path, **summary)
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"结果句柄({self.name}, {self.count}个要素)"
+
+    def 读取(self):
+        """读取完整结果为GeoDataFrame"""
+        if self._gdf is not None:
+            return self._gdf
+        import geopandas as gpd
+        return gpd.read_parquet(self.path)
+
+    def 读取Arrow(self):
+        """
+        读取Arrow表（几何为WKB），用于直接写出，不经过几何对象
+
+        返回:
+            (table, 几何字段名)，句柄持有GeoDataFrame时返回None
+        """
+        if self._gdf is not None:
+            return None
+        import json
+        import pyarrow.parquet as pq
+        table = pq.read_table(self.path)
+        geo = json.loads(table.schema.metadata[b'geo'])
+        # 保存时写入的索引列不属于属性字段
+        table = table.select([name for name in table.column_names
+                              if not name.startswith('__index_level_')])
+        return table, geo['primary_column']
+
+    def 分块读取(self, 分块大小=20000):
+        """逐块读取结果，内存中只保留当前分块"""
+        if self._gdf is not None:
+            for start in range(0, len(self._gdf), 分块大小):
+                yield self._gdf.iloc[start:start + 分块大小]
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from geopandas.io.arrow import _arrow_to_geopandas
+        parquet_file = pq.ParquetFile(self.path)
+        for batch in parquet_file.iter_batches(batch_size=分块大小):
+            table = pa.Table.from_batches([batch], schema=parquet_file.schema_arrow)
+            yield _arrow_to_geopandas(table)
+
+    def 删除(self):
+        """删除临时文件"""
+        self._gdf = None
+        if self.path:
+            with _锁:
+                _临时文件.discard(self.path)
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.path = None
@@ -32,7 +32,16 @@ except ImportError:
     UNION_AVAILABLE = False
 
 # 导出字段筛选模块中的类和函数
-from .字段筛选 import 字段筛选, 获取所有字段, FieldFilter
+from .字段筛选 import 字段筛选, 获取所有字段, FieldFilter, 查询表达式, 编译查询, 查询表达式错误
+
+# 工作流调度
+from .调度器 import 工作流调度器, 拓扑排序
+
+# 模块结果缓存
+from .结果缓存 import 模块结果缓存, 模块缓存键, 复制结果结构
+
+# 结果导出
+from .数据导出 import 导出写出器, SHP字段名, 识别导出格式
 
 __all__ = [
     '定义数据投影', '修改数据投影', 'epsg_codes',
@@ -40,6 +49,9 @@ __all__ = [
     'EraseAnalysis', '擦除分析', 'ERASE_AVAILABLE',
     'IdentityAnalysis', '标识分析', 'IDENTITY_AVAILABLE',
     'UnionAnalysis', '融合分析', 'UNION_AVAILABLE',
-    '字段筛选', '获取所有字段', 'FieldFilter'
+    '字段筛选', '获取所有字段', 'FieldFilter', '查询表达式', '编译查询', '查询表达式错误',
+    '工作流调度器', '拓扑排序',
+    '模块结果缓存', '模块缓存键', '复制结果结构',
+    '导出写出器', 'SHP字段名', '识别导出格式'
 ]
 __version__ = '1.0.0'
\ No newline at end of file
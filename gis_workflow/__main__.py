@@ -0,0 +1,137 @@
+# coding:utf-8
+"""
+无界面运行工作流
+
+用法:
+    python -m gis_workflow 工作流.json [--parallel N] [--check] [--report 报告.json]
+
+加载由工作流界面保存的工作流文件，检查后用与界面相同的模块实现执行，
+最后输出每个模块的耗时、CPU时间、内存变化和输入输出要素数，可同时写出JSON运行报告。
+没有显示器的服务器上使用Qt的offscreen平台
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# 已知的模块分类
+模块分类 = ("添加数据", "分析功能", "数据处理", "导出数据")
+
+
+def 检查工作流文件(file_path):
+    """
+    检查工作流文件的结构，不需要创建界面
+
+    返回:
+        错误信息列表
+    """
+    errors = []
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            workflow_data = json.load(f)
+    except FileNotFoundError:
+        return [f"工作流文件不存在: {file_path}"]
+    except json.JSONDecodeError as e:
+        return [f"工作流文件格式错误: {e}"]
+
+    modules = workflow_data.get("modules", [])
+    if not modules:
+        errors.append("工作流中没有模块")
+
+    module_ids = set()
+    for module_data in modules:
+        missing = [key for key in ("id", "title", "category") if key not in module_data]
+        if missing:
+            errors.append(f"模块缺少字段: {', '.join(missing)}")
+            continue
+        module_ids.add(module_data["id"])
+        if module_data["category"] not in 模块分类:
+            errors.append(f"模块 '{module_data['title']}' 的分类未知: {module_data['category']}")
+        # 添加数据模块的输入文件必须存在
+        if module_data["category"] == "添加数据":
+            from functions.矢量读写 import 拆分图层路径
+            properties = module_data.get("properties", {})
+            paths = list(properties.get("file_paths") or [])
+            if properties.get("gdb_path"):
+                paths.append(properties["gdb_path"])
+            for path in paths:
+                if not os.path.exists(拆分图层路径(path)[0]):
+                    errors.append(f"模块 '{module_data['title']}' 的输入数据不存在: {path}")
+
+    for connection_data in workflow_data.get("connections", []):
+        for key in ("source_module_id", "target_module_id"):
+            if connection_data.get(key) not in module_ids:
+                errors.append(f"连接引用了不存在的模块: {connection_data.get(key)}")
+
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gis_workflow", description="无界面运行已保存的GIS工作流")
+    parser.add_argument("workflow", help="工作流文件（.json）")
+    parser.add_argument("--parallel", type=int, default=None, help="同时执行的模块数，测量单个模块内存时设为1")
+    parser.add_argument("--check", action="store_true", help="只检查工作流，不执行")
+    parser.add_argument("--report", default=None, help="把运行统计写出为JSON运行报告")
+    args = parser.parse_args(argv)
+
+    # 模块实现位于程序根目录下的interfaces和functions中
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
+
+    errors = 检查工作流文件(args.workflow)
+    if errors:
+        print("工作流检查失败:")
+        for error in errors:
+            print(f"  {error}")
+        return 2
+
+    # 没有显示器时使用offscreen平台
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'):
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from PyQt6.QtWidgets import QApplication
+    from interfaces.gis_workflow_interface import GisWorkflowInterface
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    interface = GisWorkflowInterface()
+
+    if not interface.loadWorkflow(args.workflow):
+        return 2
+
+    is_valid, errors = interface.canvasView._scene.validateWorkflow()
+    if not is_valid:
+        print("工作流检查失败:")
+        for error in errors:
+            print(f"  {error}")
+        return 2
+    if args.check:
+        print("工作流检查通过")
+        return 0
+
+    exit_code = 0
+    try:
+        interface.executeWorkflowWithProgress(max_workers=args.parallel)
+    except Exception as e:
+        print(f"工作流执行失败: {e}")
+        exit_code = 1
+    finally:
+        # 处理工作线程发出的界面信号
+        app.processEvents()
+
+    if interface.run_stats is not None:
+        print(interface.run_stats.汇总文本())
+        if args.report:
+            interface.run_stats.写出报告(args.report)
+            print(f"运行报告已写出: {args.report}")
+        if any(record['status'] == 'error' for record in interface.run_stats.modules.values()):
+            exit_code = exit_code or 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    # 相交、擦除等模块会使用进程池，打包后子进程需要先交给multiprocessing处理
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
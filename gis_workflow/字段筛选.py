@@ -4,12 +4,15 @@
 字段筛选模块
 实现数据字段的筛选功能
 支持不同数据处理场景下的字段处理
-支持字段查询表达式进行数据筛选
+支持字段查询表达式进行数据筛选，表达式编译为向量化的筛选掩码，
+数据尚未读取时可以转换为OGR SQL条件在读取时下推
 """
 
+import math
 import os
 import re
 import geopandas as gpd
+from functions.矢量读写 import 读取矢量, 写出矢量
 
 class FieldFilter:
     """
@@ -38,143 +41,24 @@ class FieldFilter:
     
     def _parse_query_expression(self, field, expression):
         """
-        解析查询表达式并生成对应的pandas筛选条件
+        编译查询表达式，生成对应的向量化筛选函数
+        
+        表达式可以只写运算符和值（例如"大于 5"、"包含 'abc'"、"不等于 null"），
+        此时条件作用于field；也可以写完整的条件，例如"大于 5 AND 小于 10"、"IN (1, 2)"，
+        支持的语法见查询表达式
         
         Args:
             field (str): 字段名
             expression (str): 查询表达式
             
         Returns:
-            function: 返回一个可应用于DataFrame的筛选函数
+            function: 返回一个可应用于DataFrame的筛选函数，结果为布尔数组；无法解析时返回None
         """
-        # 处理常见的查询表达式格式
-        # 例如: "等于10", "大于5", "包含'abc'", "不等于null"
-        expression = expression.strip()
-        
-        # 匹配 "等于x", "==x"
-        if expression.startswith("等于"):
-            value = expression[2:].strip()
-            return lambda df: df[field] == value
-        elif expression.startswith("=="):
-            value = expression[2:].strip()
-            return lambda df: df[field] == value
-        
-        # 匹配 "大于x", ">x"
-        elif expression.startswith("大于"):
-            value = expression[2:].strip()
-            try:
-                value = float(value)
-                return lambda df: df[field] > value
-            except ValueError:
-                pass
-        elif expression.startswith(">" and not expression.startswith(">=")):
-            value = expression[1:].strip()
-            try:
-                value = float(value)
-                return lambda df: df[field] > value
-            except ValueError:
-                pass
-        
-        # 匹配 "大于等于x", ">=x"
-        elif expression.startswith("大于等于"):
-            value = expression[4:].strip()
-            try:
-                value = float(value)
-                return lambda df: df[field] >= value
-            except ValueError:
-                pass
-        elif expression.startswith(">="):
-            value = expression[2:].strip()
-            try:
-                value = float(value)
-                return lambda df: df[field] >= value
-            except ValueError:
-                pass
-        
-        # 匹配 "小于x", "<x"
-        elif expression.startswith("小于"):
-            value = expression[2:].strip()
-            try:
-                value = float(value)
-                return lambda df: df[field] < value
-            except ValueError:
-                pass
-        elif expression.startswith("<" and not expression.startswith("<=")):
-            value = expression[1:].strip()
-            try:
-                value = float(value)
-                return lambda df: df[field] < value
-            except ValueError:
-                pass
-        
-        # 匹配 "小于等于x", "<=x"
-        elif expression.startswith("小于等于"):
-            value = expression[4:].strip()
-            try:
-                value = float(value)
-                return lambda df: df[field] <= value
-            except ValueError:
-                pass
-        elif expression.startswith("<="):
-            value = expression[2:].strip()
-            try:
-                value = float(value)
-                return lambda df: df[field] <= value
-            except ValueError:
-                pass
-        
-        # 匹配 "包含x"
-        elif expression.startswith("包含"):
-            value = expression[2:].strip()
-            # 去除可能的引号
-            if value.startswith("'") and value.endswith("'"):
-                value = value[1:-1]
-            elif value.startswith('"') and value.endswith('"'):
-                value = value[1:-1]
-            return lambda df: df[field].astype(str).str.contains(value)
-        
-        # 匹配 "开头包含x"
-        elif expression.startswith("开头包含"):
-            value = expression[4:].strip()
-            # 去除可能的引号
-            if value.startswith("'") and value.endswith("'"):
-                value = value[1:-1]
-            elif value.startswith('"') and value.endswith('"'):
-                value = value[1:-1]
-            return lambda df: df[field].astype(str).str.startswith(value)
-        
-        # 匹配 "结尾包含x"
-        elif expression.startswith("结尾包含"):
-            value = expression[4:].strip()
-            # 去除可能的引号
-            if value.startswith("'") and value.endswith("'"):
-                value = value[1:-1]
-            elif value.startswith('"') and value.endswith('"'):
-                value = value[1:-1]
-            return lambda df: df[field].astype(str).str.endswith(value)
-        
-        # 匹配 "不等于x", "!=x"
-        elif expression.startswith("不等于"):
-            value = expression[3:].strip()
-            if value.lower() == "null":
-                return lambda df: df[field].notnull()
-            return lambda df: df[field] != value
-        elif expression.startswith("!="):
-            value = expression[2:].strip()
-            if value.lower() == "null":
-                return lambda df: df[field].notnull()
-            return lambda df: df[field] != value
-        
-        # 匹配 "为空", "is null"
-        elif expression in ["为空", "is null", "IS NULL"]:
-            return lambda df: df[field].isnull()
-        
-        # 匹配 "不为空", "is not null"
-        elif expression in ["不为空", "is not null", "IS NOT NULL"]:
-            return lambda df: df[field].notnull()
-        
-        # 如果无法解析，返回None
-        return None
+        try:
+            return 编译查询(expression, 默认字段=field).掩码
+        except 查询表达式错误 as e:
+            print(f"无法解析字段 '{field}' 的查询表达式 '{expression}': {e}")
+            return None
     
     def perform_field_filter(self, file_path):
         """
@@ -212,7 +96,7 @@ def 字段筛选(file_path, selected_fields, field_queries=None):
             print(f"字段查询表达式: {field_queries}")
         
         # 读取数据
-        gdf = gpd.read_file(file_path)
+        gdf = 读取矢量(file_path)
         
         # 获取数据中的所有字段
         all_fields = list(gdf.columns)
@@ -263,7 +147,7 @@ def 字段筛选(file_path, selected_fields, field_queries=None):
         output_path = f"{base_path}_filt{ext}"
         
         # 保存文件
-        selected_gdf.to_file(output_path, encoding='utf-8')
+        写出矢量(selected_gdf, output_path, encoding='utf-8')
         
         print(f"字段筛选成功！保留字段: {valid_fields}")
         print(f"输出文件: {output_path}")
@@ -273,6 +157,581 @@ def 字段筛选(file_path, selected_fields, field_queries=None):
         print(f"字段筛选时出错: {e}")
         return False
 
+class 查询表达式错误(ValueError):
+    """查询表达式无法解析，或者值与字段类型不符"""
+
+
+# 中文运算符，按长度从长到短匹配，避免"大于等于"被识别为"大于"
+中文运算符 = [
+    ('大于等于', '>='), ('小于等于', '<='), ('开头包含', 'STARTSWITH'), ('结尾包含', 'ENDSWITH'),
+    ('不等于', '!='), ('不包含', 'NOT CONTAINS'), ('不为空', 'IS NOT NULL'),
+    ('等于', '='), ('大于', '>'), ('小于', '<'), ('包含', 'CONTAINS'), ('为空', 'IS NULL'),
+]
+
+# 符号运算符，按长度从长到短匹配
+符号运算符 = ['>=', '<=', '<>', '!=', '==', '&&', '||', '=', '>', '<', '!']
+
+# 逻辑关键字，中文关键字需要用空格与前后分开
+逻辑关键字 = {'AND': 'AND', '&&': 'AND', '且': 'AND', 'OR': 'OR', '||': 'OR', '或': 'OR', 'NOT': 'NOT', '!': 'NOT', '非': 'NOT'}
+
+# 比较运算符的标准写法
+比较运算符 = {'=': '=', '==': '=', '!=': '!=', '<>': '!=', '>': '>', '>=': '>=', '<': '<', '<=': '<='}
+
+# 字符串匹配运算符
+匹配运算符 = ('LIKE', 'CONTAINS', 'STARTSWITH', 'ENDSWITH')
+
+# 作为关键字的单词，不能用作不加引号的字段名和值
+_关键字 = {'AND', 'OR', 'NOT', 'IN', 'LIKE', 'BETWEEN', 'IS', 'NULL', 'CONTAINS', 'STARTSWITH', 'ENDSWITH', '且', '或', '非'}
+
+# 不加引号的单词中不能出现的字符
+_分隔字符 = set(' \t\r\n(),\'"`') | set('<>=!&|')
+
+
+class _字面量:
+    """表达式中的值，保留原始文本，按字段类型转换"""
+
+    def __init__(self, text, quoted=False):
+        self.text = text
+        self.quoted = quoted
+
+    @property
+    def 数值(self):
+        """转换为数字，不是有限数字时返回None"""
+        try:
+            value = float(self.text)
+        except ValueError:
+            return None
+        return value if math.isfinite(value) else None
+
+    def __repr__(self):
+        return repr(self.text) if self.quoted else self.text
+
+
+def _分词(expression):
+    """拆分为(类型, 值)列表，类型为 ( ) , OP STR WORD"""
+    tokens = []
+    i, size = 0, len(expression)
+    while i < size:
+        char = expression[i]
+        if char.isspace():
+            i += 1
+            continue
+        if char in '(),':
+            tokens.append((char, char))
+            i += 1
+            continue
+        if char in '\'"`':
+            # 引号内两个连续的引号表示引号本身
+            quote, i, text = char, i + 1, ''
+            while True:
+                if i >= size:
+                    raise 查询表达式错误(f"引号未闭合: {expression}")
+                if expression[i] == quote:
+                    if i + 1 < size and expression[i + 1] == quote:
+                        text += quote
+                        i += 2
+                        continue
+                    i += 1
+                    break
+                text += expression[i]
+                i += 1
+            tokens.append(('STR', text))
+            continue
+        symbol = next((op for op in 符号运算符 if expression.startswith(op, i)), None)
+        if symbol:
+            tokens.append(('OP', symbol))
+            i += len(symbol)
+            continue
+        chinese = next((item for item in 中文运算符 if expression.startswith(item[0], i)), None)
+        if chinese:
+            tokens.append(('OP', chinese[1]))
+            i += len(chinese[0])
+            continue
+        start = i
+        while i < size and expression[i] not in _分隔字符:
+            i += 1
+        tokens.append(('WORD', expression[start:i]))
+    return tokens
+
+
+class _条件:
+    """
+    单个比较条件
+
+    取反的条件对包含空值的行为True，与pandas中对比较结果取反一致；
+    未取反的条件（IS NULL除外）对空值为False，与SQL一致
+    """
+
+    def __init__(self, field, operator, values=(), negated=False):
+        self.field = field
+        self.operator = operator
+        self.values = list(values)
+        self.negated = negated
+
+    def 取反(self):
+        return _条件(self.field, self.operator, self.values, not self.negated)
+
+    @property
+    def 字段(self):
+        return {self.field}
+
+    def __repr__(self):
+        values = ', '.join(repr(value) for value in self.values)
+        return f"{'NOT ' if self.negated else ''}{self.field} {self.operator} {values}".strip()
+
+    def 掩码(self, df, 缓存):
+        if self.field not in df.columns:
+            raise 查询表达式错误(f"字段不存在: {self.field}")
+        mask = self._匹配(df[self.field], 缓存)
+        return ~mask if self.negated else mask
+
+    def _匹配(self, series, 缓存):
+        import numpy as np
+        import pandas as pd
+
+        operator = self.operator
+        if operator == 'IS NULL':
+            return series.isna().to_numpy()
+
+        kind = _字段类别(series.dtype)
+        if operator in 匹配运算符:
+            text = _文本列(series, 缓存)
+            value = self.values[0].text
+            if operator == 'LIKE':
+                result = text.str.fullmatch(_LIKE正则(value), na=False)
+            elif operator == 'CONTAINS':
+                result = text.str.contains(value, regex=False, na=False)
+            elif operator == 'STARTSWITH':
+                result = text.str.startswith(value, na=False)
+            else:
+                result = text.str.endswith(value, na=False)
+            return result.to_numpy(dtype=bool, na_value=False)
+
+        if kind == 'numeric':
+            values = [value.数值 for value in self.values]
+            if None in values:
+                if operator in ('=', 'IN'):
+                    # 非数字的值不可能等于数值字段
+                    values = [value for value in values if value is not None]
+                else:
+                    raise 查询表达式错误(f"字段 {self.field} 是数值字段，比较的值必须是数字: {self.values}")
+            data = 缓存.get(('numeric', self.field))
+            if data is None:
+                data = series.to_numpy(dtype=float, na_value=np.nan)
+                缓存[('numeric', self.field)] = data
+        elif kind == 'datetime':
+            try:
+                values = [pd.Timestamp(value.text) for value in self.values]
+            except ValueError:
+                raise 查询表达式错误(f"字段 {self.field} 是日期字段，无法识别日期: {self.values}")
+            data = series
+        elif operator in ('>', '>=', '<', '<=', 'BETWEEN') and all(
+                not value.quoted and value.数值 is not None for value in self.values):
+            # 文本字段与数字比较大小时按数值比较，不能转换为数字的行为False
+            values = [value.数值 for value in self.values]
+            data = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        else:
+            values = [value.text for value in self.values]
+            data = _文本列(series, 缓存)
+
+        if operator == 'IN':
+            result = data.isin(values) if hasattr(data, 'isin') else np.isin(data, values)
+        elif operator == 'BETWEEN':
+            result = (data >= values[0]) & (data <= values[1])
+        else:
+            value = values[0] if values else None
+            if value is None:
+                result = np.zeros(len(series), dtype=bool)
+            elif operator == '=':
+                result = data == value
+            elif operator == '>':
+                result = data > value
+            elif operator == '>=':
+                result = data >= value
+            elif operator == '<':
+                result = data < value
+            else:
+                result = data <= value
+        if isinstance(result, (pd.Series, pd.api.extensions.ExtensionArray)):
+            return pd.Series(result).fillna(False).to_numpy(dtype=bool)
+        return np.asarray(result, dtype=bool)
+
+    def 转SQL(self, 字段类型):
+        if self.field not in 字段类型:
+            return None
+        column = _SQL字段(self.field)
+        if self.operator == 'IS NULL':
+            return (f"{column} IS NOT NULL" if self.negated else f"{column} IS NULL"), True
+
+        kind = _字段类别(字段类型[self.field])
+        if kind == 'datetime':
+            return None
+        exact = True
+        if self.operator in 匹配运算符:
+            if kind == 'numeric':
+                return None
+            value = self.values[0].text
+            if self.operator == 'LIKE':
+                pattern = value
+            elif '%' in value or '_' in value:
+                # 值中含有通配符时无法转换为LIKE
+                return None
+            else:
+                pattern = {'CONTAINS': '%{}%', 'STARTSWITH': '{}%', 'ENDSWITH': '%{}'}[self.operator].format(value)
+            # 不同格式中LIKE是否区分大小写不一致，只能作为预筛选
+            sql, exact = f"{column} LIKE {_SQL文本(pattern)}", False
+        else:
+            if kind == 'numeric':
+                values = [value.数值 for value in self.values]
+                if None in values:
+                    return None
+                literals = [_SQL数值(value) for value in values]
+            elif self.operator in ('>', '>=', '<', '<=', 'BETWEEN') and all(
+                    not value.quoted and value.数值 is not None for value in self.values):
+                # 文本字段按数值比较大小，SQL中无法表达
+                return None
+            else:
+                # OGR对SHP的文本比较不区分大小写，GPKG和掩码区分大小写；
+                # 等于和IN的结果只会多不会少，可以作为预筛选，其他比较在不同格式中会漏掉要素
+                if self.operator not in ('=', 'IN'):
+                    return None
+                literals = [_SQL文本(value.text) for value in self.values]
+                exact = False
+            if self.operator == 'IN':
+                sql = f"{column} IN ({', '.join(literals)})"
+            elif self.operator == 'BETWEEN':
+                sql = f"{column} BETWEEN {literals[0]} AND {literals[1]}"
+            else:
+                sql = f"{column} {'<>' if self.operator == '!=' else self.operator} {literals[0]}"
+
+        if self.negated:
+            if not exact:
+                # 预筛选条件取反后会漏掉要素
+                return None
+            return f"(NOT ({sql}) OR {column} IS NULL)", True
+        return sql, exact
+
+
+class _逻辑:
+    """AND/OR组合的条件"""
+
+    def __init__(self, operator, items):
+        self.operator = operator
+        self.items = items
+
+    def 取反(self):
+        return _逻辑('OR' if self.operator == 'AND' else 'AND', [item.取反() for item in self.items])
+
+    @property
+    def 字段(self):
+        return set().union(*(item.字段 for item in self.items))
+
+    def __repr__(self):
+        return '(' + f" {self.operator} ".join(repr(item) for item in self.items) + ')'
+
+    def 掩码(self, df, 缓存):
+        mask = self.items[0].掩码(df, 缓存)
+        for item in self.items[1:]:
+            if self.operator == 'AND':
+                mask = mask & item.掩码(df, 缓存)
+            else:
+                mask = mask | item.掩码(df, 缓存)
+        return mask
+
+    def 转SQL(self, 字段类型):
+        parts = []
+        exact = True
+        for item in self.items:
+            translated = item.转SQL(字段类型)
+            if translated is None:
+                if self.operator == 'OR':
+                    return None
+                # AND中无法转换的条件先不筛选，读取后再精确筛选
+                exact = False
+                continue
+            parts.append(translated[0])
+            exact = exact and translated[1]
+        if not parts:
+            return None
+        if len(parts) == 1:
+            return parts[0], exact
+        return '(' + f" {self.operator} ".join(parts) + ')', exact
+
+
+class _解析器:
+    """递归下降解析，NOT在解析时按德摩根定律下推到单个条件"""
+
+    def __init__(self, expression, default_field=None):
+        self.expression = expression
+        self.tokens = _分词(expression)
+        self.position = 0
+        self.default_field = default_field
+
+    def 解析(self):
+        if not self.tokens:
+            raise 查询表达式错误("查询表达式为空")
+        node = self._或()
+        if self.position < len(self.tokens):
+            raise 查询表达式错误(f"无法解析 '{self.tokens[self.position][1]}': {self.expression}")
+        return node
+
+    def _当前(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def _关键字(self, offset=0):
+        """当前位置的逻辑或条件关键字（大写），不是关键字时返回None"""
+        kind, value = self._当前(offset)
+        if kind == 'OP' and value in 逻辑关键字:
+            return 逻辑关键字[value]
+        if kind == 'WORD' and value.upper() in _关键字:
+            return 逻辑关键字.get(value, value.upper())
+        return None
+
+    def _读取(self):
+        token = self._当前()
+        self.position += 1
+        return token
+
+    def _或(self):
+        items = [self._与()]
+        while self._关键字() == 'OR':
+            self.position += 1
+            items.append(self._与())
+        return items[0] if len(items) == 1 else _逻辑('OR', items)
+
+    def _与(self):
+        items = [self._非()]
+        while self._关键字() == 'AND':
+            self.position += 1
+            items.append(self._非())
+        return items[0] if len(items) == 1 else _逻辑('AND', items)
+
+    def _非(self):
+        if self._关键字() == 'NOT' and self._关键字(1) not in ('IN', 'LIKE', 'BETWEEN', 'CONTAINS'):
+            self.position += 1
+            return self._非().取反()
+        if self._当前()[0] == '(':
+            self.position += 1
+            node = self._或()
+            if self._读取()[0] != ')':
+                raise 查询表达式错误(f"缺少右括号: {self.expression}")
+            return node
+        return self._条件()
+
+    def _是运算符(self, offset=0):
+        kind, value = self._当前(offset)
+        if kind == 'OP':
+            return value not in 逻辑关键字
+        return self._关键字(offset) in ('NOT', 'IN', 'LIKE', 'BETWEEN', 'IS', 'CONTAINS', 'STARTSWITH', 'ENDSWITH')
+
+    def _条件(self):
+        kind, value = self._当前()
+        if kind in ('WORD', 'STR') and self._关键字() is None and self._是运算符(1):
+            field = value
+            self.position += 1
+        elif self._是运算符() and self.default_field is not None:
+            field = self.default_field
+        else:
+            raise 查询表达式错误(f"缺少字段或运算符: {self.expression}")
+
+        kind, value = self._读取()
+        operator = value if kind == 'OP' else value.upper()
+        negated = False
+        if operator == 'NOT':
+            # NOT IN / NOT LIKE / NOT BETWEEN / NOT CONTAINS
+            negated = True
+            kind, value = self._读取()
+            operator = (value or '').upper()
+            if operator not in ('IN', 'LIKE', 'BETWEEN', 'CONTAINS'):
+                raise 查询表达式错误(f"NOT后面的运算符无法识别: {self.expression}")
+        elif operator.startswith('NOT '):
+            negated, operator = True, operator[4:]
+
+        if operator == 'IS':
+            if self._关键字() == 'NOT':
+                negated = True
+                self.position += 1
+            if self._关键字() != 'NULL':
+                raise 查询表达式错误(f"IS后面应为NULL: {self.expression}")
+            self.position += 1
+            return _条件(field, 'IS NULL', negated=negated)
+        if operator in ('IS NULL', 'IS NOT NULL'):
+            return _条件(field, 'IS NULL', negated=operator == 'IS NOT NULL')
+        if operator == 'IN':
+            if self._读取()[0] != '(':
+                raise 查询表达式错误(f"IN后面应为括号中的值列表: {self.expression}")
+            values = [self._值()]
+            while self._当前()[0] == ',':
+                self.position += 1
+                values.append(self._值())
+            if self._读取()[0] != ')':
+                raise 查询表达式错误(f"IN的值列表缺少右括号: {self.expression}")
+            return _条件(field, 'IN', values, negated)
+        if operator == 'BETWEEN':
+            low = self._值()
+            if self._关键字() != 'AND':
+                raise 查询表达式错误(f"BETWEEN缺少AND: {self.expression}")
+            self.position += 1
+            return _条件(field, 'BETWEEN', [low, self._值()], negated)
+        if operator in 匹配运算符:
+            return _条件(field, operator, [self._值()], negated)
+        if operator in 比较运算符:
+            operator = 比较运算符[operator]
+            if operator in ('=', '!=') and self._关键字() == 'NULL':
+                # "= NULL"按IS NULL处理
+                self.position += 1
+                return _条件(field, 'IS NULL', negated=operator == '!=')
+            if operator in ('=', '!=') and self._值结束():
+                # 字段筛选对话框中值为空时表示空字符串
+                value = _字面量('', True)
+            else:
+                value = self._值()
+            if operator == '!=':
+                return _条件(field, '=', [value], True)
+            return _条件(field, operator, [value])
+        raise 查询表达式错误(f"运算符无法识别 '{value}': {self.expression}")
+
+    def _值结束(self):
+        kind, _ = self._当前()
+        return kind in (None, ')', ',') or self._关键字() in ('AND', 'OR')
+
+    def _值(self):
+        kind, value = self._当前()
+        if kind == 'STR':
+            self.position += 1
+            return _字面量(value, True)
+        if kind != 'WORD' or self._关键字() is not None:
+            raise 查询表达式错误(f"缺少值: {self.expression}")
+        # 不加引号的文本可以包含空格，连续的单词合并为一个值
+        words = []
+        while self._当前()[0] == 'WORD' and self._关键字() is None:
+            words.append(self._读取()[1])
+        return _字面量(' '.join(words))
+
+
+class 查询表达式:
+    """
+    编译后的查询表达式
+
+    支持:
+        比较: = == != <> > >= < <=，以及 等于/不等于/大于/大于等于/小于/小于等于
+        逻辑: AND/OR/NOT（&&/||/!，且/或/非）和括号
+        列表和范围: IN (...)、NOT IN (...)、BETWEEN a AND b、NOT BETWEEN a AND b
+        文本匹配: LIKE（%和_通配符）、CONTAINS/STARTSWITH/ENDSWITH，以及 包含/不包含/开头包含/结尾包含
+        空值: IS NULL/IS NOT NULL、为空/不为空
+
+    用法:
+        expr = 编译查询("DLMC IN ('水田', '旱地') AND MJ > 100")
+        gdf = gdf[expr.掩码(gdf)]
+        sql, exact = expr.转SQL(handle.dtypes)  # 读取前下推到OGR
+
+        # 字段筛选中只写运算符和值，字段由默认字段指定
+        expr = 编译查询("大于等于 5", 默认字段="MJ")
+    """
+
+    def __init__(self, expression, 默认字段=None):
+        self.expression = expression
+        self._node = _解析器(expression, 默认字段).解析()
+
+    @property
+    def 字段(self):
+        """表达式用到的字段"""
+        return self._node.字段
+
+    def __repr__(self):
+        return f"查询表达式({self._node!r})"
+
+    def 掩码(self, df):
+        """计算筛选掩码，返回与df行数相同的布尔数组"""
+        import numpy as np
+        if len(df) == 0:
+            return np.zeros(0, dtype=bool)
+        return np.asarray(self._node.掩码(df, {}), dtype=bool)
+
+    def 筛选(self, df):
+        """返回满足条件的行"""
+        return df[self.掩码(df)]
+
+    def 转SQL(self, 字段类型):
+        """
+        转换为OGR SQL条件
+
+        参数:
+            字段类型: {字段名: 数据类型}，例如图层句柄的dtypes
+
+        返回:
+            (SQL条件, 是否精确)，无法转换时返回None；
+            不精确的条件只用于读取时预筛选，读取后还要用掩码精确筛选
+        """
+        return self._node.转SQL({field: str(dtype) for field, dtype in 字段类型.items()})
+
+
+def 编译查询(expression, 默认字段=None):
+    """编译查询表达式，无法解析时抛出查询表达式错误"""
+    return 查询表达式((expression or '').strip(), 默认字段)
+
+
+def _字段类别(dtype):
+    import pandas as pd
+    if isinstance(dtype, str):
+        if dtype.startswith(('int', 'uint', 'float', 'Int', 'UInt', 'Float')):
+            return 'numeric'
+        return 'datetime' if dtype.startswith('datetime') else 'text'
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'text'
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    return 'text'
+
+
+def _文本列(series, 缓存):
+    """把字段转换为pandas字符串类型，同一次筛选中每个字段只转换一次"""
+    key = ('text', series.name)
+    if key not in 缓存:
+        缓存[key] = series if str(series.dtype).startswith('string') else series.astype('string')
+    return 缓存[key]
+
+
+def _LIKE正则(pattern):
+    """把LIKE模式转换为正则表达式，%匹配任意字符串，_匹配单个字符"""
+    return ''.join('.*' if char == '%' else '.' if char == '_' else re.escape(char) for char in pattern)
+
+
+def _SQL字段(field):
+    return '"' + field.replace('"', '""') + '"'
+
+
+def _SQL文本(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _SQL数值(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def 查询条件转SQL(field, expression, 数值字段=False):
+    """
+    把单个字段的查询表达式（例如"等于 410102"、"开头包含 4101"）转换为OGR SQL条件
+
+    参数:
+        field: 字段名
+        expression: 查询表达式
+        数值字段: 字段是否为数值类型，决定值是否加引号
+
+    返回:
+        (SQL条件, 是否精确)，无法转换时返回None；
+        不精确的条件只用于读取时预筛选，读取后还要按原表达式筛选
+    """
+    try:
+        query = 编译查询(expression, 默认字段=field)
+    except 查询表达式错误:
+        return None
+    return query.转SQL({field: 'float64' if 数值字段 else 'object'})
+
+
 def 获取所有字段(file_path):
     """
     获取矢量数据中的所有字段名称
@@ -285,7 +744,7 @@ def 获取所有字段(file_path):
     """
     try:
         # 读取数据
-        gdf = gpd.read_file(file_path)
+        gdf = 读取矢量(file_path)
         
         # 获取所有字段（包括geometry）
         all_fields = list(gdf.columns)
@@ -7,12 +7,84 @@
 
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+import numpy as np
 import geopandas as gpd
+from functions.矢量读写 import 读取矢量, 写出矢量, 分块读取矢量, 分块写出器
+import shapely
+from pyproj import CRS, Transformer
 
 # EPSG代码映射（与gis_workflow_interface.py中的保持一致）
 epsg_codes = [4513, 4514, 4515, 4516, 4517, 4518, 4519, 4520, 4521, 4522, 4523, 
               4524, 4525, 4526, 4527, 4528, 4529, 4530, 4531, 4532, 4533, 4490]
 
+# 分块转换时每块包含的要素数量，控制单次坐标数组的内存占用
+默认分块大小 = 50000
+
+@lru_cache(maxsize=64)
+def 获取坐标转换器(源坐标系, 目标坐标系):
+    """
+    获取缓存的坐标转换器，相同的(源, 目标)坐标系只构建一次
+    
+    Args:
+        源坐标系: 源坐标系的WKT或"EPSG:xxxx"字符串
+        目标坐标系: 目标坐标系的WKT或"EPSG:xxxx"字符串
+    """
+    return Transformer.from_crs(
+        CRS.from_user_input(源坐标系),
+        CRS.from_user_input(目标坐标系),
+        always_xy=True
+    )
+
+def 分块转换投影(gdf, 目标坐标系, 分块大小=默认分块大小):
+    """
+    分块转换GeoDataFrame的投影，替代gdf.to_crs
+    
+    使用缓存的转换器，按块对坐标数组做向量化转换，同一时间只展开一个分块的坐标。
+    返回的仍是完整的GeoDataFrame（属性列浅复制），整个图层的流式转换见修改数据投影
+    
+    Args:
+        gdf: 带有坐标系的GeoDataFrame
+        目标坐标系: 目标坐标系（可被pyproj识别的任意形式）
+        分块大小: 每块处理的要素数量
+    """
+    if gdf.crs is None:
+        raise ValueError("数据没有定义投影，无法转换")
+    
+    目标crs = CRS.from_user_input(目标坐标系)
+    if gdf.crs == 目标crs:
+        return gdf
+    
+    transformer = 获取坐标转换器(gdf.crs.to_wkt(), 目标crs.to_wkt())
+    
+    def _转换坐标(coords):
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([x, y])
+    
+    def _转换三维坐标(coords):
+        x, y, z = transformer.transform(coords[:, 0], coords[:, 1], coords[:, 2])
+        return np.column_stack([x, y, z])
+    
+    geoms = np.asarray(gdf.geometry.array)
+    结果 = np.empty(len(geoms), dtype=object)
+    分块大小 = max(1, int(分块大小))
+    for start in range(0, len(geoms), 分块大小):
+        chunk = geoms[start:start + 分块大小]
+        # 带Z值的几何同时转换高程，与to_crs一致
+        has_z = shapely.has_z(chunk)
+        if has_z.any():
+            转换结果 = np.empty(len(chunk), dtype=object)
+            转换结果[has_z] = shapely.transform(chunk[has_z], _转换三维坐标, include_z=True)
+            转换结果[~has_z] = shapely.transform(chunk[~has_z], _转换坐标)
+        else:
+            转换结果 = shapely.transform(chunk, _转换坐标)
+        结果[start:start + 分块大小] = 转换结果
+    
+    gdf = gdf.copy(deep=False)
+    gdf[gdf.geometry.name] = gpd.GeoSeries(结果, index=gdf.index, crs=目标crs)
+    return gdf.set_crs(目标crs, allow_override=True)
+
 def 定义数据投影(file_path, proj_index):
     """
     为无投影信息的矢量数据指定投影坐标系
@@ -29,7 +101,7 @@ def 定义数据投影(file_path, proj_index):
             epsg_code = epsg_codes[proj_index]
             
             # 读取数据
-            gdf = gpd.read_file(file_path)
+            gdf = 读取矢量(file_path)
             
             # 为数据设置投影，添加allow_override=True以允许覆盖现有CRS
             gdf = gdf.set_crs(f"EPSG:{epsg_code}", allow_override=True)
@@ -39,7 +111,7 @@ def 定义数据投影(file_path, proj_index):
             output_path = f"{base_path}_prj{ext}"
             
             # 保存文件
-            gdf.to_file(output_path, encoding='utf-8')
+            写出矢量(gdf, output_path, encoding='utf-8')
             
             print(f"投影定义成功！输出文件: {output_path}")
             return output_path
@@ -66,24 +138,28 @@ def 修改数据投影(file_path, proj_index):
         if 0 <= proj_index < len(epsg_codes):
             epsg_code = epsg_codes[proj_index]
             
-            # 读取数据
-            gdf = gpd.read_file(file_path)
-            
-            # 检查数据是否已有投影
-            if gdf.crs is None:
-                print("警告：数据没有定义投影，将直接设置新投影")
-                # 添加allow_override=True以允许覆盖现有CRS（如果存在）
-                gdf = gdf.set_crs(f"EPSG:{epsg_code}", allow_override=True)
-            else:
-                # 转换投影
-                gdf = gdf.to_crs(f"EPSG:{epsg_code}")
-            
             # 生成输出文件路径（添加_prj后缀）
             base_path, ext = os.path.splitext(file_path)
             output_path = f"{base_path}_prj{ext}"
             
-            # 保存文件
-            gdf.to_file(output_path, encoding='utf-8')
+            def _转换(gdf):
+                # 检查数据是否已有投影
+                if gdf.crs is None:
+                    # 添加allow_override=True以允许覆盖现有CRS（如果存在）
+                    return gdf.set_crs(f"EPSG:{epsg_code}", allow_override=True)
+                # 转换投影（使用缓存的转换器）
+                return 分块转换投影(gdf, f"EPSG:{epsg_code}")
+            
+            # 按分块读取、转换并追加写出，内存中只保留当前分块
+            writer = 分块写出器(output_path, encoding='utf-8')
+            for i, chunk in enumerate(分块读取矢量(file_path)):
+                if i == 0 and chunk.crs is None:
+                    print("警告：数据没有定义投影，将直接设置新投影")
+                writer.写出(_转换(chunk))
+            
+            # 空图层不会产生分块，单独写出一个只有结构的文件
+            if writer.count == 0:
+                写出矢量(_转换(读取矢量(file_path)), output_path, encoding='utf-8')
             
             print(f"投影修改成功！输出文件: {output_path}")
             return output_path
@@ -95,6 +171,56 @@ def 修改数据投影(file_path, proj_index):
         print(f"修改数据投影时出错: {e}")
         return False
 
+def 批量修改数据投影(file_paths, proj_index, max_workers=None, progress_callback=None):
+    """
+    使用进程池批量修改多个矢量文件的投影
+    
+    Args:
+        file_paths: 矢量文件路径列表
+        proj_index: 投影索引（对应epsg_codes列表中的索引）
+        max_workers: 最大进程数，默认为CPU核心数
+        progress_callback: 进度回调函数，参数为(已完成数量, 总数量)
+    
+    Returns:
+        (成功输出路径列表, 失败文件路径列表)
+    """
+    file_paths = [p for p in file_paths if p]
+    成功列表 = []
+    失败列表 = []
+    if not file_paths:
+        return 成功列表, 失败列表
+    
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(file_paths)))
+    
+    print(f"开始批量修改数据投影: {len(file_paths)} 个文件, 进程数: {max_workers}")
+    
+    # 单文件或单进程时直接在当前进程执行，避免进程启动开销
+    if max_workers == 1:
+        for i, file_path in enumerate(file_paths, 1):
+            result = 修改数据投影(file_path, proj_index)
+            (成功列表 if result else 失败列表).append(result or file_path)
+            if progress_callback:
+                progress_callback(i, len(file_paths))
+        return 成功列表, 失败列表
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(修改数据投影, file_path, proj_index): file_path for file_path in file_paths}
+        for i, future in enumerate(as_completed(futures), 1):
+            file_path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"修改数据投影时出错: {file_path}, {e}")
+                result = False
+            (成功列表 if result else 失败列表).append(result or file_path)
+            if progress_callback:
+                progress_callback(i, len(file_paths))
+    
+    print(f"批量修改数据投影完成: 成功 {len(成功列表)} 个, 失败 {len(失败列表)} 个")
+    return 成功列表, 失败列表
+
 # 测试代码
 if __name__ == "__main__":
     print("投影转换模块测试")
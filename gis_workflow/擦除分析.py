@@ -5,9 +5,103 @@ import os
 # 确保可以导入上级目录的模块
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import numpy as np
 import geopandas as gpd
+import shapely
 from shapely.geometry import GeometryCollection
 
+from functions.矢量读写 import _推断几何类型
+from gis_workflow.相交分析 import 默认分块大小, _几何维度, _修复几何, _分块计算, _进程数, _提取同类几何
+
+
+def _擦除分块(main_geoms, erase_geoms, counts, dim):
+    """
+    从每个要素中减去与它相交的擦除要素（在进程池中执行时需要是模块级函数）
+
+    Args:
+        main_geoms: 被擦除的几何，每个要素至少与一个擦除要素相交
+        erase_geoms: 与各要素相交的擦除几何，按要素顺序连续排列
+        counts: 每个要素相交的擦除几何数量
+        dim: 主图层几何维度
+    """
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    masks = erase_geoms[offsets]
+    # 只与一个擦除要素相交时直接使用该要素，多个时只合并这几个要素
+    for i in np.flatnonzero(counts > 1):
+        masks[i] = shapely.union_all(erase_geoms[offsets[i]:offsets[i] + counts[i]])
+    geoms = shapely.difference(main_geoms, masks)
+    return _提取同类几何(geoms, dim) if dim is not None else geoms
+
+
+def 擦除分析(main_gdf, erase_gdf, 分块大小=默认分块大小, max_workers=None, progress_callback=None):
+    """
+    基于空间索引的擦除分析
+
+    用擦除图层的空间索引找出每个要素相交的擦除要素，只减去这些擦除要素的局部合并，
+    不相交的要素原样保留，计算量只与重叠部分有关。结果的字段、几何类型和要素顺序与
+    gpd.overlay(how='difference')一致
+
+    Args:
+        main_gdf (GeoDataFrame): 主输入图层（被擦除的图层）
+        erase_gdf (GeoDataFrame): 擦除图层，坐标系需与主图层相同
+        分块大小 (int): 每块计算的要素对数量
+        max_workers (int): 进程数，None表示要素对超过并行阈值时使用全部CPU核心，1表示在当前进程中计算
+        progress_callback: 进度回调函数，参数为(已完成要素对数, 要素对总数)
+
+    Returns:
+        GeoDataFrame: 擦除结果图层
+    """
+    dim = _几何维度(main_gdf)
+    index_main, index_erase = erase_gdf.sindex.query(main_gdf.geometry.values, predicate='intersects', sort=True)
+    total = len(index_main)
+    # 与擦除要素相交的行，以及每行的要素对在索引中的起始位置和数量
+    rows, pair_starts, counts = np.unique(index_main, return_index=True, return_counts=True)
+    print(f"擦除候选要素对: {total}，涉及要素: {len(rows)}/{len(main_gdf)}")
+
+    result_geoms = np.asarray(main_gdf.geometry.values, dtype=object).copy()
+    if total:
+        erase_geoms = np.asarray(erase_gdf.geometry.values, dtype=object)
+        # 只修复参与计算的无效几何
+        used_erase = np.unique(index_erase)
+        erase_geoms = erase_geoms.copy()
+        erase_geoms[used_erase] = _修复几何(erase_geoms[used_erase])
+        main_geoms = _修复几何(result_geoms[rows])
+        pair_geoms = erase_geoms[index_erase]
+
+        # 按要素对数量分块，同一要素的擦除几何不拆到两个分块中
+        分块大小 = max(1, int(分块大小))
+        row_starts = np.unique(np.searchsorted(pair_starts, np.arange(0, total, 分块大小)))
+        row_ends = np.append(row_starts[1:], len(rows))
+        max_workers = _进程数(max_workers, total, len(row_starts))
+        if max_workers > 1:
+            print(f"使用 {max_workers} 个进程分块计算擦除")
+
+        def 分块参数():
+            for start, end in zip(row_starts, row_ends):
+                pair_start = pair_starts[start]
+                pair_end = pair_starts[end] if end < len(rows) else total
+                yield ((main_geoms[start:end], pair_geoms[pair_start:pair_end], counts[start:end], dim),
+                       pair_end - pair_start)
+
+        chunks = _分块计算(_擦除分块, 分块参数(), max_workers, progress_callback, total)
+        for start, end, geoms in zip(row_starts, row_ends, chunks):
+            result_geoms[rows[start:end]] = geoms
+    elif progress_callback:
+        progress_callback(0, 0)
+
+    keep = ~shapely.is_missing(result_geoms)
+    keep[keep] = ~shapely.is_empty(result_geoms[keep])
+    positions = np.flatnonzero(keep)
+    result = main_gdf.iloc[positions].reset_index(drop=True)
+    geometry = main_gdf.geometry.name
+    result[geometry] = gpd.GeoSeries(result_geoms[positions], crs=main_gdf.crs)
+    if result.empty:
+        # 空结果无法推断几何类型，记录输入图层的几何类型供导出使用
+        result.attrs['geometry_type'] = _推断几何类型(main_gdf)
+    print(f"擦除结果特征数：{len(result)}")
+    return result
+
+
 class EraseAnalysis:
     """
     擦除分析功能类
@@ -18,17 +112,23 @@ class EraseAnalysis:
     def __init__(self):
         self.keep_all = True
         self.precision = False
+        self.max_workers = None
+        self.progress_callback = None
     
-    def set_params(self, keep_all=True, precision=False):
+    def set_params(self, keep_all=True, precision=False, max_workers=None, progress_callback=None):
         """
         设置擦除分析参数
         
         Args:
             keep_all (bool): 是否保留所有结果
             precision (bool): 是否使用高精度计算
+            max_workers (int): 分块计算的进程数，None表示数据量大时自动使用多进程，1表示不使用多进程
+            progress_callback: 进度回调函数，参数为(已完成要素对数, 要素对总数)
         """
         self.keep_all = keep_all
         self.precision = precision
+        self.max_workers = max_workers
+        self.progress_callback = progress_callback
     
     def perform_erase(self, main_gdf, erase_gdf):
         """
@@ -67,8 +167,11 @@ class EraseAnalysis:
             print(f"擦除图层信息：类型={erase_gdf.geometry.type.iloc[0] if not erase_gdf.empty else '空'}, \
                   特征数={len(erase_gdf)}, 列={list(erase_gdf.columns)}")
             
-            # 执行擦除操作 (使用difference叠加操作)
-            erase_result = gpd.overlay(main_gdf, erase_gdf, how='difference')
+            # 执行擦除操作：每个要素只减去与它相交的擦除要素
+            erase_result = 擦除分析(
+                main_gdf, erase_gdf,
+                max_workers=self.max_workers, progress_callback=self.progress_callback
+            )
             print(f"擦除结果特征数：{len(erase_result)}")
             
             if erase_result.empty:
@@ -81,6 +184,12 @@ class EraseAnalysis:
         except Exception as e:
             print(f"执行擦除操作时发生错误：{e}")
             # 尝试使用替代方法
+            try:
+                erase_result = gpd.overlay(main_gdf, erase_gdf, how='difference')
+                print("使用overlay完成擦除操作")
+                return erase_result
+            except Exception as overlay_e:
+                print(f"overlay擦除失败：{overlay_e}")
             try:
                 # 首先确保擦除图层是一个有效的GeoDataFrame
                 if erase_gdf is not None and not erase_gdf.empty:
@@ -0,0 +1,300 @@
+# coding:utf-8
+"""
+工作流导出模块的写出实现
+
+上游结果按分块写出为SHP/GPKG/GDB/GeoParquet：GeoDataFrame按行切片，
+结果句柄和分块生成器逐块读取，字段重命名、字段筛选等处理只作用于当前分块，
+导出时不再复制一份完整数据
+"""
+
+import os
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from functions.矢量读写 import 拆分图层路径, 识别驱动, 写出矢量, 默认分块大小, _推断几何类型, 代码页映射
+
+# 导出格式与扩展名
+导出格式 = {
+    '.shp': 'ESRI Shapefile',
+    '.gpkg': 'GPKG',
+    '.gdb': 'OpenFileGDB',
+    '.parquet': 'GeoParquet',
+}
+
+# shapely几何类型编号与GeoParquet几何类型名称
+几何类型名称 = {
+    0: 'Point', 1: 'LineString', 3: 'Polygon', 4: 'MultiPoint',
+    5: 'MultiLineString', 6: 'MultiPolygon', 7: 'GeometryCollection',
+}
+
+# SHP字段名的最大字节数
+SHP字段名长度 = 10
+
+# 空结果无法推断几何类型时使用的类型，GDB不支持未知几何类型
+默认几何类型 = 'MultiPolygon'
+
+
+def 编码名称(encoding):
+    """把界面中的编码名称（UTF-8/GBK/GB2312）转换为Python编码名称"""
+    if not encoding:
+        return None
+    return 代码页映射.get(str(encoding).upper(), str(encoding).lower())
+
+
+def SHP字段名(columns, encoding='utf-8'):
+    """
+    生成符合SHP限制的字段名映射
+
+    DBF字段名最多10个字节（按输出编码计算，中文在UTF-8中占3个字节），
+    截断后重名的字段在末尾加序号区分
+
+    返回:
+        {原字段名: 新字段名}，只包含需要改名的字段
+    """
+    encoding = encoding or 'utf-8'
+
+    def 截断(name, size):
+        result = ''
+        for char in name:
+            if len((result + char).encode(encoding, errors='replace')) > size:
+                break
+            result += char
+        return result
+
+    mapping = {}
+    used = set()
+    # 不需要截断的字段先占用名称
+    for col in columns:
+        if len(str(col).encode(encoding, errors='replace')) <= SHP字段名长度:
+            used.add(str(col).upper())
+
+    for col in columns:
+        name = str(col)
+        if len(name.encode(encoding, errors='replace')) <= SHP字段名长度:
+            continue
+        short_name = 截断(name, SHP字段名长度)
+        index = 1
+        while short_name.upper() in used:
+            suffix = f"_{index}"
+            short_name = 截断(name, SHP字段名长度 - len(suffix)) + suffix
+            index += 1
+        used.add(short_name.upper())
+        mapping[col] = short_name
+    return mapping
+
+
+def 识别导出格式(path):
+    """根据输出路径识别导出格式，无法识别时返回None"""
+    path, _ = 拆分图层路径(path)
+    return 导出格式.get(os.path.splitext(path)[1].lower())
+
+
+class 导出写出器:
+    """
+    分块写出工作流结果
+
+    用法:
+        writer = 导出写出器(output_path, encoding='gbk', progress_callback=callback)
+        writer.写出(gdf)  # 也可以是结果句柄或GeoDataFrame分块的可迭代对象
+    """
+
+    def __init__(self, path, layer=None, encoding=None, columns=None, 分块大小=默认分块大小,
+                 progress_callback=None, geometry_type=None):
+        """
+        参数:
+            path: 输出路径，GDB/GPKG图层可写作"xxx.gdb|图层名"
+            layer: 输出图层名，GDB/GPKG未指定时使用"result"
+            encoding: SHP属性编码，默认为utf-8
+            columns: 要保留的属性字段，None表示全部保留
+            分块大小: 每次写出的要素数
+            progress_callback: 进度回调(已写出数, 总数)，总数未知时为None
+            geometry_type: 无法从数据推断几何类型（例如空结果）时使用的几何类型
+        """
+        self.path, self.layer = 拆分图层路径(path, layer)
+        self.format = 识别导出格式(self.path)
+        if self.format is None:
+            raise ValueError(f"不支持的导出格式: {path}")
+        if self.format in ('GPKG', 'OpenFileGDB'):
+            self.layer = self.layer or 'result'
+        self.encoding = 编码名称(encoding) or 'utf-8'
+        self.columns = columns
+        self.分块大小 = max(1, int(分块大小))
+        self.progress_callback = progress_callback
+        self.geometry_type = geometry_type
+        self.count = 0
+        self.renamed = {}
+        self._geometry_type = None
+        self._parquet_writer = None
+        self._parquet_schema = None
+        self._parquet_types = set()
+        self._parquet_bounds = None
+        self._parquet_crs = None
+
+    @property
+    def 输出路径(self):
+        return self.path if self.layer is None else f"{self.path}|{self.layer}"
+
+    def _分块(self, source):
+        """把数据源拆分为GeoDataFrame分块，返回(分块生成器, 总数)"""
+        if isinstance(source, gpd.GeoDataFrame):
+            total = len(source)
+            return (source.iloc[start:start + self.分块大小] for start in range(0, total, self.分块大小)), total
+        if hasattr(source, '分块读取'):
+            return source.分块读取(self.分块大小), len(source)
+        return iter(source), None
+
+    def _整理分块(self, chunk):
+        """字段筛选和SHP字段改名，只作用于当前分块"""
+        geometry_name = chunk.geometry.name
+        if self.columns is not None:
+            keep = [col for col in self.columns if col in chunk.columns and col != geometry_name]
+            chunk = chunk[keep + [geometry_name]]
+        if self.format == 'ESRI Shapefile':
+            if not self.count and not self.renamed:
+                self.renamed = SHP字段名([col for col in chunk.columns if col != geometry_name], self.encoding)
+                for old, new in self.renamed.items():
+                    print(f"重命名字段: {old} -> {new}")
+            if self.renamed:
+                chunk = chunk.rename(columns=self.renamed)
+        return chunk
+
+    def _删除已有输出(self):
+        """覆盖写出前删除已有的输出"""
+        if self.format == 'ESRI Shapefile':
+            base = os.path.splitext(self.path)[0]
+            for ext in ('.shp', '.shx', '.dbf', '.prj', '.cpg', '.sbn', '.sbx', '.qix'):
+                if os.path.exists(base + ext):
+                    os.remove(base + ext)
+        elif self.format == 'GeoParquet' and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _写出矢量分块(self, chunk):
+        kwargs = {'mode': 'a' if self.count else 'w'}
+        if self._geometry_type and self._geometry_type != 'Unknown':
+            kwargs['geometry_type'] = self._geometry_type
+            kwargs['promote_to_multi'] = self._geometry_type.startswith('Multi')
+        写出矢量(chunk, self.path, layer=self.layer, driver=识别驱动(self.path) or self.format,
+                encoding=self.encoding if self.format == 'ESRI Shapefile' else None, **kwargs)
+
+    def _写出Parquet分块(self, chunk):
+        import pyarrow.parquet as pq
+        from geopandas.io.arrow import _geopandas_to_arrow
+
+        table = _geopandas_to_arrow(chunk, index=False)
+        if self._parquet_writer is None:
+            # geo元数据在关闭时按全部分块的几何类型和范围写入
+            self._parquet_schema = table.schema.remove_metadata()
+            self._parquet_writer = pq.ParquetWriter(self.path, self._parquet_schema)
+            self._parquet_crs = chunk.crs
+        table = table.replace_schema_metadata(None).cast(self._parquet_schema)
+        self._parquet_writer.write_table(table)
+
+        # 累计几何类型和范围
+        geoms = chunk.geometry.dropna().values
+        types = shapely.get_type_id(geoms)
+        has_z = shapely.has_z(geoms)
+        self._parquet_types.update(
+            几何类型名称[type_id] + (' Z' if z else '')
+            for type_id, z in set(zip(types.tolist(), has_z.tolist())) if type_id in 几何类型名称
+        )
+        bounds = chunk.geometry.total_bounds
+        if not np.isnan(bounds).any():
+            if self._parquet_bounds is None:
+                self._parquet_bounds = bounds
+            else:
+                self._parquet_bounds = np.concatenate([
+                    np.minimum(self._parquet_bounds[:2], bounds[:2]),
+                    np.maximum(self._parquet_bounds[2:], bounds[2:]),
+                ])
+
+    def _关闭Parquet(self):
+        import json
+        from geopandas.io.arrow import METADATA_VERSION
+
+        if self._parquet_writer is None:
+            return
+        geometry_name = self._geometry_name
+        column = {'encoding': 'WKB', 'geometry_types': sorted(self._parquet_types)}
+        if self._parquet_crs is not None:
+            column['crs'] = self._parquet_crs.to_json_dict()
+        else:
+            column['crs'] = None
+        if self._parquet_bounds is not None:
+            column['bbox'] = [float(value) for value in self._parquet_bounds]
+        geo = {'primary_column': geometry_name, 'columns': {geometry_name: column},
+               'version': METADATA_VERSION, 'creator': {'library': 'geopandas', 'version': gpd.__version__}}
+        self._parquet_writer.add_key_value_metadata({'geo': json.dumps(geo)})
+        self._parquet_writer.close()
+        self._parquet_writer = None
+
+    def _空结果几何类型(self, source):
+        """空结果的几何类型：依次使用指定的类型、数据源记录的类型，GDB/GPKG仍未知时使用默认几何类型"""
+        geometry_type = self._geometry_type
+        if not geometry_type or geometry_type == 'Unknown':
+            # 图层句柄记录了数据源的几何类型，相交、擦除等空结果在attrs中记录输入图层的几何类型
+            geometry_type = self.geometry_type or getattr(source, 'geometry_type', None) \
+                or getattr(source, 'attrs', {}).get('geometry_type') or 'Unknown'
+        if geometry_type == 'Unknown' and self.format in ('GPKG', 'OpenFileGDB'):
+            geometry_type = 默认几何类型
+        return geometry_type
+
+    def 写出(self, source):
+        """
+        写出数据
+
+        参数:
+            source: GeoDataFrame、结果句柄，或逐个产出GeoDataFrame分块的可迭代对象
+
+        返回:
+            输出路径，GDB/GPKG为"数据源|图层名"
+        """
+        chunks, total = self._分块(source)
+        if isinstance(source, gpd.GeoDataFrame) and len(source):
+            # 按完整数据确定几何类型，避免分块之间单部件和多部件不一致
+            self._geometry_type = _推断几何类型(source)
+
+        output_dir = os.path.dirname(self.path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self._删除已有输出()
+
+        self._geometry_name = 'geometry'
+        try:
+            for chunk in chunks:
+                if chunk is None or len(chunk) == 0:
+                    continue
+                chunk = self._整理分块(chunk)
+                self._geometry_name = chunk.geometry.name
+                if self._geometry_type is None:
+                    # 分块来源的几何类型按第一块确定，线和面统一为多部件
+                    geometry_type = _推断几何类型(chunk)
+                    if geometry_type.split(' ')[0] in ('LineString', 'Polygon'):
+                        geometry_type = 'Multi' + geometry_type
+                    self._geometry_type = geometry_type
+                if self.format == 'GeoParquet':
+                    self._写出Parquet分块(chunk)
+                else:
+                    self._写出矢量分块(chunk)
+                self.count += len(chunk)
+                if self.progress_callback:
+                    self.progress_callback(self.count, total)
+        finally:
+            if self.format == 'GeoParquet':
+                self._关闭Parquet()
+
+        if not self.count:
+            print(f"导出数据为空: {self.输出路径}")
+            # 空结果也写出只有字段结构的文件
+            empty = source if isinstance(source, gpd.GeoDataFrame) else None
+            if empty is None and hasattr(source, '读取'):
+                empty = source.读取()
+            if empty is not None:
+                self._geometry_type = self._空结果几何类型(source)
+                chunk = self._整理分块(empty.iloc[:0])
+                if self.format == 'GeoParquet':
+                    chunk.to_parquet(self.path, index=False)
+                else:
+                    self._写出矢量分块(chunk)
+        return self.输出路径
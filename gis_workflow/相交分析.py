@@ -5,9 +5,227 @@ import os
 # 确保可以导入上级目录的模块
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 import geopandas as gpd
+import shapely
 from shapely.geometry import GeometryCollection
 
+from functions.几何修复 import 修复无效几何
+from functions.矢量读写 import _推断几何类型
+
+# 分块相交时每块包含的候选要素对数量
+默认分块大小 = 50000
+
+# 候选要素对超过此数量时才使用多进程，数据量小时进程启动和传输的开销大于计算
+并行阈值 = 200000
+
+
+def _几何维度(gdf):
+    """图层中第一个非空几何的维度（点0、线1、面2），没有几何时返回None"""
+    geoms = gdf.geometry.values
+    geoms = geoms[~(geoms.isna() | geoms.is_empty)]
+    if len(geoms) == 0:
+        return None
+    return int(shapely.get_dimensions(geoms[0]))
+
+
+def _修复几何(geoms):
+    """修复几何数组中的无效几何，没有无效几何时原样返回"""
+    fixed, repaired_count = 修复无效几何(gpd.GeoSeries(geoms))
+    if repaired_count:
+        print(f"修复无效几何: {repaired_count} 个")
+    return np.asarray(fixed.values, dtype=object)
+
+
+def _分块计算(函数, 分块参数, max_workers=1, progress_callback=None, total=None):
+    """
+    依次在当前进程或进程池中计算各分块，按分块顺序产出结果
+
+    Args:
+        函数: 模块级函数，进程池中执行时需要能被导入
+        分块参数: 可迭代对象，每项为(参数元组, 分块要素数)，进程池中按需取出，不会一次性生成全部分块
+        max_workers (int): 进程数，1表示在当前进程中计算
+        progress_callback: 进度回调函数，参数为(已完成要素数, 总数)
+        total (int): 要素总数，用于进度回调
+    """
+    done = 0
+    if max_workers <= 1:
+        for args, size in 分块参数:
+            result = 函数(*args)
+            done += size
+            if progress_callback:
+                progress_callback(done, total)
+            yield result
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # 同时提交的分块数有限，避免把全部几何一次性复制到进程队列中
+        pending = []
+        chunk_iter = iter(分块参数)
+        for args, size in chunk_iter:
+            pending.append((executor.submit(函数, *args), size))
+            if len(pending) >= max_workers * 2:
+                break
+        while pending:
+            future, size = pending.pop(0)
+            result = future.result()
+            next_chunk = next(chunk_iter, None)
+            if next_chunk is not None:
+                pending.append((executor.submit(函数, *next_chunk[0]), next_chunk[1]))
+            done += size
+            if progress_callback:
+                progress_callback(done, total)
+            yield result
+
+
+def _进程数(max_workers, total, 分块数):
+    """确定分块计算的进程数，None表示数据量超过并行阈值时使用全部CPU核心"""
+    if max_workers is None:
+        max_workers = (os.cpu_count() or 1) if total >= 并行阈值 else 1
+    return max(1, min(max_workers, 分块数 or 1))
+
+
+def _提取同类几何(geoms, dim):
+    """
+    只保留指定维度的几何，与overlay的keep_geom_type一致
+
+    几何集合中取出同维度的部分重新组合为多部件几何，
+    空几何和维度不同的几何返回None
+    """
+    result = np.asarray(geoms, dtype=object).copy()
+    type_ids = shapely.get_type_id(result)
+    collections = type_ids == 7
+    if collections.any():
+        positions = np.flatnonzero(collections)
+        parts, index = shapely.get_parts(result[positions], return_index=True)
+        # 几何集合中可能还有多部件几何，拆分为单部件
+        parts, part_index = shapely.get_parts(parts, return_index=True)
+        index = index[part_index]
+        keep = (shapely.get_dimensions(parts) == dim) & ~shapely.is_empty(parts)
+        parts, index = parts[keep], index[keep]
+        combined = np.full(len(positions), None, dtype=object)
+        if len(parts):
+            constructor = {0: shapely.multipoints, 1: shapely.multilinestrings, 2: shapely.multipolygons}[dim]
+            groups = np.unique(index)
+            combined[groups] = constructor(parts, indices=np.searchsorted(groups, index))
+            # 只有一个部件时不使用多部件几何
+            single = np.bincount(index, minlength=len(positions)) == 1
+            combined[single] = shapely.get_geometry(combined[single], 0)
+        result[positions] = combined
+    valid = ~shapely.is_missing(result)
+    valid[valid] = (shapely.get_dimensions(result[valid]) == dim) & ~shapely.is_empty(result[valid])
+    result[~valid] = None
+    return result
+
+
+def _计算相交(geoms1, geoms2, dim):
+    """计算成对几何的相交（在进程池中执行时需要是模块级函数）"""
+    geoms = shapely.intersection(geoms1, geoms2)
+    return _提取同类几何(geoms, dim) if dim is not None else geoms
+
+
+def _相交字段(columns1, columns2, keep_fields=None):
+    """
+    确定结果中保留的字段及其名称，两个图层的同名字段加_1、_2后缀
+
+    返回:
+        ([(图层1字段, 结果字段)], [(图层2字段, 结果字段)])
+    """
+    duplicated = set(columns1) & set(columns2)
+
+    def 字段映射(columns, suffix):
+        mapping = []
+        for col in columns:
+            name = f"{col}{suffix}" if col in duplicated else col
+            if keep_fields is None or col in keep_fields or name in keep_fields:
+                mapping.append((col, name))
+        return mapping
+
+    return 字段映射(columns1, '_1'), 字段映射(columns2, '_2')
+
+
+def 相交分析(first_gdf, second_gdf, keep_fields=None, 分块大小=默认分块大小, max_workers=None,
+          progress_callback=None):
+    """
+    基于空间索引的相交分析
+
+    用第二个图层的空间索引筛选出相交的要素对，按块对成对的几何做向量化相交，
+    结果只带上需要保留的字段。几何类型、字段命名和要素顺序与
+    gpd.overlay(how='intersection')一致
+
+    Args:
+        first_gdf (GeoDataFrame): 第一个输入图层
+        second_gdf (GeoDataFrame): 第二个输入图层，坐标系需与第一个图层相同
+        keep_fields (list): 要保留的字段，可以是原字段名或带_1、_2后缀的结果字段名，None表示全部保留
+        分块大小 (int): 每块计算的要素对数量
+        max_workers (int): 进程数，None表示要素对超过并行阈值时使用全部CPU核心，1表示在当前进程中计算
+        progress_callback: 进度回调函数，参数为(已完成要素对数, 要素对总数)
+
+    Returns:
+        GeoDataFrame: 相交结果图层
+    """
+    if isinstance(keep_fields, str):
+        keep_fields = [field.strip() for field in keep_fields.split(',') if field.strip()]
+    keep_fields = set(keep_fields) if keep_fields else None
+
+    geometry1, geometry2 = first_gdf.geometry.name, second_gdf.geometry.name
+    mapping1, mapping2 = _相交字段(
+        [col for col in first_gdf.columns if col != geometry1],
+        [col for col in second_gdf.columns if col != geometry2],
+        keep_fields
+    )
+    dim = _几何维度(first_gdf)
+
+    # 空间索引筛选候选要素对，按第一个图层的要素顺序排列
+    index1, index2 = second_gdf.sindex.query(first_gdf.geometry.values, predicate='intersects', sort=True)
+    total = len(index1)
+    print(f"相交候选要素对: {total}")
+
+    geoms1 = np.asarray(first_gdf.geometry.values, dtype=object)
+    geoms2 = np.asarray(second_gdf.geometry.values, dtype=object)
+    # 只修复参与相交的无效面要素
+    used1, used2 = np.unique(index1), np.unique(index2)
+    geoms1 = geoms1.copy()
+    geoms2 = geoms2.copy()
+    geoms1[used1] = _修复几何(geoms1[used1])
+    geoms2[used2] = _修复几何(geoms2[used2])
+
+    分块大小 = max(1, int(分块大小))
+    starts = range(0, total, 分块大小)
+    max_workers = _进程数(max_workers, total, len(starts))
+    if max_workers > 1:
+        print(f"使用 {max_workers} 个进程分块计算相交")
+
+    分块参数 = (
+        ((geoms1[index1[start:start + 分块大小]], geoms2[index2[start:start + 分块大小]], dim),
+         min(分块大小, total - start))
+        for start in starts
+    )
+    result_geoms = np.empty(total, dtype=object)
+    for start, geoms in zip(starts, _分块计算(_计算相交, 分块参数, max_workers, progress_callback, total)):
+        result_geoms[start:start + len(geoms)] = geoms
+
+    keep = ~shapely.is_missing(result_geoms)
+    index1, index2, result_geoms = index1[keep], index2[keep], result_geoms[keep]
+
+    # 只取需要保留的字段，按要素对位置取值
+    columns = {}
+    for source, index, mapping in ((first_gdf, index1, mapping1), (second_gdf, index2, mapping2)):
+        for col, name in mapping:
+            columns[name] = source[col].take(index).reset_index(drop=True)
+    result = pd.DataFrame(columns, index=pd.RangeIndex(len(result_geoms)))
+    result[geometry1] = gpd.GeoSeries(result_geoms, crs=first_gdf.crs)
+    result = gpd.GeoDataFrame(result, geometry=geometry1, crs=first_gdf.crs)
+    if result.empty:
+        # 空结果无法推断几何类型，记录输入图层的几何类型供导出使用
+        result.attrs['geometry_type'] = _推断几何类型(first_gdf)
+    print(f"相交结果特征数：{len(result)}，保留字段：{[name for name in columns]}")
+    return result
+
+
 class IntersectAnalysis:
     """
     相交分析功能类
@@ -17,17 +235,26 @@ class IntersectAnalysis:
     def __init__(self):
         self.keep_all = True
         self.precision = False
+        self.keep_fields = None
+        self.max_workers = None
+        self.progress_callback = None
     
-    def set_params(self, keep_all=True, precision=False):
+    def set_params(self, keep_all=True, precision=False, keep_fields=None, max_workers=None, progress_callback=None):
         """
         设置相交分析参数
         
         Args:
             keep_all (bool): 是否保留所有相交结果
             precision (bool): 是否使用高精度计算
+            keep_fields (list): 结果中保留的字段，None或空列表表示全部保留
+            max_workers (int): 分块计算的进程数，None表示数据量大时自动使用多进程，1表示不使用多进程
+            progress_callback: 进度回调函数，参数为(已完成要素对数, 要素对总数)
         """
         self.keep_all = keep_all
         self.precision = precision
+        self.keep_fields = keep_fields or None
+        self.max_workers = max_workers
+        self.progress_callback = progress_callback
     
     def perform_intersect(self, first_gdf, second_gdf):
         """
@@ -66,9 +293,11 @@ class IntersectAnalysis:
             print(f"图层2信息：类型={second_gdf.geometry.type.iloc[0] if not second_gdf.empty else '空'}, \
                   特征数={len(second_gdf)}, 列={list(second_gdf.columns)}")
             
-            # 执行相交操作
-            intersect_result = gpd.overlay(first_gdf, second_gdf, how='intersection')
-            print(f"相交结果特征数：{len(intersect_result)}")
+            # 执行相交操作：空间索引筛选要素对后分块计算，只带上保留的字段
+            intersect_result = 相交分析(
+                first_gdf, second_gdf, keep_fields=self.keep_fields,
+                max_workers=self.max_workers, progress_callback=self.progress_callback
+            )
             
             if intersect_result.empty:
                 print("警告：相交结果为空，两个图层可能没有重叠区域")
@@ -79,20 +308,17 @@ class IntersectAnalysis:
             
         except Exception as e:
             print(f"执行相交操作时发生错误：{e}")
-            # 尝试使用替代方法
+            # 尝试使用overlay
             try:
-                intersect_result = first_gdf.intersection(second_gdf)
-                print("使用替代方法完成相交操作")
-                # 将结果转换为GeoDataFrame
-                result_gdf = gpd.GeoDataFrame(geometry=intersect_result)
-                # 合并两个输入图层的属性
-                for col in first_gdf.columns:
-                    if col != 'geometry':
-                        result_gdf[f'{col}_1'] = first_gdf[col]
-                for col in second_gdf.columns:
-                    if col != 'geometry':
-                        result_gdf[f'{col}_2'] = second_gdf[col]
-                return result_gdf
+                intersect_result = gpd.overlay(first_gdf, second_gdf, how='intersection')
+                print("使用overlay完成相交操作")
+                if self.keep_fields:
+                    geometry_name = intersect_result.geometry.name
+                    columns = [col for col in intersect_result.columns
+                               if col != geometry_name and (col in self.keep_fields or
+                                                       (col.endswith(('_1', '_2')) and col[:-2] in self.keep_fields))]
+                    intersect_result = intersect_result[columns + [geometry_name]]
+                return intersect_result
             except Exception as inner_e:
                 print(f"替代方法也失败：{inner_e}")
                 return None
@@ -166,6 +392,7 @@ def main():
     print("3. 处理输入数据: layer_data = analyzer.process_input_data(input_data)")
     print("4. 验证输入: is_valid, message = analyzer.validate_inputs(layer_data)")
     print("5. 执行相交: result = analyzer.perform_intersect(first_gdf, second_gdf)")
+    print("也可以直接调用: result = 相交分析(first_gdf, second_gdf, keep_fields=['DLMC'], max_workers=4)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,289 @@
+# coding:utf-8
+"""
+工作流模块结果缓存
+
+每个模块的结果按缓存键保存：缓存键由模块类型、参数、上游模块的缓存键和
+输入文件的修改签名计算得到。再次运行工作流时缓存键不变的模块直接使用上次的结果，
+只有参数变化的模块及其下游模块会重新执行；
+内存中的结果超过上限时转存为临时GeoParquet，需要时再读取
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+# 模块属性中记录输入文件路径的键
+输入路径属性 = ('file_paths', 'gdb_path')
+
+# 模块属性中记录输出文件路径的键
+输出路径属性 = ('shp_output_path', 'excel_output_path', 'output_path')
+
+
+def 复制结果结构(result):
+    """
+    复制模块结果的字典和列表结构，GeoDataFrame等数据对象共用
+
+    下游模块会直接修改输入结果中的字典（例如替换layer_data中的data），
+    传给下游的结果必须是副本，否则会改动缓存中的上游结果
+    """
+    if isinstance(result, dict):
+        return {key: 复制结果结构(value) for key, value in result.items()}
+    if isinstance(result, list):
+        return [复制结果结构(value) for value in result]
+    return result
+
+
+def 文件签名(path):
+    """文件或GDB目录的修改签名，文件不存在时返回None"""
+    from functions.图层目录 import _数据源签名
+    from functions.矢量读写 import 拆分图层路径
+    path, _ = 拆分图层路径(path)
+    return _数据源签名(path)
+
+
+def _属性路径(properties, names):
+    """从模块属性中取出文件路径列表"""
+    paths = []
+    for name in names:
+        value = properties.get(name)
+        if isinstance(value, str) and value:
+            paths.append(value)
+        elif isinstance(value, (list, tuple)):
+            paths.extend(str(item) for item in value if item)
+    return paths
+
+
+def 模块缓存键(module_id, title, category, properties, 上游键):
+    """
+    计算模块的缓存键
+
+    参数:
+        module_id: 模块ID，只取类型前缀，ID中的时间戳不影响缓存键
+        title: 模块标题
+        category: 模块分类
+        properties: 模块属性（参数）
+        上游键: 上游模块缓存键列表，按输入端口顺序
+    """
+    module_type = module_id.rsplit('_', 1)[0] if module_id[-1:].isdigit() else module_id
+    inputs = [[path, 文件签名(path)] for path in _属性路径(properties, 输入路径属性)]
+    content = json.dumps(
+        [module_type, title, category, properties, list(上游键), inputs],
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def _数据大小(data):
+    """估算单个数据对象占用的内存（字节），延迟读取的句柄只计算已读入的数据"""
+    import geopandas as gpd
+    import shapely
+
+    if data is None:
+        return 0
+    if not isinstance(data, gpd.GeoDataFrame):
+        loaded = getattr(data, '_gdf', None)
+        return _数据大小(loaded) if isinstance(loaded, gpd.GeoDataFrame) else 0
+
+    size = 0
+    for name in data.columns:
+        column = data[name]
+        if name == data.geometry.name or isinstance(column, gpd.GeoSeries):
+            # 几何按坐标数估算：每个坐标16字节，每个几何对象约100字节
+            size += int(shapely.get_num_coordinates(column.values).sum()) * 16 + len(column) * 100
+        elif column.dtype == object and len(column) > 1000:
+            # 文本字段按前1000行估算，避免逐个对象统计
+            sample = column.iloc[:1000].memory_usage(deep=True, index=False)
+            size += int(sample / 1000 * len(column))
+        else:
+            size += int(column.memory_usage(deep=True, index=False))
+    return size + int(data.index.memory_usage())
+
+
+def _结果数据(result):
+    """列出模块结果中持有数据的(字典, 键)"""
+    items = []
+    if not isinstance(result, dict):
+        return items
+    if result.get('data') is not None:
+        items.append((result, 'data'))
+    for layer in result.get('layer_data') or []:
+        if isinstance(layer, dict) and layer.get('data') is not None:
+            items.append((layer, 'data'))
+    return items
+
+
+def 结果大小(result):
+    """估算模块结果占用的内存（字节）"""
+    seen = set()
+    size = 0
+    for container, key in _结果数据(result):
+        data = container[key]
+        if id(data) not in seen:
+            seen.add(id(data))
+            size += _数据大小(data)
+    return size
+
+
+class 模块结果缓存:
+    """
+    保存每个模块最近一次的结果
+
+    导出模块会同时记录输出文件的签名，输出文件被删除或修改后缓存失效。
+    设置内存上限后，内存中的结果超过上限时按最久未使用的顺序转存为临时GeoParquet
+    （结果句柄），下游需要时再读取；本次运行中仍有下游未执行的结果最后转存。
+    图层句柄已读入的数据直接释放，需要时从数据源重新读取
+    """
+
+    def __init__(self, 内存上限=None, 变化回调=None):
+        """
+        参数:
+            内存上限: 内存中结果的总大小上限（字节），None表示不限制
+            变化回调: 变化回调(模块ID, 内存大小, 是否已转存)，结果保存或转存后调用
+        """
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._clock = 0
+        self.内存上限 = 内存上限
+        self.变化回调 = 变化回调
+
+    def 设置内存上限(self, 内存上限):
+        """
+        更新内存上限
+
+        设置界面拖动滑块时在界面线程中逐级调用，这里只记录新的上限，
+        转存在下一次保存或标记完成时由工作线程执行，不会阻塞界面，
+        也不会在运行中转存正被下游读取的结果
+        """
+        self.内存上限 = 内存上限
+
+    def 获取(self, module_id, key):
+        """缓存键一致时返回结果副本，否则返回None"""
+        with self._lock:
+            entry = self._entries.get(module_id)
+            if entry is not None:
+                self._clock += 1
+                entry['last_used'] = self._clock
+        if entry is None or entry['key'] != key:
+            return None
+        for path, signature in entry['outputs']:
+            if 文件签名(path) != signature:
+                return None
+        return 复制结果结构(entry['result'])
+
+    def 保存(self, module_id, key, result, properties=None):
+        """保存模块结果，properties中的输出路径会一并记录签名"""
+        outputs = []
+        if properties:
+            outputs = [(path, 文件签名(path)) for path in _属性路径(properties, 输出路径属性)]
+        size = 结果大小(result)
+        with self._lock:
+            old = self._entries.get(module_id)
+            self._clock += 1
+            self._entries[module_id] = {
+                'key': key, 'result': result, 'outputs': outputs, 'size': size,
+                'spilled': False, 'active': True, 'last_used': self._clock,
+            }
+        if old is not None and old['result'] is not result:
+            self._删除转存文件(old)
+        self._通知(module_id)
+        self._控制内存()
+
+    def 标记完成(self, module_id):
+        """本次运行中模块的下游都已执行完，结果可以优先转存"""
+        with self._lock:
+            entry = self._entries.get(module_id)
+        if entry is None:
+            return
+        # 图层句柄可能在下游执行时读入了数据，重新估算大小
+        size = 结果大小(entry['result'])
+        with self._lock:
+            entry['active'] = False
+            changed = entry['size'] != size
+            entry['size'] = size
+        if changed:
+            self._通知(module_id)
+        self._控制内存()
+
+    def 结果信息(self, module_id):
+        """返回(内存大小, 是否已转存)，没有缓存时返回None"""
+        with self._lock:
+            entry = self._entries.get(module_id)
+            return None if entry is None else (entry['size'], entry['spilled'])
+
+    @property
+    def 内存占用(self):
+        with self._lock:
+            return sum(entry['size'] for entry in self._entries.values())
+
+    def _通知(self, module_id):
+        if self.变化回调:
+            info = self.结果信息(module_id)
+            if info is not None:
+                self.变化回调(module_id, *info)
+
+    def _控制内存(self):
+        """超过内存上限时转存结果，先转存已执行完下游的结果，再按最久未使用的顺序"""
+        while self.内存上限 is not None:
+            with self._lock:
+                total = sum(entry['size'] for entry in self._entries.values())
+                if total <= self.内存上限:
+                    return
+                candidates = [(module_id, entry) for module_id, entry in self._entries.items()
+                              if entry['size'] > 0 and not entry.get('spilling')]
+                if not candidates:
+                    return
+                module_id, entry = min(candidates, key=lambda item: (item[1]['active'], item[1]['last_used']))
+                entry['spilling'] = True
+            try:
+                self._转存(module_id, entry)
+            finally:
+                entry['spilling'] = False
+            self._通知(module_id)
+
+    def _转存(self, module_id, entry):
+        """把结果中的GeoDataFrame转存为结果句柄，无法转存时丢弃该缓存"""
+        import geopandas as gpd
+        from functions.结果句柄 import 结果句柄
+
+        spilled = {}
+        for container, key in _结果数据(entry['result']):
+            data = container[key]
+            if isinstance(data, gpd.GeoDataFrame):
+                if id(data) not in spilled:
+                    handle = 结果句柄.保存(data, name=container.get('name') or module_id, 预览行数=0)
+                    if handle.path is None:
+                        # 未安装pyarrow或写出失败，只能丢弃
+                        handle.删除()
+                        print(f"模块 {module_id} 的结果无法转存，已从缓存中移除")
+                        self.清除(module_id)
+                        return
+                    spilled[id(data)] = handle
+                container[key] = spilled[id(data)]
+            elif hasattr(data, '释放'):
+                data.释放()
+        with self._lock:
+            entry['size'] = 结果大小(entry['result'])
+            entry['spilled'] = True
+        print(f"模块 {module_id} 的结果已转存到临时文件")
+
+    def _删除转存文件(self, entry):
+        for container, key in _结果数据(entry['result']):
+            data = container[key]
+            if hasattr(data, '删除'):
+                data.删除()
+
+    def 清除(self, module_id=None):
+        """清除指定模块或全部模块的缓存"""
+        with self._lock:
+            if module_id is None:
+                removed = list(self._entries.values())
+                self._entries.clear()
+            else:
+                removed = [self._entries.pop(module_id)] if module_id in self._entries else []
+        for entry in removed:
+            if entry['spilled']:
+                self._删除转存文件(entry)
+
+    def __contains__(self, module_id):
+        return module_id in self._entries
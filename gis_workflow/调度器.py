@@ -0,0 +1,135 @@
+# coding:utf-8
+"""
+工作流调度器
+
+按模块之间的依赖关系调度执行：上游模块全部完成后下游模块才会开始，
+互不依赖的分支同时在线程池中运行，同时运行的模块数不超过最大并行数。
+调度器本身不依赖Qt，界面通过回调函数接收模块的开始、完成和失败通知
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# 默认同时执行的模块数
+默认并行数 = min(4, os.cpu_count() or 1)
+
+
+def 拓扑排序(依赖, 顺序=None):
+    """
+    对依赖图进行拓扑排序
+
+    参数:
+        依赖: {模块ID: 上游模块ID集合}
+        顺序: 模块ID的优先顺序，同时可以执行的模块按此顺序排列
+
+    返回:
+        模块ID列表，存在循环依赖时抛出异常
+    """
+    priority = {node: index for index, node in enumerate(顺序 or [])}
+    remaining = {node: set(upstream) & set(依赖) for node, upstream in 依赖.items()}
+    result = []
+    while remaining:
+        ready = sorted((node for node, upstream in remaining.items() if not upstream),
+                       key=lambda node: priority.get(node, len(priority)))
+        if not ready:
+            raise Exception("检测到循环依赖")
+        for node in ready:
+            del remaining[node]
+            result.append(node)
+        for upstream in remaining.values():
+            upstream.difference_update(ready)
+    return result
+
+
+class 工作流调度器:
+    """
+    并行执行工作流模块
+
+    用法:
+        scheduler = 工作流调度器(依赖, lambda node, results: 执行(node, results))
+        results = scheduler.运行()
+    """
+
+    def __init__(self, 依赖, 执行函数, 最大并行数=None, 顺序=None,
+                 开始回调=None, 完成回调=None, 失败回调=None, 释放函数=None):
+        """
+        参数:
+            依赖: {模块ID: 上游模块ID集合}
+            执行函数: 执行函数(模块ID, 已完成模块的结果字典)，返回模块结果
+            最大并行数: 同时执行的模块数，默认默认并行数
+            顺序: 模块ID的优先顺序，可同时执行的模块按此顺序提交
+            开始回调: 开始回调(模块ID)，在工作线程中调用
+            完成回调: 完成回调(模块ID, 结果, 已完成数, 总数)，在工作线程中调用
+            失败回调: 失败回调(模块ID, 异常)，在工作线程中调用
+            释放函数: 释放函数(模块ID, 结果)，模块的下游全部完成后调用，
+                      返回值替换结果字典中的结果（例如返回None不再持有该结果）
+        """
+        self.依赖 = {node: set(upstream) & set(依赖) for node, upstream in 依赖.items()}
+        self.执行函数 = 执行函数
+        self.最大并行数 = max(1, 最大并行数 or 默认并行数)
+        self.顺序 = 拓扑排序(self.依赖, 顺序)
+        self.开始回调 = 开始回调
+        self.完成回调 = 完成回调
+        self.失败回调 = 失败回调
+        self.释放函数 = 释放函数
+        self.下游 = {node: {other for other, upstream in self.依赖.items() if node in upstream}
+                   for node in self.依赖}
+
+    def _执行(self, node, results):
+        if self.开始回调:
+            self.开始回调(node)
+        return self.执行函数(node, results)
+
+    def 运行(self):
+        """
+        执行全部模块，任一模块失败时不再启动新模块，等待正在执行的模块结束后抛出该异常
+
+        返回:
+            {模块ID: 结果}
+        """
+        results = {}
+        completed = set()
+        pending = list(self.顺序)
+        running = {}
+        error = None
+        total = len(pending)
+
+        with ThreadPoolExecutor(max_workers=self.最大并行数) as executor:
+            while pending or running:
+                # 提交上游已全部完成的模块
+                if error is None:
+                    for node in list(pending):
+                        if len(running) >= self.最大并行数:
+                            break
+                        if self.依赖[node].issubset(completed):
+                            pending.remove(node)
+                            running[executor.submit(self._执行, node, results)] = node
+                elif not running:
+                    break
+
+                if not running:
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node = running.pop(future)
+                    try:
+                        results[node] = future.result()
+                    except Exception as e:
+                        if error is None:
+                            error = e
+                        if self.失败回调:
+                            self.失败回调(node, e)
+                        continue
+                    completed.add(node)
+                    if self.完成回调:
+                        self.完成回调(node, results[node], len(completed), total)
+                    # 下游全部完成的上游模块不再需要保留结果
+                    if self.释放函数:
+                        for upstream in self.依赖[node]:
+                            if self.下游[upstream].issubset(completed):
+                                results[upstream] = self.释放函数(upstream, results[upstream])
+
+        if error is not None:
+            raise error
+        return results
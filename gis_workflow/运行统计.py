@@ -0,0 +1,330 @@
+# coding:utf-8
+"""
+工作流运行统计
+记录每个模块的耗时、CPU时间、内存变化和输入输出要素数，
+供画布上的模块提示、无界面运行和运行报告使用
+"""
+
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+
+
+def 进程内存():
+    """
+    获取当前进程的内存占用
+
+    返回:
+        (当前内存, 峰值内存)，单位字节，无法获取时为None
+    """
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ('cb', wintypes.DWORD),
+                    ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize, counters.PeakWorkingSetSize
+        except Exception:
+            pass
+        return None, None
+
+    # Linux从/proc读取当前值和峰值
+    try:
+        values = {}
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    name, value = line.split(':', 1)
+                    values[name] = int(value.split()[0]) * 1024
+        if 'VmRSS' in values:
+            return values['VmRSS'], values.get('VmHWM')
+    except OSError:
+        pass
+
+    # 其他系统只能取到峰值（macOS单位为字节，其余为KB）
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != 'darwin':
+            peak *= 1024
+        return None, peak
+    except Exception:
+        return None, None
+
+
+def 结果要素数(result):
+    """统计模块结果中各图层的要素总数，无法统计时返回None"""
+    if isinstance(result, (list, tuple)):
+        # 多个输入的模块按全部输入合计
+        counts = [结果要素数(item) for item in result]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+    if not isinstance(result, dict):
+        return None
+    layer_data = result.get('layer_data')
+    if isinstance(layer_data, list) and layer_data:
+        total = 0
+        for layer in layer_data:
+            data = layer.get('data') if isinstance(layer, dict) else None
+            if data is None:
+                continue
+            # 延迟读取的图层句柄不为统计而读取数据
+            if hasattr(data, '筛选'):
+                total += data.count or 0
+                continue
+            try:
+                total += len(data)
+            except TypeError:
+                continue
+        return total
+    if result.get('data') is not None:
+        try:
+            return len(result['data'])
+        except TypeError:
+            return None
+    return None
+
+
+def 格式化大小(size):
+    """字节数转换为便于阅读的文本"""
+    if size is None:
+        return '-'
+    sign = '-' if size < 0 else ''
+    size = abs(size)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{sign}{size:.0f}{unit}" if unit == 'B' else f"{sign}{size:.1f}{unit}"
+        size /= 1024
+
+
+def 格式化耗时(seconds):
+    """秒数转换为便于阅读的文本"""
+    if seconds is None:
+        return '-'
+    if seconds < 60:
+        if seconds < 1:
+            return f"{seconds:.2f}s"
+        return f"{seconds:.1f}s" if seconds < 10 else f"{seconds:.0f}s"
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+class 运行统计:
+    """
+    记录一次工作流运行中每个模块的统计信息
+
+    耗时为墙钟时间；CPU时间按执行模块的线程统计，不包含模块另开的子进程；
+    峰值内存由后台线程定时采样，记录模块执行期间进程内存的最高值相对开始时的增量。
+    并行执行的模块共用一个进程，内存变化包含同时运行的其他模块，
+    需要准确的单模块内存时以最大并行数1运行
+    """
+
+    # 内存采样间隔（秒）
+    采样间隔 = 0.05
+
+    def __init__(self):
+        self.modules = {}
+        self.started_at = datetime.now()
+        self.start_time = time.perf_counter()
+        self.end_time = None
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+
+    def _启动采样(self):
+        """第一个模块开始时启动内存采样线程，无法获取当前内存时不采样"""
+        if self._sampler is not None or 进程内存()[0] is None:
+            return
+        self._sampler = threading.Thread(target=self._采样, name='运行统计内存采样', daemon=True)
+        self._sampler.start()
+
+    def _采样(self):
+        while not self._stop_sampling.wait(self.采样间隔):
+            self._更新峰值()
+
+    def _更新峰值(self):
+        rss, _ = 进程内存()
+        if rss is None:
+            return rss
+        with self._lock:
+            for record in self.modules.values():
+                if record['status'] == 'running' and rss > record['_peak']:
+                    record['_peak'] = rss
+        return rss
+
+    def 开始(self, module_id, title, category=None):
+        """模块开始执行，需要在执行模块的线程中调用"""
+        self._启动采样()
+        rss, _ = 进程内存()
+        with self._lock:
+            self.modules[module_id] = {
+                'title': title,
+                'category': category,
+                'status': 'running',
+                'cached': False,
+                'seconds': None,
+                'cpu_seconds': None,
+                'input_rows': None,
+                'rows': None,
+                'memory_delta': None,
+                'peak_delta': None,
+                '_start': time.perf_counter(),
+                '_cpu': time.thread_time(),
+                '_thread': threading.get_ident(),
+                '_rss': rss,
+                '_peak': rss or 0,
+            }
+
+    def 输入(self, module_id, input_data):
+        """记录模块的输入要素数"""
+        rows = 结果要素数(input_data)
+        with self._lock:
+            record = self.modules.get(module_id)
+            if record is not None:
+                record['input_rows'] = rows
+
+    def 结束(self, module_id, result=None, cached=False, error=None):
+        """模块执行结束，记录耗时、CPU时间、内存变化和输出要素数"""
+        end = time.perf_counter()
+        cpu = time.thread_time()
+        rss = self._更新峰值()
+        with self._lock:
+            record = self.modules.get(module_id)
+            if record is None:
+                return
+            record['seconds'] = end - record['_start']
+            # 在其他线程中结束（例如调度器报告失败）时无法得到模块的CPU时间
+            if threading.get_ident() == record['_thread']:
+                record['cpu_seconds'] = cpu - record['_cpu']
+            record['cached'] = cached
+            if rss is not None and record['_rss'] is not None:
+                record['memory_delta'] = rss - record['_rss']
+                record['peak_delta'] = max(record['_peak'] - record['_rss'], 0)
+            if error is not None:
+                record['status'] = 'error'
+                record['error'] = str(error)
+            else:
+                record['status'] = 'completed'
+                record['rows'] = 结果要素数(result)
+
+    def 完成(self):
+        """整个工作流执行结束"""
+        self.end_time = time.perf_counter()
+        self._stop_sampling.set()
+
+    @property
+    def 总耗时(self):
+        return (self.end_time or time.perf_counter()) - self.start_time
+
+    def 徽标文本(self, module_id):
+        """画布模块上显示的简短统计，例如"12.3s · 20000行"，没有记录时返回空字符串"""
+        with self._lock:
+            record = dict(self.modules.get(module_id) or {})
+        if not record or record['status'] == 'running':
+            return ''
+        if record['status'] == 'error':
+            return f"失败 · {格式化耗时(record['seconds'])}"
+        text = '缓存' if record['cached'] else 格式化耗时(record['seconds'])
+        if record['rows'] is not None:
+            text += f" · {record['rows']}行"
+        return text
+
+    def 详细文本(self, module_id):
+        """模块的完整统计，用作画布模块的提示文本"""
+        with self._lock:
+            record = dict(self.modules.get(module_id) or {})
+        if not record:
+            return ''
+
+        def 行数(value):
+            return '-' if value is None else str(value)
+
+        lines = [
+            record['title'],
+            f"耗时: {格式化耗时(record['seconds'])}" + ("（使用缓存）" if record['cached'] else ''),
+            f"CPU时间: {格式化耗时(record['cpu_seconds'])}",
+            f"峰值内存增量: {格式化大小(record['peak_delta'])}",
+            f"内存变化: {格式化大小(record['memory_delta'])}",
+            f"输入要素数: {行数(record['input_rows'])}",
+            f"输出要素数: {行数(record['rows'])}",
+        ]
+        if record.get('error'):
+            lines.append(f"错误: {record['error']}")
+        return '\n'.join(lines)
+
+    def 报告(self):
+        """
+        生成运行报告
+
+        返回:
+            可直接写出为JSON的字典，模块按开始执行的顺序排列
+        """
+        with self._lock:
+            records = sorted(
+                ((module_id, dict(record)) for module_id, record in self.modules.items()),
+                key=lambda item: item[1]['_start']
+            )
+        _, peak = 进程内存()
+        modules = []
+        for module_id, record in records:
+            item = {'id': module_id}
+            item.update({key: value for key, value in record.items() if not key.startswith('_')})
+            item['start_offset'] = record['_start'] - self.start_time
+            modules.append(item)
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total_seconds': self.总耗时,
+            'process_peak_memory': peak,
+            'modules': modules,
+        }
+
+    def 写出报告(self, path):
+        """把运行报告写出为JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.报告(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def 汇总文本(self):
+        """按执行顺序输出各模块的统计表"""
+        lines = [f"{'模块':<16}{'状态':<10}{'耗时(秒)':>10}{'CPU(秒)':>10}{'峰值增量':>12}"
+                 f"{'内存变化':>12}{'输入要素':>10}{'输出要素':>10}"]
+        with self._lock:
+            records = sorted((dict(record) for record in self.modules.values()), key=lambda record: record['_start'])
+
+        def 秒数(value):
+            return f"{value:.2f}" if value is not None else '-'
+
+        for record in records:
+            status = '缓存' if record['cached'] else {'completed': '完成', 'error': '失败'}.get(record['status'], '执行中')
+            input_rows = record['input_rows'] if record['input_rows'] is not None else '-'
+            rows = record['rows'] if record['rows'] is not None else '-'
+            lines.append(
+                f"{record['title']:<16}{status:<10}{秒数(record['seconds']):>10}{秒数(record['cpu_seconds']):>10}"
+                f"{格式化大小(record['peak_delta']):>12}{格式化大小(record['memory_delta']):>12}"
+                f"{input_rows:>10}{rows:>10}"
+            )
+        _, peak = 进程内存()
+        lines.append(f"总耗时: {self.总耗时:.2f}秒  进程峰值内存: {格式化大小(peak)}")
+        return '\n'.join(lines)
@@ -201,6 +201,12 @@ class WorkflowModule(QGraphicsRectItem):
         # 当前执行状态
         self.execution_state = "normal"  # normal, executing, completed, error
         
+        # 结果大小提示，例如"12.3MB"或"已转存"
+        self.result_info = ""
+        
+        # 最近一次运行的统计徽标，例如"12.3s · 20000行"，显示在模块上方
+        self.stats_badge = ""
+        
         # 模块属性 - 类似FME的参数配置
         self.properties = {
             "name": title,
@@ -237,6 +243,26 @@ class WorkflowModule(QGraphicsRectItem):
         
         self.update()  # 重绘模块
     
+    def setResultInfo(self, text):
+        """设置模块底部显示的结果大小"""
+        self.result_info = text
+        self.update()
+    
+    def setRunStats(self, badge, detail=""):
+        """设置模块上方的运行统计徽标和鼠标悬停时显示的完整统计"""
+        # 徽标绘制在模块矩形之外，改变绘制范围前需要通知场景
+        self.prepareGeometryChange()
+        self.stats_badge = badge
+        self.setToolTip(detail)
+        self.update()
+    
+    def boundingRect(self):
+        """包含模块上方统计徽标的绘制范围"""
+        rect = super().boundingRect()
+        if self.stats_badge:
+            rect = rect.adjusted(0, -18, 0, 0)
+        return rect
+    
     def start_blinking(self):
         """开始指示灯闪烁"""
         if not self.is_blinking:
@@ -308,8 +334,9 @@ class WorkflowModule(QGraphicsRectItem):
         painter.setFont(font)
         painter.drawText(category_rect, Qt.AlignmentFlag.AlignCenter, self.category)
         
-        # 绘制模块标题
-        title_rect = QRectF(rect.x(), rect.y() + 25, rect.width(), rect.height() - 30)
+        # 绘制模块标题，有结果大小时为底部留出一行
+        info_height = 14 if self.result_info else 0
+        title_rect = QRectF(rect.x(), rect.y() + 25, rect.width(), rect.height() - 30 - info_height)
         painter.setPen(QColor(255, 255, 255))
         font = painter.font()
         font.setBold(False)
@@ -317,6 +344,14 @@ class WorkflowModule(QGraphicsRectItem):
         painter.setFont(font)
         painter.drawText(title_rect, Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap, self.title)
         
+        # 绘制结果大小
+        if self.result_info:
+            info_rect = QRectF(rect.x(), rect.y() + rect.height() - info_height - 2, rect.width(), info_height)
+            painter.setPen(QColor(255, 255, 255, 220))
+            font.setPointSize(7)
+            painter.setFont(font)
+            painter.drawText(info_rect, Qt.AlignmentFlag.AlignCenter, self.result_info)
+        
         # 绘制状态指示器 - 类似FME的启用/禁用状态
         status_rect = QRectF(rect.x() + rect.width() - 15, rect.y() + 5, 10, 10)
         
@@ -337,6 +372,21 @@ class WorkflowModule(QGraphicsRectItem):
         
         painter.setPen(QPen(QColor(255, 255, 255), 1))
         painter.drawEllipse(status_rect)
+        
+        # 绘制运行统计徽标
+        if self.stats_badge:
+            font = painter.font()
+            font.setBold(False)
+            font.setPointSize(7)
+            painter.setFont(font)
+            badge_width = min(painter.fontMetrics().horizontalAdvance(self.stats_badge) + 12, rect.width() + 40)
+            badge_rect = QRectF(rect.x() + (rect.width() - badge_width) / 2, rect.y() - 17, badge_width, 15)
+            border = self.execution_colors["error"] if self.execution_state == "error" else "#616161"
+            painter.setBrush(QBrush(QColor(33, 33, 33, 200)))
+            painter.setPen(QPen(QColor(border), 1))
+            painter.drawRoundedRect(badge_rect, 7, 7)
+            painter.setPen(QColor(255, 255, 255))
+            painter.drawText(badge_rect, Qt.AlignmentFlag.AlignCenter, self.stats_badge)
     
     def createPorts(self):
         """创建端口 - 类似FME的连接器系统"""
@@ -426,6 +476,22 @@ class WorkflowScene(QGraphicsScene):
     # 添加连接信号
     connectionAdded = pyqtSignal(object)  # connection
     
+    # 工作流执行信号，由执行线程发出，在界面线程中更新显示
+    moduleStateChanged = pyqtSignal(object, str, int)  # 模块, 执行状态, 模块进度
+    workflowProgressChanged = pyqtSignal(int, str)  # 全局进度, 提示信息
+    moduleScrollRequested = pyqtSignal(object)  # 模块
+    moduleResultSizeChanged = pyqtSignal(str, object, bool)  # 模块ID, 结果内存大小, 是否已转存
+    moduleRunStatsChanged = pyqtSignal(str, str, str)  # 模块ID, 统计徽标, 完整统计
+    
+    # 导出格式与文件扩展名
+    EXPORT_FORMAT_EXTENSIONS = {
+        "Shapefile (.shp)": ".shp",
+        "GeoPackage (.gpkg)": ".gpkg",
+        "File Geodatabase (.gdb)": ".gdb",
+        "GeoParquet (.parquet)": ".parquet",
+        "Excel (.xlsx)": ".xlsx",
+    }
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.modules = []  # 存储模块
@@ -882,6 +948,11 @@ class GisWorkflowInterface(QWidget):
     # 添加连接信号
     connectionAdded = pyqtSignal(object)  # connection
     
+    # 工作流执行信号，由执行线程发出，在界面线程中更新显示
+    moduleStateChanged = pyqtSignal(object, str, int)  # 模块, 执行状态, 模块进度
+    workflowProgressChanged = pyqtSignal(int, str)  # 全局进度, 提示信息
+    moduleScrollRequested = pyqtSignal(object)  # 模块
+    
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self.setObjectName("gisWorkflowInterface")
@@ -889,8 +960,24 @@ class GisWorkflowInterface(QWidget):
         self.workflow_timer = None  # 工作流计时器
         self.elapsed_time = 0  # 已用时间（秒）
         self.timer_label = None  # 计时器标签
+        self.run_stats = None  # 最近一次运行的统计信息
+        # 模块结果缓存，参数和输入未变化的模块不再重复执行；超过内存上限的结果转存为临时文件
+        from configs.config import cfg
+        from gis_workflow.结果缓存 import 模块结果缓存
+        self.module_result_cache = 模块结果缓存(
+            内存上限=cfg.get(cfg.workflowMemoryBudget) * 1024 ** 2,
+            变化回调=self.moduleResultSizeChanged.emit
+        )
+        cfg.workflowMemoryBudget.valueChanged.connect(
+            lambda value: self.module_result_cache.设置内存上限(value * 1024 ** 2))
         self.setupUI()
         self.setupTimer()
+        # 工作流执行信号
+        self.moduleStateChanged.connect(self._onModuleStateChanged)
+        self.workflowProgressChanged.connect(self._onWorkflowProgressChanged)
+        self.moduleScrollRequested.connect(self._onModuleScrollRequested)
+        self.moduleResultSizeChanged.connect(self._onModuleResultSizeChanged)
+        self.moduleRunStatsChanged.connect(self._onModuleRunStatsChanged)
         # 连接主题变化信号
         from configs.config import cfg
         cfg.themeChanged.connect(self.updateTheme)
@@ -923,6 +1010,12 @@ class GisWorkflowInterface(QWidget):
         self.loadButton.clicked.connect(self.onLoadWorkflow)
         toolbarLayout.addWidget(self.loadButton)
         
+        # 运行报告按钮
+        self.reportButton = ToolButton(FIF.DOCUMENT)
+        self.reportButton.setToolTip("导出运行报告")
+        self.reportButton.clicked.connect(self.onExportRunReport)
+        toolbarLayout.addWidget(self.reportButton)
+        
         toolbarLayout.addStretch(1)
         layout.addLayout(toolbarLayout)
         
@@ -1354,7 +1447,7 @@ class GisWorkflowInterface(QWidget):
         formatLayout = QVBoxLayout(formatGroup)
         
         self.exportFormatCombo = ComboBox()
-        self.exportFormatCombo.addItems(["Shapefile (.shp)", "Excel (.xlsx)"])
+        self.exportFormatCombo.addItems(list(self.EXPORT_FORMAT_EXTENSIONS))
         self.exportFormatCombo.currentTextChanged.connect(self.onExportFormatChanged)
         formatLayout.addWidget(QLabel("导出格式:"))
         formatLayout.addWidget(self.exportFormatCombo)
@@ -1501,51 +1594,29 @@ class GisWorkflowInterface(QWidget):
 
     def onExportFormatChanged(self, format_text):
         """导出格式切换处理"""
-        # 根据选择的格式显示/隐藏相关选项
-        if format_text == "Shapefile (.shp)":
-            # 显示SHP选项，隐藏Excel选项
-            self.shpOptionsWidget.setVisible(True)
-            self.excelOptionsWidget.setVisible(False)
-            self.crsGroup.setVisible(True)
-            
-            # 暂时断开textChanged信号连接，避免触发弹窗
-            self.exportOutputPathEdit.textChanged.disconnect(self.saveExportDataProperties)
-            
-            # 更新文件扩展名
-            current_path = self.exportOutputPathEdit.text()
-            if current_path and not current_path.endswith('.shp'):
-                # 如果当前路径不是SHP格式，更新为SHP格式
-                base_path = current_path.rsplit('.', 1)[0] if '.' in current_path else current_path
-                self.exportOutputPathEdit.setText(base_path + '.shp')
-            
-            # 重新连接textChanged信号
-            try:
-                self.exportOutputPathEdit.textChanged.connect(self.saveExportDataProperties)
-            except TypeError:
-                # 避免重复连接的错误
-                pass
-        else:  # Excel格式
-            # 显示Excel选项，隐藏SHP选项
-            self.shpOptionsWidget.setVisible(False)
-            self.excelOptionsWidget.setVisible(True)
-            self.crsGroup.setVisible(False)
-            
-            # 暂时断开textChanged信号连接，避免触发弹窗
-            self.exportOutputPathEdit.textChanged.disconnect(self.saveExportDataProperties)
-            
-            # 更新文件扩展名
-            current_path = self.exportOutputPathEdit.text()
-            if current_path and not current_path.endswith('.xlsx'):
-                # 如果当前路径不是Excel格式，更新为Excel格式
-                base_path = current_path.rsplit('.', 1)[0] if '.' in current_path else current_path
-                self.exportOutputPathEdit.setText(base_path + '.xlsx')
-            
-            # 重新连接textChanged信号
-            try:
-                self.exportOutputPathEdit.textChanged.connect(self.saveExportDataProperties)
-            except TypeError:
-                # 避免重复连接的错误
-                pass
+        extension = self.EXPORT_FORMAT_EXTENSIONS.get(format_text, ".shp")
+        is_excel = extension == ".xlsx"
+        
+        # 根据选择的格式显示/隐藏相关选项，编码只对SHP有效
+        self.shpOptionsWidget.setVisible(extension == ".shp")
+        self.excelOptionsWidget.setVisible(is_excel)
+        self.crsGroup.setVisible(not is_excel)
+        
+        # 暂时断开textChanged信号连接，避免触发弹窗
+        self.exportOutputPathEdit.textChanged.disconnect(self.saveExportDataProperties)
+        
+        # 更新文件扩展名，GDB/GPKG路径中的图层名一并去掉
+        current_path = self.exportOutputPathEdit.text().split('|', 1)[0]
+        if current_path and not current_path.lower().endswith(extension):
+            base_path = os.path.splitext(current_path)[0]
+            self.exportOutputPathEdit.setText(base_path + extension)
+        
+        # 重新连接textChanged信号
+        try:
+            self.exportOutputPathEdit.textChanged.connect(self.saveExportDataProperties)
+        except TypeError:
+            # 避免重复连接的错误
+            pass
         
         # 只有在有当前模块时才保存属性
         if hasattr(self, 'current_module') and self.current_module and self.current_module.get("id", "").startswith("export_data"):
@@ -1557,12 +1628,9 @@ class GisWorkflowInterface(QWidget):
         
         # 根据当前选择的格式设置文件过滤器
         current_format = self.exportFormatCombo.currentText()
-        if current_format == "Shapefile (.shp)":
-            file_filter = "Shapefile (*.shp);;All Files (*)"
-            default_path = "C:\\Export_Output.shp"
-        else:  # Excel格式
-            file_filter = "Excel Files (*.xlsx);;All Files (*)"
-            default_path = "C:\\Export_Output.xlsx"
+        extension = self.EXPORT_FORMAT_EXTENSIONS.get(current_format, ".shp")
+        file_filter = f"{current_format.split(' (')[0]} (*{extension});;All Files (*)"
+        default_path = f"C:\\Export_Output{extension}"
         
         # 获取当前已设置的路径作为默认值
         current_path = self.exportOutputPathEdit.text() or default_path
@@ -2671,9 +2739,31 @@ class GisWorkflowInterface(QWidget):
         self.precisionCheckbox.toggled.connect(self.saveIntersectProperties)
         optionsLayout.addWidget(self.precisionCheckbox)
         
+        self.intersectMultiprocessCheckbox = QCheckBox("数据量大时多进程分块计算")
+        self.intersectMultiprocessCheckbox.setChecked(True)
+        self.intersectMultiprocessCheckbox.toggled.connect(self.saveIntersectProperties)
+        optionsLayout.addWidget(self.intersectMultiprocessCheckbox)
+        
         layout.addWidget(optionsGroup)
         
-        # 已移除字段筛选设置板块
+        # 保留字段组，相交结果只带上选中的字段，同名字段加_1、_2后缀
+        fieldsGroup = QGroupBox("保留字段")
+        fieldsGroup.setStyleSheet(optionsGroup.styleSheet())
+        fieldsLayout = QVBoxLayout(fieldsGroup)
+        
+        self.selectedFieldsLabel = QLabel("已筛选字段: 无")
+        self.selectedFieldsLabel.setWordWrap(True)
+        fieldsLayout.addWidget(self.selectedFieldsLabel)
+        
+        selectFieldsBtn = PushButton("选择字段")
+        selectFieldsBtn.clicked.connect(self.showFieldFilterDialog)
+        fieldsLayout.addWidget(selectFieldsBtn)
+        
+        fieldsInfoLabel = QLabel("未选择字段时保留两个图层的全部字段")
+        fieldsInfoLabel.setStyleSheet("color: #666; font-style: italic; padding: 5px;")
+        fieldsLayout.addWidget(fieldsInfoLabel)
+        
+        layout.addWidget(fieldsGroup)
         
         # 添加弹性空间
         layout.addStretch(1)
@@ -2836,17 +2926,33 @@ class GisWorkflowInterface(QWidget):
         
         layers = []
         
-        # 尝试使用fiona读取GDB图层（优先方法）
+        # 所有读取方法的结果都由图层目录服务按数据源缓存，GDB未变化时直接返回
+        from functions.图层目录 import 获取图层目录
+        catalog = 获取图层目录()
+        
+        # 优先使用图层目录服务读取GDB图层，缓存在重启后依然有效
+        if gdb_path.lower().endswith('.gdb'):
+            try:
+                layers = [
+                    f"{layer_name} ({info.get('feature_count', 0)}个要素)"
+                    for layer_name, info in catalog.全部图层信息(gdb_path)
+                ]
+                if layers:
+                    return layers
+            except Exception as e:
+                print(f"使用图层目录读取GDB失败: {e}")
+        
+        # 尝试使用fiona读取GDB图层
         try:
-            layers = self.readGdbWithFiona(gdb_path)
+            layers = catalog.缓存结果(gdb_path, 'fiona', lambda: self.readGdbWithFiona(gdb_path))
             if layers:
                 return layers
         except Exception as e:
             print(f"使用fiona读取GDB失败: {e}")
         
-        # 尝试使用GDAL/OGR读取GDB图层（次优先方法）
+        # 尝试使用GDAL/OGR读取GDB图层
         try:
-            layers = self.readGdbWithOgr(gdb_path)
+            layers = catalog.缓存结果(gdb_path, 'ogr', lambda: self.readGdbWithOgr(gdb_path))
             if layers:
                 return layers
         except Exception as e:
@@ -2856,7 +2962,7 @@ class GisWorkflowInterface(QWidget):
         try:
             # 检查是否为File Geodatabase (.gdb文件夹)
             if (gdb_path.endswith('.gdb') or gdb_path.endswith('.GDB')) and os.path.isdir(gdb_path):
-                layers = self.readFileSystemGdb(gdb_path)
+                layers = catalog.缓存结果(gdb_path, 'filesystem', lambda: self.readFileSystemGdb(gdb_path))
             # 检查是否为Personal Geodatabase (.mdb文件)
             elif (gdb_path.endswith('.mdb') or gdb_path.endswith('.MDB')) and os.path.isfile(gdb_path):
                 layers = [f"个人地理数据库: {os.path.basename(gdb_path)}"]
@@ -3517,6 +3623,7 @@ class GisWorkflowInterface(QWidget):
         if self.current_module:
             self.current_module["properties"]["keep_all"] = self.keepAllCheckbox.isChecked()
             self.current_module["properties"]["precision"] = self.precisionCheckbox.isChecked()
+            self.current_module["properties"]["multiprocess"] = self.intersectMultiprocessCheckbox.isChecked()
             
             # 保存图层顺序
             layer_order = []
@@ -3688,6 +3795,21 @@ class GisWorkflowInterface(QWidget):
             # 同步到工作区中的模块
             self.syncPropertiesToModule()
 
+    def readFieldsWithTypes(self, path, layer=None):
+        """读取图层字段及简化后的类型名称，只读取图层结构"""
+        from functions.图层目录 import 读取字段信息
+        fields_with_types = []
+        for col, dtype in 读取字段信息(path, layer)['dtypes'].items():
+            # 简化类型名称
+            if 'int' in dtype:
+                field_type = '整数'
+            elif 'float' in dtype:
+                field_type = '浮点数'
+            else:
+                field_type = '字符串'
+            fields_with_types.append((col, field_type))
+        return fields_with_types
+    
     def showFieldFilterDialog(self):
         """显示字段筛选对话框，从实际文件或GDB图层读取真实字段"""
         # 获取当前模块信息
@@ -3709,42 +3831,16 @@ class GisWorkflowInterface(QWidget):
                 if source_type == "文件系统" and file_paths:
                     # 读取文件系统中的第一个文件
                     file_path = file_paths[0]
-                    import geopandas as gpd
-                    # 只读取前几行数据以提高性能
-                    gdf = gpd.read_file(file_path, rows=5)
-                    # 获取除geometry外的所有字段及其类型
-                    for col in gdf.columns:
-                        if col != 'geometry':
-                            dtype = str(gdf[col].dtype)
-                            # 简化类型名称
-                            if 'int' in dtype:
-                                field_type = '整数'
-                            elif 'float' in dtype:
-                                field_type = '浮点数'
-                            else:
-                                field_type = '字符串'
-                            real_fields_with_types.append((col, field_type))
+                    # 只读取图层结构获取字段，不读取要素
+                    real_fields_with_types.extend(self.readFieldsWithTypes(file_path))
                     
                 elif source_type == "地理数据库":
                     gdb_path = properties.get("gdb_path", "")
                     selected_layers = properties.get("selected_layers", [])
                     if gdb_path and selected_layers:
                         # 读取GDB中的第一个选中图层
-                        import geopandas as gpd
-                        # 只读取前几行数据以提高性能
-                        gdf = gpd.read_file(gdb_path, layer=selected_layers[0], rows=5)
-                        # 获取除geometry外的所有字段及其类型
-                        for col in gdf.columns:
-                            if col != 'geometry':
-                                dtype = str(gdf[col].dtype)
-                                # 简化类型名称
-                                if 'int' in dtype:
-                                    field_type = '整数'
-                                elif 'float' in dtype:
-                                    field_type = '浮点数'
-                                else:
-                                    field_type = '字符串'
-                                real_fields_with_types.append((col, field_type))
+                        # 只读取图层结构获取字段，不读取要素
+                        real_fields_with_types.extend(self.readFieldsWithTypes(gdb_path, layer=selected_layers[0]))
             
             # 处理相交模块
             elif module_id.startswith("intersect"):
@@ -3758,7 +3854,7 @@ class GisWorkflowInterface(QWidget):
                             break
                     
                     if target_module and hasattr(target_module, 'input_port'):
-                        # 获取第一个输入连接的源模块
+                        # 相交结果包含所有输入图层的字段
                         for connection in target_module.input_port.connections:
                             source_port = connection.source_port
                             if source_port:
@@ -3771,44 +3867,16 @@ class GisWorkflowInterface(QWidget):
                                     if "file_paths" in source_properties and source_properties["file_paths"]:
                                         file_paths = source_properties["file_paths"]
                                         if file_paths:
-                                            import geopandas as gpd
-                                            # 只读取前几行数据以提高性能
-                                            gdf = gpd.read_file(file_paths[0], rows=5)
-                                            # 获取除geometry外的所有字段及其类型
-                                            for col in gdf.columns:
-                                                if col != 'geometry':
-                                                    dtype = str(gdf[col].dtype)
-                                                    # 简化类型名称
-                                                    if 'int' in dtype:
-                                                        field_type = '整数'
-                                                    elif 'float' in dtype:
-                                                        field_type = '浮点数'
-                                                    else:
-                                                        field_type = '字符串'
-                                                    real_fields_with_types.append((col, field_type))
-                                            break
+                                            # 只读取图层结构获取字段，不读取要素
+                                            real_fields_with_types.extend(self.readFieldsWithTypes(file_paths[0]))
                                     
                                     # 处理地理数据库类型的源模块
                                     elif "selected_layers" in source_properties and source_properties["selected_layers"]:
                                         gdb_path = source_properties.get("gdb_path", "")
                                         selected_layers = source_properties["selected_layers"]
                                         if gdb_path and selected_layers:
-                                            import geopandas as gpd
-                                            # 只读取前几行数据以提高性能
-                                            gdf = gpd.read_file(gdb_path, layer=selected_layers[0], rows=5)
-                                            # 获取除geometry外的所有字段及其类型
-                                            for col in gdf.columns:
-                                                if col != 'geometry':
-                                                    dtype = str(gdf[col].dtype)
-                                                    # 简化类型名称
-                                                    if 'int' in dtype:
-                                                        field_type = '整数'
-                                                    elif 'float' in dtype:
-                                                        field_type = '浮点数'
-                                                    else:
-                                                        field_type = '字符串'
-                                                    real_fields_with_types.append((col, field_type))
-                                            break
+                                            # 只读取图层结构获取字段，不读取要素
+                                            real_fields_with_types.extend(self.readFieldsWithTypes(gdb_path, layer=selected_layers[0]))
             # 处理字段筛选模块
             elif module_id.startswith("field_filter"):
                 # 尝试从连接的输入模块获取数据源信息
@@ -3834,21 +3902,8 @@ class GisWorkflowInterface(QWidget):
                                     if "file_paths" in source_properties and source_properties["file_paths"]:
                                         file_paths = source_properties["file_paths"]
                                         if file_paths:
-                                            import geopandas as gpd
-                                            # 只读取前几行数据以提高性能
-                                            gdf = gpd.read_file(file_paths[0], rows=5)
-                                            # 获取除geometry外的所有字段及其类型
-                                            for col in gdf.columns:
-                                                if col != 'geometry':
-                                                    dtype = str(gdf[col].dtype)
-                                                    # 简化类型名称
-                                                    if 'int' in dtype:
-                                                        field_type = '整数'
-                                                    elif 'float' in dtype:
-                                                        field_type = '浮点数'
-                                                    else:
-                                                        field_type = '字符串'
-                                                    real_fields_with_types.append((col, field_type))
+                                            # 只读取图层结构获取字段，不读取要素
+                                            real_fields_with_types.extend(self.readFieldsWithTypes(file_paths[0]))
                                             break
                                     
                                     # 处理地理数据库类型的源模块
@@ -3856,21 +3911,8 @@ class GisWorkflowInterface(QWidget):
                                         gdb_path = source_properties.get("gdb_path", "")
                                         selected_layers = source_properties["selected_layers"]
                                         if gdb_path and selected_layers:
-                                            import geopandas as gpd
-                                            # 只读取前几行数据以提高性能
-                                            gdf = gpd.read_file(gdb_path, layer=selected_layers[0], rows=5)
-                                            # 获取除geometry外的所有字段及其类型
-                                            for col in gdf.columns:
-                                                if col != 'geometry':
-                                                    dtype = str(gdf[col].dtype)
-                                                    # 简化类型名称
-                                                    if 'int' in dtype:
-                                                        field_type = '整数'
-                                                    elif 'float' in dtype:
-                                                        field_type = '浮点数'
-                                                    else:
-                                                        field_type = '字符串'
-                                                    real_fields_with_types.append((col, field_type))
+                                            # 只读取图层结构获取字段，不读取要素
+                                            real_fields_with_types.extend(self.readFieldsWithTypes(gdb_path, layer=selected_layers[0]))
                                             break
         except Exception as e:
             print(f"读取字段信息失败: {e}")
@@ -3882,6 +3924,11 @@ class GisWorkflowInterface(QWidget):
             type_pattern = {"id": "整数", "area": "浮点数", "perimeter": "浮点数", "value": "浮点数"}
             real_fields_with_types = [(field, type_pattern.get(field, "字符串")) for field in default_fields]
         
+        # 多个输入图层的同名字段只显示一次
+        seen_fields = set()
+        real_fields_with_types = [field for field in real_fields_with_types
+                                  if not (field[0] in seen_fields or seen_fields.add(field[0]))]
+        
         # 分离字段名和类型
         real_fields = [field[0] for field in real_fields_with_types]
         
@@ -4137,9 +4184,11 @@ class GisWorkflowInterface(QWidget):
             precision = properties.get("precision", False)
             field_filter_enabled = properties.get("field_filter_enabled", False)
             keep_fields = properties.get("keep_fields", "")
+            multiprocess = properties.get("multiprocess", True)
             
             self.keepAllCheckbox.setChecked(keep_all)
             self.precisionCheckbox.setChecked(precision)
+            self.intersectMultiprocessCheckbox.setChecked(multiprocess)
             
             # 恢复字段筛选设置
             if hasattr(self, 'fieldFilterCheckbox'):
@@ -4148,6 +4197,8 @@ class GisWorkflowInterface(QWidget):
             # 恢复已选择字段的显示
             if hasattr(self, 'selectedFieldsLabel'):
                 if keep_fields:
+                    if not isinstance(keep_fields, str):
+                        keep_fields = ', '.join(keep_fields[:5]) + ('...' if len(keep_fields) > 5 else '')
                     self.selectedFieldsLabel.setText(f"已筛选字段: {keep_fields}")
                 else:
                     self.selectedFieldsLabel.setText("已筛选字段: 无")
@@ -4370,6 +4421,49 @@ class GisWorkflowInterface(QWidget):
                     parent=self
                 )
     
+    def onExportRunReport(self):
+        """把最近一次运行的统计导出为JSON运行报告"""
+        from PyQt6.QtWidgets import QFileDialog
+        from qfluentwidgets import InfoBar, InfoBarPosition
+        if self.run_stats is None:
+            InfoBar.warning(
+                title='无法导出',
+                content='请先运行工作流',
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=2000,
+                parent=self
+            )
+            return
+        
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 
+            "导出运行报告", 
+            "", 
+            "JSON Files (*.json);;All Files (*)"
+        )
+        if not file_path:
+            return
+        try:
+            self.run_stats.写出报告(file_path)
+            InfoBar.success(
+                title='导出成功',
+                content=f'运行报告已保存到 {file_path}',
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=2000,
+                parent=self
+            )
+        except OSError as e:
+            InfoBar.error(
+                title='导出失败',
+                content=f'无法保存运行报告: {e}',
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=2000,
+                parent=self
+            )
+    
     def onLoadWorkflow(self):
         """加载工作流"""
         from PyQt6.QtWidgets import QFileDialog
@@ -4469,7 +4563,8 @@ class GisWorkflowInterface(QWidget):
                 print(f"工作流文件不存在: {file_path}")
                 return False
             
-            # 清空当前场景
+            # 清空当前场景和模块结果缓存
+            self.module_result_cache.清除()
             self.canvasView._scene.clear()
             self.canvasView._scene.modules = []
             self.canvasView._scene.connections = []
@@ -4627,6 +4722,7 @@ class GisWorkflowInterface(QWidget):
         def reset_module_states():
             for module in self.canvasView._scene.modules:
                 module.setExecutionState("normal")
+                module.setRunStats("")
         
         QTimer.singleShot(0, reset_module_states)
         
@@ -4750,232 +4846,285 @@ class GisWorkflowInterface(QWidget):
         # 启动线程
         workflow_thread.start()
 
-    def executeWorkflowWithProgress(self):
-        """执行工作流的核心逻辑，带进度更新"""
-        # 构建模块执行顺序（拓扑排序）
+    def buildDependencyGraph(self):
+        """构建模块依赖图，返回({模块ID: 模块}, {模块ID: 上游模块ID集合})"""
+        modules = {}
+        upstream = {}
+        if not self.canvasView or not self.canvasView._scene:
+            return modules, upstream
+        
+        for module in self.canvasView._scene.modules:
+            modules[module.module_id] = module
+            upstream[module.module_id] = set()
+        
+        for connection in self.canvasView._scene.connections:
+            if connection.source_port and connection.target_port:
+                source_module = connection.source_port.parentItem()
+                target_module = connection.target_port.parentItem()
+                if source_module and target_module and target_module.module_id in upstream:
+                    upstream[target_module.module_id].add(source_module.module_id)
+        
+        return modules, upstream
+    
+    def executeModule(self, module, input_data):
+        """根据模块分类执行模块"""
+        category = module.category
+        # 导出、字段筛选和定义查询模块直接处理图层句柄，其他模块在执行前读取数据
+        if category != "导出数据" and not module.module_id.startswith(("field_filter", "attribute_query")):
+            input_data = self.materializeInputData(module, input_data)
+        if category == "添加数据":
+            return self.executeAddDataModule(module, input_data)
+        elif category == "分析功能":
+            return self.executeAnalysisModule(module, input_data)
+        elif category == "数据处理":
+            return self.executeDataProcessingModule(module, input_data)
+        elif category == "导出数据":
+            return self.executeExportModule(module, input_data)
+        return input_data
+    
+    def executeWorkflowWithProgress(self, max_workers=None):
+        """
+        执行工作流的核心逻辑，带进度更新
+        
+        按依赖关系调度，互不依赖的分支同时在线程池中执行；
+        模块状态和进度通过信号发回界面线程；各模块的耗时、CPU时间、内存和要素数
+        记录在self.run_stats中，并以徽标显示在画布模块上
+        
+        参数:
+            max_workers: 同时执行的模块数，默认由调度器决定
+        """
+        from gis_workflow.调度器 import 工作流调度器
+        from gis_workflow.结果缓存 import 模块缓存键
+        from gis_workflow.运行统计 import 运行统计
+        
+        # 按分类排好的执行顺序作为同时可执行模块的优先顺序
         execution_order = self.buildExecutionOrder()
+        modules, upstream = self.buildDependencyGraph()
         
         # 存储模块的输出数据
         module_outputs = {}
-        total_modules = len(execution_order)
-        
-        # 按顺序执行模块
-        for index, module in enumerate(execution_order):
-            # 在主线程中更新模块状态和进度
-            self.update_module_ui(module, index, total_modules, 0)  # 初始进度
-            # 确保当前模块在视图中可见
-            if self.canvasView and self.canvasView.scene():
-                # 使用 QTimer 确保视图滚动操作不会阻塞 UI
-                from PyQt6.QtCore import QTimer
-                QTimer.singleShot(0, lambda m=module: self.canvasView.ensureVisible(m, 100, 100))
-            
-            module_id = module.module_id
-            category = module.category
+        # 导出失败但不中断工作流的模块
+        failed_exports = set()
+        # 本次运行中各模块的缓存键，下游模块的缓存键包含上游的缓存键
+        module_keys = {}
+        # 本次运行的统计信息
+        run_stats = 运行统计()
+        self.run_stats = run_stats
+        
+        def run_module(module_id, results):
+            module = modules[module_id]
+            run_stats.开始(module_id, module.title, module.category)
+            
+            # 参数、上游结果和输入文件都没有变化时直接使用上次的结果
+            cache_key = 模块缓存键(
+                module_id, module.title, module.category, module.properties,
+                [module_keys.get(source_id) for source_id in self.getUpstreamModuleIds(module)]
+            )
+            module_keys[module_id] = cache_key
+            cached = self.module_result_cache.获取(module_id, cache_key)
+            if cached is not None:
+                print(f"模块 {module.title} 的参数和输入未变化，使用上次的结果")
+                run_stats.结束(module_id, cached, cached=True)
+                return cached
+            
+            # 获取输入数据，上游模块已由调度器保证执行完成
+            input_data = self.getModuleInputData(module, results)
+            run_stats.输入(module_id, input_data)
+            self.update_module_ui(module, 30)
             
             try:
-                # 更新进度 - 获取输入数据
-                self.update_module_ui(module, index, total_modules, 30)
-                # 获取输入数据
-                input_data = self.getModuleInputData(module, module_outputs)
+                output_data = self.executeModule(module, input_data)
+            except Exception as e:
+                # 在执行模块的线程中结束统计，才能记录模块的CPU时间
+                run_stats.结束(module_id, error=f"执行模块 {module.title} 时出错: {e}")
+                raise
+            
+            # 检查输出数据是否为None或不包含预期的成功状态
+            if output_data is None or (isinstance(output_data, dict) and output_data.get('status') == 'error'):
+                # 从output_data中提取错误信息，如果有的话
+                error_message = ""
+                if isinstance(output_data, dict):
+                    error_message = output_data.get('message', '')
                 
-                # 更新进度 - 执行模块功能
-                self.update_module_ui(module, index, total_modules, 60)
-                # 根据模块类型执行相应操作
-                if category == "添加数据":
-                    output_data = self.executeAddDataModule(module, input_data)
-                elif category == "分析功能":
-                    output_data = self.executeAnalysisModule(module, input_data)
-                elif category == "数据处理":
-                    output_data = self.executeDataProcessingModule(module, input_data)
-                elif category == "导出数据":
-                    output_data = self.executeExportModule(module, input_data)
+                # 根据模块类型提供更具体的错误信息
+                if module.title == "相交":
+                    error_info = f"执行模块 {module.title} 时出错: {error_message or '检测到坐标系不匹配，已终止操作。请确保所有输入图层使用相同的坐标系后重试。'}"
+                elif module.title == "导出数据":
+                    error_info = f"执行模块 {module.title} 时出错: {error_message or '导出失败，请检查输出路径和权限设置。'}"
                 else:
-                    output_data = input_data
+                    error_info = f"执行模块 {module.title} 时出错: {error_message or '操作未能成功完成'}"
                 
-                # 检查输出数据是否为None或不包含预期的成功状态
-                if output_data is None or (isinstance(output_data, dict) and 'status' in output_data and output_data['status'] == 'error'):
-                    # 从output_data中提取错误信息，如果有的话
-                    error_message = ""
-                    if isinstance(output_data, dict):
-                        error_message = output_data.get('message', '')
-                    
-                    # 根据模块类型提供更具体的错误信息
-                    if module.title == "相交":
-                        error_info = f"执行模块 {module.title} 时出错: {error_message or '检测到坐标系不匹配，已终止操作。请确保所有输入图层使用相同的坐标系后重试。'}"
-                    elif module.title == "导出数据":
-                        error_info = f"执行模块 {module.title} 时出错: {error_message or '导出失败，请检查输出路径和权限设置。'}"
-                    else:
-                        error_info = f"执行模块 {module.title} 时出错: {error_message or '操作未能成功完成'}"
-                    
+                # 导出模块只标记错误，不中断其他分支，避免错误消息重复显示
+                if module.title == "导出数据":
+                    failed_exports.add(module_id)
+                    run_stats.结束(module_id, error=error_info)
                     self.update_module_error(module, error_info)
-                    print(error_info)
-                    # 对于导出模块，直接返回而不抛出异常，避免错误消息重复显示
-                    if module.title == "导出数据":
-                        return
-                    # 对于其他模块，仍然抛出异常
-                    raise Exception(error_info)
-                
-                # 存储输出数据
-                module_outputs[module_id] = output_data
-                
-                # 更新进度 - 模块完成
-                self.update_module_ui(module, index, total_modules, 100)
-                # 更新模块状态为完成
-                self.update_module_completed(module)
-                
-            except Exception as e:
-                # 更新模块状态为错误
-                error_info = f"执行模块 {module.title} 时出错: {e}"
-                self.update_module_error(module, error_info)
-                print(error_info)
-                raise e
-        
-        # 只更新必要的UI元素，成功弹窗将由runWorkflow方法中的信号槽机制处理
-        # 这样可以确保在主线程中正确显示弹窗
-        from PyQt6.QtCore import QTimer
-        from datetime import datetime
+                    return output_data
+                raise Exception(error_info)
+            
+            run_stats.结束(module_id, output_data)
+            self.module_result_cache.保存(
+                module_id, cache_key, output_data,
+                module.properties if module.category == "导出数据" else None
+            )
+            return output_data
         
-        # 计算总用时
-        total_time = (datetime.now() - self.workflow_start_time).total_seconds()
+        def on_started(module_id):
+            module = modules[module_id]
+            self.update_module_ui(module, 0)
+            # 确保当前模块在视图中可见
+            self.moduleScrollRequested.emit(module)
         
-        def update_ui():
-            # 工作流执行完成，成功弹窗将由runWorkflow方法中的信号槽机制处理
-            pass
+        def on_finished(module_id, output_data, finished_count, total_count):
+            module = modules[module_id]
+            module_outputs[module_id] = output_data
+            if module_id not in failed_exports:
+                self.update_module_completed(module)
+            self.moduleRunStatsChanged.emit(module_id, run_stats.徽标文本(module_id), run_stats.详细文本(module_id))
+            self.workflowProgressChanged.emit(int(finished_count / total_count * 100), "")
+        
+        def on_failed(module_id, error):
+            module = modules[module_id]
+            error_info = str(error)
+            if not error_info.startswith("执行模块"):
+                error_info = f"执行模块 {module.title} 时出错: {error}"
+            if run_stats.modules.get(module_id, {}).get('status') == 'running':
+                run_stats.结束(module_id, error=error_info)
+            self.update_module_error(module, error_info)
+            self.moduleRunStatsChanged.emit(module_id, run_stats.徽标文本(module_id), run_stats.详细文本(module_id))
+        
+        def on_released(module_id, output_data):
+            # 下游都已执行完，本次运行不再持有结果，缓存中的结果可以优先转存
+            self.module_result_cache.标记完成(module_id)
+            module_outputs.pop(module_id, None)
+            return None
         
-        QTimer.singleShot(0, update_ui)
+        scheduler = 工作流调度器(
+            upstream, run_module,
+            最大并行数=max_workers,
+            顺序=[module.module_id for module in execution_order],
+            开始回调=on_started, 完成回调=on_finished, 失败回调=on_failed,
+            释放函数=on_released
+        )
+        try:
+            scheduler.运行()
+        finally:
+            run_stats.完成()
+            # 运行结束后所有结果都可以转存
+            for module_id in modules:
+                self.module_result_cache.标记完成(module_id)
         
         return True
     
-    def update_module_ui(self, module, index, total_modules, module_progress):
-        """更新模块UI状态和全局进度显示"""
-        # 在主线程中更新UI
-        def update():
-            # 设置模块执行状态 - 高亮当前模块
-            module.setExecutionState("executing")
-            
-            # 计算全局进度
-            global_progress = int((index / total_modules) * 100 + (module_progress / total_modules))
-            
-            # 更新进度条
-            if hasattr(self, 'progressBar'):
-                self.progressBar.setValue(min(global_progress, 99))  # 保留1%给最终完成
-            
-            # 更新状态提示
-            if hasattr(self, 'stateTooltip'):
-                status_text = f"正在执行: {module.title} ({index + 1}/{total_modules})\n进度: {module_progress}%"
-                self.stateTooltip.setContent(status_text)
-            
-            # 更新当前模块标签
-            if hasattr(self, 'currentModuleLabel'):
-                # 先隐藏再更新文本，避免残留文本显示
-                self.currentModuleLabel.hide()
-                # 设置正确的位置
-                self.currentModuleLabel.move(self.width() // 2 - 200, self.height() // 2 - 50)
-                self.currentModuleLabel.setText(f"正在执行: {module.title} ({index + 1}/{total_modules})")
-                self.currentModuleLabel.show()
-        
-        # 使用QTimer.singleShot确保UI更新在主线程中执行，避免阻塞
-        from PyQt6.QtCore import QTimer
-        QTimer.singleShot(0, update)
+    def update_module_ui(self, module, module_progress):
+        """更新模块为执行状态并显示模块进度（可在工作线程中调用）"""
+        self.moduleStateChanged.emit(module, "executing", module_progress)
     
     def update_module_completed(self, module):
-        """更新模块为完成状态"""
-        def update():
-            module.setExecutionState("completed")
-        
-        from PyQt6.QtCore import QTimer
-        QTimer.singleShot(0, update)
+        """更新模块为完成状态（可在工作线程中调用）"""
+        self.moduleStateChanged.emit(module, "completed", 100)
     
     def update_module_error(self, module, error_info):
-        """更新模块为错误状态"""
-        def update():
-            module.setExecutionState("error")
-            print(error_info)
+        """更新模块为错误状态（可在工作线程中调用）"""
+        print(error_info)
+        self.moduleStateChanged.emit(module, "error", 0)
+    
+    def _onModuleStateChanged(self, module, state, module_progress):
+        """在界面线程中更新模块状态和执行提示"""
+        module.setExecutionState(state)
         
-        from PyQt6.QtCore import QTimer
-        QTimer.singleShot(0, update)
+        running = [m for m in self.canvasView._scene.modules if m.execution_state == "executing"]
+        if not running:
+            return
+        titles = "、".join(m.title for m in running)
+        
+        # 更新状态提示
+        if hasattr(self, 'stateTooltip'):
+            status_text = f"正在执行: {titles}"
+            if state == "executing":
+                status_text += f"\n{module.title} 进度: {module_progress}%"
+            self.stateTooltip.setContent(status_text)
+        
+        # 更新当前模块标签
+        if hasattr(self, 'currentModuleLabel'):
+            self.currentModuleLabel.move(self.width() // 2 - 200, self.height() // 2 - 50)
+            self.currentModuleLabel.setText(f"正在执行: {titles}")
+            self.currentModuleLabel.show()
+    
+    def _onWorkflowProgressChanged(self, progress, message):
+        """在界面线程中更新全局进度"""
+        if hasattr(self, 'progressBar'):
+            self.progressBar.setValue(min(progress, 99))  # 保留1%给最终完成
+        if message and hasattr(self, 'currentModuleLabel'):
+            self.currentModuleLabel.setText(message)
+    
+    def _onModuleResultSizeChanged(self, module_id, size, spilled):
+        """在模块底部显示结果占用的内存"""
+        from gis_workflow.运行统计 import 格式化大小
+        for module in self.canvasView._scene.modules:
+            if module.module_id == module_id:
+                module.setResultInfo("已转存" if spilled else (格式化大小(size) if size else ""))
+                break
+    
+    def _onModuleRunStatsChanged(self, module_id, badge, detail):
+        """在模块上方显示运行统计"""
+        for module in self.canvasView._scene.modules:
+            if module.module_id == module_id:
+                module.setRunStats(badge, detail)
+                break
+    
+    def _onModuleScrollRequested(self, module):
+        """确保正在执行的模块在视图中可见"""
+        if self.canvasView and self.canvasView.scene():
+            self.canvasView.ensureVisible(module, 100, 100)
 
+    def getUpstreamModules(self, module):
+        """按输入端口顺序列出模块的上游模块（主输入在前，次输入在后）"""
+        upstream = []
+        for port_name in ('input_port', 'input_port_2'):
+            port = getattr(module, port_name, None)
+            if port is None:
+                continue
+            for connection in port.connections:
+                source_port = connection.source_port
+                source_module = source_port.parentItem() if source_port else None
+                if source_module:
+                    upstream.append(source_module)
+        return upstream
+    
+    def getUpstreamModuleIds(self, module):
+        """按输入端口顺序列出上游模块ID"""
+        return [source_module.module_id for source_module in self.getUpstreamModules(module)]
+    
     def getModuleInputData(self, module, module_outputs):
-        """获取模块的输入数据"""
+        """
+        获取模块的输入数据
+        
+        上游结果的字典结构会被复制一份再交给模块，模块修改输入字典不会影响
+        缓存中的上游结果和其他并行分支；GeoDataFrame本身共用，不复制
+        """
+        from gis_workflow.结果缓存 import 复制结果结构
+        
         # 收集所有输入数据
         input_data = []
-        
-        # 处理第一个输入端口（主输入）
-        if hasattr(module, 'input_port'):
-            for connection in module.input_port.connections:
-                source_port = connection.source_port
-                if source_port:
-                    source_module = source_port.parentItem()
-                    if source_module:
-                        # 检查源模块是否已经在module_outputs中
-                        if source_module.module_id in module_outputs:
-                            input_data.append(module_outputs[source_module.module_id])
-                        else:
-                            # 如果源模块还没有执行，尝试直接执行它
-                            # 这种情况可能发生在拓扑排序不完善时
-                            try:
-                                # 获取源模块的输入数据
-                                source_input_data = self.getModuleInputData(source_module, module_outputs)
-                                
-                                # 根据源模块类型执行相应操作
-                                if source_module.category == "添加数据":
-                                    source_output_data = self.executeAddDataModule(source_module, source_input_data)
-                                elif source_module.category == "分析功能":
-                                    source_output_data = self.executeAnalysisModule(source_module, source_input_data)
-                                elif source_module.category == "数据处理":
-                                    source_output_data = self.executeDataProcessingModule(source_module, source_input_data)
-                                elif source_module.category == "导出数据":
-                                    source_output_data = self.executeExportModule(source_module, source_input_data)
-                                else:
-                                    source_output_data = source_input_data
-                                
-                                # 存储源模块的输出数据
-                                module_outputs[source_module.module_id] = source_output_data
-                                
-                                # 添加到当前模块的输入数据
-                                input_data.append(source_output_data)
-                            except Exception as e:
-                                print(f"执行源模块 {source_module.title} 时出错: {e}")
-                                # 即使出错也添加None到输入数据中，保持数据结构一致
-                                input_data.append(None)
-        
-        # 处理第二个输入端口（次输入）
-        if hasattr(module, 'input_port_2'):
-            for connection in module.input_port_2.connections:
-                source_port = connection.source_port
-                if source_port:
-                    source_module = source_port.parentItem()
-                    if source_module:
-                        # 检查源模块是否已经在module_outputs中
-                        if source_module.module_id in module_outputs:
-                            input_data.append(module_outputs[source_module.module_id])
-                        else:
-                            # 如果源模块还没有执行，尝试直接执行它
-                            try:
-                                # 获取源模块的输入数据
-                                source_input_data = self.getModuleInputData(source_module, module_outputs)
-                                
-                                # 根据源模块类型执行相应操作
-                                if source_module.category == "添加数据":
-                                    source_output_data = self.executeAddDataModule(source_module, source_input_data)
-                                elif source_module.category == "分析功能":
-                                    source_output_data = self.executeAnalysisModule(source_module, source_input_data)
-                                elif source_module.category == "数据处理":
-                                    source_output_data = self.executeDataProcessingModule(source_module, source_input_data)
-                                elif source_module.category == "导出数据":
-                                    source_output_data = self.executeExportModule(source_module, source_input_data)
-                                else:
-                                    source_output_data = source_input_data
-                                
-                                # 存储源模块的输出数据
-                                module_outputs[source_module.module_id] = source_output_data
-                                
-                                # 添加到当前模块的输入数据
-                                input_data.append(source_output_data)
-                            except Exception as e:
-                                print(f"执行源模块 {source_module.title} 时出错: {e}")
-                                # 即使出错也添加None到输入数据中，保持数据结构一致
-                                input_data.append(None)
+        for source_module in self.getUpstreamModules(module):
+            # 检查源模块是否已经在module_outputs中
+            if source_module.module_id in module_outputs:
+                input_data.append(复制结果结构(module_outputs[source_module.module_id]))
+                continue
+            # 如果源模块还没有执行，尝试直接执行它
+            # 这种情况可能发生在拓扑排序不完善时
+            try:
+                source_input_data = self.getModuleInputData(source_module, module_outputs)
+                source_output_data = self.executeModule(source_module, source_input_data)
+                # 存储源模块的输出数据
+                module_outputs[source_module.module_id] = source_output_data
+                # 添加到当前模块的输入数据
+                input_data.append(复制结果结构(source_output_data))
+            except Exception as e:
+                print(f"执行源模块 {source_module.title} 时出错: {e}")
+                # 即使出错也添加None到输入数据中，保持数据结构一致
+                input_data.append(None)
         
         return input_data
     
@@ -5057,143 +5206,67 @@ class GisWorkflowInterface(QWidget):
                         gdf = gdf[included_columns]
                         print(f"已根据模式筛选字段: {pattern}")
             
-            # 应用字段查询表达式
+            # 应用字段查询表达式，编译为向量化的筛选掩码
             if field_queries and not gdf.empty:
-                import re
+                from gis_workflow.字段筛选 import 编译查询, 查询表达式错误
                 
-                # 解析查询表达式并应用到数据框
-                def _parse_query_expression(expr, field):
-                    """解析查询表达式为pandas筛选条件"""
-                    if not expr or field not in gdf.columns:
-                        return None
-                    
-                    # 运算符映射（包含中文运算符）
-                    operators = {
-                        '=': '==',
-                        '!=': '!=',
-                        '<': '<',
-                        '>': '>',
-                        '<=': '<=',
-                        '>=': '>=',
-                        'contains': 'str.contains',
-                        'not contains': '~str.contains',
-                        'is null': 'isna()',
-                        'is not null': 'notna()',
-                        'startswith': 'str.startswith',
-                        'endswith': 'str.endswith',
-                        # 中文运算符映射
-                        '等于': '==',
-                        '不等于': '!=',
-                        '小于': '<',
-                        '大于': '>',
-                        '小于等于': '<=',
-                        '大于等于': '>=',
-                        '包含': 'str.contains',
-                        '不包含': '~str.contains',
-                        '为空': 'isna()',
-                        '不为空': 'notna()',
-                        '开头包含': 'str.startswith',
-                        '结尾包含': 'str.endswith'
-                    }
-                    
-                    # 尝试匹配运算符
-                    for op_pattern, pandas_op in operators.items():
-                        if op_pattern in expr:
-                            # 提取值部分
-                            parts = expr.split(op_pattern, 1)
-                            if len(parts) == 2:
-                                value = parts[1].strip()
-                                
-                                # 处理字符串值（带引号）
-                                if (value.startswith('"') and value.endswith('"')) or \
-                                   (value.startswith("'") and value.endswith("'")):
-                                    # 去掉引号
-                                    value = value[1:-1]
-                                    if pandas_op == '==':
-                                        return f"{field} == '{value}'"
-                                    elif pandas_op == '!=':
-                                        return f"{field} != '{value}'"
-                                    elif pandas_op == 'str.contains':
-                                        return f"{field}.str.contains('{value}')"
-                                    elif pandas_op == '~str.contains':
-                                        return f"~{field}.str.contains('{value}')"
-                                    elif pandas_op == 'str.startswith':
-                                        return f"{field}.str.startswith('{value}')"
-                                    elif pandas_op == 'str.endswith':
-                                        return f"{field}.str.endswith('{value}')"
-                                # 处理数值
-                                else:
-                                    try:
-                                        # 对于startswith和endswith操作，即使是数字也需要作为字符串处理
-                                        if pandas_op in ['str.startswith', 'str.endswith']:
-                                            return f"{field}.{pandas_op}('{value}')"
-                                        
-                                        # 尝试转换为浮点数
-                                        num_value = float(value)
-                                        # 如果是整数，使用整数形式
-                                        if num_value.is_integer():
-                                            num_value = int(num_value)
-                                        return f"{field} {pandas_op} {num_value}"
-                                    except ValueError:
-                                        # 如果不是数字，当作字符串处理
-                                        return f"{field} {pandas_op} '{value}'"
-                            
-                            # 特殊处理null检查
-                            elif pandas_op in ['isna()', 'notna()']:
-                                return f"{field}.{pandas_op}"
-                    
-                    return None
-                
-                # 应用每个字段的查询表达式
                 for field, expr in field_queries.items():
                     if field in gdf.columns and expr:
                         # 清理查询表达式中的空白字符和换行符
                         clean_expr = expr.strip().replace('\n', '').replace('\r', '')
-                        print(f"清理后的查询表达式: '{clean_expr}'")
-                        
-                        pandas_condition = _parse_query_expression(clean_expr, field)
-                        if pandas_condition:
-                            try:
-                                # 应用筛选条件
-                                before_count = len(gdf)
-                                gdf = gdf.query(pandas_condition)
-                                after_count = len(gdf)
-                                print(f"对字段 '{field}' 应用查询表达式: '{clean_expr}', 筛选后保留 {after_count}/{before_count} 行")
-                            except Exception as e:
-                                print(f"应用字段 '{field}' 的查询表达式时出错: {e}")
-                                # 添加更多调试信息
-                                print(f"生成的pandas条件: '{pandas_condition}'")
-                                print(f"数据框当前列: {list(gdf.columns)}")
+                        try:
+                            query = 编译查询(clean_expr, 默认字段=field)
+                            before_count = len(gdf)
+                            gdf = gdf[query.掩码(gdf)]
+                            print(f"对字段 '{field}' 应用查询表达式: '{clean_expr}', 筛选后保留 {len(gdf)}/{before_count} 行")
+                        except 查询表达式错误 as e:
+                            print(f"应用字段 '{field}' 的查询表达式时出错: {e}")
             
             # 应用通用查询表达式进行行筛选
             if query_expression and not gdf.empty:
-                try:
-                    # 这里需要将查询表达式转换为pandas可以理解的格式
-                    # 由于表达式格式可能比较复杂，这里做一个简单的转换
-                    pandas_query = query_expression
-                    
-                    # 替换一些特殊操作符
-                    pandas_query = pandas_query.replace('contains', 'str.contains')
-                    pandas_query = pandas_query.replace('not contains', '~str.contains')
-                    pandas_query = pandas_query.replace('is null', 'isna()')
-                    pandas_query = pandas_query.replace('is not null', 'notna()')
-                    
-                    # 执行查询
-                    filtered_gdf = gdf.query(pandas_query)
-                    print(f"已应用查询表达式筛选数据，保留 {len(filtered_gdf)} 行")
-                    return filtered_gdf
-                except Exception as e:
-                    print(f"执行查询表达式时出错: {e}")
-                    print(f"查询表达式: {query_expression}")
-                    # 查询出错时返回字段筛选后的数据
+                gdf = self._applyQueryExpression(gdf, query_expression)
             
             return gdf
         except Exception as e:
             print(f"字段筛选过程中出错: {e}")
             return gdf  # 出错时返回原始数据
     
+    def _applyQueryExpression(self, gdf, query_expression):
+        """
+        按查询表达式筛选行
+        
+        表达式先编译为向量化的筛选掩码；无法解析时按pandas的query语法执行，
+        兼容以前保存的工作流中直接写的pandas表达式
+        """
+        from gis_workflow.字段筛选 import 编译查询, 查询表达式错误
+        try:
+            filtered_gdf = 编译查询(query_expression).筛选(gdf)
+        except 查询表达式错误 as e:
+            print(f"查询表达式无法编译（{e}），按pandas查询语法执行")
+            pandas_query = query_expression
+            pandas_query = pandas_query.replace('not contains', '~str.contains')
+            pandas_query = pandas_query.replace('contains', 'str.contains')
+            pandas_query = pandas_query.replace('is not null', 'notna()')
+            pandas_query = pandas_query.replace('is null', 'isna()')
+            try:
+                filtered_gdf = gdf.query(pandas_query)
+            except Exception as e:
+                print(f"执行查询表达式时出错: {e}")
+                print(f"查询表达式: {query_expression}")
+                # 查询出错时返回原数据
+                return gdf
+        print(f"已应用查询表达式筛选数据，保留 {len(filtered_gdf)}/{len(gdf)} 行")
+        return filtered_gdf
+    
     def executeAddDataModule(self, module, input_data):
-        """执行添加数据模块，支持从文件系统和地理数据库加载实际地理数据"""
+        """
+        执行添加数据模块，支持从文件系统和地理数据库加载实际地理数据
+        
+        矢量图层只读取图层信息，输出延迟读取的图层句柄，下游模块需要数据时才读取，
+        字段筛选条件和分析范围可以在读取时下推到OGR
+        """
+        from functions.图层句柄 import 图层句柄
+        
         # 获取模块属性
         properties = module.properties
         selected_layers = properties.get("selected_layers", [])
@@ -5208,28 +5281,6 @@ class GisWorkflowInterface(QWidget):
             if paths_text:
                 file_paths = [path.strip() for path in paths_text.split('\n') if path.strip()]
         
-        # 特别处理 mock_data 情况 - 尝试解析为实际路径
-        if file_paths and len(file_paths) == 1 and file_paths[0] == "mock_data":
-            # 如果是 mock_data，尝试在当前工作目录或项目目录中查找实际文件
-            import os
-            # 获取项目根目录
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            # 可能的文件名
-            possible_names = ["mock_data.shp", "mock_data.geojson", "mock_data.csv", "mock_data.kml"]
-            
-            # 在项目目录和子目录中查找
-            for root, dirs, files in os.walk(project_root):
-                for name in possible_names:
-                    full_path = os.path.join(root, name)
-                    if os.path.exists(full_path):
-                        file_paths = [full_path]
-                        # 更新模块属性
-                        module.properties["file_paths"] = file_paths
-                        print(f"找到实际文件路径: {full_path}")
-                        break
-                if file_paths and file_paths[0] != "mock_data":
-                    break
-        
         # 优先处理从文件系统选择的文件
         if file_paths:
             try:
@@ -5239,6 +5290,16 @@ class GisWorkflowInterface(QWidget):
                 import pandas as pd
                 from shapely.geometry import Point
                 
+                # 矢量格式与名称
+                vector_formats = {
+                    '.shp': 'shapefile',
+                    '.geojson': 'geojson',
+                    '.json': 'geojson',
+                    '.kml': 'kml',
+                    '.kmz': 'kml',
+                    '.gpkg': 'geopackage',
+                }
+                
                 layer_data = []
                 for file_path in file_paths:
                     # 检查文件是否存在，如果不存在尝试在项目目录中查找
@@ -5265,33 +5326,20 @@ class GisWorkflowInterface(QWidget):
                     
                     try:
                         file_name = os.path.basename(file_path)
-                        file_ext = os.path.splitext(file_name)[1].lower()
+                        layer_name, file_ext = os.path.splitext(file_name)
+                        file_ext = file_ext.lower()
                         
                         # 根据文件扩展名读取不同格式的数据
-                        if file_ext == '.shp':
-                            # 读取Shapefile，不再应用字段筛选
-                            gdf = gpd.read_file(file_path)
-                            gdf_filtered = gdf
-                            
-                            layer_data.append({
-                            "name": file_name[:-4],  # 移除.shp扩展名
-                            "data": gdf_filtered,
-                            "type": "geodataframe",
-                            "source": file_path,
-                            "format": "shapefile"
-                        })
-                        elif file_ext in ['.geojson', '.json']:
-                            # 读取GeoJSON，不再应用字段筛选
-                            gdf = gpd.read_file(file_path)
-                            gdf_filtered = gdf
-                            
+                        if file_ext in vector_formats:
+                            # 只读取图层信息，要素在下游需要时读取
+                            handle = 图层句柄.打开(file_path, name=layer_name)
                             layer_data.append({
-                            "name": file_name[:-5] if file_ext == '.json' else file_name[:-8],
-                            "data": gdf_filtered,
-                            "type": "geodataframe",
-                            "source": file_path,
-                            "format": "geojson"
-                        })
+                                "name": layer_name,
+                                "data": handle,
+                                "type": "layer_handle",
+                                "source": file_path,
+                                "format": vector_formats[file_ext]
+                            })
                         elif file_ext == '.csv':
                             # 读取CSV文件，尝试解析为地理数据
                             df = pd.read_csv(file_path)
@@ -5316,31 +5364,16 @@ class GisWorkflowInterface(QWidget):
                                 geometry = [Point(xy) for xy in zip(df[lon_col], df[lat_col])]
                                 # 创建GeoDataFrame
                                 gdf = gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
-                                # 不再应用字段筛选
-                                gdf_filtered = gdf
                                 
                                 layer_data.append({
-                                    "name": file_name[:-4],  # 移除.csv扩展名
-                                    "data": gdf_filtered,
+                                    "name": layer_name,
+                                    "data": gdf,
                                     "type": "geodataframe",
                                     "source": file_path,
                                     "format": "csv"
                                 })
                             else:
                                 print(f"CSV文件 {file_path} 中未找到坐标列")
-                        elif file_ext in ['.kml', '.kmz']:
-                            # 读取KML/KMZ
-                            gdf = gpd.read_file(file_path, driver='KML')
-                            # 不再应用字段筛选
-                            gdf_filtered = gdf
-                            
-                            layer_data.append({
-                            "name": file_name[:-4] if file_ext == '.kml' else file_name[:-4],
-                            "data": gdf_filtered,
-                            "type": "geodataframe",
-                            "source": file_path,
-                            "format": "kml"
-                        })
                         else:
                             print(f"不支持的文件格式: {file_ext}")
                     except Exception as e:
@@ -5355,7 +5388,7 @@ class GisWorkflowInterface(QWidget):
                         })
                 
                 if layer_data:
-                    # 返回实际的数据对象
+                    # 返回图层句柄，要素数来自图层信息
                     return {
                         "type": "feature_data",
                         "layers": [ld["name"] for ld in layer_data],
@@ -5372,76 +5405,91 @@ class GisWorkflowInterface(QWidget):
         
         # 处理从GDB选择的图层
         if selected_layers and gdb_path:
-            try:
-                # 动态导入geopandas
-                import geopandas as gpd
-                import os
-                
-                # 尝试读取图层数据
-                layer_data = []
-                for layer_name in selected_layers:
-                    try:
-                        # 根据文件类型读取数据
-                        if os.path.exists(gdb_path):
-                            # 如果是GDB路径，尝试读取GDB中的图层
-                            if gdb_path.endswith('.gdb') or gdb_path.endswith('.GDB'):
-                                # 读取File Geodatabase
-                                gdf = gpd.read_file(gdb_path, layer=layer_name)
-                                # 不再应用字段筛选
-                                gdf_filtered = gdf
-                                
-                                layer_data.append({
-                                    "name": layer_name,
-                                    "data": gdf_filtered,
-                                    "type": "geodataframe",
-                                    "source": gdb_path,
-                                    "format": "filegdb"
-                                })
-                            else:
-                                # 其他情况，尝试直接读取文件
-                                gdf = gpd.read_file(gdb_path)
-                                # 不再应用字段筛选
-                                gdf_filtered = gdf
-                                
-                                layer_data.append({
-                                    "name": layer_name,
-                                    "data": gdf_filtered,
-                                    "type": "geodataframe",
-                                    "source": gdb_path
-                                })
-                    except Exception as e:
-                        print(f"读取图层 {layer_name} 时出错: {e}")
-                        # 即使出错也添加一个条目
-                        layer_data.append({
-                            "name": layer_name,
-                            "data": None,
-                            "type": "geodataframe",
-                            "source": gdb_path,
-                            "error": str(e)
-                        })
-                
-                if layer_data:
-                    # 返回实际的数据对象
-                    return {
-                        "type": "feature_data",
-                        "layers": selected_layers,
-                        "layer_data": layer_data,
+            import os
+            
+            layer_data = []
+            for layer_name in selected_layers:
+                if not os.path.exists(gdb_path):
+                    continue
+                try:
+                    # GDB中按图层名打开，其他数据源直接打开
+                    is_gdb = gdb_path.lower().endswith('.gdb')
+                    handle = 图层句柄.打开(gdb_path, layer=layer_name if is_gdb else None, name=layer_name)
+                    layer_data.append({
+                        "name": layer_name,
+                        "data": handle,
+                        "type": "layer_handle",
                         "source": gdb_path,
-                        "features": sum(len(layer["data"]) if layer["data"] is not None else 0 for layer in layer_data)
-                    }
-            except ImportError:
-                print("geopandas未安装，使用模拟数据")
-                # 如果geopandas不可用，回退到模拟数据
-                return self._createMockData(selected_layers)
-            except Exception as e:
-                print(f"执行GDB数据加载时出错: {e}")
-                # 如果出现其他错误，也回退到模拟数据
-                return self._createMockData(selected_layers)
+                        "format": "filegdb" if is_gdb else None
+                    })
+                except Exception as e:
+                    print(f"读取图层 {layer_name} 时出错: {e}")
+                    # 即使出错也添加一个条目
+                    layer_data.append({
+                        "name": layer_name,
+                        "data": None,
+                        "type": "layer_handle",
+                        "source": gdb_path,
+                        "error": str(e)
+                    })
+            
+            if layer_data:
+                return {
+                    "type": "feature_data",
+                    "layers": selected_layers,
+                    "layer_data": layer_data,
+                    "source": gdb_path,
+                    "features": sum(len(layer["data"]) if layer["data"] is not None else 0 for layer in layer_data)
+                }
         
         # 如果没有选择任何数据，创建默认模拟数据
         print("未选择任何数据，创建默认模拟数据")
         return self._createMockData()
     
+    def materializeInputData(self, module, input_data):
+        """
+        读取输入数据中的图层句柄和已转存的结果，供需要完整数据的模块使用
+        
+        相交、擦除、标识只需要与主图层范围相交的要素：先读取主图层，
+        其余图层句柄按主图层范围过滤后读取。相交只使用前两个输入图层，以其中要素较少的图层为主图层，
+        擦除和标识以第一个输入图层为主图层
+        """
+        items = [item for item in input_data if isinstance(item, dict)]
+        layer_data = [layer for item in items for layer in item.get("layer_data") or [] if isinstance(layer, dict)]
+        # 结果顶层的data也可能是已转存的结果
+        containers = [item for item in items if item.get("data") is not None] + layer_data
+        handles = [layer for layer in containers if hasattr(layer.get("data"), '读取')]
+        if not handles:
+            return input_data
+        
+        reference = None
+        if module.category == "分析功能" and module.title in ("相交", "擦除", "标识"):
+            candidates = [layer for layer in layer_data if layer.get("data") is not None]
+            if module.title == "相交" and candidates:
+                # 主图层只能从参与相交的前两个图层中选择，否则参与相交的图层会被其他图层的范围裁掉
+                reference = min(candidates[:2], key=lambda layer: layer["data"].count
+                                if hasattr(layer["data"], '读取') and layer["data"].count is not None
+                                else len(layer["data"]))
+            elif candidates:
+                reference = candidates[0]
+        
+        if reference is not None:
+            from functions.矢量读写 import 读取计划
+            if hasattr(reference["data"], '读取'):
+                reference["data"] = reference["data"].读取()
+            plan = 读取计划.参考范围(reference["data"])
+            if plan.bbox is not None:
+                for layer in handles:
+                    if layer is not reference and hasattr(layer["data"], '筛选'):
+                        layer["data"] = layer["data"].筛选(bbox=plan.bbox, crs=plan.crs)
+        
+        for layer in handles:
+            if hasattr(layer["data"], '读取'):
+                layer["data"] = layer["data"].读取()
+            if layer.get("type") == "layer_handle":
+                layer["type"] = "geodataframe"
+        return input_data
+    
     def _createMockData(self, layer_names=None):
         """创建模拟的地理数据用于测试"""
         try:
@@ -5693,243 +5741,48 @@ class GisWorkflowInterface(QWidget):
                 print(f"错误: {error_msg}")
                 return {"status": "error", "message": error_msg}
             
-            # 判断是SHP导出还是Excel导出
-            is_shp_export = module_id.startswith("export_shp") or "shp" in export_format.lower() or output_path.lower().endswith(".shp")
-            is_excel_export = module_id.startswith("export_excel") or "excel" in export_format.lower() or output_path.lower().endswith((".xlsx", ".xls"))
+            # 判断是矢量导出还是Excel导出
+            from gis_workflow.数据导出 import 导出写出器, 识别导出格式
+            vector_format = 识别导出格式(output_path)
+            is_excel_export = vector_format is None and (module_id.startswith("export_excel") or "excel" in export_format.lower() or output_path.lower().endswith((".xlsx", ".xls")))
             
-            print(f"导出类型判断 - SHP: {is_shp_export}, Excel: {is_excel_export}")
+            print(f"导出类型判断 - 矢量格式: {vector_format}, Excel: {is_excel_export}")
             
-            # 执行SHP导出
-            if is_shp_export:
-                    try:
-                        # 检查输入数据是否包含实际的GeoDataFrame
-                        actual_data = None
-                        
-                        # 优先获取直接的data字段（相交结果通常在这里）
-                        if isinstance(input_data, dict) and "data" in input_data:
-                            actual_data = input_data["data"]
-                        # 处理列表形式的输入
-                        elif isinstance(input_data, list) and input_data:
-                            first_item = input_data[0]
-                            if isinstance(first_item, dict):
-                                # 先检查是否有直接的data字段
-                                if "data" in first_item and first_item["data"] is not None:
-                                    actual_data = first_item["data"]
-                                # 再检查layer_data字段
-                                elif "layer_data" in first_item:
-                                    layer_data_list = first_item["layer_data"]
-                                    if layer_data_list:
-                                        # 优先选择有数据的图层
-                                        for layer in layer_data_list:
-                                            if layer.get("data") is not None:
-                                                actual_data = layer.get("data")
-                                                break
-                        
-                        # 添加详细日志，帮助调试
-                        if actual_data is not None:
-                            import pandas as pd
-                            print(f"找到实际数据，类型: {type(actual_data)}, 是否为空: {actual_data.empty if hasattr(actual_data, 'empty') else '未知'}")
-                        else:
-                            print("未找到实际的GeoDataFrame数据，数据结构:", input_data if len(str(input_data)) < 200 else str(input_data)[:200]+"...")
-                        
-                        # 如果有实际的GeoDataFrame数据，使用geopandas保存
-                        if actual_data is not None:
-                            try:
-                                import geopandas as gpd
-                                import os
-                                
-                                # 确保输出目录存在
-                                output_dir = os.path.dirname(output_path)
-                                os.makedirs(output_dir, exist_ok=True)
-                                
-                                try:
-                                    # 检查数据是否为空
-                                    if actual_data.empty:
-                                        print("警告: 导出数据为空，无法保存有效文件")
-                                        # 创建一个带有简单点几何的空GeoDataFrame以避免导出失败
-                                        from shapely.geometry import Point
-                                        empty_gdf = gpd.GeoDataFrame(columns=['geometry'], geometry='geometry')
-                                        empty_gdf.to_file(output_path, encoding='utf-8')
-                                        print(f"已创建空SHP文件: {output_path}")
-                                        return {"status": "warning", "message": "导出了空结果文件", "path": output_path}
-                                    
-                                    # 应用字段筛选
-                                    print("检查是否需要应用字段筛选")
-                                    # 尝试从输入数据或模块属性中获取字段筛选设置
-                                    keep_fields = None
-                                    
-                                    # 检查模块属性中是否有字段筛选设置
-                                    if hasattr(module, 'properties'):
-                                        if 'keep_fields' in module.properties and module.properties['keep_fields']:
-                                            keep_fields = module.properties['keep_fields']
-                                            print(f"从模块属性获取字段筛选设置: {keep_fields}")
-                                        elif hasattr(module, 'selected_fields') and module.selected_fields:
-                                            keep_fields = module.selected_fields
-                                            print(f"从模块selected_fields属性获取字段筛选设置: {keep_fields}")
-                                    
-                                    # 检查输入数据中是否有字段筛选设置 - 多种可能的位置
-                                    if not keep_fields:
-                                        # 1. 直接在输入数据字典中
-                                        if isinstance(input_data, dict) and 'selected_fields' in input_data:
-                                            keep_fields = input_data['selected_fields']
-                                            print(f"从输入数据字典获取字段筛选设置: {keep_fields}")
-                                        # 2. 在输入数据列表的第一个元素中
-                                        elif isinstance(input_data, list) and input_data:
-                                            first_item = input_data[0]
-                                            if isinstance(first_item, dict):
-                                                # 2.1 在first_item的顶层
-                                                if 'selected_fields' in first_item:
-                                                    keep_fields = first_item['selected_fields']
-                                                    print(f"从输入数据第一个元素获取字段筛选设置: {keep_fields}")
-                                                # 2.2 在first_item的layer_data中
-                                                elif 'layer_data' in first_item:
-                                                    for layer in first_item['layer_data']:
-                                                        if isinstance(layer, dict) and 'selected_fields' in layer:
-                                                            keep_fields = layer['selected_fields']
-                                                            print(f"从layer_data获取字段筛选设置: {keep_fields}")
-                                                            break
-                                    
-                                    # 如果有字段筛选设置，应用筛选
-                                    if keep_fields:
-                                        # 确保geometry字段始终保留
-                                        if 'geometry' not in keep_fields:
-                                            keep_fields = list(keep_fields) + ['geometry']
-                                        # 只保留实际存在的字段
-                                        available_fields = actual_data.columns.tolist()
-                                        filtered_fields = [field for field in keep_fields if field in available_fields]
-                                        # 确保至少保留geometry列
-                                        if 'geometry' not in filtered_fields and 'geometry' in available_fields:
-                                            filtered_fields.append('geometry')
-                                        
-                                        if filtered_fields and len(filtered_fields) > 0:
-                                            filtered_data = actual_data[filtered_fields].copy()
-                                            print(f"应用字段筛选，保留字段: {filtered_fields}")
-                                        else:
-                                            filtered_data = actual_data
-                                            print("字段筛选设置无效，保留所有字段")
-                                    else:
-                                        # 即使没有找到显式的筛选设置，也使用输入数据
-                                        # 因为performFieldFilter方法可能已经对数据进行了筛选
-                                        filtered_data = actual_data
-                                        print("未找到显式字段筛选设置，使用输入数据(可能已被字段筛选模块处理)")
-                                    
-                                    # 处理SHP文件的字段名长度限制
-                                    # ESRI Shapefile限制字段名不能超过10个字符
-                                    df_export = filtered_data.copy()
-                                    
-                                    # 重命名过长的列
-                                    new_columns = {}
-                                    for col in df_export.columns:
-                                        if col != 'geometry' and len(col) > 10:
-                                            # 生成更短的列名，保留前7个字符+序号
-                                            short_name = col[:7] + f"_{len(new_columns)}"
-                                            new_columns[col] = short_name
-                                            print(f"重命名字段: {col} -> {short_name}")
-                                    
-                                    if new_columns:
-                                        df_export = df_export.rename(columns=new_columns)
-                                    
-                                    # 确保几何列正确存在
-                                    if 'geometry' not in df_export.columns:
-                                        print("错误: 导出数据中没有geometry列")
-                                        return {"status": "error", "message": "导出数据缺少几何信息"}
-                                    
-                                    # 打印导出前的数据信息
-                                    print(f"准备导出的字段: {list(df_export.columns)}")
-                                    print(f"导出数据特征数: {len(df_export)}")
-                                    
-                                    # 使用geopandas保存为SHP文件，添加driver参数确保兼容性
-                                    df_export.to_file(output_path, driver='ESRI Shapefile', encoding='utf-8')
-                                    print(f"成功导出SHP文件到: {output_path}")
-                                    return {"exported": True, "path": output_path, "format": "shp"}
-                                    
-                                except Exception as e:
-                                    print(f"导出SHP文件时发生错误: {str(e)}")
-                                    # 尝试使用备用方法，使用GDAL/OGR直接导出
-                                    try:
-                                        # 导入GDAL模块进行备用导出
-                                        from osgeo import ogr, gdal
-                                        print("尝试使用GDAL/OGR备用方法导出")
-                                        
-                                        # 创建驱动
-                                        driver = ogr.GetDriverByName('ESRI Shapefile')
-                                        if os.path.exists(output_path):
-                                            driver.DeleteDataSource(output_path)
-                                        
-                                        # 创建数据源
-                                        data_source = driver.CreateDataSource(output_path)
-                                        
-                                        # 获取几何类型
-                                        geom_type = actual_data.geometry.iloc[0].geom_type
-                                        ogr_type = ogr.wkbUnknown
-                                        if geom_type == 'Point':
-                                            ogr_type = ogr.wkbPoint
-                                        elif geom_type == 'LineString':
-                                            ogr_type = ogr.wkbLineString
-                                        elif geom_type == 'Polygon':
-                                            ogr_type = ogr.wkbPolygon
-                                        elif geom_type == 'MultiPoint':
-                                            ogr_type = ogr.wkbMultiPoint
-                                        elif geom_type == 'MultiLineString':
-                                            ogr_type = ogr.wkbMultiLineString
-                                        elif geom_type == 'MultiPolygon':
-                                            ogr_type = ogr.wkbMultiPolygon
-                                        
-                                        # 创建图层
-                                        layer = data_source.CreateLayer('layer', geom_type=ogr_type)
-                                        
-                                        # 添加属性字段（限制为短字段名）
-                                        for i, col in enumerate(actual_data.columns):
-                                            if col != 'geometry' and i < 10:  # 限制字段数量避免问题
-                                                field_name = col[:10] if len(col) > 10 else col
-                                                field_defn = ogr.FieldDefn(field_name, ogr.OFTString)
-                                                field_defn.SetWidth(80)
-                                                layer.CreateField(field_defn)
-                                        
-                                        # 添加要素
-                                        for idx, row in actual_data.iterrows():
-                                            # 创建要素
-                                            feature = ogr.Feature(layer.GetLayerDefn())
-                                            
-                                            # 设置属性值
-                                            for i, col in enumerate(actual_data.columns):
-                                                if col != 'geometry' and i < 10:
-                                                    field_name = col[:10] if len(col) > 10 else col
-                                                    try:
-                                                        feature.SetField(field_name, str(row[col]))
-                                                    except:
-                                                        pass
-                                            
-                                            # 创建几何对象
-                                            wkt = row['geometry'].wkt
-                                            geom = ogr.CreateGeometryFromWkt(wkt)
-                                            feature.SetGeometry(geom)
-                                            
-                                            # 添加要素到图层
-                                            layer.CreateFeature(feature)
-                                            feature = None
-                                        
-                                        data_source = None
-                                        print(f"使用GDAL/OGR成功导出SHP文件: {output_path}")
-                                    except Exception as gdal_error:
-                                        print(f"GDAL/OGR导出也失败: {str(gdal_error)}")
-                                        return {"status": "error", "message": f"导出失败: {str(e)}"}
-                                finally:
-                                    # 确保文件已创建
-                                    if not os.path.exists(output_path):
-                                        print(f"错误: 导出路径不存在: {output_path}")
-                                        return {"status": "error", "message": "文件创建失败"}
-                                return {"exported": True, "path": output_path, "format": "shp"}
-                            except ImportError:
-                                print("geopandas未安装，使用GDAL创建SHP文件")
-                                # 回退到原来的GDAL实现
-                                return self.createShapefile(output_path, input_data)
-                        else:
-                            # 没有实际数据，回退到原来的实现
-                            return self.createShapefile(output_path, input_data)
-                    except Exception as e:
-                        print(f"导出SHP文件失败: {e}")
-                        return {"exported": False, "error": str(e)}
+            # 执行矢量导出：SHP/GPKG/GDB/GeoParquet
+            if vector_format is not None:
+                actual_data = self._getExportData(input_data)
+                if actual_data is None:
+                    print("未找到实际的GeoDataFrame数据，数据结构:", input_data if len(str(input_data)) < 200 else str(input_data)[:200]+"...")
+                    return {"status": "error", "message": "上游模块没有可导出的数据"}
+                
+                keep_fields = self._getExportKeepFields(module, input_data)
+                if keep_fields:
+                    print(f"应用字段筛选，保留字段: {keep_fields}")
+                
+                def on_progress(written, total):
+                    # 写出进度占模块进度的30%~100%
+                    if total:
+                        self.update_module_ui(module, 30 + int(written / total * 70))
+                
+                try:
+                    writer = 导出写出器(
+                        output_path,
+                        encoding=properties.get("shp_encoding", "UTF-8"),
+                        columns=[field for field in keep_fields if field != 'geometry'] if keep_fields else None,
+                        progress_callback=on_progress
+                    )
+                    result_path = writer.写出(actual_data)
+                except Exception as e:
+                    print(f"导出{vector_format}失败: {str(e)}")
+                    traceback.print_exc()
+                    return {"status": "error", "message": f"导出失败: {str(e)}"}
+                
+                if writer.count == 0:
+                    print(f"警告: 导出数据为空，已创建空结果: {result_path}")
+                    return {"status": "warning", "message": "导出了空结果文件", "path": result_path}
+                
+                print(f"成功导出{writer.count}个要素到: {result_path}")
+                return {"exported": True, "path": result_path, "format": vector_format, "features": writer.count}
             elif is_excel_export:
                 # 已经获取过output_path，这里直接使用
                     # 实际创建Excel文件
@@ -5939,27 +5792,9 @@ class GisWorkflowInterface(QWidget):
                         os.makedirs(os.path.dirname(output_path), exist_ok=True)
                         
                         # 检查输入数据是否包含实际的GeoDataFrame
-                        actual_data = None
-                        
-                        # 优先获取直接的data字段（相交结果通常在这里）
-                        if isinstance(input_data, dict) and "data" in input_data:
-                            actual_data = input_data["data"]
-                        # 处理列表形式的输入
-                        elif isinstance(input_data, list) and input_data:
-                            first_item = input_data[0]
-                            if isinstance(first_item, dict):
-                                # 先检查是否有直接的data字段
-                                if "data" in first_item and first_item["data"] is not None:
-                                    actual_data = first_item["data"]
-                                # 再检查layer_data字段
-                                elif "layer_data" in first_item:
-                                    layer_data_list = first_item["layer_data"]
-                                    if layer_data_list:
-                                        # 优先选择有数据的图层
-                                        for layer in layer_data_list:
-                                            if layer.get("data") is not None:
-                                                actual_data = layer.get("data")
-                                                break
+                        actual_data = self._getExportData(input_data)
+                        if hasattr(actual_data, '读取'):
+                            actual_data = actual_data.读取()
                         
                         # 添加详细日志，帮助调试
                         if actual_data is not None:
@@ -6025,107 +5860,44 @@ class GisWorkflowInterface(QWidget):
         print(f"警告: 没有识别到有效的导出类型")
         return {"status": "error", "message": "未识别到有效的导出类型，请检查模块配置"}
     
-    def createShapefile(self, output_path, input_data):
-        """创建真正的SHP文件"""
-        try:
-            import os
-            # 确保输出目录存在
-            output_dir = os.path.dirname(output_path)
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # 尝试使用GDAL创建SHP文件
-            try:
-                # 动态导入GDAL
-                ogr = __import__('osgeo', fromlist=['ogr']).ogr
-                osr = __import__('osgeo', fromlist=['osr']).osr
-                
-                # 创建空间参考
-                srs = osr.SpatialReference()
-                srs.ImportFromEPSG(4326)  # WGS84
-                
-                # 创建数据源
-                driver = ogr.GetDriverByName('ESRI Shapefile')
-                if os.path.exists(output_path):
-                    driver.DeleteDataSource(output_path)
-                
-                datasource = driver.CreateDataSource(output_path)
-                if datasource is None:
-                    raise Exception("无法创建数据源")
-                
-                # 创建图层（点要素）
-                layer = datasource.CreateLayer("result", srs, ogr.wkbPoint)
-                if layer is None:
-                    raise Exception("无法创建图层")
-                
-                # 添加字段
-                field_defn = ogr.FieldDefn("id", ogr.OFTInteger)
-                layer.CreateField(field_defn)
-                
-                field_defn = ogr.FieldDefn("name", ogr.OFTString)
-                field_defn.SetWidth(50)
-                layer.CreateField(field_defn)
-                
-                # 添加要素（基于输入数据）
-                if input_data:
-                    first_data = input_data[0] if isinstance(input_data, list) else input_data
-                    if isinstance(first_data, dict):
-                        features_count = first_data.get("features", 10)
-                        layers = first_data.get("layers", ["layer"])
-                        operation = first_data.get("operation", "unknown")
-                        
-                        # 创建一些示例要素
-                        for i in range(min(features_count, 100)):  # 限制要素数量
-                            feature = ogr.Feature(layer.GetLayerDefn())
-                            feature.SetField("id", i)
-                            feature.SetField("name", f"{operation}_{layers[0]}_{i}")
-                            
-                            # 创建点几何
-                            point = ogr.Geometry(ogr.wkbPoint)
-                            point.AddPoint(i * 0.001, i * 0.001)  # 简单的点坐标
-                            feature.SetGeometry(point)
-                            
-                            layer.CreateFeature(feature)
-                            feature = None
-                
-                # 清理
-                datasource = None
-                
-                print(f"成功导出SHP文件到: {output_path}")
-                return {"exported": True, "path": output_path, "format": "shp"}
-                
-            except (ImportError, AttributeError):
-                # 如果GDAL不可用，创建简单的文本文件作为备选
-                print("GDAL不可用，创建简单的SHP描述文件")
-                base_name = os.path.splitext(output_path)[0]
-                
-                # 创建主SHP文件
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write("This is a simulated SHP file\n")
-                    f.write("Generated by GIS Workflow Interface\n")
-                    f.write(f"Input data: {input_data}\n")
-                    if input_data:
-                        first_data = input_data[0] if isinstance(input_data, list) else input_data
-                        if isinstance(first_data, dict):
-                            f.write(f"Layers: {first_data.get('layers', [])}\n")
-                            f.write(f"Features: {first_data.get('features', 0)}\n")
-                            f.write(f"Operation: {first_data.get('operation', 'unknown')}\n")
-                
-                # 创建相关的附加文件
-                with open(base_name + ".shx", 'w') as f:
-                    f.write("Simulated SHX file")
-                
-                with open(base_name + ".dbf", 'w') as f:
-                    f.write("Simulated DBF file")
-                
-                with open(base_name + ".prj", 'w') as f:
-                    f.write("Simulated PRJ file")
-                
-                print(f"成功创建模拟SHP文件集到: {output_path}")
-                return {"exported": True, "path": output_path, "format": "shp"}
-                
-        except Exception as e:
-            print(f"创建SHP文件失败: {e}")
-            raise e
+    def _getExportData(self, input_data):
+        """从上游结果中取出要导出的数据（GeoDataFrame或结果句柄），没有时返回None"""
+        # 优先获取直接的data字段（相交结果通常在这里）
+        if isinstance(input_data, dict) and "data" in input_data:
+            return input_data["data"]
+        # 处理列表形式的输入
+        if isinstance(input_data, list) and input_data:
+            first_item = input_data[0]
+            if isinstance(first_item, dict):
+                # 先检查是否有直接的data字段
+                if first_item.get("data") is not None:
+                    return first_item["data"]
+                # 再检查layer_data字段，优先选择有数据的图层
+                for layer in first_item.get("layer_data") or []:
+                    if layer.get("data") is not None:
+                        return layer.get("data")
+        return None
+    
+    def _getExportKeepFields(self, module, input_data):
+        """获取导出时要保留的字段，没有字段筛选设置时返回None"""
+        # 检查模块属性中是否有字段筛选设置
+        if module.properties.get('keep_fields'):
+            return module.properties['keep_fields']
+        if getattr(module, 'selected_fields', None):
+            return module.selected_fields
+        
+        # 检查输入数据中是否有字段筛选设置
+        if isinstance(input_data, dict):
+            return input_data.get('selected_fields')
+        if isinstance(input_data, list) and input_data and isinstance(input_data[0], dict):
+            first_item = input_data[0]
+            if 'selected_fields' in first_item:
+                return first_item['selected_fields']
+            for layer in first_item.get('layer_data') or []:
+                if isinstance(layer, dict) and 'selected_fields' in layer:
+                    return layer['selected_fields']
+        # performFieldFilter已经对数据进行了筛选时直接使用输入数据
+        return None
     
     def performIntersect(self, module, input_data):
         """执行相交分析"""
@@ -6147,6 +5919,7 @@ class GisWorkflowInterface(QWidget):
         layer_order = []
         keep_fields = []
         field_filters = {}
+        multiprocess = True
         
         # 优先使用module参数获取配置
         if module:
@@ -6155,6 +5928,7 @@ class GisWorkflowInterface(QWidget):
             layer_order = module.properties.get("layer_order", [])
             keep_fields = module.properties.get("keep_fields", [])
             field_filters = module.properties.get("field_filters", {})
+            multiprocess = module.properties.get("multiprocess", True)
         # 回退使用current_module
         elif hasattr(self, 'current_module') and self.current_module:
             keep_all = self.current_module["properties"].get("keep_all", True)
@@ -6162,11 +5936,21 @@ class GisWorkflowInterface(QWidget):
             layer_order = self.current_module["properties"].get("layer_order", [])
             keep_fields = self.current_module["properties"].get("keep_fields", [])
             field_filters = self.current_module["properties"].get("field_filters", {})
+            multiprocess = self.current_module["properties"].get("multiprocess", True)
         
         # 创建相交分析实例
         if use_new_module:
+            def on_intersect_progress(done, total):
+                if module and total:
+                    self.update_module_ui(module, 30 + int(done / total * 60))
+            
             intersect_analyzer = IntersectAnalysis()
-            intersect_analyzer.set_params(keep_all=keep_all, precision=precision)
+            intersect_analyzer.set_params(
+                keep_all=keep_all, precision=precision, keep_fields=keep_fields,
+                # 未勾选多进程时在当前进程中分块计算
+                max_workers=None if multiprocess else 1,
+                progress_callback=on_intersect_progress
+            )
             
             # 处理输入数据
             all_layer_data = intersect_analyzer.process_input_data(input_data)
@@ -6355,9 +6139,22 @@ class GisWorkflowInterface(QWidget):
             
             # 如果有实际数据，执行实际的擦除操作
             if len(all_layer_data) >= 2:
-                # 执行擦除操作
-                erase_result = all_layer_data[0][0].overlay(all_layer_data[1][0], how="difference")
-                
+                # 执行擦除操作：每个要素只减去与它相交的擦除要素，数据量大时分块多进程计算
+                from gis_workflow.擦除分析 import EraseAnalysis
+
+                def on_erase_progress(done, total):
+                    if module and total:
+                        self.update_module_ui(module, 30 + int(done / total * 60))
+
+                erase_analyzer = EraseAnalysis()
+                erase_analyzer.set_params(
+                    max_workers=None if (module is None or module.properties.get("multiprocess", True)) else 1,
+                    progress_callback=on_erase_progress
+                )
+                erase_result = erase_analyzer.perform_erase(all_layer_data[0][0], all_layer_data[1][0])
+                if erase_result is None:
+                    raise ValueError("擦除分析没有返回结果")
+
                 # 不再应用字段筛选，直接使用原始擦除结果
                 filtered_result = erase_result
                 
@@ -6580,6 +6377,7 @@ class GisWorkflowInterface(QWidget):
             import sys
             import tempfile
             import geopandas as gpd
+            from functions.矢量读写 import 读取矢量, 写出矢量
             
             # 添加项目路径到Python路径
             import os
@@ -6626,7 +6424,7 @@ class GisWorkflowInterface(QWidget):
                         temp_path = temp.name
                     
                     # 保存GeoDataFrame到临时文件
-                    gdf.to_file(temp_path, encoding='utf-8')
+                    写出矢量(gdf, temp_path, encoding='utf-8')
                     
                     # 执行投影转换
                     if proj_function == '定义投影':
@@ -6639,7 +6437,7 @@ class GisWorkflowInterface(QWidget):
                     if os.path.exists(output_path):
                         try:
                             # 读取转换后的GeoDataFrame
-                            projection_result = gpd.read_file(output_path)
+                            projection_result = 读取矢量(output_path)
                             print(f"成功读取投影转换结果: 特征数={len(projection_result)}")
                             
                             print("投影转换完成，保留所有字段")
@@ -6688,7 +6486,7 @@ class GisWorkflowInterface(QWidget):
                     gdf = gpd.GeoDataFrame(df, geometry=geometry, crs="EPSG:4326")
                     
                     # 保存到临时文件
-                    gdf.to_file(temp_path, encoding='utf-8')
+                    写出矢量(gdf, temp_path, encoding='utf-8')
                     
                     # 执行投影转换
                     if proj_function == '定义投影':
@@ -6714,7 +6512,7 @@ class GisWorkflowInterface(QWidget):
                     # 尝试读取投影转换后的结果，以便在返回数据中包含
                     try:
                         if os.path.exists(output_path):
-                            projection_result = gpd.read_file(output_path)
+                            projection_result = 读取矢量(output_path)
                             print(f"成功读取测试数据投影转换结果: 特征数={len(projection_result)}")
                     except Exception as read_error:
                         print(f"读取测试数据投影结果失败: {read_error}")
@@ -6768,6 +6566,83 @@ class GisWorkflowInterface(QWidget):
             traceback.print_exc()
             return None
     
+    def _pushDownFieldFilter(self, handle, selected_fields, field_queries):
+        """
+        把字段筛选条件叠加到图层句柄上
+        
+        返回:
+            (新的图层句柄, 仍需在内存中执行的查询条件)
+        """
+        from gis_workflow.字段筛选 import 编译查询, 查询表达式错误
+        
+        conditions = []
+        remaining_queries = {}
+        for field, expr in (field_queries or {}).items():
+            if not expr or field not in handle.columns:
+                continue
+            clean_expr = expr.strip().replace('\n', '').replace('\r', '')
+            try:
+                translated = 编译查询(clean_expr, 默认字段=field).转SQL(handle.dtypes)
+            except 查询表达式错误:
+                translated = None
+            if translated is None:
+                remaining_queries[field] = expr
+                continue
+            sql, exact = translated
+            conditions.append(sql)
+            if not exact:
+                remaining_queries[field] = expr
+        
+        # 查询字段不在保留字段中时也要读取，内存筛选后再去掉
+        columns = [field for field in selected_fields if field in handle.columns]
+        columns += [field for field in remaining_queries if field not in columns]
+        handle = handle.筛选(columns=columns, where=" AND ".join(conditions) or None)
+        return handle, remaining_queries
+    
+    def performAttributeQuery(self, module, input_data):
+        """
+        执行定义查询模块
+        
+        图层句柄能转换为OGR SQL的条件在读取时下推，不精确的条件（例如LIKE）
+        只用于预筛选，读取后再按编译的表达式精确筛选
+        """
+        from gis_workflow.字段筛选 import 编译查询, 查询表达式错误
+        
+        properties = module.properties
+        query_expression = (properties.get("query_expression") or "").strip()
+        if not input_data or input_data[0] is None:
+            return None
+        processed_data = input_data[0]
+        if not properties.get("enabled", True) or not query_expression:
+            print("定义查询未启用或未设置查询表达式，返回原数据")
+            return processed_data
+        
+        try:
+            query = 编译查询(query_expression)
+        except 查询表达式错误 as e:
+            query = None
+            print(f"查询表达式无法编译: {e}")
+        
+        for i, layer in enumerate(processed_data.get("layer_data", [])):
+            data = layer.get("data")
+            if data is None:
+                continue
+            if hasattr(data, '筛选') and query is not None and query.字段 <= set(data.columns):
+                translated = query.转SQL(data.dtypes)
+                if translated is not None:
+                    sql, exact = translated
+                    data = data.筛选(where=sql)
+                    if exact:
+                        processed_data["layer_data"][i]["data"] = data
+                        print(f"查询条件已下推到读取: {data}")
+                        continue
+            if hasattr(data, '读取'):
+                data = data.读取()
+            processed_data["layer_data"][i]["data"] = self._applyQueryExpression(data, query_expression)
+        
+        processed_data["query_expression"] = query_expression
+        return processed_data
+    
     def performFieldFilter(self, module, input_data):
         """执行字段筛选模块"""
         try:
@@ -6799,10 +6674,24 @@ class GisWorkflowInterface(QWidget):
             processed_data = input_data[0].copy()
             if "layer_data" in processed_data:
                 for i, layer in enumerate(processed_data["layer_data"]):
+                    layer_properties = filter_properties
+                    if hasattr(layer.get("data"), '筛选'):
+                        # 图层句柄：字段和能转换为SQL的查询条件在读取时下推到OGR
+                        handle, remaining_queries = self._pushDownFieldFilter(layer["data"], selected_fields, field_queries)
+                        processed_data["layer_data"][i]["selected_fields"] = selected_fields
+                        if not remaining_queries:
+                            processed_data["layer_data"][i]["data"] = handle
+                            print(f"字段筛选条件已下推到读取: {handle}")
+                            continue
+                        layer = dict(layer, data=handle.读取())
+                        layer_properties = dict(filter_properties, field_queries=remaining_queries)
+                    elif hasattr(layer.get("data"), '读取'):
+                        # 已转存的结果
+                        layer = dict(layer, data=layer["data"].读取())
                     if layer.get("data") is not None:
                         try:
                             # 使用现有的_filterDataColumns方法进行字段筛选
-                            filtered_gdf = self._filterDataColumns(layer["data"], filter_properties)
+                            filtered_gdf = self._filterDataColumns(layer["data"], layer_properties)
                             processed_data["layer_data"][i]["data"] = filtered_gdf
                             # 添加selected_fields到每个图层数据中
                             processed_data["layer_data"][i]["selected_fields"] = selected_fields
@@ -80,6 +80,41 @@ class SettingInterface(ScrollArea):
             self.materialGroup
         )
         
+        # 数据缓存设置组
+        self.cacheGroup = SettingCardGroup('数据缓存', self.scrollWidget)
+        
+        self.dataCacheCard = SwitchSettingCard(
+            FIF.SAVE,
+            '矢量数据缓存',
+            '首次读取图层时转存为GeoParquet，之后从本地缓存快速读取',
+            cfg.dataCacheEnabled,
+            self.cacheGroup
+        )
+        
+        self.dataCacheSizeCard = RangeSettingCard(
+            cfg.dataCacheMaxSize,
+            FIF.FOLDER,
+            '缓存容量上限 (GB)',
+            '超过上限时自动删除最久未使用的缓存',
+            self.cacheGroup
+        )
+        
+        self.workflowMemoryCard = RangeSettingCard(
+            cfg.workflowMemoryBudget,
+            FIF.SPEED_HIGH,
+            '工作流结果内存上限 (MB)',
+            '工作流中间结果超过上限时转存为临时文件，需要时再读取',
+            self.cacheGroup
+        )
+        
+        self.clearCacheCard = PushSettingCard(
+            '清除缓存',
+            FIF.DELETE,
+            '本地缓存',
+            '当前缓存占用: 0.0 MB',
+            self.cacheGroup
+        )
+        
         # 关于设置组
         self.aboutGroup = SettingCardGroup('关于', self.scrollWidget)
         
@@ -148,6 +183,12 @@ class SettingInterface(ScrollArea):
         # 添加卡片到材料组
         self.materialGroup.addSettingCard(self.blurRadiusCard)
         
+        # 添加卡片到数据缓存组
+        self.cacheGroup.addSettingCard(self.dataCacheCard)
+        self.cacheGroup.addSettingCard(self.dataCacheSizeCard)
+        self.cacheGroup.addSettingCard(self.workflowMemoryCard)
+        self.cacheGroup.addSettingCard(self.clearCacheCard)
+        
         # 添加卡片到关于组
         self.aboutGroup.addSettingCard(self.versionCard)
         self.aboutGroup.addSettingCard(self.checkUpdateCard)
@@ -158,6 +199,7 @@ class SettingInterface(ScrollArea):
         self.expandLayout.setContentsMargins(36, 10, 36, 0)
         self.expandLayout.addWidget(self.personalGroup)
         self.expandLayout.addWidget(self.materialGroup)
+        self.expandLayout.addWidget(self.cacheGroup)
         self.expandLayout.addWidget(self.aboutGroup)
 
     def __showRestartTooltip(self):
@@ -188,9 +230,40 @@ class SettingInterface(ScrollArea):
         # 材料设置
         cfg.blurRadius.valueChanged.connect(self.__onBlurRadiusChanged)
         
+        # 数据缓存设置
+        self.__applyDataCacheConfig()
+        cfg.dataCacheEnabled.valueChanged.connect(self.__applyDataCacheConfig)
+        cfg.dataCacheMaxSize.valueChanged.connect(self.__applyDataCacheConfig)
+        self.clearCacheCard.clicked.connect(self.__onClearCache)
+        
         # 关于设置
         self.checkUpdateCard.clicked.connect(self.__onCheckUpdate)
     
+    def __applyDataCacheConfig(self, *args):
+        """将数据缓存配置应用到矢量读取模块"""
+        from functions.数据缓存 import 配置缓存
+        配置缓存(cfg.get(cfg.dataCacheEnabled), cfg.get(cfg.dataCacheMaxSize))
+        self.__updateCacheSizeText()
+    
+    def __updateCacheSizeText(self):
+        """更新缓存占用显示"""
+        from functions.数据缓存 import 缓存占用
+        self.clearCacheCard.setContent(f'当前缓存占用: {缓存占用() / 1024 ** 2:.1f} MB')
+    
+    def __onClearCache(self):
+        """清除矢量数据缓存和图层目录缓存"""
+        from functions.数据缓存 import 清除缓存
+        from functions.图层目录 import 获取图层目录
+        freed = 清除缓存()
+        获取图层目录().清除缓存()
+        self.__updateCacheSizeText()
+        InfoBar.success(
+            '清除成功',
+            f'已释放 {freed / 1024 ** 2:.1f} MB',
+            duration=1500,
+            parent=self
+        )
+    
     def __onCheckUpdate(self):
         """检查更新"""
         from PyQt6.QtCore import QObject, pyqtSignal